@@ -2,21 +2,37 @@
 """
 batchFfmpegConvertDeux.py
   Explanation
+    Converts the media files (of the given extensions) in the current folder with ffmpeg,
+      either to mp3 (-a, audio) or to mp4 (video, libx264).
+
+    The conversions run in parallel via lblib/os/ffmpeg_engine.py:
+      ffmpeg argv-based jobs in a pool (default: one per core) at a lower priority (niceness),
+      each one written to a temp name and renamed to its target only on success.
+    A source whose content was already converted with the same codec, bitrate and samplerate
+      (even under another name or in another folder) gets a copy of the cached result
+      instead of being converted again (lblib/os/conversion_cache.py; --no-cache turns it off).
+
+  Usage:
+    batchFfmpegConvertDeux.py [-a] [-b=<kbps>] [-s=<khz>] [-j=<workers>] [-n=<niceness>] [--no-cache] [<ext> ...]
+      -a: to audio (mp3), -b: its bitrate in kbps (default 32), -s: its sampling frequency in kHz (default 22.05)
+      -j: number of simultaneous ffmpeg's (default: number of cores), -n: their niceness (default 10)
 # -*- coding: utf-8 -*-
 """
 import glob
 import os
 import sys
+import lblib.os.conversion_cache as convcache
+import lblib.os.ffmpeg_engine as ffeng
 
 bitrate_in_kbps_DEFAULT = 32  # ie, 32 kbps (kilobits per second the bitrate)
 resampling_freq_in_khz_DEFAULT = 22.05  # ie, 22 kHz (kiloHertz the sampling frequency)
 
 
 class LocalData:
-  commDict = {
-    'audio': 'ffmpeg  -i "%(mediaFile)s" -acodec libmp3lame -b:a %(bitrate_in_kbps)dk'
-    ' -ar %(resampling_freq_in_khz)fk "%(mpx)s"',
-    'video': 'ffmpeg -i "%(mediaFile)s" -vcodec libx264 "%(mpx)s"'
+  # the ffmpeg arguments between the input and the output (the argv is formed by ffeng.ConversionJob)
+  codecArgsDict = {
+    'audio': ['-acodec', 'libmp3lame', '-b:a', '%(bitrate_in_kbps)dk', '-ar', '%(resampling_freq_in_hz)d'],
+    'video': ['-vcodec', 'libx264'],
   }
   EXTENSIONS_DEFAULT = ['flv', 'm4v', 'mkv', 'mov', 'wmv']
 
@@ -30,7 +46,7 @@ class Media:
     self.resampling_freq_in_khz = resampling_freq_in_khz_DEFAULT
     if is_audio:
       self.ext, audio_or_video = 'mp3', 'audio'
-    self.comm_base = LocalData.commDict[audio_or_video]
+    self.codec_args_base = LocalData.codecArgsDict[audio_or_video]
 
   def set_bitrate_in_kbps(self, bitrate_in_kbps):
     if bitrate_in_kbps < 16 or bitrate_in_kbps > 256:
@@ -42,36 +58,63 @@ class Media:
       return
     self.resampling_freq_in_khz = float(resampling_freq_in_khz)
 
-  def issue_command(self):
+  @property
+  def mpx(self):
     file_ext_less = os.path.splitext(self.media_file_from)[0]
     if self.ext != 'mp3':
-      mpx = file_ext_less + '.' + self.ext
-    else:
-      mpx = file_ext_less + '.cnv.' + self.ext
-    if os.path.isfile(mpx):
-      print(mpx, 'exists. Jumping to next (if this one is not already the last one)...')
-      return
-    comm = self.comm_base % {
-      'mediaFile': self.media_file_from, 'bitrate_in_kbps': self.bitrate_in_kbps,
-      'resampling_freq_in_khz': self.resampling_freq_in_khz, 'mpx': mpx
+      return file_ext_less + '.' + self.ext
+    return file_ext_less + '.cnv.' + self.ext
+
+  @property
+  def params(self):
+    return {
+      'bitrate_in_kbps': self.bitrate_in_kbps,
+      'resampling_freq_in_hz': round(self.resampling_freq_in_khz * 1000),
     }
-    issue_command(comm, self.total_to_process)
+
+  def form_codec_args(self):
+    return [arg % self.params for arg in self.codec_args_base]
+
+  def make_conversion_job_or_none(self):
+    """
+    Returns None if the target (mpx) already exists
+    """
+    if os.path.isfile(self.mpx):
+      print(self.mpx, 'exists. Jumping to next (if this one is not already the last one)...')
+      return None
+    return ffeng.ConversionJob(
+      self.media_file_from, self.mpx, self.form_codec_args(), b_cacheable=True
+    )
+
+  def issue_command(self, engine):
+    """
+    engine: the batch's ConversionEngine (@see form_engine()), created once for all the files, not per file
+    """
+    job = self.make_conversion_job_or_none()
+    if job is None:
+      return
+    engine.run([job])
 
 
-seq = 0
+def form_engine(n_workers=None, niceness=ffeng.DEFAULT_NICENESS, b_use_cache=True):
+  cache = convcache.ConversionCache() if b_use_cache else None
+  return ffeng.ConversionEngine(n_workers=n_workers, niceness=niceness, cache=cache)
 
 
-def issue_command(comm, total):
-  global seq
+def run_media_objs_in_engine(media_objs, n_workers=None, niceness=ffeng.DEFAULT_NICENESS, b_use_cache=True):
+  jobs = [job for job in (media_obj.make_conversion_job_or_none() for media_obj in media_objs) if job is not None]
+  if len(jobs) == 0:
+    return []
+  engine = form_engine(n_workers, niceness, b_use_cache)
   print('='*40)
-  seq += 1
-  print(seq, 'of', total, '::', comm)
+  print(engine, '| jobs =', len(jobs))
   print('='*40)
-  os.system(comm)  
+  return engine.run(jobs)
 
 
 def batch_convert_to_either_mp3or4(
-    extensions=None, is_audio=False, bitrate_in_kbps=None, resampling_freq_in_khz=None
+    extensions=None, is_audio=False, bitrate_in_kbps=None, resampling_freq_in_khz=None,
+    n_workers=None, niceness=ffeng.DEFAULT_NICENESS, b_use_cache=True,
 ):
   extensions = [] if extensions is None else extensions
   if len(extensions) == 0:
@@ -81,21 +124,25 @@ def batch_convert_to_either_mp3or4(
     media_files += glob.glob('*.%s' % ext)
   media_files.sort()
   total = len(media_files)
+  media_objs = []
   for mediaFileFrom in media_files:
     media_obj = Media(mediaFileFrom, total, is_audio)
     if bitrate_in_kbps is not None:
-      print('bitrate_in_kbps', bitrate_in_kbps)
       media_obj.set_bitrate_in_kbps(bitrate_in_kbps)
     if resampling_freq_in_khz is not None:
-      print('resampling_freq_in_khz', resampling_freq_in_khz)
       media_obj.set_resampling_freq_in_khz(resampling_freq_in_khz)
-    media_obj.issue_command()
+    media_objs.append(media_obj)
+  if bitrate_in_kbps is not None:
+    print('bitrate_in_kbps', bitrate_in_kbps)
+  if resampling_freq_in_khz is not None:
+    print('resampling_freq_in_khz', resampling_freq_in_khz)
+  return run_media_objs_in_engine(media_objs, n_workers, niceness, b_use_cache)
 
 
-def batch_convert_to_mp3(files_to_convert):
+def batch_convert_to_mp3(files_to_convert, n_workers=None, niceness=ffeng.DEFAULT_NICENESS, b_use_cache=True):
   """
-  :param files_to_convert: media video filenames that will be mp3-converted
-  :return:void
+  :param files_to_convert: media video filenames (or filepaths) that will be mp3-converted
+  :return: the list of ffeng.ConversionResult's
 
    This method/function was programmed to suit an external call,
    from another scripting, receiving a list (files_to_convert) of
@@ -105,10 +152,9 @@ def batch_convert_to_mp3(files_to_convert):
    Added on 2015-01-06 Luiz Lewis
   """
   total = len(files_to_convert)
-  for mediaFileFrom in files_to_convert:
-    is_audio = True
-    media_obj = Media(mediaFileFrom, total, is_audio)
-    media_obj.issueCommand()
+  is_audio = True
+  media_objs = [Media(mediaFileFrom, total, is_audio) for mediaFileFrom in files_to_convert]
+  return run_media_objs_in_engine(media_objs, n_workers, niceness, b_use_cache)
 
 
 def fetch_extension_arguments():
@@ -116,6 +162,9 @@ def fetch_extension_arguments():
   extensions = []
   bitrate_in_kbps = None
   resampling_freq_in_khz = None
+  n_workers = None
+  niceness = ffeng.DEFAULT_NICENESS
+  b_use_cache = True
   for arg in sys.argv[1:]:
     if arg.startswith('-a'):
       is_audio = True
@@ -126,13 +175,25 @@ def fetch_extension_arguments():
     elif arg.startswith('-s='):
       resampling_freq_in_khz = float(arg[len('-s='):])
       continue
+    elif arg.startswith('-j='):
+      n_workers = int(arg[len('-j='):])
+      continue
+    elif arg.startswith('-n='):
+      niceness = int(arg[len('-n='):])
+      continue
+    elif arg == '--no-cache':
+      b_use_cache = False
+      continue
     extensions.append(arg)
-  return extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz
+  return extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz, n_workers, niceness, b_use_cache
 
 
 def main():
-  extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz = fetch_extension_arguments()
-  batch_convert_to_either_mp3or4(extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz)
+  (extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz,
+   n_workers, niceness, b_use_cache) = fetch_extension_arguments()
+  batch_convert_to_either_mp3or4(
+    extensions, is_audio, bitrate_in_kbps, resampling_freq_in_khz, n_workers, niceness, b_use_cache
+  )
 
 
 if __name__ == '__main__':
@@ -1,38 +1,53 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 """
 ~/bin/batchWalkDeleteMp3split.py
 
 Explanation:
-  This script is a dir-walker that grabs media video files
-  (defaulting to mp4; another extension should gitbe given as a cli-parameter),
-  then calls batchFfmpegConvertDeux.py to convert them to mp3.
+  This script is a dir-walker that deletes the mp3s inside the "mp3split" folders of the dirtree
+    (the split pieces, once they are no longer needed).
 
-  In a sense, this script is a wrapper around batchFfmpegConvertDeux.py,
-  giving it a disk tree wide capability to mp3-convert many files automatically.
+  It also removes, in every folder walked, the temp files that an interrupted parallel conversion
+    may have left behind (".<name>.converting-<pid>...", @see lblib/os/ffmpeg_engine.py),
+    ie, those of conversions whose process is no longer alive.
+
+  The walk is done by lblib/os/treescanner.py (no chdir, no "rm *.mp3" through the shell).
 
   Written on 2015-01-06 Luiz Lewis
   Updated (to Python3) on 2024-02-20 Luiz Lewis
   # -*- coding: utf-8 -*-
 """
 import os
+import lblib.os.ffmpeg_engine as ffeng
+import lblib.os.treescanner as tscan
+MP3SPLIT_DIRNAME = 'mp3split'
+
+
+def delete_mp3s_in_dir(dirpath) -> int:
+  n_deleted = 0
+  with os.scandir(dirpath) as it:
+    for entry in it:
+      if entry.name.endswith('.mp3') and entry.is_file(follow_symlinks=False):
+        os.remove(entry.path)
+        n_deleted += 1
+  return n_deleted
 
 
 def batch_walk_delete_mp3split():
   basepath = os.path.abspath('.')
   walk_counter = 0
-  for dirpath, dirnames, filenames in os.walk('.'):
-    for dirname in dirnames:
-      if dirname == 'mp3split':
-        complement_path = dirpath
-        if complement_path.startswith('./'):
-          complement_path = complement_path[2:]
-          current_path = os.path.join(basepath, complement_path + '/mp3split')
-          walk_counter += 1
-          os.chdir(current_path)
-          scrmsg = f"{walk_counter} deleting mp3s in: [{current_path}]"
-          print(scrmsg)
-          os.system('rm *.mp3')
-          os.chdir(basepath)
+  for record in tscan.TreeScanner(basepath).scan():
+    for tempfilename in ffeng.remove_stale_tempfiles(record.dirpath):
+      scrmsg = f"removed stale conversion temp file: [{os.path.join(record.dirpath, tempfilename)}]"
+      print(scrmsg)
+    # only the mp3split subfolders (not the starting folder itself, whatever its name)
+    if record.dirname != MP3SPLIT_DIRNAME or record.dirpath == basepath:
+      continue
+    walk_counter += 1
+    scrmsg = f"{walk_counter} deleting mp3s in: [{record.dirpath}]"
+    print(scrmsg)
+    n_deleted = delete_mp3s_in_dir(record.dirpath)
+    scrmsg = f"  deleted {n_deleted} mp3s"
+    print(scrmsg)
 
 
 def process():
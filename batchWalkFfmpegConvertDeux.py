@@ -10,6 +10,9 @@ Explanation:
   In a sense, this script is a wrapper around batchFfmpegConvertDeux.py,
   giving it a disk tree wide capability to mp3-convert many files automatically.
 
+  The walk is done by lblib/os/treescanner.py (os.scandir, no chdir into each folder:
+    the files are given to batchFfmpegConvertDeux.py with their absolute paths).
+
   Some improvements on 2015-01-06 Luiz Lewis
   A more-than-normal improvement, including the script_help_string composition,on 2015-01-16 Luiz Lewis
 """
@@ -42,11 +45,25 @@ script_help_string = '''
       -m="the marker string"
         This parameter should be within quotes and there should not be spaces after the = sign and before the first quotation mark
         If not given, it defaults to " _i " which is a sign (or mark) representing a videocourse in many courses which folder we name-conventioned
+
+      --changed-only
+        Only the folders that had files added, removed or renamed since the last run (with this same option)
+        are processed (the folders' mtimes are kept in an index, @see lblib/os/treescanner.py)
+        The converter's own outputs (*.cnv.mp3 and its temp files) don't count as changes
+      -j=number_of_threads
+        Lists the folders with this number of threads (useful on slow network mounts), default 1
+      -w=number_of_workers
+        Number of simultaneous ffmpeg conversions (per folder), default: the number of cores
+      -n=niceness
+        The niceness of the ffmpeg processes, default 10 (@see lblib/os/ffmpeg_engine.py)
+      --no-cache
+        Does not use the conversion cache (@see lblib/os/conversion_cache.py)
 '''
 
 import os
 import sys
 import batchFfmpegConvertDeux as batchConverter
+import lblib.os.treescanner as tscan
 
 DEFAULT_MARKER_ON_FOLDERNAME_ALLOWING_PROCESS = ' _i ' # this is a string-marker that every SabDir course has
 MARKER_ON_FOLDERNAME_ALLOWING_PROCESS = None
@@ -55,9 +72,21 @@ DEFAULT_TARGET_EXTENSION = 'mp4'
 KNOWN_EXTENSIONS = ['avi', 'wmv', 'mp4', 'mkv', 'm4a', 'm4v']
 
 isAudio = False
+isChangedOnly = False
+nOfScanThreads = 1
+nOfConvertWorkers = None
+convertNiceness = batchConverter.ffeng.DEFAULT_NICENESS
+useCache = True
+def is_converter_output_filename(filename):
+  """
+  The files this script itself writes into the folders it scans (left out of their --changed-only signature)
+  """
+  return filename.endswith('.cnv.mp3') or batchConverter.ffeng.is_tempfilename(filename)
+
 def process_folder(current_path, files_to_convert):
   if isAudio:
-    batchConverter.batchConvertToMp3(files_to_convert)
+    filepaths_to_convert = [os.path.join(current_path, filename) for filename in files_to_convert]
+    batchConverter.batch_convert_to_mp3(filepaths_to_convert, nOfConvertWorkers, convertNiceness, useCache)
 
 def does_foldername_have_the_allow_process_mark(abs_dirpath):
   abs_dirpath = abs_dirpath.rstrip('/.')
@@ -79,6 +108,11 @@ def get_args():
   global ALLOW_PROCESS_ONLY_ON_MARKED_FOLDER
   global MARKER_ON_FOLDERNAME_ALLOWING_PROCESS
   global isAudio
+  global isChangedOnly
+  global nOfScanThreads
+  global nOfConvertWorkers
+  global convertNiceness
+  global useCache
   target_extensions = []; extensions_to_verify = []
   was_help_displayed = False
   for arg in sys.argv:
@@ -92,6 +126,16 @@ def get_args():
       MARKER_ON_FOLDERNAME_ALLOWING_PROCESS = arg[ len('-m=') : ]
     elif arg == '-a':
       isAudio = True
+    elif arg == '--changed-only':
+      isChangedOnly = True
+    elif arg.startswith('-j='):
+      nOfScanThreads = int(arg[ len('-j=') : ])
+    elif arg.startswith('-w='):
+      nOfConvertWorkers = int(arg[ len('-w=') : ])
+    elif arg.startswith('-n='):
+      convertNiceness = int(arg[ len('-n=') : ])
+    elif arg == '--no-cache':
+      useCache = False
     elif arg.startswith('-te='):
       target_exts_str = arg[ len('-te=') : ]
       if target_exts_str.find(',') > -1:
@@ -112,33 +156,31 @@ def get_args():
 def process_walk_updirtree(target_extensions):
   basepath = os.path.abspath('.')
   walk_counter = 0
-  for dirpath, dirnames, filenames in os.walk('.'):
-    complement_path = dirpath
-    abs_dirpath = os.path.join(basepath, dirpath)
+  scanner = tscan.TreeScanner(
+    basepath, n_workers=nOfScanThreads, b_only_changed=isChangedOnly, index_label='batchWalkFfmpegConvertDeux',
+    excluded_name_predicate=is_converter_output_filename,
+  )
+  for record in scanner.scan():
+    abs_dirpath = record.dirpath
     if not is_folder_allowed_for_media_file_conversion(abs_dirpath):
       print('-'*10)
       print('Not converting dir', abs_dirpath, 'because it does not have the MARKER_ON_FOLDERNAME_ALLOWING_PROCESS =[%s]' %MARKER_ON_FOLDERNAME_ALLOWING_PROCESS)
       continue
-    if complement_path.startswith('./'):
-      complement_path = complement_path[2:]
-    current_path = os.path.join(basepath, complement_path)
+    complement_path = os.path.relpath(abs_dirpath, basepath)
+    current_path = abs_dirpath
     walk_counter += 1
-    print(walk_counter, 'current path:', current_path, 'number of filenames =', len(filenames))
-    files_to_convert = []
-    for filename in filenames:
-      for target_extension in target_extensions:
-        if filename.endswith('.'+target_extension):
-          files_to_convert.append(filename)
+    print(walk_counter, 'current path:', current_path, 'number of filenames =', len(record.filenames))
+    dot_target_extensions = ['.' + target_extension for target_extension in target_extensions]
+    files_to_convert = [entry.name for entry in record.file_entries if entry.name.endswith(tuple(dot_target_extensions))]
     if len(files_to_convert) > 0:
       print('FOUND @', complement_path)
       for filename in files_to_convert:
         print(filename)
-      os.chdir(current_path)
       process_folder(current_path, files_to_convert)
-      os.chdir(basepath)
       print('-'*40)
-      print('Voltei!', dirpath, dirnames, current_path)
+      print('Done', complement_path, record.dirnames, current_path)
       print('='*40)
+  print(scanner)
 
 
 def main():
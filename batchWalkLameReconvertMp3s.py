@@ -1,4 +1,4 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 '''
 batchWalkLameReconvertMp3s.py
@@ -13,34 +13,39 @@ Explanation:
     This is so that if the target file is already the source file, no processing
       is necessary.
 
+  The walk is done by lblib/os/treescanner.py (os.scandir, no chdir into each folder:
+    lame is given the files' absolute paths).
+
   Written on 2015-01-13 Luiz Lewis
 '''
 import os
+import subprocess
 import sys
 import time
 
 import mutagen
-import batchFfmpegConvertDeux as batchConverter
+import lblib.os.treescanner as tscan
 
 
 def process_folder(current_path, files_to_convert):
-  print 'current_path:', current_path
+  print('current_path:', current_path)
   for filename in files_to_convert:
+    filepath = os.path.join(current_path, filename)
     try:
-      mutagenObj = mutagen.File(filename)
+      mutagenObj = mutagen.File(filepath)
       if mutagenObj.info.bitrate == 32000:
-        print filename, 'is already 32kbps.'
+        print(filename, 'is already 32kbps.')
         continue
     except mutagen.mp3.HeaderNotFoundError:
       pass
-    comm = 'lame --mp3input -b 32 --resample 22.50 "%(filename)s" "%(filename)s-32k.mp3"' %{'filename':filename}
-    retVal = os.system(comm)
+    tmpfilepath = filepath + '-32k.mp3'
+    comm = ['lame', '--mp3input', '-b', '32', '--resample', '22.50', filepath, tmpfilepath]
+    retVal = subprocess.run(comm).returncode
     if retVal == 0:
-      print 'Rename', filename
-      comm = 'mv "%(filename)s-32k.mp3" "%(filename)s"' %{'filename':filename}
-      os.system(comm)
+      print('Rename', filename)
+      os.replace(tmpfilepath, filepath)
     else:
-      print 'Not renaming extension -32.mp3 :: retVal =', retVal
+      print('Not renaming extension -32.mp3 :: retVal =', retVal)
 
 def go_ahead_on_dirname_allowance_check(dirpath):
   pp = dirpath.split('/')
@@ -72,31 +77,28 @@ def main():
   process_dirname_based_on_determined_strpiece = True
   basepath = os.path.abspath('.')
   walk_counter = 0
-  for dirpath, dirnames, filenames in os.walk('.'):
-    complement_path = dirpath
+  for record in tscan.TreeScanner(basepath).scan():
+    dirpath = record.dirpath
     if SWITCH_TO_CHECK_FOLDERNAME_MARKER:
       if not go_ahead_on_dirname_allowance_check(dirpath):
-        print 'Not converting dir', dirpath, 'because folder does not have the [%s] marker.' %foldername_marker
+        print('Not converting dir', dirpath, 'because folder does not have the [%s] marker.' %foldername_marker)
         continue
-    if complement_path.startswith('./'):
-      complement_path = complement_path[2:]
-    current_path = os.path.join(basepath, complement_path)
+    complement_path = os.path.relpath(dirpath, basepath)
+    current_path = dirpath
     walk_counter += 1
-    print walk_counter, 'current path:', current_path
+    print(walk_counter, 'current path:', current_path)
     files_to_convert = []
-    for fichier in filenames:
+    for fichier in record.filenames:
       if fichier.endswith('.mp3'):
         files_to_convert.append(fichier)
     if len(files_to_convert) > 0:
-      print 'FOUND @', complement_path
+      print('FOUND @', complement_path)
       for each in files_to_convert:
-        print each
-      os.chdir(current_path)
+        print(each)
       process_folder(current_path, files_to_convert)
-      os.chdir(basepath)
-      print '='*40
-      print 'Voltei!', time.ctime(), dirpath, dirnames, current_path
-      print '='*40
+      print('='*40)
+      print('Done', time.ctime(), complement_path, record.dirnames, current_path)
+      print('='*40)
 
 if __name__ == '__main__':
   main()
@@ -2,50 +2,109 @@
 """
 ~/bin/benchmarkMp3ConventViaFfmegViaPydub.py
 
-python3 benchmark_mp3.py -b 128k -r 44100 -i ./media_folder
-python3 benchmark_mp3_chart.py -b 128k -r 44100 -i ./media_folder --chart results.png
-python3 benchmark_mp3_chart.py -b 128k -r 44100 -i ./media_folder --csv results.csv --chart results.png
-
---- Benchmark Results ---
-FFmpeg:
-  Total time: 12.34 s
-  Avg/file:   1.03 s
-  CPU time:   8.56 s
-  Peak memory: 45.67 MB
-
-Pydub:
-  Total time: 18.90 s
-  Avg/file:   1.57 s
-  CPU time:   12.34 s
-  Peak memory: 78.90 MB
+Benchmarks the mp3 conversion strategies over the media files of an input folder:
+  ffmpeg       => one "ffmpeg -i ... -ar ... -ab ... -f mp3" after the other
+  ffmpeg-pool  => the same ffmpeg conversions in lblib/os/ffmpeg_engine.py's pool (-w workers)
+  pydub        => pydub's AudioSegment (decodes via ffmpeg into the Python process, encodes via ffmpeg)
+  pydub-pool   => the pydub conversions in a process pool (-w workers)
+  pcm-stream   => the decoded PCM streamed in bounded chunks from an ffmpeg decoder to an ffmpeg encoder
+                  (lblib/os/pcm_streamer.py, mp3ConvertViaPydub.py's --stream): pydub's result, fixed memory
+  lame         => pylame.py's lame argv ("lame -b <kbps> --mp3input -m s --resample <khz>"), mp3 inputs only
+  lame-pool    => the lame conversions in a thread pool (-w workers)
+
+How it measures:
+  Each trial runs in a forked process (reaped with os.wait4), that reports:
+    wall_s:          elapsed (monotonic) time
+    cpu_self_s:      the trial's own (Python side) user+sys time (getrusage(RUSAGE_SELF))
+    cpu_children_s:  the ffmpeg/lame processes' user+sys time (getrusage(RUSAGE_CHILDREN))
+    maxrss_child_MB: the largest single child's max RSS (RUSAGE_CHILDREN's ru_maxrss)
+    peak_tree_MB:    the peak of the sum of the RSS of the whole process tree (trial + children),
+                     sampled every --sample-ms during the run (what a parallel pool really holds)
+  The former version read the Python process's RSS before and after the run, so the ffmpeg children
+    (their CPU and memory) were invisible and the "peak" was just max(start, end).
+  A fresh process per trial is needed because RUSAGE_CHILDREN's ru_maxrss is a high-water mark
+    that is never reset in a process.
+
+  --warmup trials (default 1) run first and are discarded (disk cache, ffmpeg's own startup);
+  then --trials trials (default 5) give the median, the p95 and the min of each measure.
+
+History:
+  Each run appends a JSON line to --history (default: benchmark_mp3_history.jsonl in the output folder)
+    with its params (bitrate, samplerate, files, input bytes, workers), host & tool versions,
+    each variant's stats and raw trials;
+  the report compares each variant's medians with the last run of the same params in the history
+    (the "vs last" column), so a regression between conversion strategies (or versions) shows up.
+
+Usage:
+  benchmarkMp3ConventViaFfmegViaPydub.py -b 128k -r 44100 -i ./media_folder
+    [-o <output folder>] [-v ffmpeg,ffmpeg-pool,...] [-w <workers>] [--trials 5] [--warmup 1]
+    [--history <jsonl file>] [--csv results.csv] [--chart results.png]
+
+  -v: comma-separated variants (default: those whose tools are available here)
+
+Example output:
+  Benchmarking 12 files (143.2 MiB) | trials = 5 (+1 warmup) | workers = 4
+    variant        wall med   p95    cpu med  child rss  peak tree   vs last
+    ffmpeg           12.34  12.61      8.56       45.7       52.1     -1.2%
+    ffmpeg-pool       3.90   4.02      8.81       45.9      190.4     +0.4%
+    pydub            18.90  19.30     12.34       44.9      412.8         -
 
 Insights
 ========
 
   1 FFmpeg tends to be faster and leaner in memory.
-  2 Pydub adds Python overhead and may use more memory,
+  2 Pydub adds Python overhead and holds the decoded PCM in memory (the peak tree grows with the file),
     but is easier to integrate into Python workflows.
-
+  3 The pcm-stream variant gives pydub's (decode, resample, encode) result with a peak tree memory
+    that does not grow with the file's duration (the pydub one holds the whole decoded file).
+  4 A pool divides the wall time by about the number of cores, with the same CPU time,
+    while the peak tree memory multiplies by the number of workers.
 """
 import argparse
+import concurrent.futures
+import csv
+import datetime
+import json
 import os
+import platform
+import resource
+import shutil
+import statistics
 import subprocess
 import sys
+import tempfile
+import threading
 import time
-import psutil
-import csv
-import matplotlib.pyplot as plt
-from pydub import AudioSegment
+import lblib.os.ffmpeg_engine as ffeng
+import lblib.os.pcm_streamer as pcmstr
+import pylame
+try:
+  import psutil
+except ImportError:
+  # the process tree is then read from /proc (Linux)
+  psutil = None
+try:
+  from pydub import AudioSegment
+except ImportError:
+  # the pydub variants are then unavailable
+  AudioSegment = None
+DEFAULT_HISTORY_FILENAME = 'benchmark_mp3_history.jsonl'
+DEFAULT_SAMPLE_MS = 50
+MEASURES = ['wall_s', 'cpu_self_s', 'cpu_children_s', 'cpu_total_s', 'maxrss_child_MB', 'peak_tree_MB']
 
 # --- Conversion Functions ---
 
 
-def convert_ffmpeg(input_file, output_dir, bitrate, samplerate):
-  filename = os.path.splitext(os.path.basename(input_file))[0] + "_ffmpeg.mp3"
-  output_file = os.path.join(output_dir, filename)
+def form_output_file(input_file, output_dir, suffix):
+  filename = os.path.splitext(os.path.basename(input_file))[0] + f"_{suffix}.mp3"
+  return os.path.join(output_dir, filename)
+
 
+def convert_ffmpeg(input_file, output_dir, bitrate, samplerate):
+  output_file = form_output_file(input_file, output_dir, 'ffmpeg')
   cmd = [
       "ffmpeg",
+      "-nostdin",
       "-i", input_file,
       "-vn",  # no video
       "-ar", str(samplerate),
@@ -57,95 +116,479 @@ def convert_ffmpeg(input_file, output_dir, bitrate, samplerate):
 
 
 def convert_pydub(input_file, output_dir, bitrate, samplerate):
-  filename = os.path.splitext(os.path.basename(input_file))[0] + "_pydub.mp3"
-  output_file = os.path.join(output_dir, filename)
-
+  output_file = form_output_file(input_file, output_dir, 'pydub')
   audio = AudioSegment.from_file(input_file)
   audio = audio.set_frame_rate(samplerate)
   audio.export(output_file, format="mp3", bitrate=bitrate)
 
 
-# --- Benchmark Runner ---
+def convert_pcmstream(input_file, output_dir, bitrate, samplerate):
+  output_file = form_output_file(input_file, output_dir, 'pcmstream')
+  pcmstr.stream_convert_to_mp3(input_file, output_file, bitrate, samplerate)
 
-def benchmark(files, output_dir, bitrate, samplerate, method):
-  process = psutil.Process(os.getpid())
-  cpu_times_start = process.cpu_times()
-  mem_info_start = process.memory_info().rss
 
-  start = time.time()
-  if method == "ffmpeg":
-    for f in files:
-      convert_ffmpeg(f, output_dir, bitrate, samplerate)
-  elif method == "pydub":
-    for f in files:
-      convert_pydub(f, output_dir, bitrate, samplerate)
-  end = time.time()
+def convert_lame(input_file, output_dir, bitrate, samplerate):
+  """
+  pylame.py's conversion (its argv, with the benchmark's bitrate and samplerate)
+  """
+  output_file = form_output_file(input_file, output_dir, 'lame')
+  params = {'freq_in_kbps': int(bitrate.rstrip('kK'))}
+  cmd = [arg % params for arg in pylame.Mp3LameFreqChanger.LAME_ARGV_BASE]
+  # pylame resamples to 48 kHz; the benchmark uses the given samplerate
+  cmd[cmd.index('--resample') + 1] = f"{samplerate / 1000:g}"
+  cmd += ['--quiet', input_file, output_file]
+  subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+
 
-  cpu_times_end = process.cpu_times()
-  mem_info_end = process.memory_info().rss
+def run_ffmpeg_sequentially(files, output_dir, bitrate, samplerate, n_workers):
+  for f in files:
+    convert_ffmpeg(f, output_dir, bitrate, samplerate)
 
-  elapsed = end - start
-  cpu_used = (cpu_times_end.user - cpu_times_start.user) + (cpu_times_end.system - cpu_times_start.system)
-  mem_peak = max(mem_info_start, mem_info_end)
 
+def run_ffmpeg_in_engine(files, output_dir, bitrate, samplerate, n_workers):
+  jobs = [
+    ffeng.ConversionJob(f, form_output_file(f, output_dir, 'ffmpeg'), ['-vn', '-ar', str(samplerate), '-ab', bitrate])
+    for f in files
+  ]
+  # niceness 0: the other variants run at the caller's priority too
+  engine = ffeng.ConversionEngine(n_workers=n_workers, niceness=0, b_show_progress=False)
+  failed = [result for result in engine.run(jobs) if not result.ok]
+  if len(failed) > 0:
+    raise RuntimeError(f"{len(failed)} conversion(s) failed, the first: {failed[0]}")
+
+
+def run_pydub_sequentially(files, output_dir, bitrate, samplerate, n_workers):
+  for f in files:
+    convert_pydub(f, output_dir, bitrate, samplerate)
+
+
+def run_pydub_in_processpool(files, output_dir, bitrate, samplerate, n_workers):
+  with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+    futures = [executor.submit(convert_pydub, f, output_dir, bitrate, samplerate) for f in files]
+    for future in futures:
+      future.result()
+
+
+def run_pcmstream_sequentially(files, output_dir, bitrate, samplerate, n_workers):
+  for f in files:
+    convert_pcmstream(f, output_dir, bitrate, samplerate)
+
+
+def run_lame_sequentially(files, output_dir, bitrate, samplerate, n_workers):
+  for f in files:
+    convert_lame(f, output_dir, bitrate, samplerate)
+
+
+def run_lame_in_threadpool(files, output_dir, bitrate, samplerate, n_workers):
+  with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+    futures = [executor.submit(convert_lame, f, output_dir, bitrate, samplerate) for f in files]
+    for future in futures:
+      future.result()
+
+
+class Variant:
+
+  def __init__(self, name, func, required_tools, b_needs_pydub=False, b_mp3_inputs_only=False):
+    self.name = name
+    self.func = func
+    self.required_tools = required_tools
+    self.b_needs_pydub = b_needs_pydub
+    self.b_mp3_inputs_only = b_mp3_inputs_only
+
+  def get_missing_requirement_or_none(self):
+    for tool in self.required_tools:
+      if shutil.which(tool) is None:
+        return f"{tool} not found in PATH"
+    if self.b_needs_pydub and AudioSegment is None:
+      return "pydub is not installed"
+    return None
+
+  def filter_inputs(self, files) -> list:
+    if self.b_mp3_inputs_only:
+      return [f for f in files if f.lower().endswith('.mp3')]
+    return list(files)
+
+
+VARIANTS = [
+  Variant('ffmpeg', run_ffmpeg_sequentially, ['ffmpeg']),
+  Variant('ffmpeg-pool', run_ffmpeg_in_engine, ['ffmpeg']),
+  Variant('pydub', run_pydub_sequentially, ['ffmpeg'], b_needs_pydub=True),
+  Variant('pydub-pool', run_pydub_in_processpool, ['ffmpeg'], b_needs_pydub=True),
+  Variant('pcm-stream', run_pcmstream_sequentially, ['ffmpeg']),
+  Variant('lame', run_lame_sequentially, ['lame'], b_mp3_inputs_only=True),
+  Variant('lame-pool', run_lame_in_threadpool, ['lame'], b_mp3_inputs_only=True),
+]
+VARIANTS_BY_NAME = {variant.name: variant for variant in VARIANTS}
+
+# --- Measuring ---
+
+
+def get_tree_rss_bytes_via_proc(root_pid) -> int:
+  """
+  Sums the RSS of root_pid and its descendants reading /proc (used when psutil is not installed)
+  """
+  children_by_ppid = {}
+  for name in os.listdir('/proc'):
+    if not name.isdigit():
+      continue
+    try:
+      with open(f"/proc/{name}/stat", 'rb') as f:
+        stat = f.read()
+    except OSError:
+      continue
+    # the 2nd field (comm) may have spaces; the fields after it start after the last ')'
+    fields = stat[stat.rfind(b')') + 2:].split()
+    children_by_ppid.setdefault(int(fields[1]), []).append(int(name))
+  pagesize = os.sysconf('SC_PAGE_SIZE')
+  total, stack = 0, [root_pid]
+  while stack:
+    pid = stack.pop()
+    stack.extend(children_by_ppid.get(pid, []))
+    try:
+      with open(f"/proc/{pid}/statm", 'r') as f:
+        total += int(f.read().split()[1]) * pagesize
+    except (OSError, ValueError, IndexError):
+      pass
+  return total
+
+
+def get_tree_rss_bytes(root_pid) -> int:
+  if psutil is None:
+    return get_tree_rss_bytes_via_proc(root_pid)
+  try:
+    root = psutil.Process(root_pid)
+    procs = [root] + root.children(recursive=True)
+  except psutil.Error:
+    return 0
+  total = 0
+  for proc in procs:
+    try:
+      total += proc.memory_info().rss
+    except psutil.Error:
+      pass
+  return total
+
+
+class PeakSampler:
+  """
+  A thread that samples the process tree's RSS (sum) every interval, keeping the peak
+  """
+
+  def __init__(self, root_pid, interval_secs):
+    self.root_pid = root_pid
+    self.interval_secs = interval_secs
+    self.peak_bytes = 0
+    self.n_samples = 0
+    self.stop_event = threading.Event()
+    self.thread = threading.Thread(target=self._sample_until_stopped, daemon=True)
+
+  def _sample_until_stopped(self):
+    while True:
+      self.peak_bytes = max(self.peak_bytes, get_tree_rss_bytes(self.root_pid))
+      self.n_samples += 1
+      if self.stop_event.wait(self.interval_secs):
+        return
+
+  def __enter__(self):
+    self.thread.start()
+    return self
+
+  def __exit__(self, *exc_info):
+    self.stop_event.set()
+    self.thread.join()
+
+
+def get_cpu_secs(rusage) -> float:
+  return rusage.ru_utime + rusage.ru_stime
+
+
+def get_maxrss_MB(rusage) -> float:
+  # ru_maxrss is in KiB on Linux, in bytes on macOS
+  divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+  return rusage.ru_maxrss / divisor
+
+
+def run_trial_in_this_process(variant, files, output_dir, bitrate, samplerate, n_workers, sample_ms) -> dict:
+  self_start = resource.getrusage(resource.RUSAGE_SELF)
+  children_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+  with PeakSampler(os.getpid(), sample_ms / 1000) as sampler:
+    start = time.monotonic()
+    variant.func(files, output_dir, bitrate, samplerate, n_workers)
+    wall_s = time.monotonic() - start
+  self_end = resource.getrusage(resource.RUSAGE_SELF)
+  children_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+  output_bytes = sum(entry.stat().st_size for entry in os.scandir(output_dir) if entry.is_file())
   return {
-      "method": method,
-      "time_total": elapsed,
-      "time_avg": elapsed / len(files),
-      "cpu_time": cpu_used,
-      "mem_peak_MB": mem_peak / (1024 * 1024)
+    'wall_s': wall_s,
+    'cpu_self_s': get_cpu_secs(self_end) - get_cpu_secs(self_start),
+    'cpu_children_s': get_cpu_secs(children_end) - get_cpu_secs(children_start),
+    'maxrss_child_MB': get_maxrss_MB(children_end),
+    'peak_tree_MB': sampler.peak_bytes / (1024 * 1024),
+    'n_samples': sampler.n_samples,
+    'output_bytes': output_bytes,
   }
 
 
-def export_csv(results, csv_file, num_files, bitrate, samplerate):
-  header = ["method", "bitrate", "samplerate", "num_files", "time_total", "time_avg", "cpu_time", "mem_peak_MB"]
+def run_trial_in_forked_process(variant, files, output_dir, bitrate, samplerate, n_workers, sample_ms) -> dict:
+  """
+  Forks, runs the trial in the child (which sends back its measures as JSON through a pipe)
+    and reaps it with os.wait4, whose rusage (the child's and its reaped descendants' CPU)
+    gives cpu_total_s
+  """
+  read_fd, write_fd = os.pipe()
+  sys.stdout.flush()
+  pid = os.fork()
+  if pid == 0:
+    os.close(read_fd)
+    exitcode = 0
+    try:
+      measures = run_trial_in_this_process(variant, files, output_dir, bitrate, samplerate, n_workers, sample_ms)
+    except BaseException as e:
+      measures, exitcode = {'error': f"{type(e).__name__}: {e}"}, 1
+    with os.fdopen(write_fd, 'w') as f:
+      json.dump(measures, f)
+    os._exit(exitcode)
+  os.close(write_fd)
+  with os.fdopen(read_fd, 'r') as f:
+    payload = f.read()
+  _, status, rusage = os.wait4(pid, 0)
+  try:
+    measures = json.loads(payload)
+  except ValueError:
+    measures = {'error': f"the trial process ended with status {status} and sent no measures"}
+  if 'error' in measures:
+    raise RuntimeError(f"variant {variant.name}: {measures['error']}")
+  measures['cpu_total_s'] = get_cpu_secs(rusage)
+  return measures
+
+
+def percentile(values, pct):
+  """
+  The nearest-rank percentile (with few trials an interpolated p95 would just be the max anyway)
+  """
+  ordered = sorted(values)
+  rank = max(1, -(-len(ordered) * pct // 100))
+  return ordered[int(rank) - 1]
+
+
+def summarize_trials(trials) -> dict:
+  stats = {}
+  for measure in MEASURES:
+    values = [trial[measure] for trial in trials]
+    stats[measure] = {
+      'median': statistics.median(values),
+      'p95': percentile(values, 95),
+      'min': min(values),
+    }
+  return stats
+
+# --- Benchmark Runner ---
+
+
+class BenchmarkSuite:
+
+  def __init__(self, files, output_dir, bitrate, samplerate, variants, n_workers=None,
+               n_trials=5, n_warmup=1, sample_ms=DEFAULT_SAMPLE_MS):
+    self.files = files
+    self.output_dir = output_dir
+    self.bitrate = bitrate
+    self.samplerate = samplerate
+    self.variants = variants
+    self.n_workers = max(1, n_workers or os.cpu_count() or 1)
+    self.n_trials = max(1, n_trials)
+    self.n_warmup = max(0, n_warmup)
+    self.sample_ms = sample_ms
+    self.input_bytes = sum(os.path.getsize(f) for f in files)
+    # variant name => {'n_files', 'stats', 'trials'} or {'skipped': reason}
+    self.results = {}
+
+  def run_variant(self, variant):
+    missing = variant.get_missing_requirement_or_none()
+    files = variant.filter_inputs(self.files)
+    if missing is None and len(files) == 0:
+      missing = 'no suitable input files'
+    if missing is not None:
+      self.results[variant.name] = {'skipped': missing}
+      print(f"  skipping {variant.name}: {missing}")
+      return
+    trials = []
+    for i in range(self.n_warmup + self.n_trials):
+      # a fresh output folder per trial (no output left to be overwritten or skipped)
+      trial_dir = tempfile.mkdtemp(prefix=f"{variant.name}-", dir=self.output_dir)
+      try:
+        measures = run_trial_in_forked_process(
+          variant, files, trial_dir, self.bitrate, self.samplerate, self.n_workers, self.sample_ms
+        )
+      finally:
+        shutil.rmtree(trial_dir, ignore_errors=True)
+      if i < self.n_warmup:
+        continue
+      trials.append(measures)
+    self.results[variant.name] = {'n_files': len(files), 'stats': summarize_trials(trials), 'trials': trials}
+    print(f"  done {variant.name}: wall median {self.results[variant.name]['stats']['wall_s']['median']:.2f}s")
+
+  def run(self):
+    print(f"Benchmarking {len(self.files)} files ({self.input_bytes / 2**20:.1f} MiB)"
+          f" | trials = {self.n_trials} (+{self.n_warmup} warmup) | workers = {self.n_workers}")
+    for variant in self.variants:
+      self.run_variant(variant)
+
+  @property
+  def params(self) -> dict:
+    return {
+      'bitrate': self.bitrate,
+      'samplerate': self.samplerate,
+      'n_files': len(self.files),
+      'input_bytes': self.input_bytes,
+      'n_workers': self.n_workers,
+      'n_trials': self.n_trials,
+      'n_warmup': self.n_warmup,
+    }
+
+  def form_history_record(self) -> dict:
+    return {
+      'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+      'host': platform.node(),
+      'platform': platform.platform(),
+      'python': platform.python_version(),
+      'tools': {tool: get_tool_version_or_none(tool) for tool in ('ffmpeg', 'lame')},
+      'params': self.params,
+      'variants': self.results,
+    }
+
+  def find_last_comparable_record_or_none(self, history_file):
+    """
+    The last history record with the same params (bitrate, samplerate, files, input bytes, workers)
+    """
+    if not os.path.isfile(history_file):
+      return None
+    keys = ['bitrate', 'samplerate', 'n_files', 'input_bytes', 'n_workers']
+    last = None
+    with open(history_file, 'r', encoding='utf-8') as f:
+      for line in f:
+        try:
+          record = json.loads(line)
+        except ValueError:
+          continue
+        if all(record.get('params', {}).get(key) == self.params[key] for key in keys):
+          last = record
+    return last
+
+  def report(self, last_record=None):
+    print("\n--- Benchmark Results ---")
+    print(f"  {'variant':<13}{'wall med':>9}{'p95':>7}{'cpu med':>9}{'child rss':>11}{'peak tree':>11}{'vs last':>10}")
+    for name, result in self.results.items():
+      if 'skipped' in result:
+        print(f"  {name:<13}  skipped: {result['skipped']}")
+        continue
+      stats = result['stats']
+      vs_last = '-'
+      try:
+        last_median = last_record['variants'][name]['stats']['wall_s']['median']
+        vs_last = f"{(stats['wall_s']['median'] / last_median - 1) * 100:+.1f}%"
+      except (TypeError, KeyError, ZeroDivisionError):
+        pass
+      print(f"  {name:<13}{stats['wall_s']['median']:>9.2f}{stats['wall_s']['p95']:>7.2f}"
+            f"{stats['cpu_total_s']['median']:>9.2f}{stats['maxrss_child_MB']['median']:>11.1f}"
+            f"{stats['peak_tree_MB']['median']:>11.1f}{vs_last:>10}")
+    print("  (seconds & MB; cpu = the trial's and its children's; vs last = wall median vs the history's last run)")
+
+
+def get_tool_version_or_none(tool):
+  if shutil.which(tool) is None:
+    return None
+  version_arg = '-version' if tool == 'ffmpeg' else '--version'
+  try:
+    completed = subprocess.run([tool, version_arg], capture_output=True, text=True, errors='replace', timeout=10)
+  except (OSError, subprocess.TimeoutExpired):
+    return None
+  lines = completed.stdout.splitlines()
+  return lines[0] if len(lines) > 0 else None
+
+
+def append_history(history_file, record):
+  dirpath = os.path.dirname(os.path.abspath(history_file))
+  os.makedirs(dirpath, exist_ok=True)
+  with open(history_file, 'a', encoding='utf-8') as f:
+    f.write(json.dumps(record) + '\n')
+
+
+def export_csv(results, csv_file, params):
+  header = ["method", "bitrate", "samplerate", "num_files", "n_workers", "n_trials"]
+  header += [f"{measure}_{stat}" for measure in MEASURES for stat in ('median', 'p95')]
   write_header = not os.path.exists(csv_file)
 
   with open(csv_file, mode="a", newline="") as f:
     writer = csv.DictWriter(f, fieldnames=header)
     if write_header:
       writer.writeheader()
-    for res in results:
+    for name, result in results.items():
+      if 'skipped' in result:
+        continue
       row = {
-          "method": res["method"],
-          "bitrate": bitrate,
-          "samplerate": samplerate,
-          "num_files": num_files,
-          "time_total": f"{res['time_total']:.2f}",
-          "time_avg": f"{res['time_avg']:.2f}",
-          "cpu_time": f"{res['cpu_time']:.2f}",
-          "mem_peak_MB": f"{res['mem_peak_MB']:.2f}"
+          "method": name,
+          "bitrate": params['bitrate'],
+          "samplerate": params['samplerate'],
+          "num_files": result['n_files'],
+          "n_workers": params['n_workers'],
+          "n_trials": params['n_trials'],
       }
+      for measure in MEASURES:
+        for stat in ('median', 'p95'):
+          row[f"{measure}_{stat}"] = f"{result['stats'][measure][stat]:.2f}"
       writer.writerow(row)
 
 
 def generate_chart(results, output_file="benchmark_chart.png"):
-  methods = [res["method"] for res in results]
-  metrics = ["time_total", "time_avg", "cpu_time", "mem_peak_MB"]
+  import matplotlib.pyplot as plt
+  measured = {name: result for name, result in results.items() if 'skipped' not in result}
+  methods = list(measured)
+  metrics = ["wall_s", "cpu_total_s", "maxrss_child_MB", "peak_tree_MB"]
 
   fig, axs = plt.subplots(2, 2, figsize=(10, 8))
   axs = axs.flatten()
 
   for i, metric in enumerate(metrics):
-    values = [res[metric] for res in results]
-    axs[i].bar(methods, values, color=["steelblue", "orange"])
-    axs[i].set_title(metric.replace("_", " ").capitalize())
+    medians = [measured[name]['stats'][metric]['median'] for name in methods]
+    p95_errs = [measured[name]['stats'][metric]['p95'] - measured[name]['stats'][metric]['median'] for name in methods]
+    axs[i].bar(methods, medians, yerr=[[0] * len(methods), p95_errs], color="steelblue")
+    axs[i].set_title(metric.replace("_", " ").capitalize() + " (median, p95 bar)")
     axs[i].set_ylabel("Value")
     axs[i].set_xlabel("Method")
+    axs[i].tick_params(axis='x', labelrotation=30)
 
   plt.tight_layout()
   plt.savefig(output_file)
   print(f"Chart saved as {output_file}")
 
 
+def pick_variants(variants_arg) -> list:
+  if variants_arg is None:
+    return list(VARIANTS)
+  variants = []
+  for name in variants_arg.split(','):
+    name = name.strip()
+    if name not in VARIANTS_BY_NAME:
+      sys.exit(f"Error: unknown variant [{name}] (known: {', '.join(VARIANTS_BY_NAME)})")
+    variants.append(VARIANTS_BY_NAME[name])
+  return variants
+
+
 def main():
-  parser = argparse.ArgumentParser(description="Benchmark ffmpeg vs pydub MP3 conversion with CPU/memory stats and chart.")
+  parser = argparse.ArgumentParser(description="Benchmark the mp3 conversion strategies (ffmpeg, pydub, lame, pools)"
+                                               " with the children's CPU/memory, trials and a JSON history.")
   parser.add_argument("-b", "--bitrate", required=True, help="MP3 bitrate (e.g., 64k, 128k)")
   parser.add_argument("-r", "--samplerate", type=int, required=True, help="Sample rate (e.g., 22050, 44100)")
   parser.add_argument("-i", "--input", required=True, help="Input folder with media files")
   parser.add_argument("-o", "--output", default="benchmark_output", help="Output folder")
+  parser.add_argument("-v", "--variants", help=f"Comma-separated variants (default all: {','.join(VARIANTS_BY_NAME)})")
+  parser.add_argument("-w", "--workers", type=int, help="Workers of the pool variants (default: the number of cores)")
+  parser.add_argument("--trials", type=int, default=5, help="Measured trials per variant")
+  parser.add_argument("--warmup", type=int, default=1, help="Discarded warmup trials per variant")
+  parser.add_argument("--sample-ms", type=int, default=DEFAULT_SAMPLE_MS, help="Peak memory sampling interval")
+  parser.add_argument("--history", help=f"JSON lines history file (default: <output>/{DEFAULT_HISTORY_FILENAME})")
   parser.add_argument("--csv", help="Optional CSV file to store results")
-  parser.add_argument("--chart", help="Optional chart image file (PNG) to save summary", default="benchmark_chart.png")
+  parser.add_argument("--chart", help="Optional chart image file (PNG) to save summary (needs matplotlib)")
 
   args = parser.parse_args()
 
@@ -154,31 +597,30 @@ def main():
 
   os.makedirs(args.output, exist_ok=True)
 
-  files = [os.path.join(args.input, f) for f in os.listdir(args.input) if os.path.isfile(os.path.join(args.input, f))]
-
-  print(f"Benchmarking {len(files)} files...")
-
-  results_ffmpeg = benchmark(files, args.output, args.bitrate, args.samplerate, "ffmpeg")
-  results_pydub = benchmark(files, args.output, args.bitrate, args.samplerate, "pydub")
+  files = sorted(os.path.join(args.input, f) for f in os.listdir(args.input) if os.path.isfile(os.path.join(args.input, f)))
+  if len(files) == 0:
+    sys.exit("Error: the input folder has no files.")
 
-  results = [results_ffmpeg, results_pydub]
+  suite = BenchmarkSuite(
+    files, os.path.abspath(args.output), args.bitrate, args.samplerate, pick_variants(args.variants),
+    n_workers=args.workers, n_trials=args.trials, n_warmup=args.warmup, sample_ms=args.sample_ms,
+  )
+  suite.run()
 
-  print("\n--- Benchmark Results ---")
-  for res in results:
-    print(f"{res['method'].capitalize()}:")
-    print(f"  Total time: {res['time_total']:.2f} s")
-    print(f"  Avg/file:   {res['time_avg']:.2f} s")
-    print(f"  CPU time:   {res['cpu_time']:.2f} s")
-    print(f"  Peak memory:{res['mem_peak_MB']:.2f} MB\n")
+  history_file = args.history or os.path.join(args.output, DEFAULT_HISTORY_FILENAME)
+  suite.report(suite.find_last_comparable_record_or_none(history_file))
+  append_history(history_file, suite.form_history_record())
+  print(f"Run appended to the history {history_file}")
 
   # Export to CSV if requested
   if args.csv:
-    export_csv(results, args.csv, len(files), args.bitrate, args.samplerate)
+    export_csv(suite.results, args.csv, suite.params)
     print(f"Results appended to {args.csv}")
 
-  # Generate chart
-  generate_chart(results, args.chart)
+  # Generate chart if requested
+  if args.chart:
+    generate_chart(suite.results, args.chart)
 
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  main()
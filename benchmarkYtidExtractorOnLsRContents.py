@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+~/bin/benchmarkYtidExtractorOnLsRContents.py
+
+Benchmarks the ytid extraction over the "ls -R" contents files (z_ls-R_contents-*.txt)
+  comparing three ways:
+    1 former-charbychar => line by line, each candidate validated char by char
+                           (as is_str_enc64() did before it became a compiled regexp)
+    2 perline-lblib     => line by line with the lblib functions (their validators are now compiled regexps)
+    3 extractor-chunked => lblib/ytfunctions/ytid_extractor.py, ie one precompiled regexp over 4MiB chunks
+
+Usage:
+  $benchmarkYtidExtractorOnLsRContents.py [--dirpath <folder-with-z_ls-R_contents-files>]
+    [--synthesize <number-of-lines>] [--repeat <n>]
+
+  --dirpath: the folder where the z_ls-R_contents-*.txt files are (default: the current one)
+  --synthesize: instead of the real files, a corpus with this number of lines is generated in a tmpdir
+    (a mix of directory headers, yt-dlp [ytid] names, former -ytid names, urls and non-ytid names)
+  --repeat: each way runs n times and the best time is taken (default: 3)
+
+Example output (--synthesize 500000):
+  corpus: 1 file(s) | lines = 500000 | size = 21.8 MiB
+    way                  best(s)   Mlines/s    MiB/s     ytids
+    former-charbychar      1.861      0.269     11.7    350000
+    perline-lblib          1.527      0.327     14.3    350000
+    extractor-chunked      0.685      0.730     31.8    350000
+"""
+import argparse
+import glob
+import os
+import random
+import string
+import tempfile
+import time
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+import lblib.ytfunctions.ytid_extractor as ytext
+FILEPREFIX = 'z_ls-R_contents-'
+ENCODE64CHARS = string.digits + string.ascii_uppercase + string.ascii_lowercase + '_' + '-'
+parser = argparse.ArgumentParser(description="Benchmark the ytid extraction over z_ls-R_contents files.")
+parser.add_argument("--dirpath", type=str, default=None,
+                    help="the folder with the z_ls-R_contents-*.txt files")
+parser.add_argument("--synthesize", type=int, default=None,
+                    help="number of lines of a generated corpus (instead of the real files)")
+parser.add_argument("--repeat", type=int, default=3,
+                    help="times each way runs (the best time is taken)")
+
+
+def is_str_enc64_charbychar(line):
+  """
+  A copy of the former is_str_enc64() (kept here as the benchmark's baseline)
+  """
+  blist = list(map(lambda c: c in ENCODE64CHARS, line))
+  if False in blist:
+    return False
+  return True
+
+
+def extract_ytid_former_charbychar(line):
+  line = line.strip(' \t\r\n')
+  name, _ = os.path.splitext(line)
+  if len(name) > 12 and name[-12] == '-' and is_str_enc64_charbychar(name[-11:]):
+    return name[-11:]
+  match = ytstrfs.cmpld_ytid_in_ytdlp_filename_pattern.search(line)
+  if match:
+    return match.group(1)
+  ytid = ytstrfs.get_match_ytid_af_equalsign_or_itself(line)
+  if len(ytid) == 11 and is_str_enc64_charbychar(ytid):
+    return ytid
+  return None
+
+
+def extract_ytid_perline_lblib(line):
+  line = line.strip(' \t\r\n')
+  ytid = ytstrfs.extract_ytid_from_fn_w_0_or_1_ext_having_dash_ytid_sufix(line)
+  if ytid is not None:
+    return ytid
+  match = ytstrfs.cmpld_ytid_in_ytdlp_filename_pattern.search(line)
+  if match:
+    return match.group(1)
+  return ytstrfs.extract_ytid_from_yturl_or_itself_or_none(line)
+
+
+def count_ytids_perline(filepaths, func):
+  n_ytids = 0
+  for filepath in filepaths:
+    with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+      for line in f:
+        if func(line) is not None:
+          n_ytids += 1
+  return n_ytids
+
+
+def count_ytids_former_charbychar(filepaths):
+  return count_ytids_perline(filepaths, extract_ytid_former_charbychar)
+
+
+def count_ytids_perline_lblib(filepaths):
+  return count_ytids_perline(filepaths, extract_ytid_perline_lblib)
+
+
+def count_ytids_extractor_chunked(filepaths):
+  n_ytids = 0
+  for filepath in filepaths:
+    for _ in ytext.extract_ytids_fr_file(filepath):
+      n_ytids += 1
+  return n_ytids
+
+
+def mount_a_random_ytid():
+  return ''.join(random.choice(ENCODE64CHARS) for _ in range(11))
+
+
+def synthesize_corpus(n_lines, folderpath) -> str:
+  filepath = os.path.join(folderpath, f"{FILEPREFIX}synthesized.txt")
+  random.seed(11)
+  with open(filepath, 'w', encoding='utf-8') as f:
+    for i in range(n_lines):
+      kind = i % 10
+      if kind == 0:
+        f.write(f"./Some Channel/Folder {i}:\n")
+      elif kind in (1, 2, 3):
+        f.write(f"Some video title number {i} [{mount_a_random_ytid()}].mp4\n")
+      elif kind in (4, 5, 6):
+        f.write(f"Some former video title {i}-{mount_a_random_ytid()}.webm\n")
+      elif kind == 7:
+        f.write(f"https://www.youtube.com/watch?v={mount_a_random_ytid()}&pp=continuation\n")
+      else:
+        f.write(f"a file without an id number {i}.pdf\n")
+  return filepath
+
+
+class Benchmark:
+
+  ways = [
+    ('former-charbychar', count_ytids_former_charbychar),
+    ('perline-lblib', count_ytids_perline_lblib),
+    ('extractor-chunked', count_ytids_extractor_chunked),
+  ]
+
+  def __init__(self, filepaths, n_repeat=3):
+    self.filepaths = filepaths
+    self.n_repeat = max(1, n_repeat)
+    self.n_lines = 0
+    self.n_bytes = 0
+    self.results = []
+
+  def measure_corpus(self):
+    for filepath in self.filepaths:
+      self.n_bytes += os.path.getsize(filepath)
+      with open(filepath, 'rb') as f:
+        self.n_lines += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(ytext.DEFAULT_CHUNKSIZE), b''))
+
+  def run(self):
+    self.measure_corpus()
+    for wayname, func in self.ways:
+      best_secs, n_ytids = None, 0
+      for _ in range(self.n_repeat):
+        start = time.perf_counter()
+        n_ytids = func(self.filepaths)
+        elapsed = time.perf_counter() - start
+        best_secs = elapsed if best_secs is None else min(best_secs, elapsed)
+      self.results.append((wayname, best_secs, n_ytids))
+      print(f"  done {wayname} in {best_secs:.3f}s")
+
+  def report(self):
+    print(f"corpus: {len(self.filepaths)} file(s) | lines = {self.n_lines} | size = {self.n_bytes / 2**20:.1f} MiB")
+    print(f"  {'way':<20}{'best(s)':>8}{'Mlines/s':>11}{'MiB/s':>9}{'ytids':>10}")
+    for wayname, best_secs, n_ytids in self.results:
+      secs = max(best_secs, 1e-9)
+      mlines_per_sec = self.n_lines / secs / 1e6
+      mib_per_sec = self.n_bytes / secs / 2**20
+      print(f"  {wayname:<20}{best_secs:>8.3f}{mlines_per_sec:>11.3f}{mib_per_sec:>9.1f}{n_ytids:>10}")
+
+
+def process():
+  args = parser.parse_args()
+  if args.synthesize:
+    tmpdir = tempfile.mkdtemp()
+    filepaths = [synthesize_corpus(args.synthesize, tmpdir)]
+  else:
+    dirpath = args.dirpath or os.path.abspath('.')
+    filepaths = sorted(glob.glob(os.path.join(dirpath, f"{FILEPREFIX}*.txt")))
+  if len(filepaths) == 0:
+    scrmsg = "No z_ls-R_contents-*.txt files found (use --dirpath or --synthesize <n_lines>)."
+    print(scrmsg)
+    return
+  benchmark = Benchmark(filepaths, args.repeat)
+  benchmark.run()
+  benchmark.report()
+
+
+if __name__ == '__main__':
+  process()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import glob, sys
+import glob, os, sys
+import lblib.os.media_duration as mdur
 
 DEFAULT_EXTENSION = 'mp4'
 
@@ -30,6 +31,24 @@ def calcAverageDurationAs2ndWordInFile(files):
   average = round(average)
   return average
 
+def calcAverageProbedDurationInFiles(files):
+  '''
+  The average (integer rounded minutes) of the files' real durations, read from their headers
+    (mp4 & mp3, lblib/os/media_duration.py) or, for the other ones, probed by lblib's metadata service
+    (one bulk call: the files unchanged since a former probe come from its cache)
+  '''
+  durations = mdur.get_durations_secs(files)
+  durations_in_min = []
+  for filepath, duration_secs in sorted(durations.items()):
+    if duration_secs is None:
+      continue
+    duration_in_min = round(duration_secs / 60)
+    print(duration_in_min, os.path.basename(filepath))
+    durations_in_min.append(duration_in_min)
+  if len(durations_in_min) == 0:
+    return 0
+  return round(sum(durations_in_min) / len(durations_in_min))
+
 def show_cli_help():
   print('''
     This scripts calculates the average duration in minutes from
@@ -45,6 +64,10 @@ def show_cli_help():
     The argument required is -e=<extension>
           -e=mp4 (ie, take the average duration for mp4 files,
                   all those in which name convention holds) 
+
+    Optional:
+          -p (probe: take the files' real durations via ffprobe,
+              instead of the names' second word, whether or not the convention holds)
   ''')
 
 def get_extension_from_args():
@@ -73,7 +96,10 @@ def process():
   files = get_files_from_args()
   print('Calculation duration average calculation with %d files.' %len(files))
   if len(files) > 0:
-    average = calcAverageDurationAs2ndWordInFile(files)
+    if '-p' in sys.argv:
+      average = calcAverageProbedDurationInFiles(files)
+    else:
+      average = calcAverageDurationAs2ndWordInFile(files)
     print('Duration average is', average)
   else:
     print('Please use the -e=<extension> to pick up a file extension to be used for the duration average calculation.')
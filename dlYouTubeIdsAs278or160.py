@@ -26,9 +26,14 @@ TO-DO:
     in this case the available ones are known.
   This can be achieved by $youtube-dl -F <ytid>
     which lists all available formats.
+Bandwidth:
+  if the environment variable LBLIB_DLD_BANDWIDTH is set (e.g. "4M"), each download
+  gets its share of that total (shared with the other download scripts running at the same time)
+  via "youtube-dl -r <share>" (@see lblib/os/rate_governor.py)
 """
 from subprocess import PIPE, Popen
 import string
+import lblib.os.rate_governor as rgov  # rgov.RateGovernor
 
 
 DEFAULT_YTIDS_FILENAME = 'youtube-ids.txt'
@@ -51,9 +56,10 @@ class VType:
     pass
 
   @classmethod
-  def get_interpolcomm_with_compositeformat(cls, vacompositeformat):
+  def get_interpolcomm_with_compositeformat(cls, vacompositeformat, ratelimit_args=None):
     if vacompositeformat in cls.known_vacomposite_tuples:
-      interpolcomm = 'youtube-dl -w -f ' + vacompositeformat + ' {ytid}'
+      ratelimit = ''.join(arg + ' ' for arg in ratelimit_args or [])
+      interpolcomm = 'youtube-dl ' + ratelimit + '-w -f ' + vacompositeformat + ' {ytid}'
       return interpolcomm
 
   @classmethod
@@ -67,16 +73,18 @@ class VType:
 
 class YtIdDownloader:
 
-  def __init__(self, ytid):
+  def __init__(self, ytid, governor=None):
     self.ytid = ytid
     self.formats_tried = []
+    self.governor = governor or rgov.RateGovernor()
 
   def download_ytid_with_vacompositeformat(self, vacompositetype):
-    basecomm = VType.get_interpolcomm_with_compositeformat(vacompositetype)
-    comm = basecomm.format(ytid=self.ytid)
-    print(comm)
-    p = Popen(comm, shell=True, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = p.communicate()
+    with self.governor.acquire(f"As278or160 ytid={self.ytid} -f {vacompositetype}") as lease:
+      basecomm = VType.get_interpolcomm_with_compositeformat(vacompositetype, lease.ratelimit_args)
+      comm = basecomm.format(ytid=self.ytid)
+      print(comm)
+      p = Popen(comm, shell=True, stdout=PIPE, stderr=PIPE)
+      stdout, stderr = p.communicate()
     res = str(stderr)
     print('OS command response stderr: [[', res, ']]')
     if FORMAT_NOT_AVAILABLE_MSG.lower() in res.lower():
@@ -143,8 +151,12 @@ def process_ytids_file(ytids_filename=None):
   ytids_filename = ytids_filename or DEFAULT_YTIDS_FILENAME
   VType.list_vacomposite_formats()
   ytids = get_ytids_as_list(ytids_filename)
+  # a bad $LBLIB_DLD_BANDWIDTH stops here, before any download
+  rgov.get_total_bps_or_exit()
+  governor = rgov.RateGovernor()
+  print(governor)
   for i, ytid in enumerate(ytids):
-    ytdownloader = YtIdDownloader(ytid)
+    ytdownloader = YtIdDownloader(ytid, governor)
     seq = i + 1
     ytdownloader.download(seq)
 
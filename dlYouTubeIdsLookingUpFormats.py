@@ -30,10 +30,16 @@ Important: though the available format codes are linear, the script
   ie video+audio composites.
   (TO-DO: it's possible to go beyond the previously known combinations,
   this may be improved in the future.)
+
+Bandwidth:
+  if the environment variable LBLIB_DLD_BANDWIDTH is set (e.g. "4M"), each download
+  gets its share of that total (shared with the other download scripts running at the same time)
+  via "youtube-dl -r <share>" (@see lblib/os/rate_governor.py)
 """
 from subprocess import PIPE, Popen
 import string
 import os
+import lblib.os.rate_governor as rgov  # rgov.RateGovernor
 
 
 DEFAULT_YTIDS_FILENAME = 'youtube-ids.txt'
@@ -41,7 +47,7 @@ YT_VID_AUD_FORMAT_CODES_FILENAME = 'yt_video_audio_format_codes.txt'
 YTID_CHARSIZE = 11
 FORMAT_NOT_AVAILABLE_MSG = 'requested format not available'
 FAILURE_IN_NAME_RESO_MSG = 'failure in name resolution'
-basedldcomm = 'youtube-dl -w -f {vcode}+{acode} {ytid}'
+basedldcomm = 'youtube-dl {ratelimit}-w -f {vcode}+{acode} {ytid}'
 basevercomm = 'youtube-dl -F {ytid}'
 ENC64 = string.ascii_lowercase + string.ascii_uppercase + string.digits + '_' + '-'
 WAIT_TIME_IN_SEC = 30
@@ -111,8 +117,9 @@ def extract_available_format_codes_from_text(text):
 
 class YtIdDownloader:
 
-  def __init__(self, ytid):
+  def __init__(self, ytid, governor=None):
     self.ytid = ytid
+    self.governor = governor or rgov.RateGovernor()
     self.format_codes_from_yt = None
     self._ordered_suggested_vacodes_tuplelist = None
     self._ordered_available_vacodes_tuplelist = None
@@ -162,11 +169,13 @@ class YtIdDownloader:
   def dld_with_video_audio_code_tuple(self, vcode, acode):
     """
     """
-    dld_comm = basedldcomm.format(vcode=vcode, acode=acode, ytid=self.ytid)
-    print('First try with', self.ytid)
-    print(dld_comm)
-    p = Popen(dld_comm, shell=True, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = p.communicate()
+    with self.governor.acquire(f"LookingUpFormats ytid={self.ytid} -f {vcode}+{acode}") as lease:
+      ratelimit = ''.join(arg + ' ' for arg in lease.ratelimit_args)
+      dld_comm = basedldcomm.format(ratelimit=ratelimit, vcode=vcode, acode=acode, ytid=self.ytid)
+      print('First try with', self.ytid)
+      print(dld_comm)
+      p = Popen(dld_comm, shell=True, stdout=PIPE, stderr=PIPE)
+      stdout, stderr = p.communicate()
     stderr = str(stderr)
     if len(stderr) > 5:  # when no error happens, it should be b" "
       print(stderr)
@@ -176,7 +185,7 @@ class YtIdDownloader:
 
   def download(self):
     """
-    basedldcomm = 'youtube-dl -w -f {vformat}+{aformat} {ytid}'
+    basedldcomm = 'youtube-dl {ratelimit}-w -f {vformat}+{aformat} {ytid}'
     basevercomm = 'youtube-dl -F {ytid}'
     """
     vcode, acode = self.first_suggested_va_codes_tuple
@@ -232,11 +241,15 @@ def get_ytids_as_list(ytids_filename=None):
 
 def process_ytids_file(ytids_filename=None):
   ytids = get_ytids_as_list(ytids_filename)
+  # a bad $LBLIB_DLD_BANDWIDTH stops here, before any download
+  rgov.get_total_bps_or_exit()
+  governor = rgov.RateGovernor()
+  print(governor)
   for i, ytid in enumerate(ytids):
     seq = i + 1
     print('-'*40)
     print(seq, 'processing ytid', ytid)
-    ytid_downloader = YtIdDownloader(ytid)
+    ytid_downloader = YtIdDownloader(ytid, governor)
     ytid_downloader.download()
 
 
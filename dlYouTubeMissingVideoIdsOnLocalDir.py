@@ -11,6 +11,9 @@ Explanation:
   filenames that do not have the title part.
   
 
+  The videoids of the files on the local dir come from the ytid catalog (lblib/ytfunctions/ytid_catalog.py),
+  which is refreshed first (the dir is only listed again if its mtime changed since the last run).
+
   Limitations:
   
     A safe rule to check whether an id is a valid videoid or not, that has not been implemented.
@@ -42,6 +45,7 @@ Available formats:
 
 '''
 import glob, logging, os, sys, time
+import lblib.ytfunctions.ytid_catalog as ytcat
 
 def print_and_log(line_msg):
   print(line_msg)
@@ -160,20 +164,10 @@ class VideoIdsComparer(object):
     self.store_all_filevideoids_on_local_dir()
 
   def store_all_filevideoids_on_local_dir(self):
-    self.all_filevideoids = []
-    files = os.listdir('.')
-    for filename in files:
-      if not os.path.isfile(filename):
-        continue
-      try:
-        extlessname = filename
-        if filename.find('.') > -1:
-          extlessname = os.path.splitext(filename)[0]
-        youtubeid = get_videoid_from_extless_filename(extlessname)
-        if youtubeid != None:
-          self.all_filevideoids.append(youtubeid)
-      except IndexError:
-        continue
+    local_dir_abspath = os.path.abspath('.')
+    with ytcat.get_refreshed_catalog(local_dir_abspath, b_recursive=False) as catalog:
+      entries = catalog.get_entries_under(local_dir_abspath, b_recursive=False)
+    self.all_filevideoids = [entry.ytid for entry in entries]
 
   def get_all_mp4_videoids_on_local_dir(self):
     mp4s = []
@@ -190,8 +184,9 @@ class VideoIdsComparer(object):
   def compareLocalIdsWithFileDB(self):
     self.missing_videoids = []; n_missing = 0
     videoidsObj = VideoIdsOnFile(self.local_filename)
+    all_filevideoids_set = set(self.all_filevideoids)
     for videoid in videoidsObj.get_videoids_on_file():
-      if videoid not in self.all_filevideoids:
+      if videoid not in all_filevideoids_set:
         n_missing += 1
         # print n_missing, 'VideoId', videoid, 'in file not on local dir.'
         self.missing_videoids.append(videoid)
@@ -20,14 +20,15 @@ Observation about the auto-dubs and this script:
     this script is able to "fall back" to a one-language download;
 
   2) the fall-back is not "perfectly" perceived,
-    at the time of writing any non-zero return from subprocess
-    will make this script try a one-language download,
+    at the time of writing a non-zero return from subprocess whose stderr is either
+    "format not available" or not recognized will make this script try a one-language download,
 
   3) but, if the non-zero return was caused by, say,
-    a network fault, and the video is in fact multilanguage,
-    the one-language attempt will also fail
+    a network fault or throttling (HTTP 429), the yt-dlp call is retried with a backoff
+    and, if it keeps failing, that language is skipped without the fall-back
     (attempting to download a multilanguage video with
-     a one-language audiocode returns an error from YouTube).
+     a one-language audiocode returns an error from YouTube)
+    (@see lblib/os/subprocrunner.py for the failure classification).
 
 Each language, dubbed or original, has its own separate audio-only-file
   that is 'fused' (or merged) to its video-only counterpart
@@ -49,6 +50,10 @@ Syntax:
     [--amn <audio-main-number>]
     [--map <mapdict|dictionary-map-informing-sufixes-and-their-2-letter-language-codes>]
     [--seq <sequence-number-for-token-vdN-2letter>]
+    [--jobs <number-of-ytids-downloaded-concurrently>]
+    [--audiojobs <number-of-language-audios-fetched-concurrently>]
+    [--automap]
+    [--bandwidth <total-download-rate, e.g. 4M>]
 
 Where:
   <ytid> => the ENCODE64 11-character YouTube video id
@@ -64,6 +69,12 @@ Where:
     obs: the download directory is a prenamed subdirectory inside <dirpath>
   <dictionary-map-informing-sufixes-and-their-2-letter-language-codes> => see the examples (above and below)
   <sequence-number-for-token-vdN-2letter> => a sequence number to be appended to "token" vd (example: seq=1 -> "vd1-en")
+  <number-of-ytids-downloaded-concurrently> => how many ytids are processed at the same time (default: 1)
+    obs: when greater than 1, each ytid gets its own tmp subdirectory (videodld_tmpdir/<ytid>)
+         so that the "before-versus-after" filename discovery and the renames do not mix up files
+  <number-of-language-audios-fetched-concurrently> => concurrency cap for the audio parts of one ytid (default: 1)
+    obs: when greater than 1, all language audio parts are fetched first (in parallel)
+         and only then the per-language merges (video-only + audio) happen one by one
 
 Older syntax (no longer valid):
   $dlYouTubeWhenThereAreDubbed.py [--ytid <ytid or yturl within "">]
@@ -102,6 +113,61 @@ The result will be the download of two videofiles: one with the language audio 2
 This automatization also takes care of the renaming needed
   because yt-dlp does not differentiate filenames by language audio
 
+Concurrent downloads with parameter --jobs:
+==========================================
+  when youtube-ids.txt has many ytids, the queue is bound by per-request latency, not bandwidth,
+    so --jobs N runs N Downloader's at the same time (a bounded pool of N workers)
+  each ytid is isolated into videodld_tmpdir/<ytid> and yt-dlp (plus the final renaming scripts)
+    run with that subdirectory as their working directory, i.e., the process-wide chdir is not used
+  at the end of each ytid, its videos are moved directly to <dirpath> and its (empty) subdirectory removed
+
+Automatic language map with parameter --automap:
+================================================
+  instead of typing --map by hand, --automap runs "yt-dlp -F" once per ytid
+    and parses its "[xx-YY] ... dubbed-auto/original" audio lines into the map
+    (@see lblib/ytfunctions/ytdlp_formatprobe.py)
+  the parsed format table is cached on disk per ytid (with a TTL), so a batch rerun does not re-probe
+  if --amn is not among the available audio codes, the one with most languages is taken
+  if the video has no dubs, the non-dashed audiocode (e.g. 233) is used from the start,
+    ie the failing-then-fallback path (@see below) is not entered
+  if the probe itself fails, the --map given (or its default) is used as before
+
+Resuming an interrupted batch (the download journal):
+=====================================================
+  each stage of a ytid (video-only downloaded, fsufix-renamed, fanned out, each language merged, moved)
+    is appended to videodld_tmpdir/.dldjournal.jsonl with the resulting filename, size and a quick checksum
+    (@see lblib/ytfunctions/dldjournal.py)
+  rerunning the same command after a crash (or a kill) picks each ytid up at its next stage:
+    a moved ytid is skipped, a merged language is not redownloaded
+    and the video-only filename comes from the journal (no directory listing nor user prompt)
+  the records are keyed by ytid, videoonlycode and audio codes, so the same ytid with other formats
+    or languages (another --map, for example) is a new download
+  a ytid is recorded as moved only when all its languages got merged: the ones that failed
+    (a transient error, a rename that could not happen) are retried by the next run
+  before a resume, the video-only file (or its bk copies) is checked against the journaled size & checksum,
+    if it's missing or different, the video-only part is downloaded afresh
+
+Parallel language audios with parameter --audiojobs:
+===================================================
+  for a ten-language autodubbed video (the 233-0..233-9 scheme below), fetching audios one by one
+    costs ten serial round trips, so --audiojobs N splits the 5th step into two stages:
+    a) prefetch: "yt-dlp -w -f 233-k -o '<tmpdir>/.prefetch-<ytid>-f233-k.%(ext)s'" for all k, N at a time
+       (an explicit output path per job, not depending on yt-dlp's own naming of intermediate parts)
+    b) merge: for each language, its prefetched audio is looked up by that path (its ext being one of
+       AUDIO_DOT_EXTENSIONS) and merged with the video-only part by "ffmpeg -c copy" (no re-encoding,
+       the container falls back to mkv if the canonical's does not take the audio codec)
+  a language whose prefetch (or merge) fails is simply left to the former "yt-dlp -w -f 160+233-k"
+
+Sharing the bandwidth with parameter --bandwidth:
+=================================================
+  --bandwidth 4M (or the environment variable LBLIB_DLD_BANDWIDTH=4M) sets a total download rate
+    that is shared among all downloads running at the same time on this machine
+    (the --jobs workers of this script and also dlYouTubeIdsLookingUpFormats.py and dlYouTubeIdsAs278or160.py)
+  each yt-dlp call gets its share as "yt-dlp -r <share> ..." (@see lblib/os/rate_governor.py),
+    the budget being split among --jobs times --audiojobs calls (the prefetches count)
+    and the sum of the shares never going above the total
+  without it, no rate limit is set (the former behavior)
+
 Care with the use of parameter --useinputfile:
 =============================================
   if the user wants to download many videos at once, it can be done with --useinputfile,
@@ -213,6 +279,10 @@ Limitation: what does this script not do (at least yet)?
       the program will halt showing its error message,
     (ie, this script does not yet treat non-0 return cases [*] in a better way)
     [*] imagining mostly that non-O returns are network problems or yt-dlp upgrade needs
+  3 when the downloaded filename cannot be discovered, the user is asked for it (an input() prompt),
+    but only in the one-by-one mode: with --jobs greater than 1 (worker threads, interleaved output)
+    the ytid is marked failed instead, journaled as such (stage "failed", with the reason),
+    and reported at the end; a rerun (possibly without --jobs) retries it
 
 On 2025-08-01:
   the main parts of this script were already in use
@@ -236,14 +306,20 @@ Justification:
     but it may also grow in the future
       (for example: Russian appeared -- we haven't seen it before -- in some original-English videos)
 """
+import concurrent.futures
 import os.path
-import shutil
 import subprocess
 import sys
 import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
 import lblib.regexfs.filenamevalidator_cls as fnval  # .FilenameValidator
 import lblib.ytfunctions.osentry_class as ose  # ose.OSEntry
 import lblib.ytfunctions.cliparams_for_utubewhendub as clip  # clip.CliParam
+import lblib.os.fanout_copier as fcp  # fcp.FanoutCopier
+import lblib.ytfunctions.ytdlp_formatprobe as fprb  # fprb.FormatProbe
+import lblib.os.subprocrunner as sprun  # sprun.SubprocRunner
+import lblib.ytfunctions.dldjournal as djr  # djr.DownloadJournal
+import lblib.os.rate_governor as rgov  # rgov.RateGovernor
+import lblib.os.ffmpeg_engine as ffeng  # ffeng.FFMPEG_BASE_ARGV
 OSEntry = ose.OSEntry
 # DEFAULT_AUDIOVIDEO_CODE = ose.DEFAULT_AUDIOVIDEO_CODE
 # DEFAULT_AUDIOVIDEO_DOT_EXT = ose.DEFAULT_AUDIOVIDEO_DOT_EXT
@@ -252,6 +328,7 @@ DEFAULT_AUDIO_MAIN_NUMBER = ose.DEFAULT_AUDIO_MAIN_NUMBER  # may be -1 meaning n
 DEFAULT_SFX_W_2LETLNG_MAPDCT = ose.DEFAULT_SFX_W_2LETLNG_MAPDCT
 DEFAULT_VIDEO_ONLY_CODE = ose.DEFAULT_VIDEO_ONLY_CODE
 VIDEO_DOT_EXTENSIONS = ose.VIDEO_DOT_EXTENSIONS
+AUDIO_DOT_EXTENSIONS = ['.m4a', '.webm', '.mp4', '.opus', '.mp3']  # the exts yt-dlp gives YouTube's audio formats
 default_videodld_tmpdir = ose.default_videodld_tmpdir
 
 
@@ -268,7 +345,9 @@ class Downloader:
   DEFAULT_AUDIO_MAIN_NUMBER = DEFAULT_AUDIO_MAIN_NUMBER
   videodld_tmpdirname = default_videodld_tmpdir
   # class-wide static interpolable-string constants
-  comm_line_base = 'yt-dlp -w -f {ytdlp_fcode_str} "{videourl}"'
+  ytdlp_argv_base = ['yt-dlp', '-w', '-f']
+  DEFAULT_YTDLP_TIMEOUT_SECS = 3 * 3600  # per yt-dlp call, a long one for a 1080p video on a slow line
+  DEFAULT_YTDLP_MAX_RETRIES = sprun.DEFAULT_MAX_RETRIES
   video_baseurl = 'https://www.youtube.com/watch?v={ytid}'
 
   def __init__(
@@ -279,6 +358,13 @@ class Downloader:
       audiomainnumber: int = None,
       nvdseq: int = None,
       sfx_n_2letlng_dict: dict | str = None,
+      b_tmpsubdir_per_ytid: bool = False,
+      naudiojobs: int = None,
+      b_automap: bool = False,
+      timeout_secs: float = None,
+      max_retries: int = None,
+      governor: rgov.RateGovernor = None,
+      b_interactive: bool = True,
     ):
     self.ytid = ytstrfs.get_validated_ytid_or_raise(ytid)
     self.dlddir_abspath = dlddir_abspath
@@ -294,8 +380,32 @@ class Downloader:
     self.cur_lng_obj = None  # each language is abstracted to a "language object" as each download happens
     self.last_nsufix_in_case_it_failed = 0
     self.b_verified_once_tmpdir_abspath = None
+    # when True (the --jobs scheduler mode), tmpdir becomes videodld_tmpdir/<ytid>
+    self.b_tmpsubdir_per_ytid = b_tmpsubdir_per_ytid
+    # concurrency cap for the language audio parts (1 means no prefetch stage, ie one by one)
+    self.naudiojobs = naudiojobs or 1
+    # if True, langmapper is replaced (in process()) by the one discovered via FormatProbe
+    self.b_automap = b_automap
+    # the yt-dlp calls go through this runner: argv (no shell), timeout, classified failures & retries
+    self.runner = sprun.SubprocRunner(
+      timeout_secs=timeout_secs or self.DEFAULT_YTDLP_TIMEOUT_SECS,
+      max_retries=self.DEFAULT_YTDLP_MAX_RETRIES if max_retries is None else max_retries,
+    )
+    self.last_runresult = None  # the last yt-dlp RunResult (its failure_kind is looked up by the fallback)
+    # the bandwidth share of each yt-dlp call (disabled, ie no "-r", if no total bandwidth is configured)
+    self.governor = governor or rgov.RateGovernor()
+    # False in the --jobs mode (a worker thread): the user is never prompted, the ytid fails instead
+    self.b_interactive = b_interactive
+    # set when the current language is given up for this run without a merge (@see download_audio_complements())
+    self.b_cur_lang_skipped = False
+    # the journal lives in the shared tmpdir (not in the per-ytid one, which is removed when its ytid is done)
+    self.journal = djr.DownloadJournal(os.path.join(self.dlddir_abspath, self.videodld_tmpdirname))
+    # the journal records are keyed by it (set in process(), after the --automap discovery, if any)
+    self.journal_runkey = None
+    # the video-only-downloaded record this run builds on (the fsufix & fan-out records older than it are stale)
+    self.videoonly_record = None
     # self.prename = None
-    self.previously_existing_filenames_in_tmpdir = []
+    self.previously_existing_filenames_in_tmpdir = set()
     self.osentry = OSEntry(
       workdir_abspath=self.child_tmpdir_abspath,
       basefilename=None,  # later to be known
@@ -306,6 +416,8 @@ class Downloader:
     if self.dlddir_abspath is None or self.dlddir_abspath == '.':
       # default is the current working directory
       self.dlddir_abspath = os.path.abspath('.')
+    # subprocesses run with cwd=tmpdir, so a relative dlddir would be resolved against the wrong dir
+    self.dlddir_abspath = os.path.abspath(self.dlddir_abspath)
     if not os.path.isdir(self.dlddir_abspath):
       errmsg = f"Error: Download directory [{self.dlddir_abspath}] does not exist."
       raise OSError(errmsg)
@@ -342,6 +454,32 @@ class Downloader:
     url = self.video_baseurl.format(**pdict)
     return url
 
+  def get_ytdlp_argv(self, ytdlp_fcode_str, outtmpl=None) -> list[str]:
+    """
+    Example: ['yt-dlp', '-w', '-f', '160+233-0', 'https://www.youtube.com/watch?v=<ytid>']
+    """
+    argv = self.ytdlp_argv_base + [f"{ytdlp_fcode_str}"]
+    if outtmpl is not None:
+      argv += ['-o', outtmpl]
+    return argv + [self.videourl]
+
+  def run_ytdlp_governed(self, argv) -> sprun.RunResult:
+    """
+    Runs yt-dlp (in the tmpdir) via the runner holding a bandwidth lease from the RateGovernor
+      the lease's rate goes in as "-r <rate>" right after the executable
+    """
+    fcode = argv[len(self.ytdlp_argv_base)]
+    with self.governor.acquire(f"dubbed ytid={self.ytid} -f {fcode}") as lease:
+      argv = argv[:1] + lease.ratelimit_args + argv[1:]
+      return self.runner.run(argv, cwd=self.osentry.workdir_abspath)
+
+  def run_ytdlp(self, argv) -> sprun.RunResult:
+    """
+    Runs yt-dlp (governed, see above) and keeps its result in self.last_runresult
+    """
+    self.last_runresult = self.run_ytdlp_governed(argv)
+    return self.last_runresult
+
   def rename_canofile_to_the_bk1sufixed(self):
     """
     The canonical filename (the one downloaded) gets renamed to the bk1_sufixed filename
@@ -378,6 +516,7 @@ class Downloader:
       return
     try:
       os.rename(srcfilepath, trgfilepath)
+      self.osentry.snapshot.note_rename(srcfilepath, trgfilepath)
       scrmsg = f"Renamed accomplished: ytid={self.ytid} 2-letter lang code={twolettercode} lang={ln}"
       print(scrmsg)
     except (IOError, OSError) as e:
@@ -394,6 +533,11 @@ class Downloader:
     The first video is just renamed to sufix "bk<seq>" where seq is the audio sequential number
     The following videos are copied each one with its "bk<seq>" sufix
     Obs: The first video is renamed at the end, i.e., the copies are done firstly
+
+    The "copies" are made by a FanoutCopier (lblib/os/fanout_copier.py), ie,
+      reflink if the filesystem supports it, else hardlink, else (the former) shutil.copy2
+      (the video-only file is never written in place, the merge writes a new file,
+       so sharing its blocks or its inode among the bk<seq> names is safe)
     """
     if self.total_langs == 0:
       #  nothing to rename, return
@@ -411,6 +555,7 @@ class Downloader:
       errmsg = f"Error: srcfilename [{srcfilename}] for copying bk's does not exist."
       print(errmsg)
       sys.exit(1)
+    copier = fcp.FanoutCopier()
     for self.cur_lng_obj in self.langmapper.loop_over_langs():
       seq = self.cur_lng_obj.seq_order
       audioonlycode = self.cur_lng_obj.audioonlycode
@@ -429,7 +574,10 @@ class Downloader:
         print(scrmsg)
         continue
       try:
-        shutil.copy2(srcfilepath, trgfilepath)
+        strategy = copier.copy(srcfilepath, trgfilepath)
+        self.osentry.snapshot.note_added(trgfilepath)
+        scrmsg = f"Copied bk{seq} via {strategy}"
+        print(scrmsg)
       except (IOError, OSError) as e:
         errmsg = f"""Error: the copying above failed
           -------------------- 
@@ -441,6 +589,7 @@ class Downloader:
         """
         print(errmsg)
         sys.exit(1)
+    print(copier.report())
 
   def store_files_that_already_exist_into_a_list(self, tmpdir_abspath):
     """
@@ -451,11 +600,10 @@ class Downloader:
         errmsg = fDate Sufix [{strdate}] in filename is either missing or it's not past today
         raise OSError(errmsg)
     """
-    filenames = os.listdir(tmpdir_abspath)
-    for filename in filenames:
-      if not filename.endswith(tuple(ose.VIDEO_DOT_EXTENSIONS)):  # notice osentry has not yet been initialized at this
-        continue
-      self.previously_existing_filenames_in_tmpdir.append(filename)
+    # the listing is the (shared) DirSnapshot of the tmpdir, notice osentry has not yet been initialized at this
+    #   only this ytid's video files matter (the before-versus-after comparison is per ytid)
+    snapshot = ose.get_dirsnapshot(tmpdir_abspath)
+    self.previously_existing_filenames_in_tmpdir = snapshot.get_video_filenames_for_ytid(self.ytid)
 
   def verify_tmpdir_once_n_store_files_already_existing(self, tmpdir_abspath):
     """
@@ -480,14 +628,26 @@ class Downloader:
 
     The composition-class OSEntry also has it from here
     To avoid an "origins" bug, it may be advisable to always read it from OSEntry (though the two are the same)
+
+    When b_tmpsubdir_per_ytid is True, the ytid itself is appended as a further subdirectory,
+      so that concurrent Downloader's never share a tmpdir
     :return:
     """
     tmpdir_abspath = os.path.join(self.dlddir_abspath, self.videodld_tmpdirname)
+    if self.b_tmpsubdir_per_ytid:
+      tmpdir_abspath = os.path.join(tmpdir_abspath, self.ytid)
     if not self.b_verified_once_tmpdir_abspath:
       self.verify_tmpdir_once_n_store_files_already_existing(tmpdir_abspath)
     return tmpdir_abspath
 
   def fallbackcase_ask_user_what_the_downloaded_filename_is(self):
+    if not self.b_interactive:
+      # a worker thread (the --jobs mode) must not block on input(): the ytid is given up for this run
+      reason = f"downloaded filename not found in [{self.osentry.workdir_abspath}] (no prompt with --jobs)"
+      self.journal.record(self.ytid, djr.STAGE_FAILED, runkey=self.journal_runkey, reason=reason)
+      errmsg = f"Error: ytid={self.ytid} {reason}, marked failed in the journal, rerun to retry it"
+      print(errmsg)
+      return None
     scrmsg = f"""Script was not able to find the downloaded filename,
      this can happen when the download had alread happened before,
      please check whether one can be found in the tmpdir and enter it here
@@ -518,6 +678,31 @@ class Downloader:
       sys.exit(1)
     return filename
 
+  @property
+  def dldname_filepath(self) -> str:
+    """
+    The file yt-dlp writes the video-only part's final filepath into (@see download_video_only())
+    """
+    return os.path.join(self.osentry.workdir_abspath, f".dldname-{self.ytid}.txt")
+
+  def read_dldd_videofilename_or_none(self) -> str | None:
+    """
+    The filename yt-dlp reported (its last line) if that file is there (it's stat'ed, not listed)
+      None if yt-dlp did not report it (eg an older yt-dlp without --print-to-file)
+    """
+    try:
+      with open(self.dldname_filepath, 'r', encoding='utf-8') as f:
+        lines = [line.strip() for line in f if line.strip()]
+      os.remove(self.dldname_filepath)
+    except OSError:
+      return None
+    if len(lines) == 0:
+      return None
+    filename = os.path.basename(lines[-1])
+    if self.ytid not in filename or not filename.endswith(tuple(VIDEO_DOT_EXTENSIONS)):
+      return None
+    return filename if self.osentry.snapshot.refresh_filename(filename) else None
+
   def discover_dldd_videofilename(self):
     """
     Discovers the filename of the downloaded yt-dlp file
@@ -552,28 +737,34 @@ class Downloader:
 
     If the second try does not find a file, the third try asks the user which filename
       is the correct one.
+
+    Before all that, the filename yt-dlp reported (--print-to-file) is taken if present:
+      it is stat'ed alone, the tmpdir (possibly shared by a whole batch) is only re-listed on a miss
     """
     # if self.osentry.has_basefilename_been_found():
     #   return
-    videofilename_soughtfor = None
-    allfilenames = os.listdir(self.osentry.workdir_abspath)
-    # dot_ext = self.cur_dot_ext
-    # ----------
-    # first try: folder contents comparison (before versus after)
-    # ----------
-    videofilenames = filter(lambda f: f.endswith(tuple(VIDEO_DOT_EXTENSIONS)), allfilenames)
-    videofilenames_appearing_after = list(
-      filter(
-        lambda f: f not in self.previously_existing_filenames_in_tmpdir,
-        videofilenames
-      )
-    )
+    snapshot = self.osentry.snapshot
+    videofilename_soughtfor = self.read_dldd_videofilename_or_none()
+    videofilenames_appearing_after = []
+    if videofilename_soughtfor is not None:
+      scrmsg = f"Found downloaded file (as reported by yt-dlp) as [{videofilename_soughtfor}]"
+      print(scrmsg)
+    else:
+      # the one listing needed: yt-dlp (an outside process) has just written into the folder
+      snapshot.rescan()
+      # ----------
+      # first try: folder contents comparison (before versus after)
+      # ----------
+      videofilenames_appearing_after = [
+        f for f in snapshot.get_video_filenames_for_ytid(self.ytid)
+        if f not in self.previously_existing_filenames_in_tmpdir
+      ]
     n_results = len(videofilenames_appearing_after)
-    if n_results == 1:
+    if videofilename_soughtfor is None and n_results == 1:
       videofilename_soughtfor = videofilenames_appearing_after[0]
       scrmsg = f"Found downloaded file as [{videofilename_soughtfor}]"
       print(scrmsg)
-    else:
+    elif videofilename_soughtfor is None:
       # at this point, some hypotheses come to mind
       # 1 - directory may be empty (which might signal a network failure)
       # 2 - file had already been downloaded before, so the comparison before versus after does not find it
@@ -584,9 +775,10 @@ class Downloader:
       # ----------
       # second try: look up filename's canonical form
       # ----------
-      scrmsg = f"Looking up the downloaded file among {len(allfilenames)} files in folder"
+      ytid_filenames = snapshot.get_filenames_for_ytid(self.ytid)
+      scrmsg = f"Looking up the downloaded file among {len(ytid_filenames)} files (of {len(snapshot)}) in folder"
       print(scrmsg)
-      for fn in allfilenames:
+      for fn in ytid_filenames:
         # filename is compliant to the "canonical filename", i.e., name[ytid].ext
         validator = fnval.FilenameValidator(filename=fn)
         if validator.is_filename_a_valid_ytdlp and self.ytid == validator.ytid:
@@ -633,10 +825,12 @@ class Downloader:
        so that after the next language download yt-dlp will be able to blend audio with video."""
       print(scrmsg)
       os.remove(self.osentry.fp_for_fn_as_name_ext)
+      self.osentry.snapshot.note_removed(self.osentry.fp_for_fn_as_name_ext)
       print('Canonical file deleted. Continuing.')
       return False
     try:
       os.rename(self.osentry.fp_for_fn_as_name_ext, self.osentry.fp_for_fn_as_name_fsufix_ext)
+      self.osentry.snapshot.note_rename(self.osentry.fp_for_fn_as_name_ext, self.osentry.fp_for_fn_as_name_fsufix_ext)
       scrmsg = f"""Rename succeeded (from canonical to f-sufixed).
       FROM (canonical): [{self.osentry.fn_as_name_ext}]
       FROM (f-sufixed): [{self.osentry.fn_as_name_fsufix_ext}]"""
@@ -653,35 +847,24 @@ class Downloader:
 
   def download_video_only(self):
     """
-    This method downloads the videoonlyfile via yt-dlp using Python's subprocess.run()
-
-    At the time of this writing, when subprocess raises subprocess.CalledProcessError
-      the script wraps it up with an additional error-message and then reraises ValueError
+    This method downloads the videoonlyfile via yt-dlp using the SubprocRunner (lblib/os/subprocrunner.py)
 
-    [For later on]
-    This may be improved later on if some hypotheses for the
-      subprocess.CalledProcessError exception allow this program to continue on
+    Transient failures (network, throttling, timeout) are retried by the runner with a backoff,
+      if they persist (or the failure is not transient), False is returned
     """
-    strdict = {'ytdlp_fcode_str': self.videoonlycode, 'videourl': self.videourl}
-    comm = self.comm_line_base.format(**strdict)
-    scrmsg = f"@download_video_only | {comm}"
+    argv = self.get_ytdlp_argv(self.videoonlycode)
+    # yt-dlp appends the final filepath to a (hidden) file: the discovery then needs no directory listing
+    argv[-1:-1] = ['--print-to-file', 'after_move:filepath', self.dldname_filepath]
+    scrmsg = f"@download_video_only | {' '.join(argv)}"
     print(scrmsg)
     try:
-      """
-      ans = input('Run this command above (Y/n) ? [ENTER] means Yes')
-      if ans not in ['Y', 'y', '']:
+      result = self.run_ytdlp(argv)
+      if not result.ok:
+        warnmsg = f"""Command: [{' '.join(argv)}]
+         failed with return code: [{result.returncode}] | failure = {result.failure_kind}
+         => {result.last_stderr_lines}"""
+        print(warnmsg)
         return False
-      """
-      subprocess.run(comm, shell=True, check=True)  # timeout=5 (how long can a download last?)
-    # except subprocess.TimeoutExpired:
-    #     print(f"Command timed out: {comm}")
-    except subprocess.CalledProcessError as e:
-      warnmsg = f"""Command: [{comm}]
-       failed with return code: [{e.returncode}]
-       => {e}"""
-      print(warnmsg)
-      # raise ValueError(errmsg)
-      return False
     except KeyboardInterrupt:
       scrmsg = "Interrupted by user. Exiting loop. Continuing."
       print(scrmsg)
@@ -701,26 +884,21 @@ class Downloader:
     Obs:
       a) the approach this method tries is to look up different extensions with the same name
       b) another approach would be to try to use the ytid itself sufixed to name
+      c) each candidate name is stat'ed via the osentry's DirSnapshot (refresh_filename())
 
     """
-    canoname = self.osentry.fn_as_name_ext
+    canoname = self.osentry.name
     curr_dot_ext = self.osentry.dot_ext
-    extensions = list(self.osentry.video_dot_extensions)
-    try:
-      # remove the extension it already has, go look up a matching one among the remaining ones
-      extensions.remove(curr_dot_ext)
-    except ValueError:
-      pass
-    # look up if there are still extensions in the list
-    while len(extensions) > 0:
-      next_dot_ext = extensions.pop()
-      # recompose filename with new extension
+    snapshot = self.osentry.snapshot
+    for next_dot_ext in self.osentry.video_dot_extensions:
+      if next_dot_ext == curr_dot_ext:
+        # skip the extension it already has, go look up a matching one among the remaining ones
+        continue
+      # recompose filename with new extension (stat'ed alone, no directory listing)
       soughtfor_alt_filename = f"{canoname}{next_dot_ext}"
-      soughtfor_alt_filepath = os.path.join(self.osentry.workdir_abspath, soughtfor_alt_filename)
-      if os.path.isfile(soughtfor_alt_filepath):
+      if snapshot.refresh_filename(soughtfor_alt_filename):
         # found it
-        # self.cur_dot_ext = next_dot_ext
-        return soughtfor_alt_filepath
+        return os.path.join(self.osentry.workdir_abspath, soughtfor_alt_filename)
     return None
 
   def rename_bksufixedfilename_to_fsufixedfilename_to_avoid_the_vo_redownload(self):
@@ -755,8 +933,8 @@ class Downloader:
     srcfilename = self.osentry.get_fn_as_name_fsufix_ext_bksufix(self.n_ongoing_lang)
     trgfilepath = self.osentry.fp_for_fn_as_name_fsufix_ext
     trgfilename = self.osentry.fn_as_name_fsufix_ext
-    # check existence
-    if not os.path.isfile(srcfilepath):
+    # check existence (a resumed run may find the video-only part already under its fsufix name)
+    if not os.path.isfile(srcfilepath) and not os.path.isfile(trgfilepath):
       errmsg = f"""For the rename above
       ---------------------------------------
       FROM (bksufix):  [{srcfilename}]
@@ -777,9 +955,11 @@ class Downloader:
         """
         print(errmsg)
         os.remove(srcfilepath)
+        self.osentry.snapshot.note_removed(srcfilepath)
       return
     try:
       os.rename(srcfilepath, trgfilepath)
+      self.osentry.snapshot.note_rename(srcfilepath, trgfilepath)
       scrmsg = f"""Rename succeeded: from bksufix=".bk{self.n_ongoing_lang}" to fsufix="{self.osentry.fsufix}":
       ----------------------------------
       FROM (bksufix):  [{srcfilename}]
@@ -846,10 +1026,42 @@ class Downloader:
         that, instead of audiocode, say, 233-0, 233 (without dash-0) could work
           and form the video in its original language.
         That would complete the job supposing the video does not have another translated language anyway.
+
+    2 the current language object becomes the no-dubs one (its audioonlycode is not dashed, its lang is 'un')
+      and the composite {videoonlycode}+{audiomainnumber} is downloaded here, so that the caller
+      renames & journals it as merged like any other language (@see nodubs_av_code)
     """
     self.set_langmapper_to_no_dubs()
     scrmsg = "Set language mapper to 'no dubs'"
     print(scrmsg)
+    if self.cur_lng_obj.nsufix is None or self.cur_lng_obj.nsufix < 0:
+      # the non-dashed audiocode is the one that has just failed
+      return
+    self.cur_lng_obj = ytstrfs.LangAttr(
+      langless_audiocode=self.audiomainnumber, nsufix=-1, twolettercode='un', seq_order=self.cur_lng_obj.seq_order
+    )
+    argv = self.get_ytdlp_argv(self.composite_av_code)
+    scrmsg = f"no-dubs composite_av_code={self.composite_av_code} | running: {' '.join(argv)}"
+    print(scrmsg)
+    result = self.run_ytdlp(argv)
+    if not result.ok:
+      errmsg = f"""No-dubs download failed ({result.failure_kind}) with return code {result.returncode}: {' '.join(argv)}
+      => {result.last_stderr_lines}"""
+      print(errmsg)
+
+  @property
+  def nodubs_av_code(self) -> str:
+    """
+    The composite format code of the no-dubs fallback (the audiocode without a dashed-sufix), e.g. "160+233"
+    """
+    return f"{self.videoonlycode}+{self.audiomainnumber}"
+
+  def is_nodubs_composite_merged(self) -> bool:
+    """
+    True if a former (or this) run fell back to the no-dubs composite and merged it:
+      the video has no language variations, so the (dashed) languages asked for are not missing
+    """
+    return self.journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, self.nodubs_av_code, self.journal_runkey)
 
   @property
   def composite_av_code(self) -> str:
@@ -879,26 +1091,45 @@ class Downloader:
     ln = self.cur_lng_obj.langname
     scrmsg = f"audioonlycode now is {aoc} | its 2-letter-lang-code is {tlc} {ln}"
     print(scrmsg)
-    pdict = {'ytdlp_fcode_str': self.composite_av_code, 'videourl': self.videourl}
-    comm = self.comm_line_base.format(**pdict)
+    if self.merge_prefetched_audiopart_w_videoonly(self.cur_lng_obj):
+      return
+    argv = self.get_ytdlp_argv(self.composite_av_code)
     try:
-      scrmsg = f"composite_av_code={self.composite_av_code} | running: {comm}"
+      scrmsg = f"composite_av_code={self.composite_av_code} | running: {' '.join(argv)}"
       print(scrmsg)
-      """
-      scrmsg = f"Continue with the download above (Y/n)? [ENTER] means Yes"
-      ans = input(scrmsg)
-      if ans not in ['Y', 'y', '']:
-        sys.exit(0)
-      """
-      subprocess.run(comm, shell=True, check=True)  # timeout=5 (how long can a download last?)
-    # except subprocess.TimeoutExpired:
-    #     print(f"Command timed out: {comm}")
-    except subprocess.CalledProcessError as e:
+      result = self.run_ytdlp(argv)
+      if result.ok:
+        return
+      if result.is_transient:
+        # network/throttling that persisted after the retries: the video may well have dubs,
+        # so the (expensive) single-language fallback is not taken
+        errmsg = f"""
+        =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
+        Subprocess failed with a transient error after {result.n_attempts} attempts:
+        Command failed ({result.failure_kind}) with return code {result.returncode}: {' '.join(argv)}
+        => {result.last_stderr_lines}
+        => NOT falling back, audiocode={aoc} is skipped for this run
+        =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
+        """
+        print(errmsg)
+        return
+      if result.failure_kind == sprun.FAILURE_HTTP_CLIENT:
+        # a 403/404 and alike is not a missing format, a single-language download would get it as well
+        errmsg = f"""
+        =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
+        Subprocess failed with a (permanent) HTTP client error:
+        Command failed ({result.failure_kind}) with return code {result.returncode}: {' '.join(argv)}
+        => {result.last_stderr_lines}
+        => NOT falling back, audiocode={aoc} is skipped for this run
+        =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
+        """
+        print(errmsg)
+        return
       errmsg = f"""
       =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
       Subprocess returned with an error:
-      Command failed with return code {e.returncode}: {comm}
-      full error msg => {e}
+      Command failed ({result.failure_kind}) with return code {result.returncode}: {' '.join(argv)}
+      => {result.last_stderr_lines}
       => trying a download without an audiocode with the dashed-sufix
       =+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|=+=|
       """
@@ -913,6 +1144,7 @@ class Downloader:
       (yt-dlp forms the same filename regardless of language)
       this method prefix-renames the file just downloaded so that the next
       download is "available" for yt-dlp (as its filename is available)
+    Returns the lang-prefixed filepath if the rename happened, None otherwise
     """
     srccanofilepath = self.osentry.fp_for_fn_as_name_ext
     srccanofilename = self.osentry.fn_as_name_ext
@@ -937,7 +1169,7 @@ class Downloader:
           ------------------------------------
           => reason: canonical (FROM) is not present in folder. Continuing."""
         print(wrnmsg)
-        return
+        return None
       # update srccanofilename from srccanofilepath
       _, srccanofilename = os.path.split(srccanofilepath)
     if os.path.isfile(langprefixedfilepath):
@@ -949,9 +1181,10 @@ class Downloader:
         ------------------------------------
         => reason: lang-prefixed filename (TO) is already present in folder. Continuing."""
       print(wrnmsg)
-      return
+      return None
     try:
       os.rename(srccanofilepath, langprefixedfilepath)
+      self.osentry.snapshot.note_rename(srccanofilepath, langprefixedfilepath)
       audioonlycode = self.langmapper.get_audioonlycode_for_1baseidx(self.n_ongoing_lang)
       scrmsg = f"""Rename succeeded => lang={self.n_ongoing_lang} | audiocode={audioonlycode}
       ------------------------------------
@@ -960,6 +1193,7 @@ class Downloader:
       ------------------------------------
       """
       print(scrmsg)
+      return langprefixedfilepath
     except (IOError, OSError) as e:
       warnmsg = f"""Error when attempting to rename:
       ---------------------------------------
@@ -971,6 +1205,7 @@ class Downloader:
       """
       print(warnmsg)
       # sys.exit(1)
+    return None
 
   def check_if_canonicalname_changed_its_extension(self):
     """
@@ -982,6 +1217,160 @@ class Downloader:
     """
     self.osentry.find_n_set_the_canonical_with_another_extension()
 
+  def get_prefetch_fp_wo_ext(self, lng_obj) -> str:
+    """
+    The explicit output path (but its ext, chosen by yt-dlp) of one language's prefetched audio part
+      example: "<tmpdir>/.prefetch-abcABC123-_-f233-1"
+    """
+    filename = f".prefetch-{self.ytid}-f{lng_obj.audioonlycode}"
+    return os.path.join(self.osentry.workdir_abspath, filename)
+
+  def find_prefetched_audiopart_or_none(self, lng_obj) -> str | None:
+    """
+    Looks the prefetched audio part up by its explicit path (a stat per AUDIO_DOT_EXTENSIONS candidate)
+    """
+    prefetch_fp_wo_ext = self.get_prefetch_fp_wo_ext(lng_obj)
+    for dot_ext in AUDIO_DOT_EXTENSIONS:
+      filename = os.path.basename(prefetch_fp_wo_ext) + dot_ext
+      if self.osentry.snapshot.refresh_filename(filename):
+        return prefetch_fp_wo_ext + dot_ext
+    return None
+
+  @staticmethod
+  def move_tempfile_if_target_absent(tempfilepath, trgfilepath) -> bool:
+    """
+    os.link() + unlink: the link fails if the target exists (no check-then-replace race)
+      on a filesystem without hard links, the check is followed by an os.replace()
+    Returns False (the tempfile removed) if the target already exists
+    """
+    try:
+      os.link(tempfilepath, trgfilepath)
+      os.remove(tempfilepath)
+      return True
+    except FileExistsError:
+      pass
+    except OSError:
+      if not os.path.exists(trgfilepath):
+        os.replace(tempfilepath, trgfilepath)
+        return True
+    os.remove(tempfilepath)
+    return False
+
+  def merge_prefetched_audiopart_w_videoonly(self, lng_obj) -> bool:
+    """
+    Merges (ffmpeg, streams copied) the prefetched audio part with the video-only part into the canonical
+      (the one yt-dlp's own merge would write), then removes both parts as yt-dlp's merge does
+    If the container of the canonical does not take the audio codec, it's tried as mkv (as yt-dlp does)
+    Returns False if there's no prefetched part or the merge failed: the caller falls back to yt-dlp
+    An existing canonical is never overwritten: the merge is then discarded, the parts are kept for a retry,
+      the language is journaled as failed and skipped for this run (self.b_cur_lang_skipped)
+    """
+    audiofilepath = self.find_prefetched_audiopart_or_none(lng_obj)
+    videofilepath = self.osentry.fp_for_fn_as_name_fsufix_ext
+    if audiofilepath is None or not os.path.isfile(videofilepath):
+      return False
+    dot_exts = [self.osentry.dot_ext] + (['.mkv'] if self.osentry.dot_ext != '.mkv' else [])
+    for dot_ext in dot_exts:
+      trgfilepath = os.path.join(self.osentry.workdir_abspath, f"{self.osentry.name}{dot_ext}")
+      tempfilepath = ffeng.form_tempfilepath(trgfilepath)
+      argv = ffeng.FFMPEG_BASE_ARGV + [
+        '-i', videofilepath, '-i', audiofilepath, '-map', '0:v:0', '-map', '1:a:0', '-c', 'copy', tempfilepath,
+      ]
+      scrmsg = f"Merging prefetched audio {lng_obj.audioonlycode} | {' '.join(argv)}"
+      print(scrmsg)
+      result = self.runner.run(argv, cwd=self.osentry.workdir_abspath)
+      if result.ok and os.path.isfile(tempfilepath):
+        if not self.move_tempfile_if_target_absent(tempfilepath, trgfilepath):
+          reason = f"merge target [{os.path.basename(trgfilepath)}] already exists, not overwritten"
+          self.journal.record(
+            self.ytid, djr.STAGE_FAILED, fcode=f"{self.videoonlycode}+{lng_obj.audioonlycode}",
+            runkey=self.journal_runkey, reason=reason,
+          )
+          wrnmsg = f"Merge of the prefetched audio {lng_obj.audioonlycode}: {reason}, language skipped for this run"
+          print(wrnmsg)
+          self.b_cur_lang_skipped = True
+          return True
+        self.osentry.snapshot.note_added(trgfilepath)
+        for partfilepath in (videofilepath, audiofilepath):
+          os.remove(partfilepath)
+          self.osentry.snapshot.note_removed(partfilepath)
+        return True
+      if os.path.isfile(tempfilepath):
+        os.remove(tempfilepath)
+    wrnmsg = f"Merge of the prefetched audio {lng_obj.audioonlycode} failed, falling back to yt-dlp's download & merge"
+    print(wrnmsg)
+    return False
+
+  def prefetch_audiopart(self, lng_obj) -> bool:
+    """
+    Downloads the audio-only part for one language to its explicit path (see get_prefetch_fp_wo_ext())
+      for merge_prefetched_audiopart_w_videoonly() to find it there
+
+    Obs: this method receives lng_obj instead of using self.cur_lng_obj because it runs in a thread pool
+    """
+    aoc = lng_obj.audioonlycode
+    outtmpl = self.get_prefetch_fp_wo_ext(lng_obj).replace('%', '%%') + '.%(ext)s'
+    argv = self.get_ytdlp_argv(aoc, outtmpl=outtmpl)
+    scrmsg = f"@prefetch_audiopart lang={lng_obj.twolettercode} | {' '.join(argv)}"
+    print(scrmsg)
+    # self.run_ytdlp() is not used here because self.last_runresult is not thread-local
+    result = self.run_ytdlp_governed(argv)
+    if not result.ok:
+      warnmsg = f"""Prefetch of audioonlycode={aoc} failed ({result.failure_kind}) with return code [{result.returncode}]
+       => it'll be retried (or fall back) in the merge stage"""
+      print(warnmsg)
+      return False
+    if self.find_prefetched_audiopart_or_none(lng_obj) is None:
+      warnmsg = f"Prefetch of audioonlycode={aoc} succeeded but its file is not at [{outtmpl}]"
+      print(warnmsg)
+      return False
+    return True
+
+  def prefetch_audio_complements_concurrently(self):
+    """
+    Fetches all language audio parts at the same time, capped at self.naudiojobs,
+      so that wall time approaches the slowest language instead of the sum of all of them
+    The merges (one per language) happen afterward in download_audio_complements()
+    """
+    lng_objs = [
+      lng_obj for lng_obj in self.langmapper.loop_over_langs()
+      if not self.journal.has_stage(
+        self.ytid, djr.STAGE_LANG_MERGED, f"{self.videoonlycode}+{lng_obj.audioonlycode}", self.journal_runkey
+      )
+    ]
+    if len(lng_objs) == 0:
+      return 0
+    n_workers = min(self.naudiojobs, len(lng_objs))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+      results = list(executor.map(self.prefetch_audiopart, lng_objs))
+    n_fetched = sum(1 for res in results if res)
+    scrmsg = f"Prefetched {n_fetched} of {len(lng_objs)} language audio parts (audiojobs={self.naudiojobs})"
+    print(scrmsg)
+    return n_fetched
+
+  def discover_langmapper_via_formatprobe(self) -> bool:
+    """
+    Replaces self.langmapper with the one parsed from the (cached) "yt-dlp -F" output
+    If the probe fails, the langmapper formed from --map is kept (the former behavior)
+    """
+    probe = fprb.FormatProbe(self.ytid)
+    try:
+      langmapper = probe.get_langmapper(self.audiomainnumber)
+    except OSError as e:
+      wrnmsg = f"Format probe failed for ytid={self.ytid}, keeping map {self.langmapper.indict} => {e}"
+      print(wrnmsg)
+      return False
+    if langmapper is None:
+      wrnmsg = f"Format probe found no audio-only format for ytid={self.ytid}, keeping map {self.langmapper.indict}"
+      print(wrnmsg)
+      return False
+    self.langmapper = langmapper
+    self.audiomainnumber = langmapper.audiomainnumber
+    scrmsg = f"""{probe}
+    => discovered map = {langmapper.indict} | audioonlycodes = {langmapper.audioonlycodes}"""
+    print(scrmsg)
+    return True
+
   def download_audio_complements(self):
     """
     A lang_o carries the following attributes:
@@ -990,16 +1379,91 @@ class Downloader:
         -> twolettercode (the 2-letter language abbreviation: en, es, fr, etc.)
         -> seq_order=seq_order (the sequence order of the language: e.g. {0 (seq 1), 3 (seq 2), 6 (seq 3)}
         -> audioonlycode (dynamic, it's the sum of langless_audiocode, a dash, and the langnumber)
+
+    If naudiojobs > 1, the audio parts are prefetched in parallel before the loop below,
+      which then (for each language) only merges them with the video-only part
     """
+    if self.is_nodubs_composite_merged():
+      scrmsg = f"Journal: no-dubs {self.nodubs_av_code} already merged for ytid={self.ytid}. Continuing."
+      print(scrmsg)
+      return
+    if self.naudiojobs > 1 and self.total_langs > 1:
+      self.prefetch_audio_complements_concurrently()
     for self.cur_lng_obj in self.langmapper.loop_over_langs():  # formerly range(1, self.total_langs + 1):
+      if self.journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, self.composite_av_code, self.journal_runkey):
+        scrmsg = f"Journal: {self.composite_av_code} already merged for ytid={self.ytid}. Continuing."
+        print(scrmsg)
+        continue
+      self.b_cur_lang_skipped = False
       self.download_audiopart_to_blend_it_w_videoonly()
+      if self.b_cur_lang_skipped:
+        # the canonical in the folder is not this language's merge: it must not be renamed as such
+        self.restore_bksufixedfilename_after_a_failed_merge()
+        continue
       # TODO test if fallback to non_dashed_number_audiocode happened at this point
       # the reason is that n_ongoing_lang is not following the indices of list audioonlycodes
       # an IndexError protection is done inside the next method, but we should still think about a better solution
       # so that a last renaming may happen to the non_dashed_number_audiocode videofile
       # the way it is now, this last renaming is done manually, if he/she wants to, by the user
       self.check_if_canonicalname_changed_its_extension()
-      self.rename_videofile_after_audiovideofusion()
+      langprefixedfilepath = self.rename_videofile_after_audiovideofusion()
+      if langprefixedfilepath is None:
+        self.restore_bksufixedfilename_after_a_failed_merge()
+      else:
+        self.journal.record(
+          self.ytid, djr.STAGE_LANG_MERGED, langprefixedfilepath, fcode=self.composite_av_code,
+          runkey=self.journal_runkey,
+        )
+      if self.langmapper.no_dubs:
+        # after the fallback, the other languages asked for do not exist (the no-dubs composite is the video)
+        break
+
+  def restore_bksufixedfilename_after_a_failed_merge(self):
+    """
+    The merge of the current language did not happen, so its video-only part (renamed from bk<seq> to fsufix
+      before the merge) goes back to its bk<seq> name: the next language does not take it
+      and a later run (the language is not journaled as merged) finds it for the retry
+    """
+    fsufixedfilepath = self.osentry.fp_for_fn_as_name_fsufix_ext
+    bksufixedfilepath = self.osentry.get_fp_for_fn_as_name_fsufix_ext_bksufix(self.n_ongoing_lang)
+    if not os.path.isfile(fsufixedfilepath) or os.path.isfile(bksufixedfilepath):
+      return
+    try:
+      os.rename(fsufixedfilepath, bksufixedfilepath)
+      self.osentry.snapshot.note_rename(fsufixedfilepath, bksufixedfilepath)
+      scrmsg = f"Merge did not happen: video-only part kept as [{os.path.basename(bksufixedfilepath)}] for a retry."
+      print(scrmsg)
+    except OSError as e:
+      wrnmsg = f"Could not restore [{os.path.basename(bksufixedfilepath)}] => {e}"
+      print(wrnmsg)
+
+  def remove_leftover_bksufixed_files(self):
+    """
+    With all languages merged, the bk<seq> copies left (a fresh video-only download after a resume,
+      or a fallback to the non-dashed audiocode) are no longer needed
+    """
+    bkprefix = self.osentry.fn_as_name_fsufix_ext + '.bk'
+    with os.scandir(self.osentry.workdir_abspath) as it:
+      leftover_filepaths = [entry.path for entry in it if entry.name.startswith(bkprefix)]
+    for filepath in leftover_filepaths:
+      os.remove(filepath)
+      self.osentry.snapshot.note_removed(filepath)
+      scrmsg = f"Removed leftover video-only copy [{os.path.basename(filepath)}]"
+      print(scrmsg)
+
+  def get_unmerged_lng_objs(self) -> list:
+    """
+    The languages (of the current langmapper) without a lang-merged journal record
+      none if the no-dubs composite was merged (the fallback: the video has no language variations)
+    """
+    if self.is_nodubs_composite_merged():
+      return []
+    return [
+      lng_obj for lng_obj in self.langmapper.loop_over_langs()
+      if not self.journal.has_stage(
+        self.ytid, djr.STAGE_LANG_MERGED, f"{self.videoonlycode}+{lng_obj.audioonlycode}", self.journal_runkey
+      )
+    ]
 
   @property
   def vocreplacelist(self):
@@ -1055,25 +1519,27 @@ class Downloader:
     """
     got_one = False
     for idx, vc in enumerate(self.vocreplacelist):
-      strdict = {'ytdlp_fcode_str': vc, 'videourl': self.videourl}
-      comm = self.comm_line_base.format(**strdict)
-      scrmsg = f"@download_video_already_merged | {comm}"
+      if self.journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, vc, self.journal_runkey):
+        scrmsg = f"Journal: {vc} already downloaded for ytid={self.ytid}. Continuing."
+        print(scrmsg)
+        got_one = True
+        continue
+      argv = self.get_ytdlp_argv(vc)
+      scrmsg = f"@download_video_already_merged | {' '.join(argv)}"
       print(scrmsg)
       try:
-        subprocess.run(comm, shell=True, check=True)  # timeout=5 (how long can a download last?)
+        result = self.run_ytdlp(argv)
+        if not result.ok:
+          warnmsg = f"""Command: [{' '.join(argv)}]
+           failed with return code: [{result.returncode}] | failure = {result.failure_kind}
+           => {result.last_stderr_lines}"""
+          print(warnmsg)
+          continue
         # the name should be the "canonical", no discovery is necessary
         # self.discover_dldd_videofilename()
         self.rename_videocomplete_with_videocode(vc, idx)
+        self.journal.record(self.ytid, djr.STAGE_LANG_MERGED, fcode=vc, runkey=self.journal_runkey)
         got_one = True
-      # except subprocess.TimeoutExpired:
-      #     print(f"Command timed out: {comm}")
-      except subprocess.CalledProcessError as e:
-        warnmsg = f"""Command: [{comm}]
-         failed with return code: [{e.returncode}]
-         => {e}"""
-        print(warnmsg)
-        # raise ValueError(errmsg)
-        continue
       except KeyboardInterrupt:
         scrmsg = "Interrupted by user. Exiting loop. Continuing."
         print(scrmsg)
@@ -1081,22 +1547,111 @@ class Downloader:
     return got_one
 
   def prefixdate_n_move_videos_to_parent_dir(self):
+    """
+    The renaming scripts below work on their current directory,
+      so they are run with cwd=tmpdir instead of a process-wide os.chdir()
+      (this keeps concurrent Downloader's from stepping on each other's directories)
+    The move goes to dlddir_abspath, which is the parent dir of the shared tmpdir
+      and the grandparent of the per-ytid tmpdir (when b_tmpsubdir_per_ytid is True)
+    """
+    workdir = self.osentry.workdir_abspath
     dext = self.osentry.dot_ext
     ext = dext.lstrip('.')
     comm = f"renameDatePrefixBasedOnOSDate.py -y -e={ext}"
     comm += f"; renameAudioDurationIncluder.py -y -e={ext}"
     comm += "; renameYtDlpBracketConventionToFormer.py tf -y"
-    scrmsg = f" => Executing command: {comm}"
+    scrmsg = f" => Executing command: {comm} | in [{workdir}]"
+    print(scrmsg)
+    subprocess.run(comm, shell=True, cwd=workdir)
+    comm = f'mv *{dext} "{self.dlddir_abspath}"'
+    scrmsg = f" => Executing command: {comm} | in [{workdir}]"
     print(scrmsg)
-    os.system(comm)
-    comm = f"mv *{dext} .."
-    scrmsg = f" => Executing command: {comm}"
+    subprocess.run(comm, shell=True, cwd=workdir)
+    # the renaming scripts and the mv above are outside processes, so the snapshot is refreshed
+    self.osentry.snapshot.rescan()
+    if self.b_tmpsubdir_per_ytid:
+      try:
+        os.rmdir(workdir)
+      except OSError:
+        # not empty: leftovers (e.g. a failed language) stay there for the user to look up
+        scrmsg = f"Per-ytid tmpdir [{workdir}] not empty, it was kept."
+        print(scrmsg)
+
+  def form_journal_runkey(self) -> str:
+    """
+    The videoonlycode plus the audio codes asked for (@see dldjournal.form_runkey())
+    """
+    if self.audiomainnumber == -1:
+      return djr.form_runkey(self.videoonlycode, self.vocreplacelist)
+    return djr.form_runkey(self.videoonlycode, self.langmapper.audioonlycodes)
+
+  def has_journaled_stage(self, stage) -> bool:
+    """
+    A per-ytid stage (fsufix, fan-out) done for the current video-only file (not for a former one)
+    """
+    return self.journal.has_stage_since(self.ytid, stage, self.videoonly_record, runkey=self.journal_runkey)
+
+  def is_file_as_journaled(self, filepath) -> bool:
+    """
+    Renames and fan-out copies keep the content, so each video-only file is checked against
+      the size & quick checksum journaled at the download
+    """
+    if not os.path.isfile(filepath):
+      return False
+    size = self.videoonly_record.get('size')
+    if size is not None and os.path.getsize(filepath) != size:
+      return False
+    checksum = self.videoonly_record.get('checksum')
+    return checksum is None or djr.quick_checksum(filepath) == checksum
+
+  def are_videoonly_files_as_journaled(self) -> bool:
+    """
+    Checks the files the next stage needs: the canonical (before the fsufix rename), the fsufixed
+      (before the fan-out) or a bk<seq> copy per language not yet merged (one of them may be at its fsufix name)
+    """
+    if not self.has_journaled_stage(djr.STAGE_FSUFIXED):
+      return self.is_file_as_journaled(self.osentry.fp_for_fn_as_name_ext)
+    if not self.has_journaled_stage(djr.STAGE_FANNEDOUT):
+      return self.is_file_as_journaled(self.osentry.fp_for_fn_as_name_fsufix_ext)
+    b_fsufixed_available = self.is_file_as_journaled(self.osentry.fp_for_fn_as_name_fsufix_ext)
+    for lng_obj in self.get_unmerged_lng_objs():
+      if self.is_file_as_journaled(self.osentry.get_fp_for_fn_as_name_fsufix_ext_bksufix(lng_obj.seq_order)):
+        continue
+      if b_fsufixed_available:
+        b_fsufixed_available = False
+        continue
+      return False
+    return True
+
+  def set_osentry_fr_journal_or_false(self) -> bool:
+    """
+    On a resume, the downloaded (canonical) filename is taken from the journal,
+      so that neither the before-versus-after listing nor the user prompt is needed
+    The journaled file(s) must still be there, as they were (size & checksum), otherwise
+      False is returned and the video-only part is downloaded afresh
+    """
+    record = self.journal.get_last_record_or_none(
+      self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, runkey=self.journal_runkey
+    )
+    if record is None or not record.get('filename'):
+      return False
+    self.videoonly_record = record
+    self.osentry.basefilename = record['filename']
+    if not self.are_videoonly_files_as_journaled():
+      wrnmsg = f"""Journal: the video-only file(s) of [{self.osentry.fn_as_name_ext}] are missing or changed
+      => downloading ytid={self.ytid} video-only part afresh"""
+      print(wrnmsg)
+      self.videoonly_record = None
+      self.osentry.basefilename = None
+      return False
+    scrmsg = f"Journal: resuming ytid={self.ytid} with videofilename [{self.osentry.fn_as_name_ext}]"
     print(scrmsg)
-    os.system(comm)
+    return True
 
   def process(self):
     """
-      1st -> position (cd changedir) at the working tmpdir
+      0th -> look up the journal: stages already recorded for this ytid (and formats) are not redone
+      1st -> set the working tmpdir (it's given as cwd to subprocess, no os.chdir() happens)
       2nd -> download the 160 (or the entered as input) video
       3rd -> disconver the downloaded video's filename
       4th -> copy it to as many as there are audio langs entered
@@ -1104,60 +1659,150 @@ class Downloader:
       5th -> download the audio(s) for each language
         5-1 download the audiofile proper
         5-2 "fuse" (or merge) it with the videofile in store so that the composite (video with audio) results
+      6th -> if all languages got merged, move the videos to the dlddir
     """
+    if self.audiomainnumber != -1 and self.b_automap:
+      # before the journal lookup, for the discovered audio codes are part of the runkey (the probe is cached)
+      self.discover_langmapper_via_formatprobe()
+    # fixed here: a fallback to the non-dashed audiocode later changes the langmapper, not the run's identity
+    self.journal_runkey = self.form_journal_runkey()
+    if self.journal.has_stage(self.ytid, djr.STAGE_MOVED, runkey=self.journal_runkey):
+      scrmsg = f"Journal: ytid={self.ytid} ({self.journal_runkey}) was already completed (and moved). Skipping it."
+      print(scrmsg)
+      return True
     scrmsg = f"""1st step ->
-    POSITION (chdir) at the working tmpdir: [{self.osentry.workdir_abspath}]"""
+    WORK (as subprocess cwd) at the working tmpdir: [{self.osentry.workdir_abspath}]"""
     print(scrmsg)
-    os.chdir(self.osentry.workdir_abspath)
     scrmsg = f"""2nd step ->
     DOWNLOAD the {self.videoonlycode} video (ytid={self.ytid})"""
     print(scrmsg)
     if self.audiomainnumber == -1:
       return self.download_as_videowhole()
-    if not self.download_video_only():
-      # at this point, `subprocess` exitted with non-0 (this also means the videoonlyfile did not download)
-      # as the next steps depend on this, script cannot continue returning False from here
-      return False
-    scrmsg = f"""3rd step -> 
-    DISCOVER the downloaded video's filename (with ytid={self.ytid})
-      and rename it to the videoonlyfile
-      that one will serve the audio files to later compose audio+video"""
-    print(scrmsg)
-    self.discover_dldd_videofilename()
-    self.rename_from_canonical_to_fsufixedvideoonlyfile()
-    scrmsg = f"""4th step ->
-    COPY it  (with ytid={self.ytid}) to as many as there are audio lang entered"""
-    print(scrmsg)
-    self.copy_n_rename_videoonly_n_lang_times()
+    if not self.set_osentry_fr_journal_or_false():
+      if not self.download_video_only():
+        # at this point, `subprocess` exitted with non-0 (this also means the videoonlyfile did not download)
+        # as the next steps depend on this, script cannot continue returning False from here
+        return False
+      scrmsg = f"""3rd step ->
+      DISCOVER the downloaded video's filename (with ytid={self.ytid})
+        and rename it to the videoonlyfile
+        that one will serve the audio files to later compose audio+video"""
+      print(scrmsg)
+      self.discover_dldd_videofilename()
+      self.videoonly_record = self.journal.record(
+        self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, self.osentry.fp_for_fn_as_name_ext, runkey=self.journal_runkey
+      )
+    if not self.has_journaled_stage(djr.STAGE_FSUFIXED):
+      self.rename_from_canonical_to_fsufixedvideoonlyfile()
+      self.journal.record(
+        self.ytid, djr.STAGE_FSUFIXED, self.osentry.fp_for_fn_as_name_fsufix_ext, runkey=self.journal_runkey
+      )
+    if not self.has_journaled_stage(djr.STAGE_FANNEDOUT):
+      scrmsg = f"""4th step ->
+      COPY it  (with ytid={self.ytid}) to as many as there are audio lang entered"""
+      print(scrmsg)
+      self.copy_n_rename_videoonly_n_lang_times()
+      self.journal.record(
+        self.ytid, djr.STAGE_FANNEDOUT, self.osentry.get_fp_for_fn_as_name_fsufix_ext_bksufix(1),
+        runkey=self.journal_runkey,
+      )
     audioonlycodes = self.langmapper.audioonlycodes
     scrmsg = f"""5th step ->
     DOWNLOAD (with ytid={self.ytid}) the audio(s) complements | audioonlycodes={audioonlycodes}"""
     print(scrmsg)
     self.download_audio_complements()
+    unmerged_lng_objs = self.get_unmerged_lng_objs()
+    if len(unmerged_lng_objs) > 0:
+      # not moved (nor journaled as moved): the next run retries the missing languages from the tmpdir
+      wrnmsg = f"""ytid={self.ytid}: {len(unmerged_lng_objs)} language(s) not merged
+      => {[lng_obj.audioonlycode for lng_obj in unmerged_lng_objs]}
+      => its files stay in [{self.osentry.workdir_abspath}], rerun to retry them"""
+      print(wrnmsg)
+      return False
+    self.remove_leftover_bksufixed_files()
     # move all videos from child_tmpdir_abspath to its parent dir
     self.prefixdate_n_move_videos_to_parent_dir()
+    self.journal.record(self.ytid, djr.STAGE_MOVED, runkey=self.journal_runkey)
     return True
 
 
-def loop_over_ytids(cliprm_o):
+def download_one_ytid(cliprm_o, ytid, b_tmpsubdir_per_ytid=False) -> bool:
   """
+  Instantiates a Downloader for one ytid and runs it
 
-    scrmsg = f"ytid = {ytid}"
-    print(scrmsg)
-
-  :param cliprm_o:
-  :return:
+  Because Downloader may sys.exit() when it cannot continue (a missing file for a rename, for example),
+    SystemExit is caught here so that, in the concurrent mode, one failing ytid
+    does not bring down the others
+  With a tmp subdirectory per ytid, its DirSnapshot is evicted at the end (the subdirectory is not reused)
   """
-  for ytid in cliprm_o.ytids:
+  downloader = None
+  try:
     downloader = Downloader(
       ytid=ytid,
       dlddir_abspath=cliprm_o.dirpath,
       videoonlycode=cliprm_o.videoonlycode,
       audiomainnumber=cliprm_o.audiomainnumber,
       nvdseq=cliprm_o.nvdseq,
-      sfx_n_2letlng_dict=cliprm_o.sfx_n_2letlng_dict
+      sfx_n_2letlng_dict=cliprm_o.sfx_n_2letlng_dict,
+      b_tmpsubdir_per_ytid=b_tmpsubdir_per_ytid,
+      naudiojobs=cliprm_o.naudiojobs,
+      b_automap=cliprm_o.b_automap,
+      timeout_secs=cliprm_o.timeout_secs,
+      max_retries=cliprm_o.max_retries,
+      governor=cliprm_o.governor,
+      # the concurrent mode (a tmp subdirectory per ytid) runs in worker threads: no input() there
+      b_interactive=not b_tmpsubdir_per_ytid,
     )
-    _ = downloader.process()  # process() returns a boolean (True | False)
+    return bool(downloader.process())  # process() returns a boolean (True | False)
+  except (OSError, ValueError, SystemExit) as e:
+    errmsg = f"Error: ytid={ytid} could not be processed => {e}"
+    print(errmsg)
+  finally:
+    if b_tmpsubdir_per_ytid and downloader is not None:
+      ose.drop_dirsnapshot(downloader.osentry.workdir_abspath)
+  return False
+
+
+def schedule_ytids_concurrently(cliprm_o):
+  """
+  Runs cliprm_o.njobs Downloader's at the same time (a bounded thread pool)
+
+  Threads suffice here because the work is waiting on yt-dlp subprocesses (not Python CPU)
+  Each ytid gets its own tmp subdirectory, ie videodld_tmpdir/<ytid>,
+    so the before-versus-after listing, the renames and the final move are ytid-local
+  """
+  results = {}
+  with concurrent.futures.ThreadPoolExecutor(max_workers=cliprm_o.njobs) as executor:
+    future_to_ytid = {
+      executor.submit(download_one_ytid, cliprm_o, ytid, True): ytid
+      for ytid in cliprm_o.ytids
+    }
+    for future in concurrent.futures.as_completed(future_to_ytid):
+      ytid = future_to_ytid[future]
+      results[ytid] = future.result()
+      scrmsg = f"[{len(results)}/{len(future_to_ytid)}] ytid={ytid} finished | success={results[ytid]}"
+      print(scrmsg)
+  failed = [ytid for ytid in cliprm_o.ytids if not results.get(ytid)]
+  scrmsg = f"""Concurrent download report (jobs={cliprm_o.njobs}):
+    total ytids = {len(cliprm_o.ytids)} | succeeded = {len(cliprm_o.ytids) - len(failed)} | failed = {len(failed)}
+    failed ytids = {failed}"""
+  print(scrmsg)
+  return len(failed) == 0
+
+
+def loop_over_ytids(cliprm_o):
+  """
+  Loops over the ytids one after another
+    (or, if --jobs is greater than 1, hands them over to the concurrent scheduler)
+
+  :param cliprm_o:
+  :return:
+  """
+  if cliprm_o.njobs > 1 and len(cliprm_o.ytids) > 1:
+    return schedule_ytids_concurrently(cliprm_o)
+  for ytid in cliprm_o.ytids:
+    # an OSError (eg a journaled file gone meanwhile) or a sys.exit() stops this ytid only
+    _ = download_one_ytid(cliprm_o, ytid)  # returns a boolean (True | False)
   return True
 
 
@@ -1176,6 +1821,11 @@ def process():
     scrmsg = f"Not running scripting, confirmation {cliprm_o.confirmed})."
     print(scrmsg)
     return False
+  # one governor for all Downloader's, it expects as many leases as yt-dlp calls running at once:
+  #   each of the --jobs ytids may prefetch up to --audiojobs language audio parts at the same time
+  n_expected_leases = cliprm_o.njobs * cliprm_o.naudiojobs
+  cliprm_o.governor = rgov.RateGovernor(cliprm_o.bandwidth, n_expected_leases=n_expected_leases)
+  print(cliprm_o.governor)
   return loop_over_ytids(cliprm_o)
 
 
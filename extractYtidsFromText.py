@@ -2,11 +2,12 @@
 """
 ~/bin/extractYtidsFromText.py
 
-This script extracts ytids with brackets (the current form of yt-dlp)
-  either from a textfile or from stdin
+This script extracts ytids (all of them in a line, in the forms of lblib/ytfunctions/ytid_extractor.py:
+  URLs, brackets as in yt-dlp filenames, dash sufixes and bare ytids)
+  either from a textfile or from stdin, without repeats and in their order of appearance
 
 Usage:
-  this_script [--useinputfile] [--infile <filename>]
+  this_script [--useinputfile] [--infile <filename>] [--stream] [--exclude <ytidsfile>]
 
 Notice that the two parameters above are optional.
   If the user wants to use stdin (to pipe text in),
@@ -16,6 +17,11 @@ Notice that the two parameters above are optional.
 Where:
   --useinputfile: a flag to read the text in filenamed youtube-names.txt
   --infile: a filename from which the text will be read
+  --stream: each new unique ytid is output as soon as its line is read (no "# Total" header,
+    the summary goes to stderr at the end); the memory used is the set of the unique ytids seen,
+    whatever the input size
+  --exclude: ytids not to output, a .ytidset file (see lblib/ytfunctions/ytid_binstore.py)
+    or a text file with ytids (eg the youtube-ids.txt of the already downloaded ones)
 
 Examples:
   1
@@ -37,11 +43,19 @@ Examples:
   In this example, the program will read file inputfile.txt
     from the current (running) directory. The output will be redirected
     to file youtube-ids.txt.
+
+  4
+  $yt-dlp --flat-playlist --print url <playlist-url> | this_script --stream --exclude done.ytidset | <downloader>
+
+  In this example, the script sits in a pipeline: each ytid not yet seen
+    (nor in done.ytidset) goes on to the downloader as soon as yt-dlp prints it.
 """
 import argparse
 import os
 import sys
 import re
+import lblib.ytfunctions.ytid_binstore as ytbinstore
+import lblib.ytfunctions.ytid_extractor as ytext
 restr_ytid_wi_brackets = r"^.*?\[(?P<ytid>[A-Za-z0-9\-_]{11})\].*$"
 recmp_ytid_wi_brackets = re.compile(restr_ytid_wi_brackets)
 default_filename = "youtube-names.txt"
@@ -54,22 +68,26 @@ parser.add_argument("--infile", type=str,
                     help="input filename as a local dir file")
 parser.add_argument("--dirpath", type=str,
                     help="Directory recipient of the download")
+parser.add_argument("--stream", action='store_true',
+                    help="output each new unique ytid as soon as it's read (pipeline mode)")
+parser.add_argument("--exclude", type=str,
+                    help="a .ytidset (ytid_binstore) or text file with ytids not to output")
 args = parser.parse_args()
 
 
 class Extractor:
 
   def __init__(self):
-    self.use_stdin, self.infile, self.useinputfile = get_args()
+    self.use_stdin, self.infile, self.useinputfile, self.b_stream, self.excludefile = get_args()
     self.n_ytids = 0
     self.ytids = []
+    self.ytidfilter = None
 
   def extract_ytids_from_line(self, line):
-    mo = recmp_ytid_wi_brackets.match(line)
-    if mo:
-      ytid = mo.group('ytid')
-      self.n_ytids += 1
-      self.ytids.append(ytid)
+    # a line may have more than one ytid (eg a few URLs), all are taken
+    ytids = ytext.extract_ytids_fr_text(line)
+    self.n_ytids += len(ytids)
+    self.ytids += self.ytidfilter.filter(ytids)
     return None
 
   def extract_ytids_from_text(self, text):
@@ -79,10 +97,38 @@ class Extractor:
     return None
 
   def extract_ytids_from_stdin(self):
-    for line in sys.stdin:
-      self.extract_ytids_from_line(line)
+    for ytids in ytext.extract_ytid_batches_fr_binstream(sys.stdin.buffer):
+      self.n_ytids += len(ytids)
+      self.ytids += self.ytidfilter.filter(ytids)
     return None
 
+  def stream_ytids(self, binstream):
+    """
+    Writes each new unique ytid as soon as its line is read (flushed per chunk read),
+      so that this script may sit in the middle of a pipeline, eg:
+      yt-dlp --flat-playlist --print url <playlist> | extractYtidsFromText.py --stream --exclude <ytidset> | ...
+    """
+    for ytids in ytext.extract_ytid_batches_fr_binstream(binstream, b_streaming=True):
+      self.n_ytids += len(ytids)
+      new_ytids = self.ytidfilter.filter(ytids)
+      if new_ytids:
+        sys.stdout.write('\n'.join(new_ytids) + '\n')
+        sys.stdout.flush()
+
+  def load_exclude_set(self):
+    """
+    The ytids not to output: a ytid_binstore file (.ytidset, memory-mapped, not loaded)
+      or any text file with ytids (read into a set)
+    """
+    if self.excludefile is None:
+      return None
+    if not os.path.isfile(self.excludefile):
+      errmsg = f"Error: exclude file [{self.excludefile}] does not exist."
+      raise OSError(errmsg)
+    if self.excludefile.endswith(ytbinstore.BINSTORE_DOT_EXT):
+      return ytbinstore.YtidBinStore(self.excludefile)
+    return set(ytext.extract_ytids_fr_file(self.excludefile))
+
   def fork_process_option(self):
     if self.use_stdin:
       self.extract_ytids_from_stdin()
@@ -95,24 +141,35 @@ class Extractor:
     else:
       scrmsg = 'Nothing to do or input file does not exist. If so, set parameters for execution.'
       print(scrmsg)
-    # avoiding the use of set() to maintain order
+    # the ytidfilter avoids the repeats keeping the sequential order
 
   def process(self):
-    self.fork_process_option()
-    self.unicize_ytids()
-    self.show_ytids()
-
-  def unicize_ytids(self):
-    """
-    Removes repeats from ytids
-    The set() function is avoided here
-      so that sequencial order is mantained in the ytids list
-    """
-    _ytid = []
-    for e in self.ytids:
-      if e not in _ytid:
-        _ytid.append(e)
-    self.ytids = _ytid
+    exclude = self.load_exclude_set()
+    self.ytidfilter = ytext.UniqueYtidFilter(exclude=exclude)
+    try:
+      if self.b_stream:
+        self.process_stream()
+      else:
+        self.fork_process_option()
+        self.show_ytids()
+    finally:
+      if isinstance(exclude, ytbinstore.YtidBinStore):
+        exclude.close()
+
+  def process_stream(self):
+    try:
+      if self.use_stdin:
+        self.stream_ytids(sys.stdin.buffer)
+      else:
+        with open(self.infile or default_filename, 'rb') as f:
+          self.stream_ytids(f)
+    except BrokenPipeError:
+      # the reader downstream has gone (eg "| head"): stop quietly
+      devnull = os.open(os.devnull, os.O_WRONLY)
+      os.dup2(devnull, sys.stdout.fileno())
+      return
+    # the stdout is the pipe's data, the summary goes to stderr
+    print('#', self.ytidfilter, file=sys.stderr)
 
   def show_ytids(self):
     scrmsg = f'# Total {len(self.ytids)} ytids'
@@ -129,12 +186,13 @@ def adhoctest1():
 
 
 def get_args():
-  use_stdin = True
+  if args.docstr:
+    print(__doc__)
+    sys.exit(0)
   infile = args.infile
   useinputfile = args.useinputfile
-  if infile is None and useinputfile is None:
-    use_stdin = True
-  return use_stdin, infile, useinputfile
+  use_stdin = infile is None and not useinputfile
+  return use_stdin, infile, useinputfile, args.stream, args.exclude
 
 
 def process():
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/collections/setalgebra.py
+
+  Set algebra over (possibly very large) line or ytid files:
+    union, intersection, difference (the 1st input minus the others), symmetric difference
+    (the items in an odd number of inputs, as a ^ b ^ c) and unique (the repeats taken out)
+
+  Two strategies, same results:
+    1 - in memory (the inputs' estimated footprint under max_memory): one hash set per input
+    2 - external sorted-merge (larger than RAM): each input is cut into runs of at most max_run_items,
+        each run sorted & uniqued in memory and written to a temp file; the runs of an input are
+        k-way merged (heapq.merge, at most MERGE_FANIN files open at a time) into its sorted unique stream,
+        and the inputs' streams are merged again, tagged with their input index, so that each item comes out
+        once with the inputs it is in; the memory used is about one run, whatever the inputs' sizes
+
+  The output is sorted unless b_keep_order, then it's in first-seen order (the order of the inputs, one after
+    the other); in the external strategy this takes one more external sort, on the items' first positions
+
+  An item is an input's line (its surrounding blanks stripped; empty lines skipped) or, with iter_ytids,
+    each ytid found in it (see lblib/ytfunctions/ytid_extractor.py); any callable filepath => iterator of str
+    may be given as itemize.
+
+  Usage:
+    for item in compute(OP_DIFFERENCE, ['youtube-ids.txt', 'done-ids.txt'], itemize=iter_ytids, b_keep_order=True):
+      ...
+    ytids = compute_on_iterables(OP_DIFFERENCE, [dldble_ytids, existing_ytids], b_keep_order=True)
+
+  CLI:
+    setalgebra.py <op> <file1> [<file2> ...] [--ytids] [--order] [--mode=auto|memory|external]
+                  [--maxmem=<MB>] [--tmpdir=<dir>]
+    op: union | intersection | difference | symdiff | unique
+"""
+import heapq
+import itertools
+import operator
+import os
+import sys
+import tempfile
+import lblib.ytfunctions.ytid_extractor as ytext
+OP_UNION = 'union'
+OP_INTERSECTION = 'intersection'
+OP_DIFFERENCE = 'difference'
+OP_SYMDIFF = 'symdiff'
+OP_UNIQUE = 'unique'
+OPERATIONS = (OP_UNION, OP_INTERSECTION, OP_DIFFERENCE, OP_SYMDIFF, OP_UNIQUE)
+MODE_AUTO = 'auto'
+MODE_MEMORY = 'memory'
+MODE_EXTERNAL = 'external'
+MODES = (MODE_AUTO, MODE_MEMORY, MODE_EXTERNAL)
+DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+# a str item in a set (plus its dict entry for the first-seen order) takes a few times its bytes in the file
+MEMORY_PER_FILEBYTE = 4
+DEFAULT_MAX_RUN_ITEMS = 1_000_000
+MERGE_FANIN = 64
+ENCODING_ERRORS = 'surrogateescape'  # the temp files give back exactly what was read
+
+
+def iter_lines(filepath):
+  with open(filepath, 'r', encoding='utf-8', errors=ENCODING_ERRORS) as f:
+    for line in f:
+      line = line.strip(' \t\r\n')
+      if line:
+        yield line
+
+
+def iter_ytids(filepath):
+  yield from ytext.extract_ytids_fr_file(filepath)
+
+
+def is_kept(op, input_idxs, n_inputs) -> bool:
+  """
+  input_idxs: the (distinct) indices of the inputs the item is in
+  """
+  if op == OP_INTERSECTION:
+    return len(input_idxs) == n_inputs
+  if op == OP_DIFFERENCE:
+    return len(input_idxs) == 1 and 0 in input_idxs
+  if op == OP_SYMDIFF:
+    return len(input_idxs) % 2 == 1
+  return True  # OP_UNION & OP_UNIQUE
+
+
+def validate_op(op, n_inputs):
+  if op not in OPERATIONS:
+    errmsg = f"Error: operation [{op}] is not one of {OPERATIONS}"
+    raise ValueError(errmsg)
+  if n_inputs == 0:
+    errmsg = f"Error: operation [{op}] needs at least one input"
+    raise ValueError(errmsg)
+
+
+def choose_mode(filepaths, max_memory=DEFAULT_MAX_MEMORY) -> str:
+  estimated = sum(os.path.getsize(filepath) for filepath in filepaths) * MEMORY_PER_FILEBYTE
+  return MODE_MEMORY if estimated <= max_memory else MODE_EXTERNAL
+
+
+def compute_on_iterables(op, iterables, b_keep_order=False) -> list[str]:
+  """
+  The in-memory strategy (hash sets); iterables: one iterable of items per input
+  """
+  iterables = list(iterables)
+  validate_op(op, len(iterables))
+  sets = []
+  first_seen = {}  # a dict keeps the insertion order
+  for items in iterables:
+    if b_keep_order:
+      itemset = set()
+      for item in items:
+        if item not in itemset:
+          itemset.add(item)
+          first_seen.setdefault(item, None)
+    else:
+      itemset = set(items)
+    sets.append(itemset)
+  if op == OP_DIFFERENCE:
+    # no need to look up each item in every input
+    rest = set().union(*sets[1:])
+    candidates = first_seen if b_keep_order else sets[0]
+    result = [item for item in candidates if item in sets[0] and item not in rest]
+  else:
+    candidates = first_seen if b_keep_order else set().union(*sets)
+    n_inputs = len(sets)
+    result = [
+      item for item in candidates
+      if is_kept(op, [idx for idx, itemset in enumerate(sets) if item in itemset], n_inputs)
+    ]
+  return result if b_keep_order else sorted(result)
+
+
+def _write_run(pairs, tmpdir) -> str:
+  """
+  pairs: sorted (item, pos) pairs, written one "item<TAB>pos" line each (pos last, as an item may have tabs)
+  """
+  fd, runpath = tempfile.mkstemp(suffix='.run', dir=tmpdir)
+  with open(fd, 'w', encoding='utf-8', errors=ENCODING_ERRORS) as f:
+    f.writelines(f"{item}\t{pos}\n" for item, pos in pairs)
+  return runpath
+
+
+def _read_run(runpath):
+  with open(runpath, 'r', encoding='utf-8', errors=ENCODING_ERRORS) as f:
+    for line in f:
+      item, pos = line[:-1].rsplit('\t', 1)
+      yield item, int(pos)
+
+
+def _merge_runs(runpaths, key, tmpdir):
+  """
+  Merges the sorted runs (by key), reducing them first, MERGE_FANIN at a time, so that few files are open at once
+  """
+  runpaths = list(runpaths)
+  while len(runpaths) > MERGE_FANIN:
+    merged_runpaths = []
+    for i in range(0, len(runpaths), MERGE_FANIN):
+      group = runpaths[i:i + MERGE_FANIN]
+      merged_runpaths.append(_write_run(heapq.merge(*map(_read_run, group), key=key), tmpdir))
+      for runpath in group:
+        os.remove(runpath)
+    runpaths = merged_runpaths
+  yield from heapq.merge(*map(_read_run, runpaths), key=key)
+
+
+def _sort_into_runs(pairs, key, tmpdir, max_run_items, b_unique) -> list[str]:
+  """
+  Cuts pairs (item, pos) into sorted runs of at most max_run_items;
+    b_unique: a run keeps an item once, with its first pos
+  """
+  runpaths = []
+  while True:
+    batch = list(itertools.islice(pairs, max_run_items))
+    if not batch:
+      break
+    if b_unique:
+      first_pos = {}
+      for item, pos in batch:
+        first_pos.setdefault(item, pos)
+      batch = first_pos.items()
+    runpaths.append(_write_run(sorted(batch, key=key), tmpdir))
+  return runpaths
+
+
+def _iter_sorted_unique(runpaths, tmpdir):
+  """
+  An input's sorted unique stream: (item, first pos) from its item-sorted runs
+  """
+  merged = _merge_runs(runpaths, operator.itemgetter(0), tmpdir)
+  for item, group in itertools.groupby(merged, key=operator.itemgetter(0)):
+    yield item, min(pos for _, pos in group)
+
+
+def _iter_tagged(runpaths, idx, tmpdir):
+  for item, pos in _iter_sorted_unique(runpaths, tmpdir):
+    yield item, pos, idx
+
+
+def _iter_kept(op, streams, n_inputs):
+  """
+  Merges the inputs' sorted unique streams of (item, pos, input index) and yields the kept (item, first pos)
+  """
+  merged = heapq.merge(*streams, key=operator.itemgetter(0))
+  for item, group in itertools.groupby(merged, key=operator.itemgetter(0)):
+    group = list(group)  # at most one entry per input
+    if is_kept(op, {idx for _, _, idx in group}, n_inputs):
+      yield item, min(pos for _, pos, _ in group)
+
+
+def _compute_external(op, filepaths, itemize, b_keep_order, max_run_items, tmpdir):
+  with tempfile.TemporaryDirectory(prefix='setalgebra-', dir=tmpdir) as workdir:
+    positions = itertools.count()  # shared, so that the inputs' positions follow one another
+    streams = []
+    for idx, filepath in enumerate(filepaths):
+      pairs = zip(itemize(filepath), positions)
+      runpaths = _sort_into_runs(pairs, operator.itemgetter(0), workdir, max_run_items, True)
+      streams.append(_iter_tagged(runpaths, idx, workdir))
+    kept = _iter_kept(op, streams, len(filepaths))
+    if not b_keep_order:
+      for item, _ in kept:
+        yield item
+      return
+    # the first-seen order: one more external sort, on the first positions
+    runpaths = _sort_into_runs(kept, operator.itemgetter(1), workdir, max_run_items, False)
+    for item, _ in _merge_runs(runpaths, operator.itemgetter(1), workdir):
+      yield item
+
+
+def compute(
+    op, filepaths, itemize=iter_lines, b_keep_order=False, mode=MODE_AUTO,
+    max_memory=DEFAULT_MAX_MEMORY, max_run_items=DEFAULT_MAX_RUN_ITEMS, tmpdir=None):
+  """
+  Yields the items of op over the inputs at filepaths (sorted, or in first-seen order if b_keep_order)
+    mode: MODE_AUTO chooses by the inputs' sizes against max_memory (see choose_mode())
+  """
+  filepaths = list(filepaths)
+  validate_op(op, len(filepaths))
+  if mode not in MODES:
+    errmsg = f"Error: mode [{mode}] is not one of {MODES}"
+    raise ValueError(errmsg)
+  if mode == MODE_AUTO:
+    mode = choose_mode(filepaths, max_memory)
+  if mode == MODE_MEMORY:
+    yield from compute_on_iterables(op, [list(itemize(filepath)) for filepath in filepaths], b_keep_order)
+    return
+  yield from _compute_external(op, filepaths, itemize, b_keep_order, max_run_items, tmpdir)
+
+
+def adhoctest1():
+  tmpdir = tempfile.mkdtemp()
+  contents = ['b\na\nc\na\nd\n', 'c\ne\nb\n', 'b\nf\n']
+  filepaths = []
+  for i, content in enumerate(contents):
+    filepaths.append(os.path.join(tmpdir, f"in{i}.txt"))
+    with open(filepaths[-1], 'w') as f:
+      f.write(content)
+  for op in OPERATIONS:
+    for b_keep_order in (False, True):
+      in_memory = list(compute(op, filepaths, b_keep_order=b_keep_order, mode=MODE_MEMORY))
+      external = list(compute(op, filepaths, b_keep_order=b_keep_order, mode=MODE_EXTERNAL, max_run_items=2))
+      print(op, 'order' if b_keep_order else 'sorted', in_memory, 'ok' if in_memory == external else external)
+
+
+def get_args() -> dict:
+  args = {
+    'op': None, 'filepaths': [], 'itemize': iter_lines, 'b_keep_order': False, 'mode': MODE_AUTO,
+    'max_memory': DEFAULT_MAX_MEMORY, 'tmpdir': None,
+  }
+  for arg in sys.argv[1:]:
+    if arg in ['-h', '--help']:
+      print(__doc__)
+      sys.exit(0)
+    elif arg == '--ytids':
+      args['itemize'] = iter_ytids
+    elif arg == '--order':
+      args['b_keep_order'] = True
+    elif arg.startswith('--mode='):
+      args['mode'] = arg[len('--mode='):]
+    elif arg.startswith('--maxmem='):
+      args['max_memory'] = int(arg[len('--maxmem='):]) * 1024 * 1024
+    elif arg.startswith('--tmpdir='):
+      args['tmpdir'] = arg[len('--tmpdir='):]
+    elif args['op'] is None:
+      args['op'] = arg
+    else:
+      args['filepaths'].append(arg)
+  return args
+
+
+def process():
+  """
+  Prints the result items, one per line
+  """
+  args = get_args()
+  if args['op'] is None:
+    print(__doc__)
+    return
+  items = compute(
+    args['op'], args['filepaths'], itemize=args['itemize'], b_keep_order=args['b_keep_order'],
+    mode=args['mode'], max_memory=args['max_memory'], tmpdir=args['tmpdir'],
+  )
+  for item in items:
+    print(item)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
@@ -0,0 +1,86 @@
+import os
+import random
+import shutil
+import tempfile
+import lblib.collections.setalgebra as salg
+import unittest
+
+
+class SetAlgebraTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_setalgebra-')
+    # a small fan-in, so that the external strategy also goes through its multi-pass merge
+    self.former_merge_fanin = salg.MERGE_FANIN
+    salg.MERGE_FANIN = 3
+
+  def tearDown(self):
+    salg.MERGE_FANIN = self.former_merge_fanin
+    shutil.rmtree(self.testdirpath)
+
+  def write_inputs(self, contents):
+    filepaths = []
+    for i, content in enumerate(contents):
+      filepaths.append(os.path.join(self.testdirpath, f"in{i}.txt"))
+      with open(filepaths[-1], 'w') as f:
+        f.write(content)
+    return filepaths
+
+  def compute_both(self, op, filepaths, b_keep_order, itemize=salg.iter_lines):
+    in_memory = list(salg.compute(op, filepaths, itemize, b_keep_order, mode=salg.MODE_MEMORY))
+    external = list(salg.compute(
+      op, filepaths, itemize, b_keep_order, mode=salg.MODE_EXTERNAL, max_run_items=2, tmpdir=self.testdirpath
+    ))
+    return in_memory, external
+
+  def test_1_expected_results(self):
+    filepaths = self.write_inputs(['b\na\nc\na\nd\n', 'c\ne\nb\n', 'b\nf\n'])
+    expected = {
+      salg.OP_UNION: (['a', 'b', 'c', 'd', 'e', 'f'], ['b', 'a', 'c', 'd', 'e', 'f']),
+      salg.OP_INTERSECTION: (['b'], ['b']),
+      salg.OP_DIFFERENCE: (['a', 'd'], ['a', 'd']),
+      salg.OP_SYMDIFF: (['a', 'b', 'd', 'e', 'f'], ['b', 'a', 'd', 'e', 'f']),
+      salg.OP_UNIQUE: (['a', 'b', 'c', 'd', 'e', 'f'], ['b', 'a', 'c', 'd', 'e', 'f']),
+    }
+    for op, (exp_sorted, exp_ordered) in expected.items():
+      for b_keep_order, exp_items in ((False, exp_sorted), (True, exp_ordered)):
+        in_memory, external = self.compute_both(op, filepaths, b_keep_order)
+        self.assertEqual(exp_items, in_memory, f"{op} memory keep_order={b_keep_order}")
+        self.assertEqual(exp_items, external, f"{op} external keep_order={b_keep_order}")
+
+  def test_2_strategies_agree(self):
+    rng = random.Random(20261018)
+    for n_inputs in (1, 2, 4):
+      contents = []
+      for _ in range(n_inputs):
+        items = [f"item{rng.randrange(60):02d}" for _ in range(rng.randrange(0, 120))]
+        contents.append(''.join(item + '\n' for item in items))
+      filepaths = self.write_inputs(contents)
+      for op in salg.OPERATIONS:
+        for b_keep_order in (False, True):
+          in_memory, external = self.compute_both(op, filepaths, b_keep_order)
+          self.assertEqual(in_memory, external, f"{op} inputs={n_inputs} keep_order={b_keep_order}")
+          # and the iterables' entry point gives the same
+          iterables = [salg.iter_lines(filepath) for filepath in filepaths]
+          self.assertEqual(in_memory, salg.compute_on_iterables(op, iterables, b_keep_order))
+
+  def test_3_ytids_n_blank_lines(self):
+    filepaths = self.write_inputs([
+      'abcABC123-_\n\n   \n[xyzXYZ789ab]\n', 'https://www.youtube.com/watch?v=xyzXYZ789ab\n',
+    ])
+    for b_keep_order in (False, True):
+      in_memory, external = self.compute_both(salg.OP_DIFFERENCE, filepaths, b_keep_order, salg.iter_ytids)
+      self.assertEqual(['abcABC123-_'], in_memory)
+      self.assertEqual(in_memory, external)
+    # the empty & blank lines are not items
+    in_memory, external = self.compute_both(salg.OP_UNION, filepaths[:1], False)
+    self.assertEqual(['[xyzXYZ789ab]', 'abcABC123-_'], in_memory)
+    self.assertEqual(in_memory, external)
+
+  def test_4_bad_op_n_no_inputs(self):
+    with self.assertRaises(ValueError):
+      list(salg.compute('xor', self.write_inputs(['a\n'])))
+    with self.assertRaises(ValueError):
+      list(salg.compute(salg.OP_UNION, []))
+    with self.assertRaises(ValueError):
+      list(salg.compute(salg.OP_UNION, self.write_inputs(['a\n']), mode='disk'))
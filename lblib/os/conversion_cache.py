@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/conversion_cache.py
+
+  A content-addressed cache for the audio/video conversions (transcodings):
+    the key is (the source's content hash, the complete conversion argv with its input & output filepaths taken out),
+    so a source that was moved or renamed (or an identical copy elsewhere) is not transcoded again:
+    the cached result is copied to the new target name instead;
+    any difference in the arguments (a "-vn", another encoder, another output extension) is another key.
+
+  Clients:
+    ~/bin/batchFfmpegConvertDeux.py (via lblib/os/ffmpeg_engine.py, thus also its walker and mover)
+    ~/bin/mp3ConvertViaFfmpegSystemCall.py
+    ~/bin/pylame.py
+
+  Layout (the cache directory):
+    objects/<2 hex chars>/<64 hex chars key><dot_ext>  the cached outputs
+    index.sqlite  (WAL mode) with two tables:
+      entries: key => relpath, size, created_ts, last_used_ts (the LRU order), srchash
+      srchashes: (st_dev, st_ino, size, mtime_ns) => content hash
+        ie a source is hashed (whole, blake2b) only once while it's unchanged,
+        and a rename or a move within the same filesystem keeps its inode, so it keeps its hash too
+
+  Eviction: after each store, the least recently used entries are removed until the total size
+    is within max_total_bytes (the user's files are copies, thus not affected);
+    an eviction also prunes the srchashes rows that no entry refers to any longer
+
+  The cache objects and the user's files never share an inode (no hardlinks): an in-place edit of an output
+    (an ID3 retag, for example) must not change the cache nor the other outputs of the same object.
+    The copies are reflinks (copy-on-write clones, @see lblib/os/fanout_copier.py) where the filesystem
+    supports them, otherwise byte copies; either way via a temp name and os.replace (a target is never partial).
+    The cache objects are kept read-only; the outputs get their owner's write permission back.
+
+  Settings (constructor parameters or environment variables):
+    cachedir: LBLIB_CONVCACHE_DIR, default $XDG_CACHE_HOME/lblib/convcache (XDG_CACHE_HOME defaults to ~/.cache)
+    max_total_bytes: LBLIB_CONVCACHE_MAXBYTES (a number with an optional K, M or G sufix), default 10G
+
+  Usage:
+    cache = ConversionCache()
+    argv = ['ffmpeg', '-i', srcfilepath, '-vn', '-ar', '22050', '-ab', '32k', trgfilepath]
+    params = form_params_fr_argv(argv, srcfilepath, trgfilepath)
+    if not cache.materialize(srcfilepath, params, trgfilepath):
+      ... convert srcfilepath into trgfilepath ...
+      cache.store(srcfilepath, params, trgfilepath)
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import stat
+import sys
+import threading
+import time
+import lblib.os.fanout_copier as fcp
+import lblib.os.localstate as lst
+CACHEDIR_ENVVAR = 'LBLIB_CONVCACHE_DIR'
+MAXBYTES_ENVVAR = 'LBLIB_CONVCACHE_MAXBYTES'
+DEFAULT_MAX_TOTAL_BYTES = 10 * 1024 ** 3
+HASH_CHUNKSIZE = 1024 * 1024
+SIZE_MULTIPLIERS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS entries (
+  key TEXT PRIMARY KEY,
+  relpath TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  created_ts REAL NOT NULL,
+  last_used_ts REAL NOT NULL,
+  srchash TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_last_used_idx ON entries (last_used_ts);
+CREATE TABLE IF NOT EXISTS srchashes (
+  dev INTEGER NOT NULL,
+  ino INTEGER NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  hash TEXT NOT NULL,
+  PRIMARY KEY (dev, ino, size, mtime_ns)
+);
+"""
+
+
+def trans_sizestr_to_bytes(sizestr) -> int:
+  """
+  Examples: "10G" => 10737418240 | "500M" => 524288000 | "1000" => 1000
+  """
+  sizestr = str(sizestr).strip().upper().rstrip('B')
+  sufix = sizestr[-1] if sizestr and sizestr[-1] in SIZE_MULTIPLIERS else ''
+  number = sizestr[:-1] if sufix else sizestr
+  try:
+    return int(float(number) * SIZE_MULTIPLIERS[sufix])
+  except ValueError:
+    errmsg = f"Error: size [{sizestr}] is not valid (examples: 500M, 10G)"
+    raise ValueError(errmsg)
+
+
+def get_default_cachedir_abspath() -> str:
+  cachedir = os.environ.get(CACHEDIR_ENVVAR)
+  if cachedir:
+    return cachedir
+  return lst.get_lblib_cachedir_abspath('convcache')
+
+
+def hash_file_content(filepath) -> str:
+  hasher = hashlib.blake2b(digest_size=32)
+  with open(filepath, 'rb') as f:
+    for chunk in iter(lambda: f.read(HASH_CHUNKSIZE), b''):
+      hasher.update(chunk)
+  return hasher.hexdigest()
+
+
+def form_params_fr_argv(argv, srcfilepath, trgfilepath) -> tuple:
+  """
+  The cache key's params: the complete conversion argv with its input & output filepaths replaced by placeholders
+    (the source is in the key by its content hash; the output's extension is kept: ffmpeg picks the format from it)
+  Example: ['ffmpeg', '-i', 'a.mp4', '-vn', 'b.mp3'] => ('ffmpeg', '-i', '<src>', '-vn', '<trg>.mp3')
+  """
+  trg_placeholder = '<trg>' + os.path.splitext(trgfilepath)[1]
+  placeholders = {str(srcfilepath): '<src>', str(trgfilepath): trg_placeholder}
+  return tuple(placeholders.get(str(arg), str(arg)) for arg in argv)
+
+
+def make_key(srchash, params) -> str:
+  """
+  params: the conversion's arguments (@see form_params_fr_argv()), each one is part of the key
+  """
+  keystr = '|'.join([srchash] + [f"{param}" for param in params])
+  return hashlib.sha256(keystr.encode('utf-8')).hexdigest()
+
+
+def reflink_or_copy(srcfilepath, trgfilepath, b_readonly=False):
+  """
+  Copies srcfilepath as trgfilepath, a reflink if the filesystem supports it, else a byte copy
+    trgfilepath appears at once, whole (a temp name is os.replace'd onto it)
+    b_readonly: the target is made read-only (the cache objects), else its owner may write it (the outputs)
+  """
+  tmpfilepath = f"{trgfilepath}.{os.getpid()}-{threading.get_ident()}.tmp"
+  try:
+    try:
+      fcp.reflink_or_raise(srcfilepath, tmpfilepath)
+    except OSError:
+      shutil.copy2(srcfilepath, tmpfilepath)
+    mode = stat.S_IMODE(os.stat(tmpfilepath).st_mode)
+    if b_readonly:
+      mode &= ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    else:
+      mode |= stat.S_IWUSR
+    os.chmod(tmpfilepath, mode)
+    os.replace(tmpfilepath, trgfilepath)
+  except OSError:
+    if os.path.exists(tmpfilepath):
+      os.remove(tmpfilepath)
+    raise
+
+
+class ConversionCache:
+
+  def __init__(self, cachedir_abspath=None, max_total_bytes=None):
+    self.cachedir_abspath = os.path.abspath(cachedir_abspath or get_default_cachedir_abspath())
+    if max_total_bytes is None:
+      envvalue = os.environ.get(MAXBYTES_ENVVAR)
+      max_total_bytes = trans_sizestr_to_bytes(envvalue) if envvalue else DEFAULT_MAX_TOTAL_BYTES
+    self.max_total_bytes = max_total_bytes
+    os.makedirs(os.path.join(self.cachedir_abspath, 'objects'), exist_ok=True)
+    # sqlite connections are not shared between threads (the ffmpeg engine calls from its pool threads)
+    self.threadlocal = threading.local()
+    # the counters below are incremented from the engine's pool threads
+    self.counters_lock = threading.Lock()
+    self.n_hits = 0
+    self.n_misses = 0
+    self.n_stored = 0
+    self.n_evicted = 0
+
+  @property
+  def dbfilepath(self):
+    return os.path.join(self.cachedir_abspath, 'index.sqlite')
+
+  @property
+  def conn(self) -> sqlite3.Connection:
+    conn = getattr(self.threadlocal, 'conn', None)
+    if conn is None:
+      conn = sqlite3.connect(self.dbfilepath, timeout=60)
+      conn.execute('PRAGMA journal_mode=WAL')
+      conn.executescript(SCHEMA_SQL)
+      columnnames = [row[1] for row in conn.execute('PRAGMA table_info(entries)')]
+      if 'srchash' not in columnnames:
+        # an index from before the srchash column (its entries are pruned by the LRU like the others)
+        conn.execute('ALTER TABLE entries ADD COLUMN srchash TEXT')
+      conn.commit()
+      self.threadlocal.conn = conn
+    return conn
+
+  def count(self, countername, n=1):
+    with self.counters_lock:
+      setattr(self, countername, getattr(self, countername) + n)
+
+  def get_srchash(self, srcfilepath) -> str:
+    """
+    The content hash of srcfilepath, computed only if its (dev, inode, size, mtime) is not yet known
+    """
+    st = os.stat(srcfilepath)
+    statkey = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    row = self.conn.execute(
+      'SELECT hash FROM srchashes WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ?', statkey
+    ).fetchone()
+    if row is not None:
+      return row[0]
+    srchash = hash_file_content(srcfilepath)
+    with self.conn:
+      self.conn.execute('INSERT OR REPLACE INTO srchashes VALUES (?, ?, ?, ?, ?)', statkey + (srchash,))
+    return srchash
+
+  def get_srchash_n_key(self, srcfilepath, params) -> tuple[str, str]:
+    srchash = self.get_srchash(srcfilepath)
+    return srchash, make_key(srchash, params)
+
+  def get_key(self, srcfilepath, params) -> str:
+    return self.get_srchash_n_key(srcfilepath, params)[1]
+
+  def form_objectfilepath(self, key, dot_ext) -> str:
+    return os.path.join(self.cachedir_abspath, 'objects', key[:2], key + dot_ext)
+
+  def lookup(self, srcfilepath, params) -> str | None:
+    """
+    Returns the cached output's filepath (and marks it as just used) or None
+    """
+    key = self.get_key(srcfilepath, params)
+    row = self.conn.execute('SELECT relpath FROM entries WHERE key = ?', (key,)).fetchone()
+    if row is None:
+      self.count('n_misses')
+      return None
+    objectfilepath = os.path.join(self.cachedir_abspath, row[0])
+    if not os.path.isfile(objectfilepath):
+      # removed from outside
+      with self.conn:
+        self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+      self.count('n_misses')
+      return None
+    with self.conn:
+      self.conn.execute('UPDATE entries SET last_used_ts = ? WHERE key = ?', (time.time(), key))
+    self.count('n_hits')
+    return objectfilepath
+
+  def materialize(self, srcfilepath, params, trgfilepath) -> bool:
+    """
+    If the conversion is cached, copies (reflinks) it as trgfilepath and returns True
+    """
+    try:
+      objectfilepath = self.lookup(srcfilepath, params)
+    except OSError:
+      return False
+    if objectfilepath is None:
+      return False
+    reflink_or_copy(objectfilepath, trgfilepath)
+    return True
+
+  def store(self, srcfilepath, params, producedfilepath) -> str | None:
+    """
+    Keeps producedfilepath (the conversion of srcfilepath with params) in the cache
+      returns the cached object's filepath (or None if it could not be stored)
+    """
+    try:
+      srchash, key = self.get_srchash_n_key(srcfilepath, params)
+      objectfilepath = self.form_objectfilepath(key, os.path.splitext(producedfilepath)[1])
+      os.makedirs(os.path.dirname(objectfilepath), exist_ok=True)
+      reflink_or_copy(producedfilepath, objectfilepath, b_readonly=True)
+      size = os.path.getsize(objectfilepath)
+    except OSError:
+      return None
+    now = time.time()
+    relpath = os.path.relpath(objectfilepath, self.cachedir_abspath)
+    with self.conn:
+      self.conn.execute(
+        'INSERT OR REPLACE INTO entries (key, relpath, size, created_ts, last_used_ts, srchash) VALUES (?, ?, ?, ?, ?, ?)',
+        (key, relpath, size, now, now, srchash),
+      )
+    self.count('n_stored')
+    self.evict()
+    return objectfilepath
+
+  @property
+  def total_bytes(self) -> int:
+    return self.conn.execute('SELECT coalesce(sum(size), 0) FROM entries').fetchone()[0]
+
+  def evict(self, max_total_bytes=None) -> int:
+    """
+    Removes the least recently used entries until the total is within max_total_bytes
+      then the srchashes rows no remaining entry refers to
+    """
+    max_total_bytes = self.max_total_bytes if max_total_bytes is None else max_total_bytes
+    total_bytes = self.total_bytes
+    n_evicted = 0
+    if total_bytes <= max_total_bytes:
+      return 0
+    rows = self.conn.execute('SELECT key, relpath, size FROM entries ORDER BY last_used_ts').fetchall()
+    with self.conn:
+      for key, relpath, size in rows:
+        if total_bytes <= max_total_bytes:
+          break
+        try:
+          os.remove(os.path.join(self.cachedir_abspath, relpath))
+        except OSError:
+          pass
+        self.conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+        total_bytes -= size
+        n_evicted += 1
+      if n_evicted > 0:
+        self.prune_srchashes()
+    self.count('n_evicted', n_evicted)
+    return n_evicted
+
+  def prune_srchashes(self) -> int:
+    """
+    Deletes the srchashes rows of the sources that have no entry (evicted ones or never stored ones)
+      a pruned source that comes back is only hashed again
+    """
+    cursor = self.conn.execute(
+      'DELETE FROM srchashes WHERE hash NOT IN (SELECT srchash FROM entries WHERE srchash IS NOT NULL)'
+    )
+    return cursor.rowcount
+
+  def __str__(self):
+    n_entries = self.conn.execute('SELECT count(*) FROM entries').fetchone()[0]
+    outstr = f"""ConversionCache: [{self.cachedir_abspath}]
+    entries = {n_entries} | total = {self.total_bytes / 2**20:.1f} MiB | max = {self.max_total_bytes / 2**20:.0f} MiB
+    hits = {self.n_hits} | misses = {self.n_misses} | stored = {self.n_stored} | evicted = {self.n_evicted}"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  cache = ConversionCache(os.path.join(tmpdir, 'cache'), max_total_bytes=2500)
+  params = form_params_fr_argv(['ffmpeg', '-i', 'src', '-vn', 'trg.mp3'], 'src', 'trg.mp3')
+  srcfilepaths = []
+  for i in range(3):
+    srcfilepath = os.path.join(tmpdir, f'src{i}.mp4')
+    with open(srcfilepath, 'wb') as f:
+      f.write(os.urandom(1000))
+    srcfilepaths.append(srcfilepath)
+    producedfilepath = os.path.join(tmpdir, f'src{i}.cnv.mp3')
+    with open(producedfilepath, 'wb') as f:
+      f.write(os.urandom(1000))
+    cache.store(srcfilepath, params, producedfilepath)
+  # src0 was evicted (2500 bytes hold two), a renamed src2 is still found
+  os.rename(srcfilepaths[2], os.path.join(tmpdir, 'renamed.mp4'))
+  print('src0 cached?', cache.materialize(srcfilepaths[0], params, os.path.join(tmpdir, 'out0.mp3')))
+  print('renamed src2 cached?', cache.materialize(os.path.join(tmpdir, 'renamed.mp4'), params,
+                                                  os.path.join(tmpdir, 'out2.mp3')))
+  print(cache)
+
+
+def process():
+  """
+  Prints the cache's state; with "evict <maxsize>" (e.g. evict 5G) shrinks it
+  """
+  cache = ConversionCache()
+  if len(sys.argv) > 2 and sys.argv[1] == 'evict':
+    n_evicted = cache.evict(trans_sizestr_to_bytes(sys.argv[2]))
+    print('evicted', n_evicted)
+  print(cache)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/fanout_copier.py
+
+  The FanoutCopier class models the "one source file, N identical copies" situation
+    that happens in ~/bin/dlYouTubeWhenThereAreDubbed2.py (the video-only file is copied
+    once per language before yt-dlp merges each language audio into its own copy).
+
+  Instead of writing N full copies of identical bytes, it tries these strategies in order:
+    1 - reflink (the FICLONE ioctl): a copy-on-write clone (btrfs, xfs with reflink=1, bcachefs...)
+        the two files share their blocks until one of them is written to
+    2 - hardlink: a second name for the same inode (same filesystem only)
+        this is safe for the use above because the merge never writes into the video-only file:
+          ffmpeg writes a new (merged) file and yt-dlp then deletes the parts,
+          ie, each link is only renamed and unlinked, so the "copy-on-merge" is implicitly
+          done by the merge itself
+    3 - shutil.copy2: a real byte-by-byte copy (the former and still the last resort)
+
+  The copier also keeps a tally of the bytes that were not written (the "bytes saved")
+    and how many copies each strategy made, to be shown with report().
+"""
+import os
+import shutil
+import sys
+try:
+  import fcntl
+except ImportError:
+  # non-POSIX systems: the reflink strategy is simply not available
+  fcntl = None
+# from linux/fs.h: #define FICLONE _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+STRATEGY_REFLINK = 'reflink'
+STRATEGY_HARDLINK = 'hardlink'
+STRATEGY_COPY = 'copy2'
+DEFAULT_STRATEGIES = (STRATEGY_REFLINK, STRATEGY_HARDLINK, STRATEGY_COPY)
+
+
+def reflink_or_raise(srcfilepath, trgfilepath):
+  """
+  Clones srcfilepath into trgfilepath via the FICLONE ioctl (a copy-on-write clone)
+    raises OSError if the filesystem (or the platform) does not support it
+    in that case, the (empty) target created for the ioctl is removed
+  """
+  if fcntl is None or not sys.platform.startswith('linux'):
+    errmsg = f"reflink (FICLONE) is not available on platform {sys.platform}"
+    raise OSError(errmsg)
+  with open(srcfilepath, 'rb') as fsrc:
+    try:
+      with open(trgfilepath, 'xb') as ftrg:
+        fcntl.ioctl(ftrg.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+      if os.path.isfile(trgfilepath):
+        os.remove(trgfilepath)
+      raise
+  shutil.copystat(srcfilepath, trgfilepath)
+
+
+def hardlink_or_raise(srcfilepath, trgfilepath):
+  """
+  Links trgfilepath to the same inode as srcfilepath
+    raises OSError (e.g. EXDEV when the two are on different filesystems)
+  """
+  os.link(srcfilepath, trgfilepath)
+
+
+class FanoutCopier:
+  """
+  Copies one source to many targets with the cheapest strategy available
+
+  Usage:
+    copier = FanoutCopier()
+    copier.copy(src, trg1)
+    copier.copy(src, trg2)
+    print(copier.report())
+
+  Once a strategy fails (say, reflink on ext4), it's not retried for the next copies
+    of the same copier object, ie the probing costs one failed attempt at most.
+  """
+
+  def __init__(self, strategies=None):
+    self.strategies = list(strategies or DEFAULT_STRATEGIES)
+    self.unavailable_strategies = set()
+    self.n_copies_per_strategy = {strategy: 0 for strategy in self.strategies}
+    self.bytes_saved = 0
+    self.bytes_written = 0
+
+  def copy_via_strategy(self, strategy, srcfilepath, trgfilepath):
+    if strategy == STRATEGY_REFLINK:
+      return reflink_or_raise(srcfilepath, trgfilepath)
+    if strategy == STRATEGY_HARDLINK:
+      return hardlink_or_raise(srcfilepath, trgfilepath)
+    if strategy == STRATEGY_COPY:
+      return shutil.copy2(srcfilepath, trgfilepath)
+    errmsg = f"Error: copy strategy [{strategy}] is not one of {DEFAULT_STRATEGIES}"
+    raise ValueError(errmsg)
+
+  def copy(self, srcfilepath, trgfilepath) -> str:
+    """
+    Copies srcfilepath to trgfilepath trying the strategies in order
+    Returns the strategy that succeeded or raises the OSError of the last one that failed
+    """
+    if os.path.exists(trgfilepath):
+      # checked upfront so that a strategy is not taken as unavailable because of an existing target
+      errmsg = f"Error: copy target [{trgfilepath}] already exists"
+      raise FileExistsError(errmsg)
+    filesize = os.path.getsize(srcfilepath)
+    last_error = None
+    for strategy in self.strategies:
+      if strategy in self.unavailable_strategies:
+        continue
+      try:
+        self.copy_via_strategy(strategy, srcfilepath, trgfilepath)
+      except OSError as e:
+        last_error = e
+        if strategy != STRATEGY_COPY:
+          self.unavailable_strategies.add(strategy)
+        continue
+      self.n_copies_per_strategy[strategy] += 1
+      if strategy == STRATEGY_COPY:
+        self.bytes_written += filesize
+      else:
+        self.bytes_saved += filesize
+      return strategy
+    if last_error is None:
+      errmsg = f"Error: no copy strategy available among {self.strategies}"
+      raise OSError(errmsg)
+    raise last_error
+
+  @property
+  def total_copies(self) -> int:
+    return sum(self.n_copies_per_strategy.values())
+
+  def report(self) -> str:
+    per_strategy = ' | '.join(f"{s}={n}" for s, n in self.n_copies_per_strategy.items())
+    outstr = (f"FanoutCopier: copies = {self.total_copies} ({per_strategy})"
+              f" | bytes saved = {self.bytes_saved} ({self.bytes_saved / 2**20:.1f} MiB)"
+              f" | bytes written = {self.bytes_written}")
+    return outstr
+
+  def __str__(self):
+    return self.report()
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  srcfilepath = os.path.join(tmpdir, 'src.bin')
+  with open(srcfilepath, 'wb') as f:
+    f.write(os.urandom(2**20))
+  copier = FanoutCopier()
+  for i in range(1, 4):
+    trgfilepath = os.path.join(tmpdir, f'src.bin.bk{i}')
+    strategy = copier.copy(srcfilepath, trgfilepath)
+    scrmsg = f"{i} copied via {strategy} to {trgfilepath}"
+    print(scrmsg)
+  print(copier.report())
+  shutil.rmtree(tmpdir)
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/ffmpeg_engine.py
+
+  The ConversionEngine runs many ffmpeg conversions at the same time
+    (formerly, batchFfmpegConvertDeux.py issued one os.system(comm) after the other, leaving all but one core idle)
+
+  Each ConversionJob:
+    1 - is an argv list (no shell, so filenames with quotes, '$' or '`' are harmless)
+    2 - writes to a temporary name in the target's folder (".<name>.converting-<pid>-<thread_ident><ext>",
+        the extension is kept because ffmpeg picks the output format from it)
+    3 - is atomically renamed (os.replace) to its target name only when ffmpeg succeeded,
+        so that a target file is never a half-converted one (a crash or a Ctrl-C leaves a temp file,
+        which remove_stale_tempfiles() cleans up, see ~/bin/batchWalkDeleteMp3split.py)
+    4 - is skipped if its target already exists
+    5 - if it is cacheable and the engine has a cache (lblib/os/conversion_cache.py),
+        a cached conversion of the same source content with the same ffmpeg arguments is copied (reflinked)
+        instead of running ffmpeg, and a fresh conversion is stored in the cache
+        (the key's params are the job's complete argv, its input & output filepaths taken out)
+
+  The pool:
+    n_workers defaults to the number of cores (os.cpu_count());
+    the ffmpeg processes run with the given niceness (default 10), so the machine stays responsive;
+    an aggregate progress line is printed at each job's end (done/total, failures, bytes, ETA)
+
+  Adaptation note:
+    the workers are threads, each one driving one ffmpeg child process, ie, the pool is a pool of
+    ffmpeg processes (the conversion work is all in ffmpeg, a Python process per job would add nothing);
+    the niceness is applied by prefixing the argv with "nice -n <niceness>" (a preexec_fn is not thread-safe)
+
+  Clients:
+    ~/bin/batchFfmpegConvertDeux.py (and thus ~/bin/batchWalkFfmpegConvertDeux.py)
+    ~/bin/moveUnderExtensionCopyingDirStructure.py (its -c= option converts into the target tree)
+    ~/bin/batchWalkDeleteMp3split.py (stale temp files)
+
+  Usage:
+    jobs = [ConversionJob(src, trg, ['-acodec', 'libmp3lame', '-b:a', '32k', '-ar', '22050'])]
+    results = ConversionEngine(n_workers=4).run(jobs)
+"""
+import concurrent.futures
+import os
+import shutil
+import subprocess
+import threading
+import time
+import lblib.os.conversion_cache as convcache
+import lblib.os.localstate as lst
+DEFAULT_NICENESS = 10
+TEMPFILE_MARK = '.converting-'
+FFMPEG_BASE_ARGV = ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y']
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+STATUS_SKIPPED = 'skipped'
+STATUS_CACHED = 'cached'
+
+
+def form_tempfilepath(trg_filepath) -> str:
+  """
+  Format: ".{name}.converting-{pid}-{thread_ident}{ext}" in the target's folder
+  Example: "/a/b/song.cnv.mp3" => "/a/b/.song.cnv.converting-1234-140213.mp3"
+  """
+  dirpath, filename = os.path.split(trg_filepath)
+  name, ext = os.path.splitext(filename)
+  return os.path.join(dirpath, f".{name}{TEMPFILE_MARK}{os.getpid()}-{threading.get_ident()}{ext}")
+
+
+def is_tempfilename(filename) -> bool:
+  return filename.startswith('.') and TEMPFILE_MARK in filename
+
+
+def remove_stale_tempfiles(dirpath) -> list[str]:
+  """
+  Removes the temp files that an interrupted conversion left in dirpath, returns their filenames
+    (only files of processes that are not alive anymore are removed)
+  """
+  removed = []
+  try:
+    entries = list(os.scandir(dirpath))
+  except OSError:
+    return removed
+  for entry in entries:
+    if not is_tempfilename(entry.name) or not entry.is_file(follow_symlinks=False):
+      continue
+    pidpart = entry.name.split(TEMPFILE_MARK, 1)[1].split('-', 1)[0]
+    if pidpart.isdigit() and lst.is_pid_alive(int(pidpart)):
+      continue
+    try:
+      os.remove(entry.path)
+      removed.append(entry.name)
+    except OSError:
+      pass
+  return removed
+
+
+class ConversionJob:
+
+  def __init__(self, src_filepath, trg_filepath, codec_args, label=None, b_cacheable=False):
+    """
+    codec_args: the ffmpeg arguments between the input and the output, e.g. ['-vcodec', 'libx264']
+    b_cacheable: whether the engine's conversion cache (if any) is looked up and fed with this job
+    """
+    self.src_filepath = src_filepath
+    self.trg_filepath = trg_filepath
+    self.codec_args = list(codec_args)
+    self.label = label or os.path.basename(trg_filepath)
+    self.b_cacheable = b_cacheable
+
+  def form_argv(self, out_filepath) -> list[str]:
+    return FFMPEG_BASE_ARGV + ['-i', self.src_filepath] + self.codec_args + [out_filepath]
+
+  @property
+  def cache_params(self) -> tuple:
+    return convcache.form_params_fr_argv(self.form_argv(self.trg_filepath), self.src_filepath, self.trg_filepath)
+
+  def __str__(self):
+    return f"ConversionJob: [{self.src_filepath}] => [{self.trg_filepath}]"
+
+
+class ConversionResult:
+
+  def __init__(self, job, status, returncode=None, elapsed_secs=0.0, stderr=''):
+    self.job = job
+    self.status = status
+    self.returncode = returncode
+    self.elapsed_secs = elapsed_secs
+    self.stderr = stderr
+
+  @property
+  def ok(self) -> bool:
+    return self.status == STATUS_OK
+
+  @property
+  def last_stderr_lines(self) -> str:
+    lines = (self.stderr or '').strip().splitlines()
+    return '\n'.join(lines[-5:])
+
+  def __str__(self):
+    outstr = f"""ConversionResult: {self.status} | returncode = {self.returncode} | {self.elapsed_secs:.1f}s
+    {self.job}"""
+    return outstr
+
+
+class ProgressReport:
+  """
+  Aggregate progress of a run, printed (one line) at each job's end
+  """
+
+  def __init__(self, n_total, src_total_bytes):
+    self.n_total = n_total
+    self.src_total_bytes = src_total_bytes
+    self.n_done = 0
+    self.n_ok = 0
+    self.n_failed = 0
+    self.n_skipped = 0
+    self.n_cached = 0
+    self.src_done_bytes = 0
+    self.start = time.monotonic()
+    self.lock = threading.Lock()
+
+  @property
+  def elapsed_secs(self):
+    return time.monotonic() - self.start
+
+  def get_eta_secs_or_none(self) -> float | None:
+    """
+    The ETA is estimated by the source bytes converted so far (the conversion time goes with the media's length)
+    """
+    if self.src_done_bytes == 0 or self.src_total_bytes == 0:
+      return None
+    rate = self.src_done_bytes / max(self.elapsed_secs, 1e-6)
+    return (self.src_total_bytes - self.src_done_bytes) / rate
+
+  def note(self, result: ConversionResult, src_bytes):
+    with self.lock:
+      self.n_done += 1
+      if result.status == STATUS_OK:
+        self.n_ok += 1
+      elif result.status == STATUS_FAILED:
+        self.n_failed += 1
+      elif result.status == STATUS_CACHED:
+        self.n_cached += 1
+      else:
+        self.n_skipped += 1
+      # the skipped (and cached) ones do not enter the ETA rate
+      if result.status in (STATUS_SKIPPED, STATUS_CACHED):
+        self.src_total_bytes -= src_bytes
+      else:
+        self.src_done_bytes += src_bytes
+      eta_secs = self.get_eta_secs_or_none()
+      etastr = '?' if eta_secs is None else f"{eta_secs:.0f}s"
+      scrmsg = (f"[{self.n_done}/{self.n_total}] ok={self.n_ok} failed={self.n_failed} skipped={self.n_skipped}"
+                f" cached={self.n_cached}"
+                f" | {self.src_done_bytes / 2**20:.1f}/{self.src_total_bytes / 2**20:.1f} MiB"
+                f" | elapsed {self.elapsed_secs:.0f}s eta {etastr} | {result.status}: {result.job.label}")
+      print(scrmsg)
+
+  def __str__(self):
+    outstr = f"""Conversion totals: {self.n_total} jobs | ok = {self.n_ok} | failed = {self.n_failed}"""
+    outstr += f""" | skipped = {self.n_skipped} | cached = {self.n_cached} | elapsed = {self.elapsed_secs:.1f}s"""
+    return outstr
+
+
+class ConversionEngine:
+
+  def __init__(self, n_workers=None, niceness=DEFAULT_NICENESS, b_show_progress=True, cache=None):
+    """
+    cache: a lblib.os.conversion_cache.ConversionCache (or None for no caching)
+    """
+    self.n_workers = max(1, n_workers or os.cpu_count() or 1)
+    self.cache = cache
+    self.niceness = niceness
+    self.b_show_progress = b_show_progress
+    # "nice" is a POSIX utility; without it (or with niceness 0) ffmpeg runs at the caller's priority
+    self.nice_argv = []
+    if niceness and shutil.which('nice') is not None:
+      self.nice_argv = ['nice', '-n', str(niceness)]
+    self.progress = None
+
+  def convert(self, job: ConversionJob) -> ConversionResult:
+    """
+    Runs one job (called by the pool's threads)
+    """
+    if os.path.exists(job.trg_filepath):
+      return ConversionResult(job, STATUS_SKIPPED)
+    b_cacheable = self.cache is not None and job.b_cacheable
+    try:
+      if b_cacheable and self.cache.materialize(job.src_filepath, job.cache_params, job.trg_filepath):
+        return ConversionResult(job, STATUS_CACHED)
+    except OSError as e:
+      # e.g. EACCES on the target's folder or a cache object that went missing
+      return ConversionResult(job, STATUS_FAILED, stderr=f"cache materialize: {e}")
+    tempfilepath = form_tempfilepath(job.trg_filepath)
+    argv = self.nice_argv + job.form_argv(tempfilepath)
+    start = time.monotonic()
+    try:
+      completed = subprocess.run(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, text=True, errors='replace')
+      returncode, stderr = completed.returncode, completed.stderr
+    except OSError as e:
+      returncode, stderr = None, str(e)
+    elapsed_secs = time.monotonic() - start
+    if returncode == 0 and os.path.isfile(tempfilepath):
+      try:
+        os.replace(tempfilepath, job.trg_filepath)
+      except OSError as e:
+        returncode, stderr = None, f"rename to target: {e}"
+      else:
+        if b_cacheable:
+          try:
+            self.cache.store(job.src_filepath, job.cache_params, job.trg_filepath)
+          except OSError as e:
+            # the target is whole, only the cache missed this one (a full disk, a permission)
+            wrnmsg = f"Warning: not cached [{job.trg_filepath}] => {e}"
+            print(wrnmsg)
+        return ConversionResult(job, STATUS_OK, returncode, elapsed_secs, stderr)
+    try:
+      os.remove(tempfilepath)
+    except OSError:
+      pass
+    return ConversionResult(job, STATUS_FAILED, returncode, elapsed_secs, stderr)
+
+  def _convert_n_report(self, job, src_bytes) -> ConversionResult:
+    try:
+      result = self.convert(job)
+    except OSError as e:
+      # one job's filesystem error (EXDEV, EACCES, ...) fails that job, not the whole batch
+      result = ConversionResult(job, STATUS_FAILED, stderr=str(e))
+    if self.progress is not None:
+      self.progress.note(result, src_bytes)
+    return result
+
+  def run(self, jobs) -> list[ConversionResult]:
+    """
+    Runs the jobs in the pool and returns their results in the jobs' order
+    """
+    jobs = list(jobs)
+    src_sizes = []
+    for job in jobs:
+      try:
+        src_sizes.append(os.path.getsize(job.src_filepath))
+      except OSError:
+        src_sizes.append(0)
+    self.progress = ProgressReport(len(jobs), sum(src_sizes)) if self.b_show_progress else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+      futures = [executor.submit(self._convert_n_report, job, size) for job, size in zip(jobs, src_sizes)]
+      try:
+        results = [future.result() for future in futures]
+      except KeyboardInterrupt:
+        # the queued jobs are dropped; the running ffmpegs got the SIGINT too (same process group)
+        for future in futures:
+          future.cancel()
+        raise
+    if self.progress is not None:
+      print(self.progress)
+      if self.cache is not None:
+        print(self.cache)
+      for result in results:
+        if result.status == STATUS_FAILED:
+          scrmsg = f"Failed: {result.job.src_filepath}\n{result.last_stderr_lines}"
+          print(scrmsg)
+    return results
+
+  def __str__(self):
+    outstr = f"""ConversionEngine: workers = {self.n_workers} | niceness = {self.niceness} | nice_argv = {self.nice_argv}"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  srcfilepath = os.path.join(tmpdir, 'tone.wav')
+  subprocess.run(FFMPEG_BASE_ARGV + ['-f', 'lavfi', '-i', 'sine=frequency=440:duration=2', srcfilepath])
+  jobs = [
+    ConversionJob(srcfilepath, os.path.join(tmpdir, f'tone{i}.mp3'), ['-acodec', 'libmp3lame', '-b:a', '32k'])
+    for i in range(4)
+  ]
+  jobs.append(ConversionJob(os.path.join(tmpdir, 'missing.wav'), os.path.join(tmpdir, 'missing.mp3'), []))
+  engine = ConversionEngine(n_workers=2)
+  print(engine)
+  engine.run(jobs)
+  print(sorted(os.listdir(tmpdir)))
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
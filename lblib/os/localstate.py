@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/localstate.py
+
+  Where the lblib modules keep their local state (caches, indices, leases)
+    and whether the process that owns a piece of that state is still alive.
+
+  The cache dir is $XDG_CACHE_HOME/lblib (XDG_CACHE_HOME defaults to ~/.cache), used by:
+    lblib/os/conversion_cache.py, lblib/os/media_metadata.py, lblib/os/treescanner.py,
+    lblib/ytfunctions/ytdlp_formatprobe.py, lblib/ytfunctions/ytid_catalog.py, lblib/ytfunctions/ytid_repoindex.py
+  The runtime dir is $XDG_RUNTIME_DIR/lblib (its contents do not survive a reboot), else the cache dir, used by:
+    lblib/os/rate_governor.py
+  is_pid_alive() is used by lblib/os/rate_governor.py (dead leases) and lblib/os/ffmpeg_engine.py (stale temp files)
+
+  Usage:
+    dbfilepath = get_lblib_cachedir_abspath('media_metadata.sqlite')
+"""
+import os
+LBLIB_DIRNAME = 'lblib'
+
+
+def get_xdg_cachebase_abspath() -> str:
+  return os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+
+def get_lblib_cachedir_abspath(*subparts) -> str:
+  """
+  Examples: () => "~/.cache/lblib" | ('treescan', 'abc.json') => "~/.cache/lblib/treescan/abc.json"
+  """
+  return os.path.join(get_xdg_cachebase_abspath(), LBLIB_DIRNAME, *subparts)
+
+
+def get_lblib_runtimedir_abspath(*subparts) -> str:
+  """
+  XDG_RUNTIME_DIR is preferred for state that should not outlive a reboot, the cache dir is the fallback
+  """
+  runtimebase = os.environ.get('XDG_RUNTIME_DIR') or get_xdg_cachebase_abspath()
+  return os.path.join(runtimebase, LBLIB_DIRNAME, *subparts)
+
+
+def is_pid_alive(pid) -> bool:
+  try:
+    os.kill(pid, 0)
+  except ProcessLookupError:
+    return False
+  except PermissionError:
+    # it exists, it's only owned by someone else
+    return True
+  except OSError:
+    return False
+  return True
+
+
+def adhoctest1():
+  print('cachedir =', get_lblib_cachedir_abspath())
+  print('runtimedir =', get_lblib_runtimedir_abspath())
+  print('is_pid_alive(own pid) =', is_pid_alive(os.getpid()))
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
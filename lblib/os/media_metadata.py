@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/media_metadata.py
+
+  The MediaMetadataService gives the ffprobe metadata (duration, bitrate, format, streams & codecs)
+    of many media files at once:
+    1 - a (SQLite) cache keeps each file's metadata keyed by its path, size and mtime,
+        so a file is probed again only if it was changed (or replaced) since its last probe
+    2 - the files not in the cache are probed concurrently in a bounded thread pool
+        (each thread drives one ffprobe process; default 4 at a time, as ffprobe mostly waits on the disk)
+    3 - probe_many() returns them all in bulk (a dict filepath => MediaInfo)
+    Thus a rename-by-duration pass over thousands of files costs one ffprobe per new file only.
+
+  ffprobe runs as "ffprobe -v error -print_format json -show_format -show_streams <file>",
+    its output read as text (utf-8), which fixes the bytes/str problem of the former
+    renameAudioDurationIncluder.probe_n_return_json()
+
+  A file that ffprobe fails on gets a MediaInfo with its error (and no duration), cached as well
+    (the same path, size and mtime would fail again); ffprobe itself missing is not cached.
+
+  The database file (WAL mode) is, in this order:
+    a) the dbfilepath given to the constructor
+    b) the environment variable LBLIB_MEDIAPROBE_DB
+    c) $XDG_CACHE_HOME/lblib/media_metadata.sqlite (XDG_CACHE_HOME defaults to ~/.cache)
+
+  Clients:
+    ~/bin/lblib/os/media_duration.py (for the files whose headers it could not parse), thus
+      ~/bin/renameAudioDurationIncluder.py
+      ~/bin/calcAverageDurationAs2ndWordInFile.py (its -p option)
+
+  Usage:
+    service = MediaMetadataService()
+    for filepath, info in service.probe_many(filepaths).items():
+      print(info.duration_secs, info.audio_codec, filepath)
+
+  CLI:
+    media_metadata.py [<file> ...] (default: the files in the current folder)
+"""
+import concurrent.futures
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+import lblib.os.localstate as lst
+MEDIAPROBE_DB_ENVVAR = 'LBLIB_MEDIAPROBE_DB'
+DEFAULT_DB_FILENAME = 'media_metadata.sqlite'
+DEFAULT_N_WORKERS = 4
+FFPROBE_ARGV = ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams']
+# the stream fields kept (the whole ffprobe json is not)
+STREAM_KEYS = [
+  'index', 'codec_type', 'codec_name', 'duration', 'bit_rate',
+  'sample_rate', 'channels', 'width', 'height', 'avg_frame_rate',
+]
+SQL_IN_BATCHSIZE = 500
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS probes (
+  filepath TEXT PRIMARY KEY,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  duration_secs REAL,
+  bitrate INTEGER,
+  format_name TEXT,
+  streams_json TEXT,
+  error TEXT,
+  probed_ts REAL NOT NULL
+);
+"""
+
+
+def get_default_dbfilepath() -> str:
+  dbfilepath = os.environ.get(MEDIAPROBE_DB_ENVVAR)
+  if dbfilepath:
+    return dbfilepath
+  return lst.get_lblib_cachedir_abspath(DEFAULT_DB_FILENAME)
+
+
+def to_float_or_none(value) -> float | None:
+  try:
+    return float(value)
+  except (TypeError, ValueError):
+    return None
+
+
+def to_int_or_none(value) -> int | None:
+  try:
+    return int(value)
+  except (TypeError, ValueError):
+    return None
+
+
+class MediaInfo:
+  """
+  The metadata of one file:
+    duration_secs: the container's duration or, missing it, the longest stream's (None if unknown)
+    bitrate: the container's overall bit rate (bits/s)
+    streams: a list of dicts with the STREAM_KEYS ffprobe gave
+    error: None or the reason ffprobe failed
+  """
+
+  def __init__(self, filepath, size, mtime_ns, duration_secs=None, bitrate=None,
+               format_name=None, streams=None, error=None):
+    self.filepath = filepath
+    self.size = size
+    self.mtime_ns = mtime_ns
+    self.duration_secs = duration_secs
+    self.bitrate = bitrate
+    self.format_name = format_name
+    self.streams = streams or []
+    self.error = error
+
+  @classmethod
+  def from_ffprobe_dict(cls, filepath, size, mtime_ns, probed):
+    fmt = probed.get('format', {})
+    streams = [{k: stream[k] for k in STREAM_KEYS if k in stream} for stream in probed.get('streams', [])]
+    duration_secs = to_float_or_none(fmt.get('duration'))
+    if duration_secs is None:
+      stream_durations = [to_float_or_none(stream.get('duration')) for stream in streams]
+      stream_durations = [d for d in stream_durations if d is not None]
+      duration_secs = max(stream_durations) if stream_durations else None
+    return cls(
+      filepath, size, mtime_ns, duration_secs, to_int_or_none(fmt.get('bit_rate')),
+      fmt.get('format_name'), streams,
+    )
+
+  def get_codec_or_none(self, codec_type):
+    for stream in self.streams:
+      if stream.get('codec_type') == codec_type:
+        return stream.get('codec_name')
+    return None
+
+  @property
+  def audio_codec(self):
+    return self.get_codec_or_none('audio')
+
+  @property
+  def video_codec(self):
+    return self.get_codec_or_none('video')
+
+  @property
+  def ok(self) -> bool:
+    return self.error is None
+
+  def __str__(self):
+    outstr = f"""MediaInfo: [{os.path.basename(self.filepath)}] | duration = {self.duration_secs}s"""
+    outstr += f""" | bitrate = {self.bitrate} | format = {self.format_name}"""
+    outstr += f""" | audio = {self.audio_codec} | video = {self.video_codec}"""
+    if self.error is not None:
+      outstr += f""" | error = {self.error}"""
+    return outstr
+
+
+def run_ffprobe(filepath, size, mtime_ns, timeout_secs=120) -> MediaInfo:
+  """
+  Runs in the pool's threads; raises OSError if ffprobe itself cannot be run
+  """
+  try:
+    completed = subprocess.run(
+      FFPROBE_ARGV + [filepath], stdin=subprocess.DEVNULL, capture_output=True,
+      text=True, encoding='utf-8', errors='replace', timeout=timeout_secs,
+    )
+  except subprocess.TimeoutExpired:
+    return MediaInfo(filepath, size, mtime_ns, error=f"ffprobe timed out after {timeout_secs}s")
+  if completed.returncode != 0:
+    error = completed.stderr.strip().splitlines()[-1:] or [f"ffprobe returned {completed.returncode}"]
+    return MediaInfo(filepath, size, mtime_ns, error=error[0])
+  try:
+    probed = json.loads(completed.stdout)
+  except ValueError:
+    return MediaInfo(filepath, size, mtime_ns, error='ffprobe gave no json')
+  return MediaInfo.from_ffprobe_dict(filepath, size, mtime_ns, probed)
+
+
+class MediaMetadataService:
+
+  def __init__(self, dbfilepath=None, n_workers=DEFAULT_N_WORKERS):
+    self.dbfilepath = dbfilepath or get_default_dbfilepath()
+    self.n_workers = max(1, n_workers or 1)
+    dbdir_abspath = os.path.dirname(os.path.abspath(self.dbfilepath))
+    os.makedirs(dbdir_abspath, exist_ok=True)
+    self.conn = sqlite3.connect(self.dbfilepath, timeout=60)
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute('PRAGMA synchronous=NORMAL')
+    self.conn.executescript(SCHEMA_SQL)
+    self.conn.commit()
+    self.n_cached = 0
+    self.n_probed = 0
+
+  def _fetch_rows(self, filepaths) -> dict:
+    rows_by_filepath = {}
+    for i in range(0, len(filepaths), SQL_IN_BATCHSIZE):
+      batch = filepaths[i:i + SQL_IN_BATCHSIZE]
+      placeholders = ','.join('?' * len(batch))
+      sql = f"""SELECT filepath, size, mtime_ns, duration_secs, bitrate, format_name, streams_json, error
+        FROM probes WHERE filepath IN ({placeholders})"""
+      for row in self.conn.execute(sql, batch):
+        rows_by_filepath[row[0]] = row
+    return rows_by_filepath
+
+  def _store(self, infos):
+    now = time.time()
+    with self.conn:
+      self.conn.executemany(
+        'INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        [(info.filepath, info.size, info.mtime_ns, info.duration_secs, info.bitrate, info.format_name,
+          json.dumps(info.streams), info.error, now) for info in infos],
+      )
+
+  def probe_many(self, filepaths) -> dict[str, MediaInfo]:
+    """
+    Returns filepath => MediaInfo for the given files (as absolute paths; a missing file is left out)
+    """
+    stats = {}
+    for filepath in filepaths:
+      filepath = os.path.abspath(filepath)
+      try:
+        st = os.stat(filepath)
+      except OSError:
+        continue
+      stats[filepath] = (st.st_size, st.st_mtime_ns)
+    infos = {}
+    to_probe = []
+    rows_by_filepath = self._fetch_rows(list(stats))
+    for filepath, (size, mtime_ns) in stats.items():
+      row = rows_by_filepath.get(filepath)
+      if row is not None and row[1] == size and row[2] == mtime_ns:
+        streams = json.loads(row[6]) if row[6] else []
+        infos[filepath] = MediaInfo(filepath, size, mtime_ns, row[3], row[4], row[5], streams, row[7])
+        self.n_cached += 1
+      else:
+        to_probe.append((filepath, size, mtime_ns))
+    if len(to_probe) > 0:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+        probed = list(executor.map(lambda args: run_ffprobe(*args), to_probe))
+      self._store(probed)
+      self.n_probed += len(probed)
+      infos.update((info.filepath, info) for info in probed)
+    return infos
+
+  def probe(self, filepath) -> MediaInfo | None:
+    return self.probe_many([filepath]).get(os.path.abspath(filepath))
+
+  def get_durations_secs(self, filepaths) -> dict[str, float | None]:
+    return {filepath: info.duration_secs for filepath, info in self.probe_many(filepaths).items()}
+
+  def close(self):
+    self.conn.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+    return False
+
+  def __str__(self):
+    n_rows = self.conn.execute('SELECT count(*) FROM probes').fetchone()[0]
+    outstr = f"""MediaMetadataService: [{self.dbfilepath}] | workers = {self.n_workers}
+    cached files = {n_rows} | this run: from cache = {self.n_cached} | probed = {self.n_probed}"""
+    return outstr
+
+
+def process():
+  """
+  Prints the metadata of the given files (or of the files in the current folder)
+  """
+  filepaths = sys.argv[1:]
+  if len(filepaths) == 0:
+    filepaths = sorted(entry.path for entry in os.scandir('.') if entry.is_file())
+  with MediaMetadataService() as service:
+    for filepath, info in sorted(service.probe_many(filepaths).items()):
+      print(info)
+    print(service)
+
+
+if __name__ == '__main__':
+  process()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/pcm_streamer.py
+
+  stream_convert_to_mp3() converts a media file to mp3 with the decoded audio (PCM) flowing
+    in bounded chunks from an ffmpeg decoder process to an ffmpeg encoder process:
+
+      ffmpeg -i <input> ... -f nut -c:a pcm_s16le pipe:1  =>  [chunk buffer]  =>  ffmpeg -f nut -i pipe:0 ... <output.mp3>
+
+  pydub's AudioSegment.from_file(), in contrast, decodes the whole input into the Python process
+    before exporting, ie, a 3-hour lecture (44.1 kHz, stereo, 16 bits) is about 1.9 GB of PCM in memory;
+    here the memory is fixed: one chunk (default 1 MiB, a preallocated buffer reused with readinto)
+    plus the two pipes' kernel buffers plus each ffmpeg's own (constant) buffers, whatever the duration.
+
+  The PCM travels inside a NUT stream (a streamable container), so the samplerate and the channel layout
+    go along with it (a bare s16le stream would need them probed beforehand).
+
+  As in lblib/os/ffmpeg_engine.py, the encoder writes to a temporary name that is renamed (os.replace)
+    to the output name only when both processes succeeded.
+
+  Clients:
+    ~/bin/mp3ConvertViaPydub.py (its --stream option)
+    ~/bin/benchmarkMp3ConventViaFfmegViaPydub.py (the pcm-stream variant)
+
+  Usage:
+    stats = stream_convert_to_mp3('lecture.mp4', 'lecture.mp3', '64k', 22050)
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import lblib.os.ffmpeg_engine as ffeng
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+FFMPEG_COMMON_ARGS = ['-nostdin', '-hide_banner', '-loglevel', 'error']
+
+
+class StreamConversionError(RuntimeError):
+  pass
+
+
+class StreamStats:
+
+  def __init__(self, input_file, output_file, chunk_bytes):
+    self.input_file = input_file
+    self.output_file = output_file
+    self.chunk_bytes = chunk_bytes
+    self.pcm_bytes = 0
+    self.n_chunks = 0
+    self.elapsed_secs = 0.0
+
+  def __str__(self):
+    outstr = f"""StreamStats: [{os.path.basename(self.output_file)}] | pcm = {self.pcm_bytes / 2**20:.1f} MiB"""
+    outstr += f""" in {self.n_chunks} chunks of {self.chunk_bytes // 1024} KiB | elapsed = {self.elapsed_secs:.1f}s"""
+    return outstr
+
+
+def form_decoder_argv(input_file, samplerate, channels=None, ffmpeg_bin='ffmpeg') -> list[str]:
+  argv = [ffmpeg_bin] + FFMPEG_COMMON_ARGS + ['-i', input_file, '-vn', '-ar', str(samplerate)]
+  if channels is not None:
+    argv += ['-ac', str(channels)]
+  return argv + ['-c:a', 'pcm_s16le', '-f', 'nut', 'pipe:1']
+
+
+def form_encoder_argv(output_file, bitrate, ffmpeg_bin='ffmpeg') -> list[str]:
+  return [ffmpeg_bin] + FFMPEG_COMMON_ARGS + ['-y', '-f', 'nut', '-i', 'pipe:0', '-b:a', bitrate, '-f', 'mp3', output_file]
+
+
+def read_stderr_tail(stderr_file, n_lines=5) -> str:
+  stderr_file.seek(0)
+  lines = stderr_file.read().decode('utf-8', errors='replace').strip().splitlines()
+  return '\n'.join(lines[-n_lines:])
+
+
+def pump_chunks(reader, writer, chunk_bytes, stats):
+  """
+  Copies reader to writer through one preallocated buffer of chunk_bytes
+  """
+  buffer = bytearray(chunk_bytes)
+  view = memoryview(buffer)
+  while True:
+    n_read = reader.readinto(buffer)
+    if not n_read:
+      return
+    writer.write(view[:n_read])
+    stats.pcm_bytes += n_read
+    stats.n_chunks += 1
+
+
+def stream_convert_to_mp3(
+    input_file, output_file, bitrate, samplerate,
+    channels=None, chunk_bytes=DEFAULT_CHUNK_BYTES, ffmpeg_bin='ffmpeg',
+  ) -> StreamStats:
+  """
+  Raises StreamConversionError (with the end of ffmpeg's stderr) if the decoder or the encoder fails
+    the one reported is the one that failed first: if the encoder quits early, the decoder gets
+    a broken pipe (or is stopped) and its failure is not the cause
+  """
+  stats = StreamStats(input_file, output_file, chunk_bytes)
+  tempfilepath = ffeng.form_tempfilepath(output_file)
+  start = time.monotonic()
+  with tempfile.TemporaryFile() as dec_stderr, tempfile.TemporaryFile() as enc_stderr:
+    decoder = subprocess.Popen(
+      form_decoder_argv(input_file, samplerate, channels, ffmpeg_bin),
+      stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=dec_stderr, bufsize=0,
+    )
+    encoder = subprocess.Popen(
+      form_encoder_argv(tempfilepath, bitrate, ffmpeg_bin),
+      stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=enc_stderr, bufsize=0,
+    )
+    b_encoder_quit_early = False
+    try:
+      pump_chunks(decoder.stdout, encoder.stdin, chunk_bytes, stats)
+    except BrokenPipeError:
+      # the encoder quit before the end of the PCM (its stderr tells why); the decoder is stopped below
+      b_encoder_quit_early = True
+    except BaseException:
+      decoder.kill()
+      encoder.kill()
+      raise
+    finally:
+      decoder.stdout.close()
+      try:
+        encoder.stdin.close()
+      except BrokenPipeError:
+        b_encoder_quit_early = True
+      enc_returncode = encoder.wait()
+      if b_encoder_quit_early and decoder.poll() is None:
+        decoder.kill()
+      dec_returncode = decoder.wait()
+      stats.elapsed_secs = time.monotonic() - start
+    errmsg = None
+    enc_errmsg = f"ffmpeg encoder returned {enc_returncode} for [{output_file}]\n{read_stderr_tail(enc_stderr)}"
+    if b_encoder_quit_early:
+      # the decoder's failure (a kill or a broken pipe) is only a consequence: the encoder's is the one reported
+      errmsg = enc_errmsg if enc_returncode != 0 else f"ffmpeg encoder quit before the end of the input for [{output_file}]"
+    elif dec_returncode != 0:
+      # the decoder failed first: the encoder's failure, if any, is a consequence of its truncated input
+      errmsg = f"ffmpeg decoder returned {dec_returncode} for [{input_file}]\n{read_stderr_tail(dec_stderr)}"
+    elif enc_returncode != 0:
+      errmsg = enc_errmsg
+    if errmsg is not None:
+      try:
+        os.remove(tempfilepath)
+      except OSError:
+        pass
+      raise StreamConversionError(errmsg)
+  os.replace(tempfilepath, output_file)
+  return stats
+
+
+def process():
+  """
+  pcm_streamer.py <input> <output.mp3> [bitrate, default 64k] [samplerate, default 22050]
+  """
+  if len(sys.argv) < 3:
+    print(process.__doc__)
+    return
+  bitrate = sys.argv[3] if len(sys.argv) > 3 else '64k'
+  samplerate = int(sys.argv[4]) if len(sys.argv) > 4 else 22050
+  stats = stream_convert_to_mp3(sys.argv[1], sys.argv[2], bitrate, samplerate)
+  print(stats)
+
+
+if __name__ == '__main__':
+  process()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/pdf_pagecounter.py
+
+  Counts the pages of many pdf files:
+    1 - fast path: the page total is the /Count of the page tree's root, reached from the trailer
+        (trailer /Root => the catalog's /Pages => the pages root's /Count), ie, only the file's tail,
+        the xref table(s) and two small objects are read (the file is memory-mapped),
+        instead of constructing a PdfReader that parses the whole document
+        (the objects are located by the xref table, following the /Prev chain of incremental updates;
+        a cross-reference stream [PDF 1.5+] is decoded likewise, itself only: its /W, /Index & PNG predictor,
+        so the file is never scanned for object headers)
+    2 - fallback: PyPDF2's PdfReader, when the fast path cannot answer
+        (a catalog inside a compressed object stream, an indirect /Count, an xref offset that does not
+        point at its object, an unsupported xref stream filter, a damaged file)
+    3 - the files are counted in a process pool (the PdfReader fallback is CPU-bound)
+    4 - a per-folder cache (the hidden file ".pdfpagecounts.json" in each folder)
+        keeps filename => (size, mtime, page total), so an unchanged pdf is not opened again
+
+  Client:
+    ~/bin/pdfsPageCounter.py
+
+  Usage:
+    counts = count_pages_in_pool(filepaths)  # filepath => n_pages (None if it could not be counted)
+    n_pages = read_pdf_pagecount_fast_or_none(filepath)
+
+  CLI:
+    pdf_pagecounter.py [<pdffile> ...] (default: the pdfs in the current folder)
+"""
+import concurrent.futures
+import json
+import mmap
+import os
+import re
+import sys
+import zlib
+try:
+  from PyPDF2 import PdfReader
+  from PyPDF2.errors import PdfReadError
+except ImportError:
+  # only the fast path is then available
+  PdfReader = None
+  PdfReadError = ValueError
+FOLDER_CACHE_FILENAME = '.pdfpagecounts.json'
+# the tail where "startxref" is looked for (the spec says the last 1024 bytes; some writers append junk)
+TAIL_SEARCH_BYTES = 4096
+OBJ_DICT_MAX_BYTES = 8192
+MAX_XREF_SECTIONS = 64
+ref_pattern_fmt = rb'/%s\s+(\d+)\s+(\d+)\s+R'
+cmpld_root_ref_pattern = re.compile(ref_pattern_fmt % b'Root')
+cmpld_pages_ref_pattern = re.compile(ref_pattern_fmt % b'Pages')
+cmpld_prev_pattern = re.compile(rb'/Prev\s+(\d+)')
+# the \b keeps the lookahead from being beaten by backtracking: "/Count 12 0 R" must not match as "1"
+cmpld_count_pattern = re.compile(rb'/Count\s+(\d+)\b(?!\s+\d+\s+R)')
+cmpld_indirect_count_pattern = re.compile(rb'/Count\s+\d+\s+\d+\s+R')
+cmpld_w_pattern = re.compile(rb'/W\s*\[\s*(\d+)\s+(\d+)\s+(\d+)\s*\]')
+cmpld_index_pattern = re.compile(rb'/Index\s*\[([\d\s]*)\]')
+cmpld_size_pattern = re.compile(rb'/Size\s+(\d+)')
+cmpld_length_pattern = re.compile(rb'/Length\s+(\d+)\b(?!\s+\d+\s+R)')
+cmpld_predictor_pattern = re.compile(rb'/Predictor\s+(\d+)')
+cmpld_columns_pattern = re.compile(rb'/Columns\s+(\d+)')
+cmpld_xref_subsection_pattern = re.compile(rb'\s*(\d+)\s+(\d+)\s*[\r\n]')
+STRATEGY_FAST = 'fast'
+STRATEGY_PYPDF2 = 'pypdf2'
+STRATEGY_CACHED = 'cached'
+
+
+def find_startxref_or_none(mm) -> int | None:
+  tail_start = max(0, len(mm) - TAIL_SEARCH_BYTES)
+  pos = mm.rfind(b'startxref', tail_start)
+  if pos < 0:
+    return None
+  match = re.match(rb'startxref\s+(\d+)', mm[pos:pos + 40])
+  return int(match.group(1)) if match else None
+
+
+def find_obj_offset_in_xref_tables_or_none(mm, xref_offset, objnum) -> tuple[int | None, bytes | None]:
+  """
+  Walks the classic xref tables (the last one first, then its /Prev's)
+  Returns (the object's offset or None, the last trailer dict seen or None [a cross-reference stream])
+  """
+  first_trailer = None
+  for _ in range(MAX_XREF_SECTIONS):
+    if mm[xref_offset:xref_offset + 4] != b'xref':
+      return None, first_trailer
+    pos = xref_offset + 4
+    found_offset = None
+    while True:
+      match = cmpld_xref_subsection_pattern.match(mm, pos)
+      if match is None:
+        break
+      first_num, count = int(match.group(1)), int(match.group(2))
+      pos = match.end()
+      # the entries are 20 bytes each: "oooooooooo ggggg n\r\n"
+      while mm[pos:pos + 1] in (b'\r', b'\n', b' '):
+        pos += 1
+      if first_num <= objnum < first_num + count and found_offset is None:
+        entry = mm[pos + (objnum - first_num) * 20:pos + (objnum - first_num) * 20 + 18]
+        if entry[17:18] == b'n':
+          found_offset = int(entry[0:10])
+      pos += count * 20
+    trailer_pos = mm.find(b'trailer', pos, pos + 64)
+    trailer = mm[trailer_pos:trailer_pos + OBJ_DICT_MAX_BYTES] if trailer_pos >= 0 else b''
+    if first_trailer is None:
+      first_trailer = trailer
+    if found_offset is not None:
+      return found_offset, first_trailer
+    prev_match = cmpld_prev_pattern.search(trailer)
+    if prev_match is None:
+      return None, first_trailer
+    xref_offset = int(prev_match.group(1))
+  return None, first_trailer
+
+
+def undo_png_predictor_or_none(data, n_columns) -> bytes | None:
+  """
+  The PNG predictors (/Predictor >= 10) of an xref stream: each row is a filter-type byte + n_columns bytes
+    only None (0), Sub (1) & Up (2) are met in xref streams, the others give None (the slow path then)
+  """
+  rowsize = n_columns + 1
+  if n_columns <= 0 or len(data) % rowsize != 0:
+    return None
+  out = bytearray()
+  prev_row = bytearray(n_columns)
+  for start in range(0, len(data), rowsize):
+    filter_type, row = data[start], bytearray(data[start + 1:start + rowsize])
+    if filter_type == 1:
+      for i in range(1, n_columns):
+        row[i] = (row[i] + row[i - 1]) & 0xFF
+    elif filter_type == 2:
+      for i in range(n_columns):
+        row[i] = (row[i] + prev_row[i]) & 0xFF
+    elif filter_type != 0:
+      return None
+    out += row
+    prev_row = row
+  return bytes(out)
+
+
+def read_xref_stream_or_none(mm, xref_offset) -> tuple[bytes, dict] | None:
+  """
+  Decodes the cross-reference stream at xref_offset (and only it)
+  Returns (its dictionary, {objnum: (type, field2, field3)}) or None if it cannot be decoded here
+  """
+  if not re.match(rb'\s*\d+\s+\d+\s+obj', mm[xref_offset:xref_offset + 40]):
+    return None
+  chunk = mm[xref_offset:xref_offset + OBJ_DICT_MAX_BYTES]
+  stream_pos = chunk.find(b'stream')
+  if stream_pos < 0:
+    return None
+  xref_dict = chunk[:stream_pos]
+  data_start = xref_offset + stream_pos + len(b'stream')
+  data_start += 2 if mm[data_start:data_start + 2] == b'\r\n' else 1
+  length_match = cmpld_length_pattern.search(xref_dict)
+  if length_match is not None:
+    data_end = data_start + int(length_match.group(1))
+  else:
+    # an indirect /Length: the stream ends at its "endstream"
+    data_end = mm.find(b'endstream', data_start)
+    if data_end < 0:
+      return None
+  data = mm[data_start:data_end]
+  if b'/Filter' in xref_dict:
+    if b'/FlateDecode' not in xref_dict:
+      return None
+    try:
+      data = zlib.decompress(data)
+    except zlib.error:
+      return None
+  w_match = cmpld_w_pattern.search(xref_dict)
+  if w_match is None:
+    return None
+  widths = [int(w) for w in w_match.groups()]
+  predictor_match = cmpld_predictor_pattern.search(xref_dict)
+  if predictor_match is not None and int(predictor_match.group(1)) >= 10:
+    columns_match = cmpld_columns_pattern.search(xref_dict)
+    n_columns = int(columns_match.group(1)) if columns_match else 1
+    data = undo_png_predictor_or_none(data, n_columns)
+    if data is None:
+      return None
+  index_match = cmpld_index_pattern.search(xref_dict)
+  if index_match is not None:
+    numbers = [int(n) for n in index_match.group(1).split()]
+  else:
+    size_match = cmpld_size_pattern.search(xref_dict)
+    numbers = [0, int(size_match.group(1))] if size_match else []
+  entries, pos, entrysize = {}, 0, sum(widths)
+  for first_num, count in zip(numbers[0::2], numbers[1::2]):
+    for objnum in range(first_num, first_num + count):
+      entry = data[pos:pos + entrysize]
+      pos += entrysize
+      if len(entry) < entrysize:
+        return xref_dict, entries
+      fields, fpos = [], 0
+      for width in widths:
+        fields.append(int.from_bytes(entry[fpos:fpos + width], 'big'))
+        fpos += width
+      # a zero-width type field means type 1
+      entries[objnum] = (fields[0] if widths[0] > 0 else 1, fields[1], fields[2])
+  return xref_dict, entries
+
+
+def find_obj_offset_in_xref_streams_or_none(mm, xref_offset, objnum) -> int | None:
+  """
+  Walks the cross-reference streams (the last one first, then its /Prev's)
+    an object in a compressed object stream (type 2) or free (type 0) gives None (the slow path then)
+  """
+  for _ in range(MAX_XREF_SECTIONS):
+    xref_stream = read_xref_stream_or_none(mm, xref_offset)
+    if xref_stream is None:
+      return None
+    xref_dict, entries = xref_stream
+    if objnum in entries:
+      objtype, field2, _ = entries[objnum]
+      return field2 if objtype == 1 else None
+    prev_match = cmpld_prev_pattern.search(xref_dict)
+    if prev_match is None:
+      return None
+    xref_offset = int(prev_match.group(1))
+  return None
+
+
+def read_obj_dict_bytes_or_none(mm, offset) -> bytes | None:
+  if offset is None or offset >= len(mm):
+    return None
+  chunk = mm[offset:offset + OBJ_DICT_MAX_BYTES]
+  end = chunk.find(b'endobj')
+  stream_pos = chunk.find(b'stream')
+  for cut in (end, stream_pos):
+    if cut >= 0:
+      chunk = chunk[:cut]
+  return chunk
+
+
+def read_pdf_pagecount_from_mmap_or_none(mm) -> int | None:
+  xref_offset = find_startxref_or_none(mm)
+  if xref_offset is None or xref_offset >= len(mm):
+    return None
+  b_classic_xref = mm[xref_offset:xref_offset + 4] == b'xref'
+  if b_classic_xref:
+    _, trailer = find_obj_offset_in_xref_tables_or_none(mm, xref_offset, -1)
+  else:
+    # a cross-reference stream: its (uncompressed) dictionary has the trailer's keys
+    trailer = read_obj_dict_bytes_or_none(mm, xref_offset)
+  root_match = cmpld_root_ref_pattern.search(trailer or b'')
+  if root_match is None:
+    return None
+
+  def find_obj_dict(objnum, gennum):
+    if b_classic_xref:
+      offset, _ = find_obj_offset_in_xref_tables_or_none(mm, xref_offset, objnum)
+    else:
+      offset = find_obj_offset_in_xref_streams_or_none(mm, xref_offset, objnum)
+    if offset is None or not re.match(rb'\s*%d\s+%d\s+obj' % (objnum, gennum), mm[offset:offset + 40]):
+      # a damaged xref: the slow path takes it (the file is not scanned for the object here)
+      return None
+    return read_obj_dict_bytes_or_none(mm, offset)
+
+  catalog = find_obj_dict(int(root_match.group(1)), int(root_match.group(2)))
+  pages_match = cmpld_pages_ref_pattern.search(catalog or b'')
+  if pages_match is None:
+    return None
+  pages_root = find_obj_dict(int(pages_match.group(1)), int(pages_match.group(2)))
+  # the pages root's dict may have its /Kids array before its /Count, but no nested /Count
+  if cmpld_indirect_count_pattern.search(pages_root or b''):
+    return None
+  count_match = cmpld_count_pattern.search(pages_root or b'')
+  if count_match is None:
+    return None
+  n_pages = int(count_match.group(1))
+  return n_pages if n_pages > 0 else None
+
+
+def read_pdf_pagecount_fast_or_none(filepath) -> int | None:
+  try:
+    with open(filepath, 'rb') as f:
+      with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return read_pdf_pagecount_from_mmap_or_none(mm)
+  except (OSError, ValueError, IndexError):
+    # ValueError: an empty file cannot be mmap'ed (or a malformed number)
+    return None
+
+
+def read_pdf_pagecount_via_pypdf2_or_none(filepath) -> int | None:
+  if PdfReader is None:
+    return None
+  try:
+    with open(filepath, 'rb') as fd:
+      pdf_obj = PdfReader(fd)  # PdfFileReader got deprecated
+      return len(pdf_obj.pages)  # pdf_obj.getNumPages() got deprecated
+  except (PdfReadError, ValueError, OSError):  # PyPDF2.errors.PdfReadError
+    return None
+
+
+def count_pages_or_none(filepath) -> tuple[int | None, str | None]:
+  """
+  Returns (n_pages or None, the strategy that counted them); runs in the pool's processes
+  """
+  n_pages = read_pdf_pagecount_fast_or_none(filepath)
+  if n_pages is not None:
+    return n_pages, STRATEGY_FAST
+  n_pages = read_pdf_pagecount_via_pypdf2_or_none(filepath)
+  if n_pages is not None:
+    return n_pages, STRATEGY_PYPDF2
+  return None, None
+
+
+def count_pages_in_pool(filepaths, n_workers=None) -> dict[str, tuple[int | None, str | None]]:
+  """
+  filepath => (n_pages or None, strategy); a single file (or n_workers=1) is counted in this process
+  """
+  filepaths = list(filepaths)
+  n_workers = max(1, n_workers or os.cpu_count() or 1)
+  if len(filepaths) <= 1 or n_workers == 1:
+    return {filepath: count_pages_or_none(filepath) for filepath in filepaths}
+  with concurrent.futures.ProcessPoolExecutor(max_workers=min(n_workers, len(filepaths))) as executor:
+    chunksize = max(1, len(filepaths) // (n_workers * 4))
+    return dict(zip(filepaths, executor.map(count_pages_or_none, filepaths, chunksize=chunksize)))
+
+
+class FolderPageCountCache:
+  """
+  The hidden ".pdfpagecounts.json" in a folder: filename => [size, mtime_ns, n_pages]
+  """
+
+  def __init__(self, folder_absdir):
+    self.folder_absdir = folder_absdir
+    self.entries = {}
+    self.b_changed = False
+    self.load()
+
+  @property
+  def filepath(self):
+    return os.path.join(self.folder_absdir, FOLDER_CACHE_FILENAME)
+
+  def load(self):
+    try:
+      with open(self.filepath, 'r', encoding='utf-8') as f:
+        self.entries = json.load(f)
+    except (OSError, ValueError):
+      self.entries = {}
+
+  def get_or_none(self, filename) -> int | None:
+    entry = self.entries.get(filename)
+    if entry is None:
+      return None
+    try:
+      st = os.stat(os.path.join(self.folder_absdir, filename))
+    except OSError:
+      return None
+    if [st.st_size, st.st_mtime_ns] != entry[:2]:
+      return None
+    return entry[2]
+
+  def put(self, filename, n_pages):
+    try:
+      st = os.stat(os.path.join(self.folder_absdir, filename))
+    except OSError:
+      return
+    self.entries[filename] = [st.st_size, st.st_mtime_ns, n_pages]
+    self.b_changed = True
+
+  def rename(self, oldfilename, newfilename):
+    """
+    A rename keeps size & mtime, so the entry goes along
+    """
+    entry = self.entries.pop(oldfilename, None)
+    if entry is not None:
+      self.entries[newfilename] = entry
+      self.b_changed = True
+
+  def save(self):
+    if not self.b_changed:
+      return
+    # the entries of files no longer in the folder are dropped
+    self.entries = {
+      filename: entry for filename, entry in self.entries.items()
+      if os.path.isfile(os.path.join(self.folder_absdir, filename))
+    }
+    tmpfilepath = f"{self.filepath}.{os.getpid()}.tmp"
+    try:
+      with open(tmpfilepath, 'w', encoding='utf-8') as f:
+        json.dump(self.entries, f)
+      os.replace(tmpfilepath, self.filepath)
+      self.b_changed = False
+    except OSError:
+      # a read-only folder: no cache, the counting still works
+      pass
+
+
+def process():
+  """
+  Prints the page total (and how it was found) of the given pdfs (or of those in the current folder)
+  """
+  filepaths = sys.argv[1:]
+  if len(filepaths) == 0:
+    filepaths = sorted(entry.path for entry in os.scandir('.') if entry.name.lower().endswith('.pdf'))
+  for filepath, (n_pages, strategy) in count_pages_in_pool(filepaths).items():
+    print(f"{str(n_pages):>6} {str(strategy):>7} | {filepath}")
+
+
+if __name__ == '__main__':
+  process()
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/rate_governor.py
+
+  The RateGovernor class shares one total download bandwidth among all downloads
+    running at the same time on this machine, be they threads of one script (--jobs)
+    or different scripts, namely:
+      ~/bin/dlYouTubeWhenThereAreDubbed2.py
+      ~/bin/dlYouTubeIdsLookingUpFormats.py
+      ~/bin/dlYouTubeIdsAs278or160.py
+
+  How it works:
+    1 - every download registers (acquires) a lease in a small json state file
+        guarded by a file lock (fcntl.flock), ie, a lease is a record {pid, label, rate, ts}
+    2 - the governor works as a token bucket whose tokens are bytes/second:
+        the bucket holds the total bandwidth, each lease takes out its rate
+        and puts it back when it's released (or when its pid is found dead)
+    3 - a new lease is granted out of what is left in the bucket, split among the slots still to come:
+          (total - in use) / (expected - running), where "expected" is the greatest n_expected_leases
+          among the running leases and this governor (e.g. --jobs times the prefetch --audiojobs),
+          and also counts the downloads that are waiting for a share (so a lone sequential caller,
+          at n_expected_leases=1, takes the whole budget only while nobody else is waiting);
+        once expected is reached, each newcomer gets at most total / (running + 1);
+        if the grant would be below the minimum share, the download waits (polling) until some rate
+        is given back; after max_wait_secs, it takes whatever is left, however small (no starving),
+        but the sum of the granted rates never goes above the total
+    4 - the granted rate is passed on to yt-dlp (or youtube-dl) as "-r <rate>" (--limit-rate)
+
+  Adaptation note:
+    yt-dlp has no way to change its rate limit after it started,
+    so the share is decided when each download starts (a running download keeps its rate
+    until it ends). The rate of a finished lease goes back to the bucket and, as the remainder is
+    what gets split, the next yt-dlp call (the next format or language of a running ytid included)
+    takes it, ie the line is kept saturated with the sum of the granted rates not above the total.
+
+  The total bandwidth is taken (in this order) from:
+    a) the parameter given to the constructor (e.g. the --bandwidth CLI parameter)
+    b) the environment variable LBLIB_DLD_BANDWIDTH
+    if neither is given, the governor is disabled (no "-r" is added and no waiting happens)
+  Rates are given as yt-dlp takes them: bytes per second with an optional K, M or G sufix,
+    examples: "500K", "2.5M", "1G", "300000"
+  A bad rate raises ValueError; CLI scripts check it upfront with get_total_bps_or_exit()
+"""
+import json
+import os
+import sys
+import threading
+import time
+import lblib.os.localstate as lst
+try:
+  import fcntl
+except ImportError:
+  # non-POSIX systems: the inter-process lock is skipped (the thread lock still applies)
+  fcntl = None
+BANDWIDTH_ENVVAR = 'LBLIB_DLD_BANDWIDTH'
+DEFAULT_STATE_FILENAME = 'rate_governor.json'
+DEFAULT_MIN_SHARE_FRACTION = 0.1  # a lease never gets less than 1/10 of the total
+DEFAULT_MAX_WAIT_SECS = 600
+DEFAULT_POLL_SECS = 5.0
+RATE_MULTIPLIERS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def trans_ratestr_to_bps_or_none(ratestr) -> int | None:
+  """
+  Examples: "500K" => 512000 | "2.5M" => 2621440 | "300000" => 300000 | None or "" => None
+  Raises ValueError for an unparseable rate string
+  """
+  if ratestr is None:
+    return None
+  ratestr = str(ratestr).strip().upper().rstrip('B')
+  if ratestr == '':
+    return None
+  sufix = ratestr[-1] if ratestr[-1] in RATE_MULTIPLIERS else ''
+  number = ratestr[:-1] if sufix else ratestr
+  try:
+    bps = int(float(number) * RATE_MULTIPLIERS[sufix])
+  except (ValueError, OverflowError):
+    errmsg = f"Error: rate [{ratestr}] is not valid (examples: 500K, 2.5M, 300000)"
+    raise ValueError(errmsg)
+  if bps <= 0:
+    errmsg = f"Error: rate [{ratestr}] should be greater than zero"
+    raise ValueError(errmsg)
+  return bps
+
+
+def get_total_bps_or_exit(total_bandwidth=None, usage_func=None) -> int | None:
+  """
+  Validates the total bandwidth (the CLI parameter, else the environment variable) before any download starts
+    on a bad value: calls usage_func(errmsg) if given (e.g. argparse's parser.error), else prints and exits
+  """
+  source = '--bandwidth'
+  if total_bandwidth is None:
+    total_bandwidth = os.environ.get(BANDWIDTH_ENVVAR)
+    source = f"${BANDWIDTH_ENVVAR}"
+  try:
+    return trans_ratestr_to_bps_or_none(total_bandwidth)
+  except ValueError as e:
+    errmsg = f"{source}: {e}"
+    if usage_func is not None:
+      usage_func(errmsg)
+    print(errmsg)
+    sys.exit(1)
+
+
+def trans_bps_to_ratestr(bps) -> str:
+  """
+  The inverse of the above, in the form yt-dlp's --limit-rate takes, example: 2621440 => "2560K"
+  """
+  if bps >= 1024 ** 2 and bps % 1024 ** 2 == 0:
+    return f"{bps // 1024 ** 2}M"
+  if bps >= 1024:
+    return f"{bps // 1024}K"
+  return f"{bps}"
+
+
+def get_default_statedir_abspath() -> str:
+  """
+  XDG_RUNTIME_DIR is preferred because its contents do not survive a reboot (the leases shouldn't either)
+  """
+  return lst.get_lblib_runtimedir_abspath()
+
+
+class Lease:
+  """
+  A granted share of the total bandwidth, it's a context manager:
+    with governor.acquire('dubbed ytid=abcABC123-_') as lease:
+      argv = ['yt-dlp'] + lease.ratelimit_args + [...]
+  """
+
+  def __init__(self, governor, lease_id, rate_bps):
+    self.governor = governor
+    self.lease_id = lease_id
+    self.rate_bps = rate_bps
+
+  @property
+  def ratelimit_args(self) -> list[str]:
+    """
+    The yt-dlp (also youtube-dl) argv part for this lease, empty when the governor is disabled
+    """
+    if self.rate_bps is None:
+      return []
+    return ['-r', trans_bps_to_ratestr(self.rate_bps)]
+
+  def release(self):
+    if self.lease_id is not None:
+      self.governor.release(self.lease_id)
+      self.lease_id = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.release()
+    return False
+
+  def __str__(self):
+    ratestr = 'unlimited' if self.rate_bps is None else trans_bps_to_ratestr(self.rate_bps)
+    return f"Lease id={self.lease_id} rate={ratestr}"
+
+
+class RateGovernor:
+
+  # the threads of one process also take the state file in turns
+  _thread_lock = threading.Lock()
+  _lease_counter = 0
+
+  def __init__(
+      self,
+      total_bandwidth=None,
+      statedir_abspath=None,
+      n_expected_leases=1,
+      min_share_fraction=DEFAULT_MIN_SHARE_FRACTION,
+      max_wait_secs=DEFAULT_MAX_WAIT_SECS,
+      poll_secs=DEFAULT_POLL_SECS,
+    ):
+    if total_bandwidth is None:
+      total_bandwidth = os.environ.get(BANDWIDTH_ENVVAR)
+    self.total_bps = trans_ratestr_to_bps_or_none(total_bandwidth)
+    self.statedir_abspath = statedir_abspath or get_default_statedir_abspath()
+    # a caller that knows it'll run N downloads at once (--jobs N) passes N, so that the first one does not take all
+    self.n_expected_leases = max(1, n_expected_leases or 1)
+    self.min_share_bps = None if self.total_bps is None else max(1024, int(self.total_bps * min_share_fraction))
+    self.max_wait_secs = max_wait_secs
+    self.poll_secs = poll_secs
+
+  @property
+  def is_enabled(self) -> bool:
+    return self.total_bps is not None
+
+  @property
+  def statefilepath(self):
+    return os.path.join(self.statedir_abspath, DEFAULT_STATE_FILENAME)
+
+  @property
+  def lockfilepath(self):
+    return self.statefilepath + '.lock'
+
+  def _read_leases(self) -> dict:
+    try:
+      with open(self.statefilepath, 'r', encoding='utf-8') as f:
+        leases = json.load(f)
+    except (OSError, ValueError):
+      return {}
+    # leases of processes that died (a kill -9, a crash) are given back to the bucket
+    return {lid: lease for lid, lease in leases.items() if lst.is_pid_alive(lease.get('pid', -1))}
+
+  def _write_leases(self, leases):
+    tmpfilepath = f"{self.statefilepath}.{os.getpid()}.tmp"
+    with open(tmpfilepath, 'w', encoding='utf-8') as f:
+      json.dump(leases, f, indent=1)
+    os.replace(tmpfilepath, self.statefilepath)
+
+  def _with_state_locked(self, func):
+    """
+    Runs func(leases) -> result with the state file locked (threads and processes)
+      func may change leases in place, they are written back afterwards
+    """
+    os.makedirs(self.statedir_abspath, exist_ok=True)
+    with self._thread_lock:
+      with open(self.lockfilepath, 'a') as lockfile:
+        if fcntl is not None:
+          fcntl.flock(lockfile.fileno(), fcntl.LOCK_EX)
+        try:
+          leases = self._read_leases()
+          result = func(leases)
+          self._write_leases(leases)
+          return result
+        finally:
+          if fcntl is not None:
+            fcntl.flock(lockfile.fileno(), fcntl.LOCK_UN)
+
+  def _next_lease_id(self) -> str:
+    RateGovernor._lease_counter += 1
+    return f"{os.getpid()}-{threading.get_ident()}-{RateGovernor._lease_counter}"
+
+  def try_grant(self, label, b_below_min_ok=False) -> Lease | None:
+    """
+    Grants the share of what is left in the bucket (see the module docstring) or None, meanwhile
+      registering a waiting record (rate 0) that the other grants count as an expected lease,
+      if that share falls below the minimum share
+      (with b_below_min_ok=True whatever is left is granted, but never more, and None only if nothing is left)
+    The waiting record is keyed by pid+thread, the next try_grant() of the same download replaces it
+    """
+    waiter_id = f"wait-{os.getpid()}-{threading.get_ident()}"
+
+    def grant(leases):
+      leases.pop(waiter_id, None)
+      running = [lease for lease in leases.values() if lease['rate'] > 0]
+      n_waiting = len(leases) - len(running)
+      used_bps = sum(lease['rate'] for lease in running)
+      left_bps = max(0, self.total_bps - used_bps)
+      n_expected = max([self.n_expected_leases] + [lease.get('expected', 1) for lease in running])
+      n_participants = len(running) + n_waiting + 1
+      if n_participants <= n_expected:
+        # the remainder is split among the expected slots not yet running (this one and the waiting included)
+        rate_bps = left_bps // (n_expected - len(running))
+      else:
+        rate_bps = min(left_bps // (n_waiting + 1), self.total_bps // n_participants)
+      if rate_bps < self.min_share_bps:
+        if not b_below_min_ok or left_bps <= 0:
+          leases[waiter_id] = {'pid': os.getpid(), 'label': label, 'rate': 0, 'ts': time.time()}
+          return None
+        rate_bps = left_bps
+      lease_id = self._next_lease_id()
+      leases[lease_id] = {
+        'pid': os.getpid(), 'label': label, 'rate': rate_bps, 'expected': self.n_expected_leases, 'ts': time.time(),
+      }
+      return Lease(self, lease_id, rate_bps)
+    return self._with_state_locked(grant)
+
+  def give_up_waiting(self):
+    waiter_id = f"wait-{os.getpid()}-{threading.get_ident()}"
+    self._with_state_locked(lambda leases: leases.pop(waiter_id, None))
+
+  def acquire(self, label='') -> Lease:
+    """
+    Returns a Lease, waiting for the bucket to have at least the minimum share
+      (after max_wait_secs, whatever is left is taken, however small, but the total is never exceeded)
+    """
+    if not self.is_enabled:
+      return Lease(self, None, None)
+    start = time.monotonic()
+    b_told_user = False
+    try:
+      while True:
+        b_below_min_ok = time.monotonic() - start >= self.max_wait_secs
+        lease = self.try_grant(label, b_below_min_ok)
+        if lease is not None:
+          return lease
+        if not b_told_user:
+          scrmsg = f"RateGovernor: bandwidth budget in use, waiting for a share | {label}"
+          print(scrmsg)
+          b_told_user = True
+        time.sleep(self.poll_secs)
+    except BaseException:
+      # an interrupted wait (Ctrl+C, a SystemExit) must not leave its waiting record behind
+      self.give_up_waiting()
+      raise
+
+  def release(self, lease_id):
+    self._with_state_locked(lambda leases: leases.pop(lease_id, None))
+
+  def get_active_leases(self) -> dict:
+    return self._with_state_locked(lambda leases: dict(leases))
+
+  def __str__(self):
+    if not self.is_enabled:
+      return f"RateGovernor: disabled (set --bandwidth or ${BANDWIDTH_ENVVAR} to enable it)"
+    leases = self.get_active_leases()
+    used_bps = sum(lease['rate'] for lease in leases.values())
+    n_running = len([lease for lease in leases.values() if lease['rate'] > 0])
+    outstr = f"""RateGovernor: total = {trans_bps_to_ratestr(self.total_bps)}/s | in use = {trans_bps_to_ratestr(used_bps)}/s
+    active leases = {n_running} | waiting = {len(leases) - n_running} | state = [{self.statefilepath}]"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  governor = RateGovernor('4M', statedir_abspath=tempfile.mkdtemp(), n_expected_leases=3, max_wait_secs=0)
+  leases = [governor.acquire(f'download {i}') for i in range(3)]
+  for lease in leases:
+    print(lease, lease.ratelimit_args)
+  print(governor)
+  # the third download is the first to end: its rate goes to the next one (whatever the expectation)
+  leases[2].release()
+  leases[2] = RateGovernor('4M', statedir_abspath=governor.statedir_abspath).acquire('download 3')
+  print(leases[2], leases[2].ratelimit_args)
+  print(governor)
+  for lease in leases:
+    lease.release()
+  print(governor)
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
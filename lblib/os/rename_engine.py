@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/rename_engine.py
+
+  The rename engine behind the rename*.py scripts: a script supplies only a name transform,
+    ie, a function (filename, context) => new filename (or None for "not this one"),
+    and the engine does the rest:
+    1 - one os.scandir pass per directory (the files, optionally filtered by extensions, in sorted order;
+        context.seq & context.total give the file's position for the numbering transforms;
+        with b_include_dirs, the subdirectories as well)
+    2 - the whole plan is computed before any rename, with its problems found up front:
+        a) invalid new names (empty, with a '/', '.' or '..')
+        b) collisions: two files mapped to the same new name, or a new name that is taken
+           by a file that stays (neither is renamed, the pair goes to plan.conflicts)
+        c) cycles (A => B, B => A; A => B => C => A): these are fine, thanks to 3
+    3 - apply: two-phase, ie, every file of the plan is first renamed to a temporary name
+        (".<runid>-<n>.renaming"), then every temporary name to its new name,
+        so that chains and cycles never overwrite one another
+        (a new name found taken at phase 2, by some other process, is not overwritten:
+         that file goes back to its old name)
+    4 - every run streams a crash-safe journal (fsync'd, lblib/os/rename_journal.py),
+        a hidden file in the run's directory; with it, undo_run() reverses a whole run
+        and resume_run() completes an interrupted one, each in a single (two-phase) pass
+        (the CLI: ~/bin/renameUndo.py)
+    5 - tree mode: the directories below the given one are listed by one TreeScanner pass,
+        then each one is planned and applied as an independent task in a thread pool
+        (renames in different directories are independent; with b_include_dirs, the levels are applied
+        the deepest first, so a directory is renamed after its own contents);
+        print_throughput() reports each directory's entries/s
+    6 - RegexSubstitutionSet: an ordered set of regex substitutions, compiled once, is a ready-made transform
+
+  Clients:
+    ~/bin/renamePrefix.py, renameSufix.py, renameReplace12.py, renameCleanRegExp.py,
+    renameCleanMidStr.py, renamePrefixingSeqNumbers.py, renameAsSeqNumbersEraseFormerNames.py,
+    renameWithNewNameListingFileAndExt.py, renameBasedOnInputTextfile.py, renameUndo.py
+
+  Usage:
+    def transform(filename, context):
+      return 'prefix ' + filename
+    run_renames(transform, dot_exts=['.mp4'], b_recursive=False, b_autoconfirm=False)
+    # or, step by step:
+    plans = plan_renames(transform, dirpath, dot_exts=['.mp4'])
+    print_plans(plans)
+    results, journal = apply_plans_with_journal(plans, dirpath)
+"""
+import concurrent.futures
+import os
+import re
+import time
+import lblib.os.rename_journal as rnjournal
+import lblib.os.treescanner as tscan
+TEMPNAME_SUFFIX = '.renaming'
+CONFLICT_INVALID_NAME = 'invalid new name'
+CONFLICT_SHARED_TARGET = 'another file gets the same new name'
+CONFLICT_TARGET_EXISTS = 'the new name is taken by a file that stays'
+
+
+def form_dot_exts(extensions) -> tuple | None:
+  """
+  ['mp4', '.pdf'] => ('.mp4', '.pdf'); None or [] => None (all files)
+  """
+  if not extensions:
+    return None
+  if isinstance(extensions, str):
+    extensions = [extensions]
+  return tuple(ext if ext.startswith('.') else '.' + ext for ext in extensions if ext)
+
+
+def is_valid_filename(filename) -> bool:
+  if not filename or filename in ('.', '..'):
+    return False
+  return os.sep not in filename and '\x00' not in filename
+
+
+def is_engine_filename(filename) -> bool:
+  if rnjournal.is_journal_filename(filename):
+    return True
+  return filename.startswith('.') and filename.endswith(TEMPNAME_SUFFIX)
+
+
+class RenameContext:
+  """
+  Passed to the name transform: dirpath, seq (1-based position in the sorted selection), total
+    & b_is_dir (with b_include_dirs, whether the name is a subdirectory's)
+  """
+
+  def __init__(self, dirpath, seq, total, b_is_dir=False):
+    self.dirpath = dirpath
+    self.seq = seq
+    self.total = total
+    self.b_is_dir = b_is_dir
+
+  @property
+  def zfill_size(self) -> int:
+    return len(str(self.total))
+
+
+class RegexSubstitutionSet:
+  """
+  An ordered set of regex substitutions, compiled once, usable as a name transform:
+    each (pattern, replacement) is applied in turn to the result of the previous one
+    (to the name without its extension, unless b_keep_ext is False; a directory name is taken whole)
+  """
+
+  def __init__(self, substitutions=(), b_keep_ext=True, flags=0):
+    self.b_keep_ext = b_keep_ext
+    self.flags = flags
+    self.cmpld_subs = []
+    for pattern, replacement in substitutions:
+      self.add(pattern, replacement)
+
+  def add(self, pattern, replacement=''):
+    """
+    Raises re.error for a bad pattern (before any file is looked at)
+    """
+    self.cmpld_subs.append((re.compile(pattern, self.flags), replacement))
+
+  def add_lines(self, lines):
+    """
+    One substitution per line: "<pattern> => <replacement>" or "<pattern>" (a removal);
+      empty lines and lines beginning with '#' are skipped
+    """
+    for line in lines:
+      line = line.rstrip('\r\n')
+      if line.strip() == '' or line.lstrip().startswith('#'):
+        continue
+      pattern, sep, replacement = line.partition(' => ')
+      self.add(pattern, replacement if sep else '')
+
+  def apply(self, name) -> str:
+    for cmpld_re, replacement in self.cmpld_subs:
+      name = cmpld_re.sub(replacement, name)
+    return name
+
+  def __call__(self, filename, context=None) -> str | None:
+    if self.b_keep_ext and not (context is not None and context.b_is_dir):
+      name, dot_ext = os.path.splitext(filename)
+    else:
+      name, dot_ext = filename, ''
+    newname = self.apply(name) + dot_ext
+    return newname if newname != filename else None
+
+  def __len__(self):
+    return len(self.cmpld_subs)
+
+  def __str__(self):
+    return ' | '.join(f"{cmpld_re.pattern!r} => {replacement!r}" for cmpld_re, replacement in self.cmpld_subs)
+
+
+class RenamePair:
+
+  def __init__(self, dirpath, oldname, newname):
+    self.dirpath = dirpath
+    self.oldname = oldname
+    self.newname = newname
+
+  @property
+  def oldpath(self):
+    return os.path.join(self.dirpath, self.oldname)
+
+  @property
+  def newpath(self):
+    return os.path.join(self.dirpath, self.newname)
+
+  def __str__(self):
+    return f"[{self.oldname}] => [{self.newname}]"
+
+
+class RenamePlan:
+  """
+  One directory's renames: pairs (to be applied), conflicts [(pair, reason)] and cycles (lists of oldnames)
+  """
+
+  def __init__(self, dirpath):
+    self.dirpath = dirpath
+    self.pairs = []
+    self.conflicts = []
+    self.cycles = []
+    self.n_listed = 0
+    self.plan_secs = 0.0
+
+  @property
+  def depth(self) -> int:
+    return self.dirpath.rstrip(os.sep).count(os.sep)
+
+  def find_cycles(self):
+    """
+    A cycle is a chain of pairs that comes back to its start (A => B => A)
+    """
+    newname_by_oldname = {pair.oldname: pair.newname for pair in self.pairs}
+    self.cycles, seen = [], set()
+    for start in newname_by_oldname:
+      if start in seen:
+        continue
+      chain, name = [], start
+      while name in newname_by_oldname and name not in seen:
+        seen.add(name)
+        chain.append(name)
+        name = newname_by_oldname[name]
+      if name in chain:
+        self.cycles.append(chain[chain.index(name):])
+
+  def __len__(self):
+    return len(self.pairs)
+
+
+class ApplyResult:
+
+  def __init__(self, plan):
+    self.plan = plan
+    self.done = []
+    self.failed = []  # [(pair, reason)]
+    self.apply_secs = 0.0
+
+  @property
+  def files_per_sec(self) -> float:
+    """
+    The directory's throughput: its listed entries over its planning + applying time
+    """
+    secs = self.plan.plan_secs + self.apply_secs
+    return self.plan.n_listed / secs if secs > 0 else 0.0
+
+
+def plan_dir(dirpath, transform, dot_exts=None, record=None, b_include_dirs=False) -> RenamePlan:
+  """
+  record: the dir's treescanner.DirRecord if the caller has already listed it (tree mode)
+  b_include_dirs: the subdirectories are renamed as well (as the files, they go through the dot_exts filter)
+  """
+  start = time.perf_counter()
+  plan = RenamePlan(dirpath)
+  if record is None:
+    with os.scandir(dirpath) as it:
+      entries = list(it)
+  else:
+    entries = record.dir_entries + record.file_entries
+  all_names = {entry.name for entry in entries}
+  # the journals & the temporary names (of a run in progress or interrupted) are never renamed
+  entries = [entry for entry in entries if not is_engine_filename(entry.name)]
+  dirnames = set() if record is None else set(record.dirnames)
+  if record is None and b_include_dirs:
+    dirnames = {entry.name for entry in entries if entry.is_dir(follow_symlinks=False)}
+  if not b_include_dirs:
+    entries = [entry for entry in entries if entry.is_file()]
+  filenames = sorted(entry.name for entry in entries)
+  if dot_exts is not None:
+    filenames = [filename for filename in filenames if filename.endswith(dot_exts)]
+  plan.n_listed = len(filenames)
+  candidates = []
+  for i, filename in enumerate(filenames):
+    newname = transform(filename, RenameContext(dirpath, i + 1, len(filenames), filename in dirnames))
+    if newname is None or newname == filename:
+      continue
+    candidates.append(RenamePair(dirpath, filename, newname))
+  # collisions: a new name shared by many, or taken by a name that is not renamed away
+  pairs_by_newname = {}
+  for pair in candidates:
+    pairs_by_newname.setdefault(pair.newname, []).append(pair)
+  oldnames_renamed_away = {pair.oldname for pair in candidates}
+  for pair in candidates:
+    if not is_valid_filename(pair.newname):
+      plan.conflicts.append((pair, CONFLICT_INVALID_NAME))
+    elif len(pairs_by_newname[pair.newname]) > 1:
+      plan.conflicts.append((pair, CONFLICT_SHARED_TARGET))
+    elif pair.newname in all_names and pair.newname not in oldnames_renamed_away:
+      plan.conflicts.append((pair, CONFLICT_TARGET_EXISTS))
+    else:
+      plan.pairs.append(pair)
+  # a pair whose new name is the old name of a conflicting pair (which stays) would collide too
+  changed = True
+  while changed:
+    staying = {pair.oldname for pair, _ in plan.conflicts}
+    changed = False
+    for pair in list(plan.pairs):
+      if pair.newname in staying:
+        plan.pairs.remove(pair)
+        plan.conflicts.append((pair, CONFLICT_TARGET_EXISTS))
+        changed = True
+  plan.find_cycles()
+  plan.plan_secs = time.perf_counter() - start
+  return plan
+
+
+def plan_renames(
+    transform, dirpath=None, dot_exts=None, b_recursive=False, n_workers=1, b_include_dirs=False,
+    b_keep_empty=False,
+  ) -> list[RenamePlan]:
+  """
+  The plans of dirpath or, with b_recursive, of its whole dirtree (only the non-empty ones, unless b_keep_empty)
+    in tree mode, the tree is listed by one TreeScanner pass, then each directory is planned
+    as an independent task in a pool of n_workers threads
+  """
+  dirpath = os.path.abspath(dirpath or '.')
+  dot_exts = form_dot_exts(dot_exts)
+  if not b_recursive:
+    plans = [plan_dir(dirpath, transform, dot_exts, b_include_dirs=b_include_dirs)]
+  else:
+    records = list(tscan.TreeScanner(dirpath, n_workers=n_workers).scan())
+
+    def plan_record(record):
+      return plan_dir(record.dirpath, transform, dot_exts, record, b_include_dirs)
+
+    if n_workers <= 1 or len(records) <= 1:
+      plans = [plan_record(record) for record in records]
+    else:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        plans = list(executor.map(plan_record, records))
+    plans.sort(key=lambda p: p.dirpath)
+  if not b_keep_empty:
+    plans = [plan for plan in plans if len(plan.pairs) + len(plan.conflicts) > 0]
+  return plans
+
+
+def apply_plan(plan, journal=None) -> ApplyResult:
+  """
+  Two-phase: all the plan's files to temporary names, then the temporary names to the new names
+    with a journal, the intents are fsync'd before the first rename (see lblib/os/rename_journal.py)
+  """
+  start = time.perf_counter()
+  result = ApplyResult(plan)
+  runid = journal.runid if journal is not None else rnjournal.form_runid()
+  intents = []
+  for i, pair in enumerate(plan.pairs):
+    try:
+      st = os.lstat(pair.oldpath)
+    except OSError as e:
+      result.failed.append((pair, str(e)))
+      continue
+    intents.append((pair, f".{runid}-{i}{TEMPNAME_SUFFIX}", st))
+  if journal is not None:
+    journal.write_intents([
+      {
+        'dirpath': plan.dirpath, 'oldname': pair.oldname, 'tempname': tempname, 'newname': pair.newname,
+        'inode': st.st_ino, 'dev': st.st_dev,
+      } for pair, tempname, st in intents
+    ])
+  # phase 1
+  staged = []
+  for pair, tempname, _ in intents:
+    try:
+      os.rename(pair.oldpath, os.path.join(plan.dirpath, tempname))
+    except OSError as e:
+      result.failed.append((pair, str(e)))
+      continue
+    staged.append((pair, tempname))
+  rnjournal.fsync_dir(plan.dirpath)
+  # phase 2
+  for pair, tempname in staged:
+    temppath = os.path.join(plan.dirpath, tempname)
+    reason = None
+    if os.path.lexists(pair.newpath):
+      # taken meanwhile (not by this plan, whose old names are all temporary now): the file goes back
+      reason = 'the new name was taken meanwhile'
+    else:
+      try:
+        os.rename(temppath, pair.newpath)
+      except OSError as e:
+        reason = str(e)
+    if reason is None:
+      result.done.append(pair)
+      if journal is not None:
+        journal.record_done(plan.dirpath, pair.newname)
+      continue
+    try:
+      os.rename(temppath, pair.oldpath)
+    except OSError:
+      reason += f" (the file was left as [{tempname}])"
+    result.failed.append((pair, reason))
+    if journal is not None:
+      journal.record_failed(plan.dirpath, pair.oldname, reason)
+  rnjournal.fsync_dir(plan.dirpath)
+  if journal is not None:
+    journal.sync()
+  result.apply_secs = time.perf_counter() - start
+  return result
+
+
+def apply_plans(plans, journal=None, n_workers=1) -> list[ApplyResult]:
+  """
+  The plans (one per directory) are applied level by level, the deepest first,
+    so that a renamed directory's own plan (one level below) has already been applied;
+    the directories of one level are independent tasks, applied in parallel when n_workers > 1
+  """
+  plans_by_depth = {}
+  for plan in plans:
+    plans_by_depth.setdefault(plan.depth, []).append(plan)
+  results_by_dirpath = {}
+  for depth in sorted(plans_by_depth, reverse=True):
+    level_plans = plans_by_depth[depth]
+    if n_workers <= 1 or len(level_plans) <= 1:
+      level_results = [apply_plan(plan, journal) for plan in level_plans]
+    else:
+      with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+        level_results = list(executor.map(lambda plan: apply_plan(plan, journal), level_plans))
+    results_by_dirpath.update((result.plan.dirpath, result) for result in level_results)
+  return [results_by_dirpath[plan.dirpath] for plan in plans]
+
+
+def apply_plans_with_journal(plans, root_dirpath, kind=rnjournal.KIND_RENAME, n_workers=1, origin=None):
+  """
+  Returns (results, journal); the journal is a hidden file in root_dirpath
+  """
+  journal = rnjournal.RenameJournal(root_dirpath, kind, origin=origin)
+  results = []
+  try:
+    results = apply_plans(plans, journal, n_workers)
+  finally:
+    n_done = sum(len(result.done) for result in results)
+    n_failed = sum(len(result.failed) for result in results)
+    journal.close(n_done, n_failed)
+  return results, journal
+
+
+def resolve_origin_run(journalpath, b_resume=False) -> tuple:
+  """
+  An undo or a resume acts on a rename run (its origin), so undoing or resuming it comes down to that run:
+    undoing a resume = undoing the rename; resuming a resume = resuming the rename;
+    undoing an undo = resuming (redoing) the rename; resuming an undo = undoing the rename
+  Returns (the rename run, b_resume as it applies to that run)
+  """
+  run = rnjournal.read_journal(journalpath)
+  seen = set()
+  while run.kind != rnjournal.KIND_RENAME and run.origin is not None and run.origin not in seen:
+    seen.add(run.origin)
+    if run.kind == rnjournal.KIND_UNDO:
+      b_resume = not b_resume
+    run = rnjournal.read_journal(os.path.join(os.path.dirname(os.path.abspath(run.journalpath)), run.origin))
+  return run, b_resume
+
+
+def plan_recovery(run, b_resume=False) -> tuple[list[RenamePlan], int]:
+  """
+  From a journal run, the plans that take every file (found by its inode) from the name it is under now
+    back to its old name (undo) or on to its new name (b_resume, for an interrupted run)
+  Returns (plans, n_missing), n_missing being the files found under none of their names
+  """
+  plans_by_dirpath, n_missing = {}, 0
+  for intent in run.intents:
+    at = rnjournal.locate_intent(intent)
+    if at is None:
+      n_missing += 1
+      continue
+    current = {rnjournal.AT_OLD: intent['oldname'], rnjournal.AT_TEMP: intent['tempname']}.get(at, intent['newname'])
+    target = intent['newname'] if b_resume else intent['oldname']
+    if current == target:
+      continue
+    plan = plans_by_dirpath.setdefault(intent['dirpath'], RenamePlan(intent['dirpath']))
+    plan.pairs.append(RenamePair(intent['dirpath'], current, target))
+  return sorted(plans_by_dirpath.values(), key=lambda p: p.dirpath), n_missing
+
+
+def recover_run(journalpath, b_resume=False, n_workers=1, max_rounds=64):
+  """
+  Undoes (or, with b_resume, completes) the run of the journal (see resolve_origin_run() for the
+    journals of undos & resumes); the recovery has its own journal, so it can itself be undone or resumed
+  It goes in rounds: with renamed directories (tree mode), the files below them are found only
+    once their directories are back under the names the journal has for them;
+    all the rounds go into one journal (opened at the first round that has something to rename)
+  Returns (results, n_missing, the recovery's journal or None if there was nothing to do)
+  """
+  run, b_resume = resolve_origin_run(journalpath, b_resume)
+  kind = rnjournal.KIND_RESUME if b_resume else rnjournal.KIND_UNDO
+  root_dirpath = os.path.dirname(os.path.abspath(run.journalpath))
+  origin = os.path.basename(run.journalpath)
+  all_results, n_missing, journal = [], 0, None
+  try:
+    for _ in range(max_rounds):
+      plans, n_missing = plan_recovery(run, b_resume)
+      if len(plans) == 0:
+        break
+      if journal is None:
+        journal = rnjournal.RenameJournal(root_dirpath, kind, origin=origin)
+      results = apply_plans(plans, journal, n_workers)
+      all_results += results
+      if sum(len(result.done) for result in results) == 0:
+        break
+  finally:
+    if journal is not None:
+      n_done = sum(len(result.done) for result in all_results)
+      n_failed = sum(len(result.failed) for result in all_results)
+      journal.close(n_done, n_failed)
+  return all_results, n_missing, journal
+
+
+def undo_run(journalpath, n_workers=1):
+  return recover_run(journalpath, False, n_workers)
+
+
+def resume_run(journalpath, n_workers=1):
+  return recover_run(journalpath, True, n_workers)
+
+
+def print_plans(plans, b_show_dirpath=False):
+  seq = 0
+  for plan in plans:
+    if b_show_dirpath or len(plans) > 1:
+      print('='*40)
+      print('Folder:', plan.dirpath)
+    for pair in plan.pairs:
+      seq += 1
+      print(seq, 'Rename:')
+      print('FROM: >>>%s' % pair.oldname)
+      print('TO:   >>>%s' % pair.newname)
+    for pair, reason in plan.conflicts:
+      print('Not renaming (%s):' % reason, pair)
+    for cycle in plan.cycles:
+      print('Cycle (solved by the two-phase rename):', ' => '.join(cycle + cycle[:1]))
+
+
+def confirm_plans(plans, default_yes=True) -> bool:
+  """
+  default_yes is what [ENTER] (an empty answer) means: each script keeps the default its former prompt had
+  """
+  n_pairs = sum(len(plan.pairs) for plan in plans)
+  if n_pairs == 0:
+    print('No files to rename.')
+    return False
+  if default_yes:
+    screen_msg = 'Confirm the %d renames above ? (*Y/n) ([ENTER] means Yes) ' % n_pairs
+    return input(screen_msg) in ['Y', 'y', '']
+  screen_msg = 'Confirm the %d renames above ? (y/*N) ([ENTER] means No) ' % n_pairs
+  return input(screen_msg) in ['Y', 'y']
+
+
+def print_throughput(results, plans=None, total_secs=None):
+  """
+  Per directory (those with renames): entries listed, renamed, planning & applying ms, entries/s;
+    then the totals (plans: all the directories planned, if the caller kept the empty plans)
+  """
+  print('-'*40)
+  print('Per-directory throughput (listed | renamed | plan ms | apply ms | entries/s | folder):')
+  for result in results:
+    plan = result.plan
+    scrmsg = f"{plan.n_listed:>7} | {len(result.done):>6} | {plan.plan_secs * 1000:>8.1f} | "
+    scrmsg += f"{result.apply_secs * 1000:>8.1f} | {result.files_per_sec:>10.0f} | {plan.dirpath}"
+    print(scrmsg)
+  plans = plans if plans is not None else [result.plan for result in results]
+  n_listed = sum(plan.n_listed for plan in plans)
+  n_done = sum(len(result.done) for result in results)
+  scrmsg = f"Folders = {len(plans)} | entries listed = {n_listed} | renamed = {n_done}"
+  if total_secs:
+    scrmsg += f" | {total_secs:.2f}s | {n_listed / total_secs:.0f} entries/s"
+  print(scrmsg)
+
+
+def print_results(results, journal=None):
+  n_pairs = sum(len(result.plan.pairs) for result in results)
+  n_done = sum(len(result.done) for result in results)
+  for result in results:
+    for pair, reason in result.failed:
+      print('Failed (%s):' % reason, pair)
+  print('-'*40)
+  print('Total renamed: %d of %d' % (n_done, n_pairs))
+  if journal is not None:
+    print('Journal:', journal.journalpath, '(renameUndo.py reverses the run)')
+
+
+def run_renames(
+    transform, dirpath=None, dot_exts=None, b_recursive=False, b_autoconfirm=False, n_workers=1,
+    b_include_dirs=False, b_show_pairs=True, b_report_throughput=False, default_yes=True,
+  ) -> list[ApplyResult]:
+  """
+  The scripts' whole job-chain: plan, show, confirm (unless b_autoconfirm), apply (with a journal), report
+    default_yes: whether [ENTER] confirms (@see confirm_plans())
+  """
+  start = time.perf_counter()
+  dirpath = os.path.abspath(dirpath or '.')
+  all_plans = plan_renames(
+    transform, dirpath, dot_exts, b_recursive, n_workers, b_include_dirs, b_keep_empty=True,
+  )
+  plans = [plan for plan in all_plans if len(plan.pairs) + len(plan.conflicts) > 0]
+  if b_show_pairs:
+    print_plans(plans)
+  n_pairs = sum(len(plan.pairs) for plan in plans)
+  if n_pairs == 0:
+    print('No files to rename.')
+    return []
+  if not b_autoconfirm and not confirm_plans(plans, default_yes):
+    print('Renames not confirmed.')
+    return []
+  plans = [plan for plan in plans if len(plan.pairs) > 0]
+  results, journal = apply_plans_with_journal(plans, dirpath, n_workers=n_workers)
+  if b_report_throughput:
+    print_throughput(results, all_plans, time.perf_counter() - start)
+  print_results(results, journal)
+  return results
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  for filename in ['a.txt', 'b.txt', 'c.txt', 'keep.txt', 'x.mp4']:
+    with open(os.path.join(tmpdir, filename), 'w') as f:
+      f.write(filename)
+  swap = {'a.txt': 'b.txt', 'b.txt': 'a.txt', 'c.txt': 'keep.txt'}
+  plans = plan_renames(lambda fn, ctx: swap.get(fn), tmpdir, ['txt'])
+  print_plans(plans)
+  _, journal = apply_plans_with_journal(plans, tmpdir)
+  print('after', {fn: open(os.path.join(tmpdir, fn)).read() for fn in sorted(os.listdir(tmpdir)) if fn.endswith('.txt')})
+  results, n_missing, _ = undo_run(journal.journalpath)
+  print('undone', sum(len(result.done) for result in results), 'missing', n_missing)
+  print('after undo', {fn: open(os.path.join(tmpdir, fn)).read() for fn in sorted(os.listdir(tmpdir)) if fn.endswith('.txt')})
+
+
+def process():
+  """
+  The engine has no CLI of its own: renameUndo.py undoes or resumes its runs
+  """
+  print(__doc__)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/rename_journal.py
+
+  The crash-safe journal of a rename run (written by lblib/os/rename_engine.py):
+    a hidden file ".renamejournal-<runid>.jsonl" in the run's directory (the tree's root in tree mode),
+    runid being <yyyymmdd-hhmmss-microseconds>-<pid>, one JSON record per line:
+      {"type": "run", "runid", "kind" ("rename" | "undo" | "resume"), "root", "origin", "ts"}
+        (origin: for an undo or a resume, the journal filename of the rename run it acted on)
+      {"type": "intent", "dirpath", "oldname", "tempname", "newname", "inode", "dev", "ts"}
+      {"type": "done", "dirpath", "newname", "ts"} | {"type": "failed", "dirpath", "oldname", "reason", "ts"}
+      {"type": "end", "n_done", "n_failed", "ts"}
+    The intents of a directory are written & fsync'd before its first rename (write-ahead),
+    the done/failed records are fsync'd (as is the directory itself) after each phase of the two-phase apply.
+    Thus, after a crash or a kill at any point, every file of the run is found
+    (by its inode) under one of its three names: old, temporary or new;
+    a run without its "end" record is an interrupted one.
+
+  locate_intent() tells which name a file is under now;
+    rename_engine.undo_run() & rename_engine.resume_run() (ie ~/bin/renameUndo.py) build on it
+
+  Usage:
+    journal = RenameJournal(root_dirpath)
+    journal.write_intents(intents)
+    journal.record_done(dirpath, newname)
+    journal.close(n_done, n_failed)
+    run = read_journal(journalpath)
+"""
+import datetime
+import json
+import os
+import sys
+import threading
+import time
+JOURNAL_PREFIX = '.renamejournal-'
+JOURNAL_SUFFIX = '.jsonl'
+KIND_RENAME = 'rename'
+KIND_UNDO = 'undo'
+KIND_RESUME = 'resume'
+AT_OLD = 'old'
+AT_TEMP = 'temp'
+AT_NEW = 'new'
+
+
+def form_runid() -> str:
+  return datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f') + f"-{os.getpid()}"
+
+
+def is_journal_filename(filename) -> bool:
+  return filename.startswith(JOURNAL_PREFIX) and filename.endswith(JOURNAL_SUFFIX)
+
+
+def fsync_dir(dirpath):
+  """
+  A rename is durable only when its directory is (POSIX); a no-op where directories cannot be opened
+  """
+  try:
+    fd = os.open(dirpath, os.O_RDONLY)
+  except OSError:
+    return
+  try:
+    os.fsync(fd)
+  except OSError:
+    pass
+  finally:
+    os.close(fd)
+
+
+def list_journals(dirpath) -> list[str]:
+  """
+  The journal files in dirpath, oldest first (the runid begins with its timestamp)
+  """
+  with os.scandir(dirpath) as it:
+    filenames = [entry.name for entry in it if is_journal_filename(entry.name)]
+  return [os.path.join(dirpath, filename) for filename in sorted(filenames)]
+
+
+class RenameJournal:
+
+  def __init__(self, root_dirpath, kind=KIND_RENAME, runid=None, origin=None):
+    self.root_dirpath = os.path.abspath(root_dirpath)
+    self.kind = kind
+    self.origin = origin
+    self.runid = runid or form_runid()
+    self.journalpath = os.path.join(self.root_dirpath, f"{JOURNAL_PREFIX}{self.runid}{JOURNAL_SUFFIX}")
+    # the tree mode's threads share the journal
+    self.lock = threading.Lock()
+    self.file = open(self.journalpath, 'x', encoding='utf-8')
+    header = {'type': 'run', 'runid': self.runid, 'kind': self.kind, 'root': self.root_dirpath, 'origin': self.origin}
+    self._write([header], True)
+    fsync_dir(self.root_dirpath)
+
+  def _write(self, records, b_fsync):
+    now = time.time()
+    lines = ''.join(json.dumps(dict(record, ts=now)) + '\n' for record in records)
+    with self.lock:
+      self.file.write(lines)
+      self.file.flush()
+      if b_fsync:
+        os.fsync(self.file.fileno())
+
+  def write_intents(self, intents):
+    """
+    intents: dicts with dirpath, oldname, tempname, newname, inode & dev; fsync'd before returning
+    """
+    self._write([dict(intent, type='intent') for intent in intents], True)
+
+  def record_done(self, dirpath, newname):
+    self._write([{'type': 'done', 'dirpath': dirpath, 'newname': newname}], False)
+
+  def record_failed(self, dirpath, oldname, reason):
+    self._write([{'type': 'failed', 'dirpath': dirpath, 'oldname': oldname, 'reason': reason}], False)
+
+  def sync(self):
+    with self.lock:
+      os.fsync(self.file.fileno())
+
+  def close(self, n_done, n_failed):
+    self._write([{'type': 'end', 'n_done': n_done, 'n_failed': n_failed}], True)
+    self.file.close()
+
+
+class JournalRun:
+  """
+  A journal as read back: its header fields, intents, the "done" new paths and whether it ended
+  """
+
+  def __init__(self, journalpath):
+    self.journalpath = journalpath
+    self.runid = None
+    self.kind = None
+    self.root = None
+    self.origin = None
+    self.intents = []
+    self.done_newpaths = set()
+    self.b_ended = False
+
+  @property
+  def b_interrupted(self) -> bool:
+    return not self.b_ended
+
+  def __str__(self):
+    status = 'complete' if self.b_ended else 'INTERRUPTED'
+    outstr = f"""JournalRun {self.runid} | {self.kind} | {status} | intents = {len(self.intents)}"""
+    outstr += f""" | done = {len(self.done_newpaths)}"""
+    if self.origin is not None:
+      outstr += f""" | of {self.origin}"""
+    return outstr
+
+
+def read_journal(journalpath) -> JournalRun:
+  """
+  A torn last line (the crash happened while writing it) is ignored
+  """
+  run = JournalRun(journalpath)
+  with open(journalpath, 'r', encoding='utf-8') as f:
+    for line in f:
+      try:
+        record = json.loads(line)
+      except ValueError:
+        continue
+      rtype = record.get('type')
+      if rtype == 'run':
+        run.runid, run.kind, run.root = record['runid'], record['kind'], record['root']
+        run.origin = record.get('origin')
+      elif rtype == 'intent':
+        run.intents.append(record)
+      elif rtype == 'done':
+        run.done_newpaths.add(os.path.join(record['dirpath'], record['newname']))
+      elif rtype == 'end':
+        run.b_ended = True
+  return run
+
+
+def locate_intent(intent) -> str | None:
+  """
+  Returns AT_OLD, AT_TEMP or AT_NEW: the name the intent's file (its inode) is under now; None if not found
+  """
+  for at, name in ((AT_NEW, intent['newname']), (AT_TEMP, intent['tempname']), (AT_OLD, intent['oldname'])):
+    try:
+      st = os.lstat(os.path.join(intent['dirpath'], name))
+    except OSError:
+      continue
+    if st.st_ino == intent['inode'] and st.st_dev == intent['dev']:
+      return at
+  return None
+
+
+def count_locations(run) -> dict:
+  """
+  AT_OLD | AT_TEMP | AT_NEW | None (not found) => how many of the run's files are there now
+  """
+  counts = {}
+  for intent in run.intents:
+    at = locate_intent(intent)
+    counts[at] = counts.get(at, 0) + 1
+  return counts
+
+
+def process():
+  """
+  Lists the journals of the given folder (default: the current one) with where their files are now
+  """
+  dirpath = sys.argv[1] if len(sys.argv) > 1 else '.'
+  for journalpath in list_journals(dirpath):
+    run = read_journal(journalpath)
+    print(run, '|', ' '.join(f"{at}={n}" for at, n in count_locations(run).items()))
+
+
+if __name__ == '__main__':
+  process()
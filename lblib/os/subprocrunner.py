@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/subprocrunner.py
+
+  A structured subprocess runner for the yt-dlp calls (and others alike), that:
+    1 - executes argv lists (no shell, so titles with quotes or '$' are harmless)
+    2 - captures stderr, streaming it line by line to the terminal as it arrives
+          (stdout may be left to the terminal so that the progress bar still shows)
+    3 - classifies a failure as one of:
+          FAILURE_NETWORK (connection reset, DNS, read timed out, HTTP 5xx etc.)
+          FAILURE_THROTTLED (HTTP 429 "Too Many Requests" and alike)
+          FAILURE_HTTP_CLIENT (any other HTTP 4xx, e.g. 403 Forbidden, 404 Not Found: retrying won't help)
+          FAILURE_FORMAT_NOT_AVAILABLE (the requested format code does not exist for the video)
+          FAILURE_TIMEOUT (the per-call timeout expired)
+          FAILURE_OTHER (anything else)
+        an "HTTP Error <status>" in stderr is classified by its status (the last one, if there are several),
+        not by the text around it ("Unable to download ...", "Got error ..." come with 403s as well)
+    4 - retries the transient ones (network, throttled, timeout)
+          with an exponential backoff plus a jitter (to avoid concurrent workers retrying in lockstep)
+
+  The first client is ~/bin/dlYouTubeWhenThereAreDubbed2.py whose Downloader, before this module,
+    interpreted any non-zero exit as "the video has no dubs" and fell back to a single-language download;
+    with the classification, only FAILURE_FORMAT_NOT_AVAILABLE (or an unknown failure) triggers that fallback
+    (a transient failure, after its retries, or an HTTP client error skips that language for the run).
+"""
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+FAILURE_NONE = 'ok'
+FAILURE_NETWORK = 'network'
+FAILURE_THROTTLED = 'throttled'
+FAILURE_HTTP_CLIENT = 'http-client-error'
+FAILURE_FORMAT_NOT_AVAILABLE = 'format-not-available'
+FAILURE_TIMEOUT = 'timeout'
+FAILURE_OTHER = 'other'
+TRANSIENT_FAILURES = (FAILURE_NETWORK, FAILURE_THROTTLED, FAILURE_TIMEOUT)
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE_SECS = 5.0
+DEFAULT_BACKOFF_CAP_SECS = 300.0
+READER_JOIN_AFTER_KILL_SECS = 2.0
+# looked up (lowercased) in stderr before anything else, e.g. "format code 233-5 is not available"
+cmpld_format_not_available_pattern = re.compile(
+  r'requested format (is )?not available|format code \S+ is not available|no video formats found'
+)
+cmpld_http_status_pattern = re.compile(r'http\s*error\s*(\d{3})')
+# the markers below are looked up (lowercased) in stderr, when no HTTP status is found, the first group that matches wins
+THROTTLED_MARKERS = (
+  'http error 429',
+  'too many requests',
+  'rate-limit',
+  'ratelimit',
+)
+NETWORK_MARKERS = (
+  'connection reset',
+  'connection refused',
+  'connection aborted',
+  'network is unreachable',
+  'temporary failure in name resolution',
+  'name or service not known',
+  'timed out',
+  'urlopen error',
+  'incompleteread',
+  'remote end closed connection',
+)
+
+
+def classify_http_status_or_none(status: int) -> str | None:
+  """
+  429 => throttled | 5xx => network (transient) | other 4xx => http-client-error (permanent) | else None
+  """
+  if status == 429:
+    return FAILURE_THROTTLED
+  if 500 <= status <= 599:
+    return FAILURE_NETWORK
+  if 400 <= status <= 499:
+    return FAILURE_HTTP_CLIENT
+  return None
+
+
+def classify_failure(returncode, stderr: str | None) -> str:
+  """
+  Returns one of the FAILURE_* constants for a finished process
+  """
+  if returncode == 0:
+    return FAILURE_NONE
+  errtext = (stderr or '').lower()
+  if cmpld_format_not_available_pattern.search(errtext):
+    return FAILURE_FORMAT_NOT_AVAILABLE
+  statuses = cmpld_http_status_pattern.findall(errtext)
+  kind = classify_http_status_or_none(int(statuses[-1])) if statuses else None
+  if kind is not None:
+    return kind
+  for kind, markers in (
+      (FAILURE_THROTTLED, THROTTLED_MARKERS),
+      (FAILURE_NETWORK, NETWORK_MARKERS),
+    ):
+    if any(marker in errtext for marker in markers):
+      return kind
+  return FAILURE_OTHER
+
+
+def get_backoff_secs(n_attempt, base_secs=DEFAULT_BACKOFF_BASE_SECS, cap_secs=DEFAULT_BACKOFF_CAP_SECS) -> float:
+  """
+  Exponential backoff with a "full jitter" in [0.5, 1.5) of the exponential value
+    n_attempt=1 -> ~base, n_attempt=2 -> ~2*base, n_attempt=3 -> ~4*base ... (capped at cap_secs)
+  """
+  expo = min(cap_secs, base_secs * 2 ** (n_attempt - 1))
+  return expo * random.uniform(0.5, 1.5)
+
+
+class RunResult:
+
+  def __init__(self, argv):
+    self.argv = list(argv)
+    self.returncode = None
+    self.stdout = None
+    self.stderr = ''
+    self.failure_kind = None
+    self.n_attempts = 0
+    self.elapsed_secs = 0.0
+
+  @property
+  def ok(self) -> bool:
+    return self.failure_kind == FAILURE_NONE
+
+  @property
+  def is_transient(self) -> bool:
+    return self.failure_kind in TRANSIENT_FAILURES
+
+  @property
+  def is_format_not_available(self) -> bool:
+    return self.failure_kind == FAILURE_FORMAT_NOT_AVAILABLE
+
+  @property
+  def last_stderr_lines(self) -> str:
+    lines = self.stderr.strip().splitlines()
+    return '\n'.join(lines[-5:])
+
+  def __str__(self):
+    outstr = f"""RunResult: {' '.join(self.argv)}
+    returncode = {self.returncode} | failure = {self.failure_kind} | attempts = {self.n_attempts}
+    elapsed = {self.elapsed_secs:.1f}s"""
+    return outstr
+
+
+class SubprocRunner:
+  """
+  Usage:
+    runner = SubprocRunner(timeout_secs=3600, max_retries=3)
+    result = runner.run(['yt-dlp', '-w', '-f', '160', url], cwd=workdir)
+    if result.is_format_not_available:
+      ...
+  """
+
+  def __init__(
+      self,
+      timeout_secs: float | None = None,
+      max_retries: int = DEFAULT_MAX_RETRIES,
+      backoff_base_secs: float = DEFAULT_BACKOFF_BASE_SECS,
+      b_capture_stdout: bool = False,
+    ):
+    self.timeout_secs = timeout_secs
+    self.max_retries = max_retries
+    self.backoff_base_secs = backoff_base_secs
+    self.b_capture_stdout = b_capture_stdout
+
+  @staticmethod
+  def tee_lines(stream, lines: list, echo_stream=None):
+    """
+    Reads stream line by line into lines, echoing each line as it arrives (when echo_stream is given)
+    """
+    for line in stream:
+      lines.append(line)
+      if echo_stream is not None:
+        echo_stream.write(line)
+        echo_stream.flush()
+    stream.close()
+
+  def run_once(self, argv, cwd=None) -> tuple[int | None, str | None, str, str]:
+    """
+    stderr is streamed: each line is echoed as it arrives (the user still sees the warnings & errors live)
+      and teed into the capture buffer used for the failure classification
+    """
+    stdout_dest = subprocess.PIPE if self.b_capture_stdout else None
+    try:
+      proc = subprocess.Popen(
+        argv, cwd=cwd, stdout=stdout_dest, stderr=subprocess.PIPE, encoding='utf-8', errors='replace',
+      )
+    except FileNotFoundError as e:
+      # the executable itself is missing: not transient
+      return None, None, str(e), FAILURE_OTHER
+    stderr_lines, stdout_lines = [], []
+    readers = [threading.Thread(target=self.tee_lines, args=(proc.stderr, stderr_lines, sys.stderr), daemon=True)]
+    if self.b_capture_stdout:
+      readers.append(threading.Thread(target=self.tee_lines, args=(proc.stdout, stdout_lines), daemon=True))
+    for reader in readers:
+      reader.start()
+    try:
+      returncode = proc.wait(timeout=self.timeout_secs)
+    except subprocess.TimeoutExpired:
+      proc.kill()
+      proc.wait()
+      returncode = None
+    for reader in readers:
+      # after a kill, a grandchild (e.g. ffmpeg under yt-dlp) may still hold the pipe open: the wait is bounded
+      reader.join(timeout=None if returncode is not None else READER_JOIN_AFTER_KILL_SECS)
+    stderr = ''.join(stderr_lines)
+    if returncode is None:
+      return None, None, stderr, FAILURE_TIMEOUT
+    stdout = ''.join(stdout_lines) if self.b_capture_stdout else None
+    failure_kind = classify_failure(returncode, stderr)
+    return returncode, stdout, stderr, failure_kind
+
+  def run(self, argv, cwd=None) -> RunResult:
+    """
+    Runs argv until it succeeds, fails non-transiently or the retries are exhausted
+    """
+    result = RunResult(argv)
+    start = time.monotonic()
+    while True:
+      result.n_attempts += 1
+      returncode, stdout, stderr, failure_kind = self.run_once(argv, cwd=cwd)
+      result.returncode, result.stdout, result.stderr = returncode, stdout, stderr
+      result.failure_kind = failure_kind
+      if result.ok or not result.is_transient or result.n_attempts > self.max_retries:
+        break
+      backoff_secs = get_backoff_secs(result.n_attempts, self.backoff_base_secs)
+      scrmsg = (f"Transient failure ({failure_kind}) on attempt {result.n_attempts}/{self.max_retries + 1}"
+                f" | retrying in {backoff_secs:.1f}s")
+      print(scrmsg)
+      time.sleep(backoff_secs)
+    result.elapsed_secs = time.monotonic() - start
+    return result
+
+
+def adhoctest1():
+  for returncode, stderr in [
+      (0, ''),
+      (1, 'ERROR: [youtube] abc: Requested format is not available. Use --list-formats'),
+      (1, 'ERROR: unable to download video data: HTTP Error 429: Too Many Requests'),
+      (1, 'ERROR: [Errno -3] Temporary failure in name resolution'),
+      (2, 'Usage: yt-dlp [OPTIONS] URL'),
+    ]:
+    scrmsg = f"returncode={returncode} | {classify_failure(returncode, stderr)} <= {stderr}"
+    print(scrmsg)
+  runner = SubprocRunner(timeout_secs=5, max_retries=0, b_capture_stdout=True)
+  print(runner.run(['echo', 'hello']))
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
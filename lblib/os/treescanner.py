@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/os/treescanner.py
+
+  The TreeScanner class walks a directory tree (as os.walk does) with os.scandir,
+    yielding one DirRecord per directory, that carries the os.DirEntry objects themselves,
+    ie, entry.stat() and entry.is_file() are answered from what the listing already brought
+    (no second stat per file as os.path.isfile(), os.path.getsize() etc. would do).
+
+  It also:
+    a) never changes the process's cwd (records have absolute dirpaths; files are reached by entry.path)
+    b) may list the subtrees in a thread pool (n_workers > 1), which pays off on slow (network) mounts
+       where each listing waits on the server; the records then come in completion order
+    c) may keep a persisted per-directory mtime index (b_only_changed=True):
+       a directory whose mtime equals the one in the index had no entry added, removed or renamed
+       since the last scan, so it's neither listed nor yielded (its subdirectories, kept in the index,
+       are still stat'ed, for a change deep in the tree does not change its ancestors' mtimes)
+       the index is saved when the scan ends (a directory enters it only after its record was consumed)
+    d) with b_only_changed, a directory whose mtime differs is listed and its signature (subdirnames and
+       the files' names, sizes & mtimes) is compared with the indexed one, leaving out the files
+       that excluded_name_predicate(filename) accepts: these are typically the caller's own outputs
+       (a converter writing into the folders it scans would otherwise find them all "changed" on its next run);
+       an equal signature counts as unchanged (and the new mtime goes into the index)
+
+  Pruning: as with os.walk, the caller may remove names from record.dirnames (in place)
+    to keep the scanner out of those subdirectories.
+
+  Usage:
+    for record in TreeScanner(root_abspath).scan():
+      for entry in record.file_entries:
+        print(entry.path, entry.stat().st_size)
+    # or, as a drop-in for os.walk:
+    for dirpath, dirnames, filenames in walk(root_abspath):
+      ...
+
+  The index file is, by default, $XDG_CACHE_HOME/lblib/treescan/<hash-of-root-and-label>.json
+    (XDG_CACHE_HOME defaults to ~/.cache); the label tells apart scripts that scan the same root
+    (each one has its own "what I've already processed")
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import lblib.os.localstate as lst
+DEFAULT_INDEX_SUBDIRNAME = 'treescan'
+
+
+def get_default_indexfilepath(root_abspath, label='') -> str:
+  hashname = hashlib.sha1(f"{label}:{root_abspath}".encode('utf-8', errors='replace')).hexdigest()[:16]
+  return lst.get_lblib_cachedir_abspath(DEFAULT_INDEX_SUBDIRNAME, hashname + '.json')
+
+
+class DirRecord:
+  """
+  One directory of the scan:
+    dirpath: its absolute path
+    dirnames & filenames: as in os.walk (symlinks to dirs are in dirnames, to files in filenames)
+    dir_entries & file_entries: the os.DirEntry objects (same order as the names)
+    mtime_ns: the directory's own st_mtime_ns
+  """
+
+  def __init__(self, dirpath, mtime_ns, dir_entries, file_entries, signature=None):
+    self.dirpath = dirpath
+    self.mtime_ns = mtime_ns
+    self.signature = signature
+    self.dir_entries = dir_entries
+    self.file_entries = file_entries
+    self.dirnames = [entry.name for entry in dir_entries]
+    self.filenames = [entry.name for entry in file_entries]
+
+  @property
+  def dirname(self):
+    return os.path.basename(self.dirpath)
+
+  def get_file_entries_with_exts(self, dot_exts) -> list:
+    """
+    dot_exts example: ('.mp4', '.mkv') (compared case-insensitively)
+    """
+    dot_exts = tuple(dot_ext.lower() for dot_ext in dot_exts)
+    return [entry for entry in self.file_entries if entry.name.lower().endswith(dot_exts)]
+
+  def __str__(self):
+    outstr = f"""DirRecord: [{self.dirpath}] | dirs = {len(self.dirnames)} | files = {len(self.filenames)}"""
+    return outstr
+
+
+class TreeScanner:
+
+  def __init__(
+      self,
+      root_abspath=None,
+      n_workers=1,
+      b_follow_symlinks=False,
+      b_only_changed=False,
+      indexfilepath=None,
+      index_label='',
+      excluded_name_predicate=None,
+    ):
+    """
+    excluded_name_predicate: callable(filename) -> bool, the files that don't count in a directory's signature
+    """
+    self.root_abspath = os.path.abspath(root_abspath or '.')
+    self.n_workers = max(1, n_workers or 1)
+    self.b_follow_symlinks = b_follow_symlinks
+    self.b_only_changed = b_only_changed
+    self.indexfilepath = indexfilepath
+    self.excluded_name_predicate = excluded_name_predicate
+    if self.b_only_changed and self.indexfilepath is None:
+      self.indexfilepath = get_default_indexfilepath(self.root_abspath, index_label)
+    # dirpath => [mtime_ns, subdirnames, signature]
+    self.index = {}
+    self.new_index = {}
+    self.n_listed = 0
+    self.n_skipped_unchanged = 0
+    self.n_errors = 0
+    self.load_index()
+
+  def load_index(self):
+    if self.indexfilepath is None:
+      return
+    try:
+      with open(self.indexfilepath, 'r', encoding='utf-8') as f:
+        self.index = json.load(f)
+    except (OSError, ValueError):
+      self.index = {}
+
+  def save_index(self):
+    if self.indexfilepath is None:
+      return
+    os.makedirs(os.path.dirname(self.indexfilepath), exist_ok=True)
+    # the directories this scan did not reach (pruned or the scan was interrupted) keep their former entries
+    index = dict(self.index)
+    index.update(self.new_index)
+    tmpfilepath = f"{self.indexfilepath}.{os.getpid()}.tmp"
+    with open(tmpfilepath, 'w', encoding='utf-8') as f:
+      json.dump(index, f)
+    os.replace(tmpfilepath, self.indexfilepath)
+
+  def form_signature(self, dir_entries, file_entries) -> str | None:
+    """
+    A hash of the subdirnames and of the (name, size, mtime) of the files not excluded by excluded_name_predicate
+      None if a file could not be stat'ed (then the directory counts as changed)
+    """
+    parts = [f"d:{entry.name}" for entry in dir_entries]
+    for entry in file_entries:
+      if self.excluded_name_predicate is not None and self.excluded_name_predicate(entry.name):
+        continue
+      try:
+        st = entry.stat()
+      except OSError:
+        return None
+      parts.append(f"f:{entry.name}:{st.st_size}:{st.st_mtime_ns}")
+    joined = '\n'.join(sorted(parts))
+    return hashlib.sha1(joined.encode('utf-8', errors='surrogateescape')).hexdigest()
+
+  def _list_dir(self, dirpath):
+    """
+    Returns a triple (record, subdirpaths, status):
+      (record, None, 'listed') | (None, [], 'error')
+      (b_only_changed) (None, indexed subdirpaths, 'unchanged') | (record, indexed subdirpaths, 'unchanged')
+        the latter when only the mtime changed, not the signature (the record then carries the new mtime)
+    Runs in the worker threads when n_workers > 1, so it touches no shared state
+    """
+    try:
+      mtime_ns = os.stat(dirpath).st_mtime_ns
+    except OSError:
+      return None, [], 'error'
+    indexed = None
+    if self.b_only_changed:
+      indexed = self.index.get(dirpath)
+      if indexed is not None and indexed[0] == mtime_ns:
+        return None, [os.path.join(dirpath, dirname) for dirname in indexed[1]], 'unchanged'
+    dir_entries, file_entries = [], []
+    try:
+      with os.scandir(dirpath) as it:
+        for entry in it:
+          try:
+            if entry.is_dir():
+              dir_entries.append(entry)
+            else:
+              file_entries.append(entry)
+          except OSError:
+            file_entries.append(entry)
+    except OSError:
+      return None, [], 'error'
+    signature = self.form_signature(dir_entries, file_entries) if self.b_only_changed else None
+    record = DirRecord(dirpath, mtime_ns, dir_entries, file_entries, signature)
+    if signature is not None and indexed is not None and len(indexed) > 2 and indexed[2] == signature:
+      return record, [os.path.join(dirpath, dirname) for dirname in indexed[1]], 'unchanged'
+    return record, None, 'listed'
+
+  def _get_subdirpaths_to_descend(self, record) -> list[str]:
+    """
+    The subdirs left in record.dirnames (the caller may have pruned some) that are to be descended into
+    """
+    entries_by_name = {entry.name: entry for entry in record.dir_entries}
+    subdirpaths = []
+    for dirname in record.dirnames:
+      entry = entries_by_name.get(dirname)
+      if entry is None:
+        continue
+      if not self.b_follow_symlinks and entry.is_symlink():
+        continue
+      subdirpaths.append(entry.path)
+    return subdirpaths
+
+  def _take_result(self, dirpath, result):
+    """
+    Generator step for one listed dirpath: yields its record (if any) and returns the subdirpaths to go on with
+    """
+    record, subdirpaths, status = result
+    if status == 'error':
+      self.n_errors += 1
+      return []
+    if status == 'unchanged':
+      self.n_skipped_unchanged += 1
+      self.new_index[dirpath] = self.index[dirpath]
+      if record is not None:
+        # only excluded files changed: the index takes the new mtime (the next scan won't list it again)
+        self.new_index[dirpath] = [record.mtime_ns, self.index[dirpath][1], record.signature]
+      return subdirpaths
+    self.n_listed += 1
+    yield record
+    subdirpaths = self._get_subdirpaths_to_descend(record)
+    # only now (the record was consumed) the dir goes into the index
+    if self.indexfilepath is not None:
+      self.new_index[dirpath] = [record.mtime_ns, [os.path.basename(p) for p in subdirpaths], record.signature]
+    return subdirpaths
+
+  def _scan_sequentially(self):
+    stack = [self.root_abspath]
+    while stack:
+      dirpath = stack.pop()
+      subdirpaths = yield from self._take_result(dirpath, self._list_dir(dirpath))
+      # reversed, so that the dirs come out in listing order (as os.walk's top-down)
+      stack.extend(reversed(subdirpaths))
+
+  def _scan_in_threadpool(self):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=self.n_workers) as executor:
+      pending = {executor.submit(self._list_dir, self.root_abspath): self.root_abspath}
+      while pending:
+        done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+          dirpath = pending.pop(future)
+          subdirpaths = yield from self._take_result(dirpath, future.result())
+          for subdirpath in subdirpaths:
+            pending[executor.submit(self._list_dir, subdirpath)] = subdirpath
+
+  def scan(self):
+    """
+    Yields a DirRecord per directory (top-down when n_workers == 1; completion order otherwise)
+    """
+    try:
+      if self.n_workers == 1:
+        yield from self._scan_sequentially()
+      else:
+        yield from self._scan_in_threadpool()
+    finally:
+      self.save_index()
+
+  def __str__(self):
+    outstr = f"""TreeScanner: [{self.root_abspath}] | workers = {self.n_workers}
+    listed = {self.n_listed} | unchanged (skipped) = {self.n_skipped_unchanged} | errors = {self.n_errors}
+    index = [{self.indexfilepath}]"""
+    return outstr
+
+
+def walk(root_abspath=None, n_workers=1, b_follow_symlinks=False):
+  """
+  A drop-in for os.walk(root_abspath) (top-down) yielding (dirpath, dirnames, filenames)
+    dirnames may be pruned in place as with os.walk
+  """
+  for record in TreeScanner(root_abspath, n_workers=n_workers, b_follow_symlinks=b_follow_symlinks).scan():
+    yield record.dirpath, record.dirnames, record.filenames
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  for relpath in ['a/a1', 'a/a2', 'b']:
+    os.makedirs(os.path.join(tmpdir, relpath))
+  for relpath in ['f0.txt', 'a/f1.mp4', 'a/a1/f2.mp4', 'b/f3.mp3']:
+    with open(os.path.join(tmpdir, relpath), 'w') as f:
+      f.write('x')
+  indexfilepath = os.path.join(tmpdir, 'index.json')
+  for n_workers in (1, 4):
+    print('n_workers', n_workers, sorted(os.path.relpath(dp, tmpdir) for dp, _, _ in walk(tmpdir, n_workers)))
+  scanner = TreeScanner(tmpdir, b_only_changed=True, indexfilepath=indexfilepath)
+  print('1st', [record.dirname for record in scanner.scan()])
+  with open(os.path.join(tmpdir, 'a/a1/f4.mp4'), 'w') as f:
+    f.write('x')
+  scanner = TreeScanner(tmpdir, b_only_changed=True, indexfilepath=indexfilepath)
+  print('2nd (after a change in a/a1)', [record.dirname for record in scanner.scan()])
+  with open(os.path.join(tmpdir, 'b/f3.cnv.mp3'), 'w') as f:
+    f.write('x')
+  scanner = TreeScanner(
+    tmpdir, b_only_changed=True, indexfilepath=indexfilepath,
+    excluded_name_predicate=lambda filename: filename.endswith('.cnv.mp3'),
+  )
+  print('3rd (after an excluded output in b)', [record.dirname for record in scanner.scan()])
+  print(scanner)
+
+
+def process():
+  """
+  Lists the directories (and their number of files) below the given one (or the current one)
+  """
+  root_abspath = sys.argv[1] if len(sys.argv) > 1 else None
+  scanner = TreeScanner(root_abspath)
+  for record in scanner.scan():
+    print(len(record.filenames), record.dirpath)
+  print(scanner)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import stat
+import tempfile
+import lblib.os.conversion_cache as convcache
+import unittest
+
+
+class ConversionCacheTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_conversion_cache-')
+    self.cache = convcache.ConversionCache(os.path.join(self.testdirpath, 'cache'), max_total_bytes=2500)
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def make_file(self, filename, content):
+    filepath = os.path.join(self.testdirpath, filename)
+    with open(filepath, 'wb') as f:
+      f.write(content)
+    return filepath
+
+  def test_1_sizestr_n_params(self):
+    self.assertEqual(10 * 1024 ** 3, convcache.trans_sizestr_to_bytes('10G'))
+    self.assertEqual(500 * 1024 ** 2, convcache.trans_sizestr_to_bytes('500MB'))
+    self.assertEqual(1000, convcache.trans_sizestr_to_bytes('1000'))
+    self.assertRaises(ValueError, convcache.trans_sizestr_to_bytes, 'big')
+    argv = ['ffmpeg', '-i', '/a/x.mp4', '-vn', '-b:a', '32k', '/b/x.mp3']
+    params = convcache.form_params_fr_argv(argv, '/a/x.mp4', '/b/x.mp3')
+    self.assertEqual(('ffmpeg', '-i', '<src>', '-vn', '-b:a', '32k', '<trg>.mp3'), params)
+    # other filepaths, same conversion: same params; one argument more or less: other params
+    self.assertEqual(params, convcache.form_params_fr_argv(
+      ['ffmpeg', '-i', '/c/y.mp4', '-vn', '-b:a', '32k', '/d/y.mp3'], '/c/y.mp4', '/d/y.mp3'
+    ))
+    self.assertNotEqual(
+      convcache.make_key('h', params),
+      convcache.make_key('h', convcache.form_params_fr_argv(argv[:3] + argv[4:], '/a/x.mp4', '/b/x.mp3')),
+    )
+
+  def test_2_store_materialize_n_rename(self):
+    params = ('ffmpeg', '-i', '<src>', '-vn', '<trg>.mp3')
+    srcfilepath = self.make_file('src.mp4', b's' * 1000)
+    producedfilepath = self.make_file('src.mp3', b'p' * 1000)
+    objectfilepath = self.cache.store(srcfilepath, params, producedfilepath)
+    # the cache object is read-only and not the produced file's inode
+    self.assertFalse(os.stat(objectfilepath).st_mode & stat.S_IWUSR)
+    self.assertNotEqual(os.stat(producedfilepath).st_ino, os.stat(objectfilepath).st_ino)
+    # a renamed source (same inode) is found, the output is writable by its owner
+    renamedfilepath = os.path.join(self.testdirpath, 'renamed.mp4')
+    os.rename(srcfilepath, renamedfilepath)
+    outfilepath = os.path.join(self.testdirpath, 'out.mp3')
+    self.assertTrue(self.cache.materialize(renamedfilepath, params, outfilepath))
+    with open(outfilepath, 'rb') as f:
+      self.assertEqual(b'p' * 1000, f.read())
+    self.assertTrue(os.stat(outfilepath).st_mode & stat.S_IWUSR)
+    # other params: a miss
+    self.assertFalse(self.cache.materialize(renamedfilepath, params[:3] + params[4:], outfilepath + '2'))
+    self.assertEqual((1, 1), (self.cache.n_hits, self.cache.n_misses))
+
+  def test_3_lru_eviction_prunes_srchashes(self):
+    params = ('ffmpeg', '-i', '<src>', '<trg>.mp3')
+    srcfilepaths = []
+    for i in range(3):
+      srcfilepaths.append(self.make_file(f'src{i}.mp4', bytes([i]) * 1000))
+      self.cache.store(srcfilepaths[-1], params, self.make_file(f'out{i}.mp3', b'o' * 1000))
+    # 2500 bytes hold two: the least recently used (src0) was evicted, with its srchashes row
+    self.assertEqual(1, self.cache.n_evicted)
+    self.assertEqual(2000, self.cache.total_bytes)
+    hashes = {row[0] for row in self.cache.conn.execute('SELECT hash FROM srchashes')}
+    self.assertEqual({convcache.hash_file_content(filepath) for filepath in srcfilepaths[1:]}, hashes)
+    self.assertFalse(self.cache.materialize(srcfilepaths[0], params, os.path.join(self.testdirpath, 'x.mp3')))
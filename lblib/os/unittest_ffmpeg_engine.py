@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest.mock
+import lblib.os.conversion_cache as convcache
+import lblib.os.ffmpeg_engine as ffeng
+import unittest
+# a stand-in for ffmpeg: copies its "-i" input to its last argument (the output), fails if the input is missing
+FAKE_FFMPEG_SOURCE = """#!%s
+import shutil, sys
+argv = sys.argv[1:]
+try:
+  shutil.copyfile(argv[argv.index('-i') + 1], argv[-1])
+except OSError as e:
+  sys.stderr.write('%%s\\n' %% e)
+  sys.exit(1)
+""" % sys.executable
+
+
+class ConversionEngineTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_ffmpeg_engine-')
+    bindirpath = os.path.join(self.testdirpath, 'bin')
+    os.makedirs(bindirpath)
+    fakeffmpegpath = os.path.join(bindirpath, 'ffmpeg')
+    with open(fakeffmpegpath, 'w') as f:
+      f.write(FAKE_FFMPEG_SOURCE)
+    os.chmod(fakeffmpegpath, 0o755)
+    self.path_patcher = unittest.mock.patch.dict(os.environ, {'PATH': bindirpath + os.pathsep + os.environ['PATH']})
+    self.path_patcher.start()
+
+  def tearDown(self):
+    self.path_patcher.stop()
+    shutil.rmtree(self.testdirpath)
+
+  def make_file(self, filename, content=b'x' * 100):
+    filepath = os.path.join(self.testdirpath, filename)
+    with open(filepath, 'wb') as f:
+      f.write(content)
+    return filepath
+
+  def test_1_tempfilepath(self):
+    tempfilepath = ffeng.form_tempfilepath('/a/b/song.cnv.mp3')
+    dirpath, filename = os.path.split(tempfilepath)
+    self.assertEqual('/a/b', dirpath)
+    self.assertTrue(filename.startswith(f'.song.cnv.converting-{os.getpid()}-'))
+    self.assertTrue(filename.endswith('.mp3'))
+    self.assertTrue(ffeng.is_tempfilename(filename))
+    self.assertFalse(ffeng.is_tempfilename('song.cnv.mp3'))
+    # a temp file of a dead process is removed, one of a live process is kept
+    deadproc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    deadproc.wait()
+    self.make_file(f'.a{ffeng.TEMPFILE_MARK}{deadproc.pid}-1.mp3')
+    self.make_file(os.path.basename(ffeng.form_tempfilepath(os.path.join(self.testdirpath, 'b.mp3'))))
+    removed = ffeng.remove_stale_tempfiles(self.testdirpath)
+    self.assertEqual([f'.a{ffeng.TEMPFILE_MARK}{deadproc.pid}-1.mp3'], removed)
+
+  def test_2_statuses_n_cache(self):
+    cache = convcache.ConversionCache(os.path.join(self.testdirpath, 'cache'))
+    engine = ffeng.ConversionEngine(n_workers=2, niceness=0, b_show_progress=False, cache=cache)
+    srcfilepath = self.make_file('a.wav')
+    existingfilepath = self.make_file('c.mp3')
+    jobs = [
+      ffeng.ConversionJob(srcfilepath, os.path.join(self.testdirpath, 'a.mp3'), ['-vn'], b_cacheable=True),
+      ffeng.ConversionJob(srcfilepath, existingfilepath, ['-vn'], b_cacheable=True),
+      ffeng.ConversionJob(os.path.join(self.testdirpath, 'missing.wav'), os.path.join(self.testdirpath, 'm.mp3'), []),
+    ]
+    results = engine.run(jobs)
+    self.assertEqual([ffeng.STATUS_OK, ffeng.STATUS_SKIPPED, ffeng.STATUS_FAILED], [r.status for r in results])
+    self.assertIn('missing.wav', results[2].last_stderr_lines)
+    # no temp file is left behind, neither by the success nor by the failure
+    self.assertEqual([], [fn for fn in os.listdir(self.testdirpath) if ffeng.is_tempfilename(fn)])
+    self.assertFalse(os.path.exists(os.path.join(self.testdirpath, 'm.mp3')))
+    # the same source & arguments into another target: from the cache; other arguments: converted
+    results = engine.run([
+      ffeng.ConversionJob(srcfilepath, os.path.join(self.testdirpath, 'a2.mp3'), ['-vn'], b_cacheable=True),
+      ffeng.ConversionJob(srcfilepath, os.path.join(self.testdirpath, 'a3.mp3'), [], b_cacheable=True),
+    ])
+    self.assertEqual([ffeng.STATUS_CACHED, ffeng.STATUS_OK], [r.status for r in results])
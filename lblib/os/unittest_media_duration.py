@@ -0,0 +1,90 @@
+import os
+import shutil
+import struct
+import tempfile
+import lblib.os.media_duration as mdur
+import unittest
+# MPEG-1 layer III, 128 kbps, 44100 Hz, stereo, no CRC: a 417-byte frame of 1152 samples
+MP3_FRAME_HEADER = b'\xff\xfb\x90\x00'
+MP3_FRAME_SIZE = 417
+MP3_SECS_PER_FRAME = 1152 / 44100
+
+
+def form_box(boxtype, payload):
+  return struct.pack('>I4s', 8 + len(payload), boxtype) + payload
+
+
+def form_mvhd(timescale, duration, version=0):
+  if version == 1:
+    return form_box(b'mvhd', bytes([1, 0, 0, 0]) + bytes(16) + struct.pack('>IQ', timescale, duration) + bytes(80))
+  return form_box(b'mvhd', bytes(4) + bytes(8) + struct.pack('>II', timescale, duration) + bytes(80))
+
+
+def form_id3v23_tag(frames_data):
+  size = len(frames_data)
+  syncsafe = bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+  return b'ID3' + bytes([3, 0, 0]) + syncsafe + frames_data
+
+
+def form_tlen_frame(ms):
+  payload = b'\x00' + str(ms).encode('ascii')
+  return b'TLEN' + struct.pack('>I', len(payload)) + b'\x00\x00' + payload
+
+
+class MediaDurationTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_media_duration-')
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def write(self, filename, data):
+    filepath = os.path.join(self.testdirpath, filename)
+    with open(filepath, 'wb') as f:
+      f.write(data)
+    return filepath
+
+  def test_1_mp4(self):
+    ftyp = form_box(b'ftyp', b'isom' + bytes(4))
+    mdat = form_box(b'mdat', bytes(5000))
+    # moov at the end (after the big mdat), mvhd version 0
+    filepath = self.write('a.mp4', ftyp + mdat + form_box(b'moov', form_mvhd(1000, 93500)))
+    self.assertAlmostEqual(93.5, mdur.read_duration_secs_or_none(filepath))
+    # mvhd version 1 (64-bit duration), moov first
+    filepath = self.write('b.m4a', ftyp + form_box(b'moov', form_mvhd(44100, 44100 * 3600, version=1)) + mdat)
+    self.assertAlmostEqual(3600.0, mdur.read_duration_secs_or_none(filepath))
+    # fragmented: mvhd duration 0, the duration is in mvex/mehd
+    mehd = form_box(b'mehd', bytes(4) + struct.pack('>I', 120000))
+    moov = form_box(b'moov', form_mvhd(1000, 0) + form_box(b'mvex', mehd))
+    self.assertAlmostEqual(120.0, mdur.read_duration_secs_or_none(self.write('c.mp4', ftyp + moov)))
+    # no moov, a box running past the end, an empty file: unparsed
+    self.assertIsNone(mdur.read_duration_secs_or_none(self.write('d.mp4', ftyp + mdat)))
+    self.assertIsNone(mdur.read_duration_secs_or_none(self.write('e.mp4', ftyp + struct.pack('>I4s', 9999, b'moov'))))
+    self.assertIsNone(mdur.read_duration_secs_or_none(self.write('f.mp4', b'')))
+
+  def test_2_mp3(self):
+    frame = MP3_FRAME_HEADER + bytes(MP3_FRAME_SIZE - 4)
+    parsed = mdur.parse_mp3_frame_header_or_none(struct.unpack('>I', MP3_FRAME_HEADER)[0])
+    self.assertEqual((1, 3, 128, 44100, False), tuple(parsed[k] for k in (
+      'version', 'layer', 'bitrate_kbps', 'samplerate', 'b_mono'
+    )))
+    self.assertIsNone(mdur.parse_mp3_frame_header_or_none(0xFFFBF000))  # bitrate index 15
+    # CBR: audio bytes at the bitrate (an ID3v1 tag at the end is left out)
+    filepath = self.write('cbr.mp3', frame * 100 + b'TAG' + bytes(125))
+    self.assertAlmostEqual(100 * MP3_FRAME_SIZE * 8 / 128000, mdur.read_duration_secs_or_none(filepath))
+    # Xing header (after the 32-byte side info of a stereo MPEG-1 frame) with the number of frames
+    xing = MP3_FRAME_HEADER + bytes(32) + b'Xing' + struct.pack('>II', 0x1, 5000)
+    filepath = self.write('vbr.mp3', xing + bytes(MP3_FRAME_SIZE - len(xing)) + frame * 10)
+    self.assertAlmostEqual(5000 * MP3_SECS_PER_FRAME, mdur.read_duration_secs_or_none(filepath))
+    # VBRI header (Fraunhofer's, 32 bytes after the frame header)
+    vbri = MP3_FRAME_HEADER + bytes(32) + b'VBRI' + bytes(10) + struct.pack('>I', 777)
+    filepath = self.write('vbri.mp3', vbri + bytes(MP3_FRAME_SIZE - len(vbri)) + frame * 10)
+    self.assertAlmostEqual(777 * MP3_SECS_PER_FRAME, mdur.read_duration_secs_or_none(filepath))
+    # the ID3v2 TLEN frame comes before the CBR estimate
+    tag = form_id3v23_tag(form_tlen_frame(61500) + bytes(20))
+    self.assertEqual((len(tag), 61500), mdur.read_id3v2_tag_size_n_tlen_ms(tag))
+    self.assertAlmostEqual(61.5, mdur.read_duration_secs_or_none(self.write('tlen.mp3', tag + frame * 10)))
+    # neither a frame nor a TLEN: unparsed; another extension: not looked into
+    self.assertIsNone(mdur.read_duration_secs_or_none(self.write('junk.mp3', bytes(2000))))
+    self.assertIsNone(mdur.read_duration_secs_or_none(self.write('cbr.ogg', frame * 10)))
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import zlib
+import lblib.os.pdf_pagecounter as pdfpc
+import unittest
+
+
+def form_classic_pdf(pages_dict):
+  """
+  A minimal PDF with a classic xref table: 1 = catalog, 2 = pages root (pages_dict), 3 = an indirect count
+  """
+  objs = [b'<< /Type /Catalog /Pages 2 0 R >>', pages_dict, b'7']
+  body, offsets = b'%PDF-1.4\n', []
+  for i, obj in enumerate(objs, start=1):
+    offsets.append(len(body))
+    body += b'%d 0 obj\n%s\nendobj\n' % (i, obj)
+  xref_offset = len(body)
+  body += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objs) + 1)
+  for offset in offsets:
+    body += b'%010d 00000 n \n' % offset
+  body += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objs) + 1, xref_offset)
+  return body
+
+
+def form_xref_stream_pdf(pages_dict, b_predictor):
+  """
+  A minimal PDF 1.5 with a (flate-compressed) cross-reference stream, with or without a PNG Up predictor
+  """
+  objs = [b'<< /Type /Catalog /Pages 2 0 R >>', pages_dict]
+  body, offsets = b'%PDF-1.5\n', []
+  for i, obj in enumerate(objs, start=1):
+    offsets.append(len(body))
+    body += b'%d 0 obj\n%s\nendobj\n' % (i, obj)
+  xref_offset = len(body)
+  # entries for objects 0..3 (3 is the xref stream itself), /W [1 2 1]
+  rows = [bytes([0, 0, 0, 255])] + [bytes([1]) + offset.to_bytes(2, 'big') + b'\x00' for offset in offsets]
+  rows.append(bytes([1]) + xref_offset.to_bytes(2, 'big') + b'\x00')
+  decodeparms = b''
+  if b_predictor:
+    predicted, prev_row = b'', bytes(4)
+    for row in rows:
+      predicted += b'\x02' + bytes((b - p) & 0xFF for b, p in zip(row, prev_row))
+      prev_row = row
+    rows = [predicted]
+    decodeparms = b' /DecodeParms << /Predictor 12 /Columns 4 >>'
+  data = zlib.compress(b''.join(rows))
+  body += b'3 0 obj\n<< /Type /XRef /Size 4 /W [1 2 1] /Root 1 0 R /Filter /FlateDecode%s /Length %d >>\nstream\n' % (
+    decodeparms, len(data)
+  )
+  body += data + b'\nendstream\nendobj\nstartxref\n%d\n%%%%EOF\n' % xref_offset
+  return body
+
+
+class PdfPageCounterTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_pdf_pagecounter-')
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def write_pdf(self, filename, content):
+    filepath = os.path.join(self.testdirpath, filename)
+    with open(filepath, 'wb') as f:
+      f.write(content)
+    return filepath
+
+  def test_1_direct_count(self):
+    filepath = self.write_pdf('direct.pdf', form_classic_pdf(b'<< /Type /Pages /Kids [] /Count 12 >>'))
+    self.assertEqual(12, pdfpc.read_pdf_pagecount_fast_or_none(filepath))
+    self.assertEqual((12, pdfpc.STRATEGY_FAST), pdfpc.count_pages_or_none(filepath))
+
+  def test_2_indirect_count_goes_to_the_slow_path(self):
+    # "/Count 12 0 R" must not be read as 1 (nor 12): it's a reference to object 12
+    filepath = self.write_pdf('indirect.pdf', form_classic_pdf(b'<< /Type /Pages /Kids [] /Count 3 0 R >>'))
+    self.assertIsNone(pdfpc.read_pdf_pagecount_fast_or_none(filepath))
+    if pdfpc.PdfReader is None:
+      self.assertEqual((None, None), pdfpc.count_pages_or_none(filepath))
+    self.assertIsNone(pdfpc.cmpld_count_pattern.search(b'/Count 12 0 R'))
+    self.assertEqual(b'12', pdfpc.cmpld_count_pattern.search(b'/Count 12 /Kids').group(1))
+
+  def test_3_xref_stream(self):
+    for b_predictor in (False, True):
+      filepath = self.write_pdf('xrefstream.pdf', form_xref_stream_pdf(b'<< /Type /Pages /Count 7 >>', b_predictor))
+      self.assertEqual(7, pdfpc.read_pdf_pagecount_fast_or_none(filepath), f"predictor={b_predictor}")
+
+  def test_4_damaged_xref_n_non_pdf(self):
+    content = form_classic_pdf(b'<< /Type /Pages /Count 5 >>')
+    # the startxref offset points nowhere meaningful: no answer from the fast path (no scan either)
+    damaged = content.replace(b'startxref\n', b'startxref\n1')
+    self.assertIsNone(pdfpc.read_pdf_pagecount_fast_or_none(self.write_pdf('damaged.pdf', damaged)))
+    self.assertIsNone(pdfpc.read_pdf_pagecount_fast_or_none(self.write_pdf('empty.pdf', b'')))
+    self.assertIsNone(pdfpc.read_pdf_pagecount_fast_or_none(self.write_pdf('text.pdf', b'not a pdf\n')))
@@ -0,0 +1,69 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest.mock
+import lblib.os.rate_governor as rgov
+import unittest
+
+
+class RateGovernorTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.statedirpath = tempfile.mkdtemp(prefix='unittest_rate_governor-')
+
+  def tearDown(self):
+    shutil.rmtree(self.statedirpath)
+
+  def make_governor(self, total_bandwidth='4M', **kwargs):
+    return rgov.RateGovernor(total_bandwidth, statedir_abspath=self.statedirpath, max_wait_secs=0, **kwargs)
+
+  def test_1_ratestr(self):
+    self.assertEqual(512000, rgov.trans_ratestr_to_bps_or_none('500K'))
+    self.assertEqual(2621440, rgov.trans_ratestr_to_bps_or_none('2.5M'))
+    self.assertEqual(300000, rgov.trans_ratestr_to_bps_or_none(' 300000 '))
+    self.assertIsNone(rgov.trans_ratestr_to_bps_or_none(''))
+    self.assertRaises(ValueError, rgov.trans_ratestr_to_bps_or_none, 'fast')
+    self.assertRaises(ValueError, rgov.trans_ratestr_to_bps_or_none, '0K')
+    self.assertEqual('2560K', rgov.trans_bps_to_ratestr(2621440))
+    self.assertEqual('4M', rgov.trans_bps_to_ratestr(4 * 1024 ** 2))
+
+  def test_2_shares_never_exceed_the_total(self):
+    governor = self.make_governor(n_expected_leases=3)
+    leases = [governor.acquire(f'download {i}') for i in range(3)]
+    rates = [lease.rate_bps for lease in leases]
+    self.assertTrue(all(rate >= governor.min_share_bps for rate in rates))
+    self.assertLessEqual(sum(rates), governor.total_bps)
+    # a share was split among the expected slots: nobody took the whole budget
+    self.assertTrue(all(rate < governor.total_bps for rate in rates))
+    self.assertEqual(['-r', rgov.trans_bps_to_ratestr(rates[0])], leases[0].ratelimit_args)
+    # a released rate goes back to the bucket, to the next one
+    leases[2].release()
+    lease = self.make_governor().acquire('download 3')
+    self.assertLessEqual(sum(rates[:2]) + lease.rate_bps, governor.total_bps)
+    for lease in leases[:2] + [lease]:
+      lease.release()
+    self.assertEqual({}, governor.get_active_leases())
+
+  def test_3_waiting_n_dead_leases(self):
+    governor = self.make_governor(n_expected_leases=1)
+    full = governor.acquire('the whole budget')
+    self.assertEqual(governor.total_bps, full.rate_bps)
+    # nothing left: no grant, but a waiting record (rate 0) is left for the others to count
+    self.assertIsNone(governor.try_grant('waiting one'))
+    self.assertEqual([0], [lease['rate'] for lease in governor.get_active_leases().values() if lease['rate'] == 0])
+    governor.give_up_waiting()
+    full.release()
+    # the lease of a dead process goes back to the bucket
+    deadproc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    deadproc.wait()
+    with open(governor.statefilepath, 'w') as f:
+      json.dump({'dead': {'pid': deadproc.pid, 'label': 'killed', 'rate': governor.total_bps, 'ts': 0}}, f)
+    self.assertEqual({}, governor.get_active_leases())
+    # disabled: no rate limit, no state
+    with unittest.mock.patch.dict(os.environ, {rgov.BANDWIDTH_ENVVAR: ''}):
+      disabled = rgov.RateGovernor(None, statedir_abspath=os.path.join(self.statedirpath, 'none'))
+    self.assertFalse(disabled.is_enabled)
+    self.assertEqual([], disabled.acquire('x').ratelimit_args)
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import unittest.mock
+import lblib.os.rename_engine as rneng
+import lblib.os.rename_journal as rnjournal
+import unittest
+
+
+def list_visible_names(dirpath):
+  return sorted(fn for fn in os.listdir(dirpath) if not fn.startswith('.'))
+
+
+def read_content(dirpath, filename):
+  with open(os.path.join(dirpath, filename)) as f:
+    return f.read()
+
+
+class RenameEngineTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_rename_engine-')
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def make_files(self, filenames, dirpath=None):
+    dirpath = dirpath or self.testdirpath
+    for filename in filenames:
+      # each file's content is its original name, so that a rename can be followed
+      with open(os.path.join(dirpath, filename), 'w') as f:
+        f.write(filename)
+
+  def plan_with_mapping(self, mapping):
+    return rneng.plan_dir(self.testdirpath, lambda filename, context: mapping.get(filename))
+
+  def test_1_collisions(self):
+    self.make_files(['a.txt', 'b.txt', 'c.txt', 'd.txt', 'e.txt'])
+    # a & b to the same new name, c onto d (which stays), e onto c (which stays because of its conflict)
+    plan = self.plan_with_mapping({'a.txt': 'x.txt', 'b.txt': 'x.txt', 'c.txt': 'd.txt', 'e.txt': 'c.txt'})
+    self.assertEqual(0, len(plan.pairs))
+    reasons = {pair.oldname: reason for pair, reason in plan.conflicts}
+    self.assertEqual(rneng.CONFLICT_SHARED_TARGET, reasons['a.txt'])
+    self.assertEqual(rneng.CONFLICT_SHARED_TARGET, reasons['b.txt'])
+    self.assertEqual(rneng.CONFLICT_TARGET_EXISTS, reasons['c.txt'])
+    self.assertEqual(rneng.CONFLICT_TARGET_EXISTS, reasons['e.txt'])
+    # invalid new names
+    plan = self.plan_with_mapping({'a.txt': '', 'b.txt': 'sub/b.txt', 'c.txt': '..'})
+    self.assertEqual(0, len(plan.pairs))
+    self.assertEqual({rneng.CONFLICT_INVALID_NAME}, {reason for _, reason in plan.conflicts})
+    # nothing was renamed in planning
+    self.assertEqual(['a.txt', 'b.txt', 'c.txt', 'd.txt', 'e.txt'], list_visible_names(self.testdirpath))
+
+  def test_2_cycle(self):
+    self.make_files(['a.txt', 'b.txt', 'c.txt'])
+    plan = self.plan_with_mapping({'a.txt': 'b.txt', 'b.txt': 'c.txt', 'c.txt': 'a.txt'})
+    self.assertEqual(0, len(plan.conflicts))
+    self.assertEqual(1, len(plan.cycles))
+    self.assertEqual(['a.txt', 'b.txt', 'c.txt'], sorted(plan.cycles[0]))
+    result = rneng.apply_plan(plan)
+    self.assertEqual(3, len(result.done))
+    self.assertEqual(0, len(result.failed))
+    self.assertEqual('c.txt', read_content(self.testdirpath, 'a.txt'))
+    self.assertEqual('a.txt', read_content(self.testdirpath, 'b.txt'))
+    self.assertEqual('b.txt', read_content(self.testdirpath, 'c.txt'))
+
+  def test_3_two_phase_apply(self):
+    self.make_files(['1.txt', '2.txt', '3.txt'])
+    # a chain: applied one pair after the other, 1 => 2 would overwrite 2 before it moved on to 3
+    plan = self.plan_with_mapping({'1.txt': '2.txt', '2.txt': '3.txt', '3.txt': '4.txt'})
+    self.assertEqual(3, len(plan.pairs))
+    self.assertEqual(0, len(plan.cycles))
+    results, journal = rneng.apply_plans_with_journal([plan], self.testdirpath)
+    self.assertEqual(['2.txt', '3.txt', '4.txt'], list_visible_names(self.testdirpath))
+    self.assertEqual('1.txt', read_content(self.testdirpath, '2.txt'))
+    self.assertEqual('2.txt', read_content(self.testdirpath, '3.txt'))
+    self.assertEqual('3.txt', read_content(self.testdirpath, '4.txt'))
+    # no temporary name is left behind and the journal ended with every intent done
+    hidden = [fn for fn in os.listdir(self.testdirpath) if fn.startswith('.')]
+    self.assertEqual([os.path.basename(journal.journalpath)], hidden)
+    run = rnjournal.read_journal(journal.journalpath)
+    self.assertFalse(run.b_interrupted)
+    self.assertEqual(3, len(run.intents))
+    # a new name taken meanwhile (by another process) is not overwritten: its file goes back
+    self.make_files(['5.txt'])
+    plan = self.plan_with_mapping({'5.txt': '6.txt'})
+    self.make_files(['6.txt'])
+    result = rneng.apply_plan(plan)
+    self.assertEqual(1, len(result.failed))
+    self.assertEqual('5.txt', read_content(self.testdirpath, '5.txt'))
+    self.assertEqual('6.txt', read_content(self.testdirpath, '6.txt'))
+
+  def test_4_undo_n_resume_roundtrip(self):
+    self.make_files(['a.txt', 'b.txt', 'c.txt'])
+    mapping = {'a.txt': 'b.txt', 'b.txt': 'a.txt', 'c.txt': 'd.txt'}
+    _, journal = rneng.apply_plans_with_journal([self.plan_with_mapping(mapping)], self.testdirpath)
+    self.assertEqual('b.txt', read_content(self.testdirpath, 'a.txt'))
+    # undo: back to the original names
+    _, n_missing, undojournal = rneng.undo_run(journal.journalpath)
+    self.assertEqual(0, n_missing)
+    self.assertEqual(['a.txt', 'b.txt', 'c.txt'], list_visible_names(self.testdirpath))
+    self.assertEqual('a.txt', read_content(self.testdirpath, 'a.txt'))
+    # undoing the undo redoes the rename run
+    rneng.undo_run(undojournal.journalpath)
+    self.assertEqual(['a.txt', 'b.txt', 'd.txt'], list_visible_names(self.testdirpath))
+    self.assertEqual('b.txt', read_content(self.testdirpath, 'a.txt'))
+    # a recovery with nothing left to do writes no journal
+    n_journals = len(rnjournal.list_journals(self.testdirpath))
+    _, _, nojournal = rneng.resume_run(journal.journalpath)
+    self.assertIsNone(nojournal)
+    self.assertEqual(n_journals, len(rnjournal.list_journals(self.testdirpath)))
+
+  def test_5_resume_n_undo_an_interrupted_run(self):
+    self.make_files(['a.txt', 'b.txt', 'c.txt'])
+    plan = self.plan_with_mapping({'a.txt': 'b.txt', 'b.txt': 'c.txt', 'c.txt': 'a.txt'})
+    # an interrupted run: intents journaled, one file in its temporary name, another already at its new name
+    journal = rnjournal.RenameJournal(self.testdirpath)
+    intents = []
+    for i, pair in enumerate(plan.pairs):
+      st = os.lstat(pair.oldpath)
+      intents.append({
+        'dirpath': plan.dirpath, 'oldname': pair.oldname, 'tempname': f".{journal.runid}-{i}{rneng.TEMPNAME_SUFFIX}",
+        'newname': pair.newname, 'inode': st.st_ino, 'dev': st.st_dev,
+      })
+    journal.write_intents(intents)
+    for intent in intents:
+      os.rename(os.path.join(self.testdirpath, intent['oldname']), os.path.join(self.testdirpath, intent['tempname']))
+    os.rename(os.path.join(self.testdirpath, intents[0]['tempname']), os.path.join(self.testdirpath, 'b.txt'))
+    journal.file.close()  # no 'end' record: the run was interrupted
+    self.assertTrue(rnjournal.read_journal(journal.journalpath).b_interrupted)
+    # resume completes it
+    _, n_missing, _ = rneng.resume_run(journal.journalpath)
+    self.assertEqual(0, n_missing)
+    self.assertEqual('a.txt', read_content(self.testdirpath, 'b.txt'))
+    self.assertEqual('b.txt', read_content(self.testdirpath, 'c.txt'))
+    self.assertEqual('c.txt', read_content(self.testdirpath, 'a.txt'))
+    # then undo takes it all back
+    rneng.undo_run(journal.journalpath)
+    for filename in ['a.txt', 'b.txt', 'c.txt']:
+      self.assertEqual(filename, read_content(self.testdirpath, filename))
+
+  def test_6_tree_undo_uses_one_journal(self):
+    subdirpath = os.path.join(self.testdirpath, 'a', 'b')
+    os.makedirs(subdirpath)
+    self.make_files(['f.txt'], subdirpath)
+    plans = rneng.plan_renames(
+      lambda filename, context: 'x' + filename, self.testdirpath, b_recursive=True, b_include_dirs=True
+    )
+    _, journal = rneng.apply_plans_with_journal(plans, self.testdirpath)
+    self.assertEqual('f.txt', read_content(os.path.join(self.testdirpath, 'xa', 'xb'), 'xf.txt'))
+    # the undo goes in rounds (a directory's contents are found once it's back), all in one journal
+    _, n_missing, _ = rneng.undo_run(journal.journalpath)
+    self.assertEqual(0, n_missing)
+    self.assertEqual('f.txt', read_content(subdirpath, 'f.txt'))
+    self.assertEqual(2, len(rnjournal.list_journals(self.testdirpath)))
+
+  def test_7_confirm_default(self):
+    self.make_files(['a.txt'])
+    plans = [self.plan_with_mapping({'a.txt': 'b.txt'})]
+    for answer, default_yes, b_expected in (
+      ('', True, True), ('', False, False), ('y', False, True), ('n', True, False),
+    ):
+      with unittest.mock.patch('builtins.input', return_value=answer):
+        self.assertEqual(b_expected, rneng.confirm_plans(plans, default_yes), f"[{answer}] default_yes={default_yes}")
@@ -0,0 +1,64 @@
+import sys
+import lblib.os.subprocrunner as sprun
+import unittest
+
+
+class ClassifyFailureTestCase(unittest.TestCase):
+
+  def test_1_classification(self):
+    for returncode, stderr, expected in [
+        (0, 'WARNING: anything', sprun.FAILURE_NONE),
+        (1, 'ERROR: [youtube] abc: Requested format is not available. Use --list-formats', sprun.FAILURE_FORMAT_NOT_AVAILABLE),
+        (1, 'ERROR: format code 233-5 is not available', sprun.FAILURE_FORMAT_NOT_AVAILABLE),
+        (1, 'ERROR: unable to download video data: HTTP Error 429: Too Many Requests', sprun.FAILURE_THROTTLED),
+        (1, 'ERROR: unable to download video data: HTTP Error 503: Service Unavailable', sprun.FAILURE_NETWORK),
+        (1, 'ERROR: unable to download video data: HTTP Error 403: Forbidden', sprun.FAILURE_HTTP_CLIENT),
+        # the last HTTP status wins, whatever the text around it
+        (1, 'Got error: HTTP Error 503\nERROR: Unable to download: HTTP Error 404: Not Found', sprun.FAILURE_HTTP_CLIENT),
+        (1, 'ERROR: [Errno -3] Temporary failure in name resolution', sprun.FAILURE_NETWORK),
+        (1, 'ERROR: Read timed out.', sprun.FAILURE_NETWORK),
+        (2, 'Usage: yt-dlp [OPTIONS] URL', sprun.FAILURE_OTHER),
+        (1, None, sprun.FAILURE_OTHER),
+      ]:
+      self.assertEqual(expected, sprun.classify_failure(returncode, stderr), stderr)
+
+  def test_2_backoff(self):
+    for n_attempt in range(1, 12):
+      expo = min(sprun.DEFAULT_BACKOFF_CAP_SECS, 2.0 * 2 ** (n_attempt - 1))
+      backoff_secs = sprun.get_backoff_secs(n_attempt, base_secs=2.0)
+      self.assertTrue(0.5 * expo <= backoff_secs < 1.5 * expo, (n_attempt, backoff_secs))
+
+
+class SubprocRunnerTestCase(unittest.TestCase):
+
+  def run_python(self, code, **kwargs):
+    runner = sprun.SubprocRunner(backoff_base_secs=0.01, **kwargs)
+    return runner.run([sys.executable, '-c', code])
+
+  def test_1_capture_n_retries(self):
+    result = self.run_python('import sys; print("out"); sys.stderr.write("err\\n")', b_capture_stdout=True)
+    self.assertTrue(result.ok)
+    self.assertEqual(('out\n', 'err\n', 1), (result.stdout, result.stderr, result.n_attempts))
+    # a transient failure is retried max_retries times
+    code = 'import sys; sys.stderr.write("ERROR: HTTP Error 429: Too Many Requests\\n"); sys.exit(1)'
+    result = self.run_python(code, max_retries=2)
+    self.assertTrue(result.is_transient)
+    self.assertEqual(3, result.n_attempts)
+    # a permanent one is not
+    code = 'import sys; sys.stderr.write("ERROR: Requested format is not available\\n"); sys.exit(1)'
+    result = self.run_python(code, max_retries=2)
+    self.assertTrue(result.is_format_not_available)
+    self.assertEqual(1, result.n_attempts)
+    self.assertEqual('ERROR: Requested format is not available', result.last_stderr_lines)
+
+  def test_2_undecodable_stderr_timeout_n_missing_executable(self):
+    code = 'import sys; sys.stderr.buffer.write(b"\\xff\\xfe HTTP Error 404\\n"); sys.exit(1)'
+    result = self.run_python(code, max_retries=0)
+    self.assertEqual(sprun.FAILURE_HTTP_CLIENT, result.failure_kind)
+    self.assertIn('�', result.stderr)
+    code = 'import sys, time; sys.stderr.write("started\\n"); sys.stderr.flush(); time.sleep(10)'
+    result = self.run_python(code, timeout_secs=0.5, max_retries=0)
+    self.assertEqual((sprun.FAILURE_TIMEOUT, None), (result.failure_kind, result.returncode))
+    self.assertEqual('started\n', result.stderr)
+    result = sprun.SubprocRunner(max_retries=3).run(['/nonexistent/yt-dlp'])
+    self.assertEqual((sprun.FAILURE_OTHER, 1), (result.failure_kind, result.n_attempts))
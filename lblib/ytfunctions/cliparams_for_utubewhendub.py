@@ -8,6 +8,7 @@ This module contain class CliParam which helps collect, verify
 """
 import argparse
 import os
+import lblib.os.rate_governor as rgov
 import lblib.ytfunctions.osentry_class as ose  # ose.OSEntry
 import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
 DEFAULT_YTIDS_FILENAME = ose.DEFAULT_YTIDS_FILENAME
@@ -36,6 +37,18 @@ parser.add_argument("--seq", type=int, default=1,
                     help="the sequencial number that accompanies the 'vd' namemarker at the last renaming")
 parser.add_argument("--map", type=str, default="0:en,1:pt",
                     help="the dictionary-mapping with numbers and the 2-letter language codes (e.g. '0:en,1:pt')")
+parser.add_argument("--automap", action='store_true',
+                    help="discover the --map (and check --amn) via a cached 'yt-dlp -F' probe for each ytid")
+parser.add_argument("--jobs", type=int, default=1,
+                    help="number of ytids downloaded concurrently (each one in its own tmp subdirectory)")
+parser.add_argument("--audiojobs", type=int, default=1,
+                    help="concurrency cap for fetching the language audio parts of one ytid (1 means one by one)")
+parser.add_argument("--timeout", type=int, default=None,
+                    help="timeout in seconds for each yt-dlp call (default: 3 hours)")
+parser.add_argument("--retries", type=int, default=None,
+                    help="retries (with a jittered backoff) for transient yt-dlp failures: network, throttling, timeout")
+parser.add_argument("--bandwidth", type=str, default=None,
+                    help="total download rate shared by all concurrent downloads, e.g. 4M or 500K (bytes/s)")
 parser.add_argument("-y", action='store_true',
                     help="represents 'yes', making the user confirmation phase to be skipped off")
 args = parser.parse_args()
@@ -94,6 +107,13 @@ class CliParam:
     self.audiomainnumber = DEFAULT_AUDIO_MAIN_NUMBER
     self.nvdseq = 1
     self.sfx_n_2letlng_dict = DEFAULT_SFX_W_2LETLNG_MAPDCT
+    self.b_automap = False  # if True, --map is discovered per ytid from its (cached) format listing
+    self.timeout_secs = None  # None means the Downloader's default
+    self.max_retries = None  # None means the Downloader's default
+    self.njobs = 1  # 1 means the former sequential one-ytid-after-another behavior
+    self.naudiojobs = 1  # 1 means the language audio parts are fetched one after another
+    self.bandwidth = None  # None means the env var LBLIB_DLD_BANDWIDTH (or no rate limit if that's not set either)
+    self.governor = None  # the RateGovernor is set by the download script itself
 
   def verify_n_trans_sfx_n_2letlng_dict(self):
     """
@@ -138,6 +158,14 @@ class CliParam:
     self.nvdseq = args.seq or 1
     self.sfx_n_2letlng_dict = args.map or DEFAULT_SFX_W_2LETLNG_MAPDCT
     self.verify_n_trans_sfx_n_2letlng_dict()
+    self.b_automap = args.automap or False
+    self.timeout_secs = args.timeout
+    self.max_retries = args.retries
+    self.njobs = args.jobs if args.jobs and args.jobs > 0 else 1
+    self.naudiojobs = args.audiojobs if args.audiojobs and args.audiojobs > 0 else 1
+    self.bandwidth = args.bandwidth
+    # a bad rate (here or in $LBLIB_DLD_BANDWIDTH) stops with the usage message before any download
+    rgov.get_total_bps_or_exit(self.bandwidth, usage_func=parser.error)
 
   def read_inputfile_ifneeded(self):
     if self.b_useinputfile:
@@ -190,6 +218,9 @@ class CliParam:
     -------------------
     => videoonlycode = {voc} | audiomainnumber = {amn} | audioonlycodes = {aocs}
     => sfx_n_2letlng_dict = {self.sfx_n_2letlng_dict} | langnames = {langs_in_asc_order} | n_langs = {n_langs}
+    => automap (map discovered via yt-dlp -F per ytid, --map above is only a fallback) = {self.b_automap}
+    => jobs (ytids downloaded concurrently) = {self.njobs} | audiojobs (languages fetched concurrently) = {self.naudiojobs}
+    => bandwidth (total rate shared by the concurrent downloads) = {self.bandwidth or 'env or unlimited'}
     """
     print(scrmsg)
     print(charrule)
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/dldjournal.py
+
+  The DownloadJournal class is an append-only journal (one json object per line)
+    that the Downloader (in ~/bin/dlYouTubeWhenThereAreDubbed2.py) writes at each stage
+    of its process(), so that a crashed or killed batch resumes at the next stage
+    without listing directories or asking the user which file was downloaded.
+
+  The journal file is ".dldjournal.jsonl" inside the shared tmpdir (videodld_tmpdir),
+    ie, also when each ytid has its own tmp subdirectory (the --jobs mode),
+    so that a per-ytid subdirectory may be removed when its ytid is done.
+
+  Each line (a record) has:
+    ytid, runkey, stage, fcode (the format code when the stage is per language), filename,
+    size, checksum (a quick one, @see quick_checksum() below) and ts (the timestamp)
+  The runkey (@see form_runkey() below) is the videoonlycode plus the audio codes asked for, ie
+    a later run of the same ytid with other formats or languages does not take the former one's records;
+    the journal being in the dlddir's tmpdir, records are also per dlddir.
+
+  The file is read once (at the first lookup) into an in-memory index keyed on (ytid, stage, fcode, runkey)
+    and record() appends to both, so the lookups of a batch do not re-read the file
+    (a DownloadJournal object is made per Downloader, ie per ytid)
+
+  Example of a journal for a two-language video:
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "videoonly-downloaded", "filename": "title [abcABC123-_].mp4", ...}
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "fsufixed", "filename": "title [abcABC123-_].f160.mp4", ...}
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "fannedout", "filename": "title [abcABC123-_].f160.mp4.bk1", ...}
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "lang-merged", "fcode": "160+233-0", "filename": "vd1-en title ...", ...}
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "lang-merged", "fcode": "160+233-1", "filename": "vd1-pt title ...", ...}
+    {"ytid": "abcABC123-_", "runkey": "160|233-0,233-1", "stage": "moved", ...}
+
+  Usage:
+    journal = DownloadJournal(tmpdir_abspath)
+    runkey = form_runkey(160, ['233-0', '233-1'])
+    journal.record(ytid, STAGE_LANG_MERGED, filepath, fcode='160+233-0', runkey=runkey)
+    journal.has_stage(ytid, STAGE_LANG_MERGED, '160+233-0', runkey)  # => True
+    journal.get_last_record_or_none(ytid, STAGE_VIDEOONLY_DOWNLOADED, runkey=runkey)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+try:
+  import fcntl
+except ImportError:
+  # non-POSIX systems: the inter-process lock is skipped (the thread lock still applies)
+  fcntl = None
+DEFAULT_JOURNAL_FILENAME = '.dldjournal.jsonl'
+STAGE_VIDEOONLY_DOWNLOADED = 'videoonly-downloaded'
+STAGE_FSUFIXED = 'fsufixed'
+STAGE_FANNEDOUT = 'fannedout'
+STAGE_LANG_MERGED = 'lang-merged'
+STAGE_MOVED = 'moved'
+# not a stage reached: a ytid given up in this run (its reason is kept), the next run retries it
+STAGE_FAILED = 'failed'
+QUICK_CHECKSUM_CHUNKSIZE = 64 * 1024
+
+
+def form_runkey(videoonlycode, audiocodes) -> str:
+  """
+  Example: (160, ['233-0', '233-1']) => "160|233-0,233-1"
+  """
+  return f"{videoonlycode}|{','.join(f'{aoc}' for aoc in audiocodes)}"
+
+
+def quick_checksum(filepath) -> str | None:
+  """
+  A blake2b hash over the file size plus its first, middle and last 64KiB
+    (hashing whole multi-hundred-MB videos at every stage would cost more than the stage itself)
+  Returns None if the file does not exist
+  """
+  try:
+    size = os.path.getsize(filepath)
+    hasher = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filepath, 'rb') as f:
+      for offset in (0, max(0, size // 2 - QUICK_CHECKSUM_CHUNKSIZE // 2), max(0, size - QUICK_CHECKSUM_CHUNKSIZE)):
+        f.seek(offset)
+        hasher.update(f.read(QUICK_CHECKSUM_CHUNKSIZE))
+    return hasher.hexdigest()
+  except OSError:
+    return None
+
+
+class DownloadJournal:
+
+  # one lock per journal filepath for the threads of this process (the --jobs mode)
+  _thread_locks = {}
+  _thread_locks_guard = threading.Lock()
+
+  def __init__(self, journaldir_abspath, journal_filename=None):
+    self.journaldir_abspath = journaldir_abspath
+    self.journal_filename = journal_filename or DEFAULT_JOURNAL_FILENAME
+    os.makedirs(self.journaldir_abspath, exist_ok=True)
+    with self._thread_locks_guard:
+      self.thread_lock = self._thread_locks.setdefault(self.journal_filepath, threading.Lock())
+    # (ytid, stage, fcode, runkey) => the last record, fcode None standing for "any fcode" (lazily loaded)
+    self._index = None
+
+  @property
+  def journal_filepath(self):
+    return os.path.join(self.journaldir_abspath, self.journal_filename)
+
+  def append(self, record: dict):
+    """
+    Appends one record (a line) and fsync's it, so that a kill right after a stage does not lose it
+    """
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with self.thread_lock:
+      with open(self.journal_filepath, 'a', encoding='utf-8') as f:
+        if fcntl is not None:
+          fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+        if fcntl is not None:
+          fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+  def record(self, ytid, stage, filepath=None, fcode=None, runkey=None, reason=None) -> dict:
+    """
+    Forms and appends a record for a stage just finished
+      filepath (if given) is the file the stage produced: its name, size and quick checksum are kept
+      reason (if given) says why, eg for a STAGE_FAILED record
+    """
+    record = {'ytid': ytid, 'runkey': runkey, 'stage': stage}
+    if fcode is not None:
+      record['fcode'] = f"{fcode}"
+    if reason is not None:
+      record['reason'] = reason
+    if filepath is not None:
+      record['filename'] = os.path.basename(filepath)
+      record['size'] = os.path.getsize(filepath) if os.path.isfile(filepath) else None
+      record['checksum'] = quick_checksum(filepath)
+    record['ts'] = time.time()
+    self.append(record)
+    if self._index is not None:
+      self.index_record(record)
+    return record
+
+  def read_records(self, ytid=None) -> list[dict]:
+    """
+    Returns all records (or those of one ytid) in the order they were written
+      a truncated last line (from a kill in the middle of a write) is ignored
+    """
+    records = []
+    try:
+      with open(self.journal_filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+          try:
+            record = json.loads(line)
+          except ValueError:
+            continue
+          if ytid is None or record.get('ytid') == ytid:
+            records.append(record)
+    except OSError:
+      pass
+    return records
+
+  def index_record(self, record: dict):
+    ytid, stage, runkey = record.get('ytid'), record.get('stage'), record.get('runkey')
+    self._index[(ytid, stage, None, runkey)] = record
+    if record.get('fcode') is not None:
+      self._index[(ytid, stage, record['fcode'], runkey)] = record
+
+  @property
+  def index(self) -> dict:
+    if self._index is None:
+      self._index = {}
+      for record in self.read_records():
+        self.index_record(record)
+    return self._index
+
+  def get_last_record_or_none(self, ytid, stage, fcode=None, runkey=None) -> dict | None:
+    """
+    The last record of the stage for (ytid, runkey), of any fcode if fcode is None
+    """
+    return self.index.get((ytid, stage, None if fcode is None else f"{fcode}", runkey))
+
+  def has_stage(self, ytid, stage, fcode=None, runkey=None) -> bool:
+    return self.get_last_record_or_none(ytid, stage, fcode, runkey) is not None
+
+  def has_stage_since(self, ytid, stage, since_record, fcode=None, runkey=None) -> bool:
+    """
+    True if the stage was recorded at or after since_record (eg a later video-only redownload
+      makes the former fsufix & fan-out records stale)
+    """
+    record = self.get_last_record_or_none(ytid, stage, fcode, runkey)
+    if record is None:
+      return False
+    return since_record is None or record.get('ts', 0) >= since_record.get('ts', 0)
+
+  def __str__(self):
+    outstr = f"""DownloadJournal:
+    journal = [{self.journal_filepath}] | records = {len(self.read_records())}"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  journal = DownloadJournal(tmpdir)
+  ytid = 'abcABC123-_'
+  filepath = os.path.join(tmpdir, f'title [{ytid}].mp4')
+  with open(filepath, 'wb') as f:
+    f.write(b'0' * 1000)
+  runkey = form_runkey(160, ['233-0', '233-1'])
+  journal.record(ytid, STAGE_VIDEOONLY_DOWNLOADED, filepath=filepath, runkey=runkey)
+  journal.record(ytid, STAGE_LANG_MERGED, fcode='160+233-0', runkey=runkey)
+  print(journal)
+  print(journal.get_last_record_or_none(ytid, STAGE_VIDEOONLY_DOWNLOADED, runkey=runkey))
+  print('has 160+233-1 ?', journal.has_stage(ytid, STAGE_LANG_MERGED, '160+233-1', runkey))
+  print('has 160 (other runkey) ?', journal.has_stage(ytid, STAGE_VIDEOONLY_DOWNLOADED, runkey=form_runkey(18, [])))
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
@@ -6,9 +6,22 @@ The OSEntry class models the files and filenames that are downloaded
   to form the various available autodubbed language videos from YouTube together with its original language.
 This class is used by dlYouTubeWhenThereAreDubbed.py that, at the time of writing,
   is placed in the (Linux) user's bin directory.
+
+The DirSnapshot class (also here) is a one-time os.scandir() of the working tmpdir
+  indexed by ytid and dot extension. OSEntry owns it (via get_dirsnapshot(),
+  which shares one snapshot per directory among the OSEntry's of a batch), and
+  the renames/moves/removals done by the Downloader are noted into it incrementally,
+  so that filename lookups do not re-list the tmpdir (which, with thousands of
+  leftover videos in a shared tmpdir, made a batch quadratic).
+  Only what is written by an outside process (yt-dlp itself) needs a rescan()
+  or, when the name it wrote is known (yt-dlp reports it, or the candidates are few), a one-file refresh_filename().
+  The process-wide registry keeps at most MAX_DIRSNAPSHOTS snapshots (least recently used are evicted)
+  and drop_dirsnapshot() evicts one when its directory is done with (a per-ytid tmp subdirectory).
 """
+import collections
 import os
 import sys
+import threading
 import lblib.regexfs.filenamevalidator_cls as fnval  # .FilenameValidator
 import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
 DEFAULT_YTIDS_FILENAME = 'youtube-ids.txt'
@@ -19,6 +32,164 @@ DEFAULT_VIDEO_ONLY_CODE = 160
 DEFAULT_SFX_W_2LETLNG_MAPDCT = {0: 'en', 1: 'pt'}  # en is English, pt is Portuguese
 VIDEO_DOT_EXTENSIONS = ['.mp4', '.mkv', '.webm', '.m4v', '.avi', '.wmv']
 default_videodld_tmpdir = 'videodld_tmpdir'
+MAX_DIRSNAPSHOTS = 32
+
+
+class DirSnapshot:
+  """
+  A filename snapshot of one directory indexed as:
+    ytid_ext_idx[ytid][dot_ext] = set of filenames
+      (ytid is the last "[<11-char ytid>]" in the filename, dot_ext is its last extension)
+
+  Usage:
+    snapshot = DirSnapshot(workdir_abspath)
+    added = snapshot.rescan()  # after an outside process (e.g. yt-dlp) has written into the directory
+    snapshot.note_rename(srcfilepath, trgfilepath)  # after an os.rename() done by the caller
+    filenames = snapshot.get_filenames_for_ytid(ytid, '.mp4')
+  """
+
+  def __init__(self, workdir_abspath):
+    self.workdir_abspath = workdir_abspath
+    self.filenames = set()
+    self.ytid_ext_idx = {}
+    self.lock = threading.Lock()
+    self.n_scans = 0
+    self.rescan()
+
+  @staticmethod
+  def extract_ytid_n_dot_ext_fr_filename(filename) -> tuple[str | None, str]:
+    _, dot_ext = os.path.splitext(filename)
+    matches = ytstrfs.cmpld_ytid_in_ytdlp_filename_pattern.findall(filename)
+    ytid = matches[-1] if matches else None
+    return ytid, dot_ext
+
+  def _add(self, filename):
+    if filename in self.filenames:
+      return
+    self.filenames.add(filename)
+    ytid, dot_ext = self.extract_ytid_n_dot_ext_fr_filename(filename)
+    if ytid is None:
+      return
+    self.ytid_ext_idx.setdefault(ytid, {}).setdefault(dot_ext, set()).add(filename)
+
+  def _discard(self, filename):
+    if filename not in self.filenames:
+      return
+    self.filenames.discard(filename)
+    ytid, dot_ext = self.extract_ytid_n_dot_ext_fr_filename(filename)
+    ext_dict = self.ytid_ext_idx.get(ytid)
+    if ext_dict is None:
+      return
+    ext_dict.get(dot_ext, set()).discard(filename)
+    if len(ext_dict.get(dot_ext, ())) == 0:
+      ext_dict.pop(dot_ext, None)
+    if len(ext_dict) == 0:
+      del self.ytid_ext_idx[ytid]
+
+  def rescan(self) -> set[str]:
+    """
+    Re-lists the directory (os.scandir, files only) and returns the filenames that appeared since the last scan
+    """
+    try:
+      with os.scandir(self.workdir_abspath) as entries:
+        scanned = {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+      scanned = set()
+    with self.lock:
+      self.n_scans += 1
+      added = scanned - self.filenames
+      for filename in self.filenames - scanned:
+        self._discard(filename)
+      for filename in added:
+        self._add(filename)
+    return added
+
+  def refresh_filename(self, filename) -> bool:
+    """
+    Stats one filename (instead of re-listing the directory), notes it in or out and returns whether it exists
+    """
+    b_exists = os.path.isfile(os.path.join(self.workdir_abspath, filename))
+    with self.lock:
+      if b_exists:
+        self._add(filename)
+      else:
+        self._discard(filename)
+    return b_exists
+
+  def is_file_in_dir(self, filepath) -> bool:
+    folderpath, filename = os.path.split(filepath)
+    return folderpath == self.workdir_abspath
+
+  def note_added(self, filepath):
+    if self.is_file_in_dir(filepath):
+      with self.lock:
+        self._add(os.path.basename(filepath))
+
+  def note_removed(self, filepath):
+    if self.is_file_in_dir(filepath):
+      with self.lock:
+        self._discard(os.path.basename(filepath))
+
+  def note_rename(self, srcfilepath, trgfilepath):
+    """
+    Both paths may or may not be in this directory (a move out of it is just a removal)
+    """
+    self.note_removed(srcfilepath)
+    self.note_added(trgfilepath)
+
+  def has_filename(self, filename) -> bool:
+    return filename in self.filenames
+
+  def get_filenames_for_ytid(self, ytid, dot_ext=None) -> list[str]:
+    ext_dict = self.ytid_ext_idx.get(ytid, {})
+    if dot_ext is not None:
+      return sorted(ext_dict.get(dot_ext, ()))
+    return sorted(fn for filenames in ext_dict.values() for fn in filenames)
+
+  def get_video_filenames_for_ytid(self, ytid) -> set[str]:
+    """
+    The filenames of ytid with a video extension, from the per-ytid index (the directory is not iterated)
+    """
+    ext_dict = self.ytid_ext_idx.get(ytid, {})
+    return {fn for dot_ext in VIDEO_DOT_EXTENSIONS for fn in ext_dict.get(dot_ext, ())}
+
+  def __len__(self):
+    return len(self.filenames)
+
+  def __str__(self):
+    outstr = f"""DirSnapshot: [{self.workdir_abspath}]
+    files = {len(self.filenames)} | ytids = {len(self.ytid_ext_idx)} | scans = {self.n_scans}"""
+    return outstr
+
+
+_dirsnapshots = collections.OrderedDict()
+_dirsnapshots_lock = threading.Lock()
+
+
+def get_dirsnapshot(workdir_abspath) -> DirSnapshot:
+  """
+  One DirSnapshot per directory for the whole process
+    (in a batch, the Downloader's (and their OSEntry's) that work in a shared tmpdir reuse it)
+  Beyond MAX_DIRSNAPSHOTS, the least recently used is evicted
+    (an OSEntry that still holds it keeps using it, only the sharing ends)
+  """
+  with _dirsnapshots_lock:
+    snapshot = _dirsnapshots.get(workdir_abspath)
+    if snapshot is None:
+      snapshot = DirSnapshot(workdir_abspath)
+      _dirsnapshots[workdir_abspath] = snapshot
+    _dirsnapshots.move_to_end(workdir_abspath)
+    while len(_dirsnapshots) > MAX_DIRSNAPSHOTS:
+      _dirsnapshots.popitem(last=False)
+    return snapshot
+
+
+def drop_dirsnapshot(workdir_abspath):
+  """
+  Evicts the DirSnapshot of workdir_abspath (if any), eg when its per-ytid tmp subdirectory is done with
+  """
+  with _dirsnapshots_lock:
+    _dirsnapshots.pop(workdir_abspath, None)
 
 
 class OSEntry:
@@ -42,6 +213,16 @@ class OSEntry:
       self.videoonly_or_audio_code = videoonly_or_audio_code
     self.workdir_abspath = workdir_abspath
     self.treat_workdir_abspath()
+    self._snapshot = None
+
+  @property
+  def snapshot(self) -> DirSnapshot:
+    """
+    The (lazily taken) DirSnapshot of workdir_abspath
+    """
+    if self._snapshot is None:
+      self._snapshot = get_dirsnapshot(self.workdir_abspath)
+    return self._snapshot
 
   def treat_workdir_abspath(self):
     if self.workdir_abspath is None or self.workdir_abspath == '.':
@@ -365,13 +546,17 @@ class OSEntry:
       3 - if it finds that canonical with a different extension, set that extension
           (remind the canonical filename is formed joining the two parts ({name}{dot_ext})
     """
+    # the merge (by yt-dlp) may have just written into the folder: the names it may have written
+    #   are known, so each one is stat'ed once (and noted in or out of the snapshot), no directory listing
     # step 1 - if the original canonical exists, do nothing, return
-    if os.path.isfile(self.fp_for_fn_as_name_ext):
+    if self.snapshot.refresh_filename(self.fn_as_name_ext):
       return False
     # step 2 - look up a canonical name joint with a different extension
     for dot_ext in VIDEO_DOT_EXTENSIONS:
-      newfilepath = fnval.change_fileextension_in_fp_fr_w(self.fp_for_fn_as_name_ext, dot_ext)
-      if os.path.isfile(newfilepath):
+      if dot_ext == self.dot_ext:
+        # stat'ed in step 1
+        continue
+      if self.snapshot.refresh_filename(f"{self.name}{dot_ext}"):
         # found, set found fileextension
         self.dot_ext = dot_ext
         scrmsg = f"\tFound CHANGED dot_ext as {dot_ext} | canonical = {self.fn_as_name_ext}"
@@ -399,10 +584,11 @@ class OSEntry:
       prefix = f"vd{seq}-{ntries}-{twolettercode} "
     newfilename = prefix + canofilename
     newfilepath = os.path.join(self.workdir_abspath, newfilename)
-    if os.path.isfile(newfilename):
+    if os.path.isfile(newfilepath):
       return self.rename_canofile_with_twolettercode_n_nvdseq(twolettercode, seq, ntries+1)
     # rename
     os.rename(canofilepath, newfilepath)
+    self.snapshot.note_rename(canofilepath, newfilepath)
     scrmsg = f"""Renamed:
     FROM: [{canofilename}]
     TO:   [{newfilename}]  
@@ -435,6 +621,7 @@ class OSEntry:
       changing_filepath = os.path.join(self.workdir_abspath, changing_filename)
     try:
       os.rename(canofilepath, changing_filepath)
+      self.snapshot.note_rename(canofilepath, changing_filepath)
       scrmsg = f"""Rename succeeded for incrementing langN prefix to canofile
       ---------------------------------------
       FROM (canofilepath):    [{canofilepath}]
@@ -486,9 +673,22 @@ def adhoctest2():
 
 
 def adhoctest1():
-  """
-  """
-  pass
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  for filename in ['a [abcABC123-_].mp4', 'a [abcABC123-_].f160.mp4.bk1', 'b [zzzZZZ999-_].webm', 'notes.txt']:
+    with open(os.path.join(tmpdir, filename), 'w') as f:
+      f.write('')
+  snapshot = DirSnapshot(tmpdir)
+  print(snapshot)
+  print(snapshot.get_filenames_for_ytid('abcABC123-_'))
+  srcfilepath = os.path.join(tmpdir, 'a [abcABC123-_].mp4')
+  trgfilepath = os.path.join(tmpdir, 'a [abcABC123-_].f160.mp4')
+  os.rename(srcfilepath, trgfilepath)
+  snapshot.note_rename(srcfilepath, trgfilepath)
+  print(snapshot.get_filenames_for_ytid('abcABC123-_', '.mp4'))
+  with open(os.path.join(tmpdir, 'c [cccCCC333-_].mkv'), 'w') as f:
+    f.write('')
+  print('added =', snapshot.rescan(), snapshot)
 
 
 def process():
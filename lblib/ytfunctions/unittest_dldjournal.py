@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import lblib.ytfunctions.dldjournal as djr
+import unittest
+
+
+class DownloadJournalTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_dldjournal-')
+    self.ytid = 'abcABC123-_'
+    self.runkey = djr.form_runkey(160, ['233-0', '233-1'])
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def test_1_runkey_n_lookups(self):
+    self.assertEqual('160|233-0,233-1', self.runkey)
+    journal = djr.DownloadJournal(self.testdirpath)
+    filepath = os.path.join(self.testdirpath, f'title [{self.ytid}].mp4')
+    with open(filepath, 'wb') as f:
+      f.write(b'0' * 1000)
+    journal.record(self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, filepath=filepath, runkey=self.runkey)
+    journal.record(self.ytid, djr.STAGE_LANG_MERGED, fcode='160+233-0', runkey=self.runkey)
+    record = journal.get_last_record_or_none(self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, runkey=self.runkey)
+    self.assertEqual(os.path.basename(filepath), record['filename'])
+    self.assertEqual(1000, record['size'])
+    self.assertEqual(djr.quick_checksum(filepath), record['checksum'])
+    self.assertTrue(journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, '160+233-0', self.runkey))
+    self.assertFalse(journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, '160+233-1', self.runkey))
+    # fcode None stands for "any fcode"
+    self.assertTrue(journal.has_stage(self.ytid, djr.STAGE_LANG_MERGED, runkey=self.runkey))
+    # another runkey (other formats asked for) does not take this run's records
+    self.assertFalse(journal.has_stage(self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, runkey=djr.form_runkey(18, [])))
+
+  def test_2_reread_n_truncated_line(self):
+    journal = djr.DownloadJournal(self.testdirpath)
+    journal.record(self.ytid, djr.STAGE_FSUFIXED, runkey=self.runkey)
+    journal.record(self.ytid, djr.STAGE_FAILED, runkey=self.runkey, reason='no dubs')
+    # a kill in the middle of a write leaves a partial last line
+    with open(journal.journal_filepath, 'a', encoding='utf-8') as f:
+      f.write('{"ytid": "abcABC123-_", "stage": "mo')
+    rereader = djr.DownloadJournal(self.testdirpath)
+    self.assertEqual(2, len(rereader.read_records(self.ytid)))
+    self.assertTrue(rereader.has_stage(self.ytid, djr.STAGE_FSUFIXED, runkey=self.runkey))
+    failed = rereader.get_last_record_or_none(self.ytid, djr.STAGE_FAILED, runkey=self.runkey)
+    self.assertEqual('no dubs', failed['reason'])
+    self.assertEqual([], rereader.read_records('otherytid01'))
+
+  def test_3_has_stage_since(self):
+    journal = djr.DownloadJournal(self.testdirpath)
+    fanout = journal.record(self.ytid, djr.STAGE_FANNEDOUT, runkey=self.runkey)
+    videoonly = journal.record(self.ytid, djr.STAGE_VIDEOONLY_DOWNLOADED, runkey=self.runkey)
+    videoonly['ts'] = fanout['ts'] + 1
+    # a later video-only redownload makes the former fan-out record stale
+    self.assertFalse(journal.has_stage_since(self.ytid, djr.STAGE_FANNEDOUT, videoonly, runkey=self.runkey))
+    self.assertTrue(journal.has_stage_since(self.ytid, djr.STAGE_FANNEDOUT, None, runkey=self.runkey))
+    self.assertIsNone(djr.quick_checksum(os.path.join(self.testdirpath, 'missing.mp4')))
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import lblib.ytfunctions.ytid_binstore as ytbin
+import unittest
+
+
+class YtidBinStoreTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_ytid_binstore-')
+    self.binfilepath = os.path.join(self.testdirpath, 'test' + ytbin.BINSTORE_DOT_EXT)
+
+  def tearDown(self):
+    shutil.rmtree(self.testdirpath)
+
+  def test_1_pack_roundtrip(self):
+    for ytid in ['abcABC123-_', '___________', 'AAAAAAAAAAA', 'zyxZYX987_-']:
+      record = ytbin.pack_ytid(ytid)
+      self.assertEqual(ytbin.RECORDSIZE, len(record))
+      self.assertEqual(ytid, ytbin.unpack_ytid(record))
+    self.assertRaises(ValueError, ytbin.pack_ytid, 'short')
+    # the bulk packing agrees with the one-by-one packing and skips the invalid ones ('+' and '/' included)
+    ytids = ['abcABC123-_', 'zyxZYX987_-', 'invalid', 'abc+BC123/_']
+    self.assertEqual([ytbin.pack_ytid(ytid) for ytid in ytids[:2]], ytbin.pack_ytids_in_bulk(ytids))
+
+  def test_2_membership_n_order(self):
+    ytids = ['zyxZYX987_-', 'abcABC123-_', '___________', 'AAAAAAAAAAA', 'abcABC123-_', 'invalid']
+    for b_bloom in (True, False):
+      self.assertEqual(4, ytbin.write_ytidset(self.binfilepath, ytids, b_bloom))
+      with ytbin.YtidBinStore(self.binfilepath) as store:
+        self.assertEqual(4, len(store))
+        self.assertEqual(sorted(store, key=ytbin.pack_ytid), list(store))
+        for ytid in ['zyxZYX987_-', 'abcABC123-_', '___________', 'AAAAAAAAAAA']:
+          self.assertIn(ytid, store)
+        self.assertNotIn('notInSet123', store)
+        self.assertNotIn('invalid', store)
+
+  def test_3_txt_roundtrip_n_bad_files(self):
+    txtfilepath = os.path.join(self.testdirpath, 'youtube-ids.txt')
+    with open(txtfilepath, 'w') as f:
+      f.write('abcABC123-_\ntitle [zyxZYX987_-].mp4\n')
+    self.assertEqual(2, ytbin.convert_txt_to_binstore(txtfilepath, self.binfilepath))
+    outfilepath = os.path.join(self.testdirpath, 'out.txt')
+    self.assertEqual(2, ytbin.convert_binstore_to_txt(self.binfilepath, outfilepath))
+    with open(outfilepath) as f:
+      self.assertEqual({'abcABC123-_', 'zyxZYX987_-'}, set(f.read().split()))
+    # a truncated file and a non-ytidset file are refused
+    with open(self.binfilepath, 'rb') as f:
+      data = f.read()
+    with open(self.binfilepath, 'wb') as f:
+      f.write(data[:-1])
+    self.assertRaises(ValueError, ytbin.YtidBinStore, self.binfilepath)
+    with open(self.binfilepath, 'wb') as f:
+      f.write(b'NOTASET!' + bytes(40))
+    self.assertRaises(ValueError, ytbin.YtidBinStore, self.binfilepath)
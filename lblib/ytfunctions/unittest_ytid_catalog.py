@@ -0,0 +1,58 @@
+import os
+import shutil
+import tempfile
+import lblib.ytfunctions.ytid_catalog as ytcat
+import unittest
+
+
+class YtidCatalogTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.testdirpath = tempfile.mkdtemp(prefix='unittest_ytid_catalog-')
+    # the tree and the database are kept apart, so the db's own files don't change the tree's mtimes
+    self.treepath = os.path.join(self.testdirpath, 'tree')
+    os.makedirs(os.path.join(self.treepath, 'sub', 'subsub'))
+    for relpath in ['a [abcABC123-_].mp4', 'b-zyxZYX987_-.webm', 'nothing.txt', 'sub/c [abcABC123-_].m4a',
+                    'sub/subsub/qwertyUIOP1.mp4']:
+      with open(os.path.join(self.treepath, relpath), 'w') as f:
+        f.write('x')
+    self.catalog = ytcat.YtidCatalog(os.path.join(self.testdirpath, 'catalog.sqlite'))
+
+  def tearDown(self):
+    self.catalog.close()
+    shutil.rmtree(self.testdirpath)
+
+  def test_1_ytid_in_filename(self):
+    for filename, expected in [
+        ('title [abcABC123-_].mp4', ('abcABC123-_', '.mp4')),
+        ('t [zyxZYX987_-] then [abcABC123-_].mp4', ('abcABC123-_', '.mp4')),
+        ('title-abcABC123-_.mp4', ('abcABC123-_', '.mp4')),
+        ('abcABC123-_.mp4', ('abcABC123-_', '.mp4')),
+        ('title.mp4', (None, '.mp4')),
+      ]:
+      self.assertEqual(expected, ytcat.extract_ytid_n_dot_ext_fr_filename(filename), filename)
+    # "/a/b_%" must not take "/a/b_%x" (a sibling) as part of its subtree
+    lower, upper = ytcat.get_subtree_bounds('/a/b_%')
+    self.assertTrue(lower <= '/a/b_%/c' < upper)
+    self.assertFalse(lower <= '/a/b_%x' < upper)
+
+  def test_2_incremental_refresh(self):
+    stats = self.catalog.refresh(self.treepath)
+    self.assertEqual((3, 4), (stats.n_dirs_listed, stats.n_ytidfiles))
+    self.assertEqual(['abcABC123-_', 'zyxZYX987_-', 'qwertyUIOP1'], self.catalog.get_ytids_under(self.treepath))
+    self.assertEqual(['abcABC123-_'], list(self.catalog.get_repeats_under(self.treepath)))
+    # nothing changed: only stats
+    stats = self.catalog.refresh(self.treepath)
+    self.assertEqual((3, 0), (stats.n_dirs_statted, stats.n_dirs_listed))
+    # a removal is seen in its own dir only; a removed subtree leaves the catalog
+    os.remove(os.path.join(self.treepath, 'b-zyxZYX987_-.webm'))
+    shutil.rmtree(os.path.join(self.treepath, 'sub', 'subsub'))
+    stats = self.catalog.refresh(self.treepath)
+    self.assertEqual(2, stats.n_dirs_listed)
+    self.assertFalse(self.catalog.has_ytid('zyxZYX987_-'))
+    self.assertFalse(self.catalog.has_ytid('qwertyUIOP1'))
+    entries = self.catalog.get_entries_for_ytid('abcABC123-_', self.treepath)
+    self.assertEqual(['a [abcABC123-_].mp4', 'c [abcABC123-_].m4a'], [entry.filename for entry in entries])
+    # scope: non-recursive and by extension
+    self.assertEqual(1, len(self.catalog.get_entries_under(self.treepath, b_recursive=False)))
+    self.assertEqual(['.m4a'], [entry.dot_ext for entry in self.catalog.get_entries_under(dot_exts=['.m4a'])])
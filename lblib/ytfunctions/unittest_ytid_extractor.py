@@ -0,0 +1,39 @@
+import io
+import lblib.ytfunctions.ytid_extractor as ytext
+import unittest
+
+
+class YtidExtractorTestCase(unittest.TestCase):
+
+  def test_1_the_four_forms(self):
+    text = """./some/folder:
+title one [abcABC123-_].mp4
+title two-zyxZYX987_-.webm
+https://www.youtube.com/watch?v=qwertyUIOP1&pp=continuation
+https://youtu.be/asdfgHJKL23
+https://www.youtube.com/shorts/shortsABC12
+  mnbvcXZ0987
+not a ytid line
+toolongtoolongtoolong
+https://www.youtube.com/watch?v=toolongtoolong1
+title three-abcABC123-_.tar.gz"""
+    self.assertEqual(
+      ['abcABC123-_', 'zyxZYX987_-', 'qwertyUIOP1', 'asdfgHJKL23', 'shortsABC12', 'mnbvcXZ0987'],
+      ytext.extract_ytids_fr_text(text),
+    )
+    self.assertEqual([], ytext.extract_ytids_fr_text(None))
+
+  def test_2_chunks_never_split_a_line(self):
+    lines = [f"title {i} [{'abcdefghij' + 'ABCDEFGHIJ'[i % 10]}].mp4" for i in range(50)]
+    data = '\n'.join(lines).encode('ascii')
+    expected = ytext.extract_ytids_fr_text(data.decode('ascii'))
+    self.assertEqual(50, len(expected))
+    # a chunksize smaller than a line (and a last line without a newline)
+    for chunksize in (7, 64, 1 << 20):
+      self.assertEqual(expected, list(ytext.extract_ytids_fr_binstream(io.BytesIO(data), chunksize)))
+
+  def test_3_unique_filter(self):
+    ytidfilter = ytext.UniqueYtidFilter(exclude={'zyxZYX987_-'})
+    self.assertEqual(['abcABC123-_'], ytidfilter.filter(['abcABC123-_', 'zyxZYX987_-', 'abcABC123-_']))
+    self.assertEqual(['qwertyUIOP1'], ytidfilter.filter(['abcABC123-_', 'qwertyUIOP1']))
+    self.assertEqual((5, 2, 1), (ytidfilter.n_in, ytidfilter.n_out, ytidfilter.n_excluded))
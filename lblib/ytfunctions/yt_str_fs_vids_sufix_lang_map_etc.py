@@ -13,6 +13,11 @@ import re
 YTID_CHARSIZE = 11
 enc64_valid_chars = string.digits + string.ascii_lowercase + string.ascii_uppercase + '_-'
 # Example for the regexp below: https://www.youtube.com/watch?v=abcABC123_-&pp=continuation
+# the two compiled regexps below replace the former char-by-char validation (one C-level pass each)
+enc64_str_regexp_pattern = r'[A-Za-z0-9_-]*'
+cmpld_enc64_str_pattern = re.compile(enc64_str_regexp_pattern)
+ytid_regexp_pattern = r'[A-Za-z0-9_-]{11}'
+cmpld_ytid_pattern = re.compile(ytid_regexp_pattern)
 ytid_url_w_watch_regexp_pattern = r'watch\?v=([A-Za-z0-9_-]{11})(?=(&|$))'
 cmpld_ytid_url_w_watch_re_pattern = re.compile(ytid_url_w_watch_regexp_pattern)
 ytid_in_ytdlp_filename_pattern = r'\[([A-Za-z0-9_-]{11})\]'
@@ -22,6 +27,14 @@ cmpld_ytid_instr_af_equalsign_pattern = re.compile(ytid_instr_af_equalsign)
 # another pattern to extract a ytid is the following: https://www.youtube.com/shorts/<ytid>
 # but the ytid will generalized as a split('/')[-1] and then tested as an 11-char ENC64 str
 ytvideobaseurl = "https://www.youtube.com/watch?v="
+# Example for the regexp below (a line from "yt-dlp -F <url>"):
+#   233-8  mp4 audio only    m3u8 [pt-BR] Português (Brasil) - dubbed-auto
+# group 1 is the audiomainnumber, group 2 the (optional) nsufix, group 3 the remaining of the line
+ytdlp_formatline_regexp_pattern = r'^(\d+)(?:-(\d+))?\s+(.*)$'
+cmpld_ytdlp_formatline_pattern = re.compile(ytdlp_formatline_regexp_pattern)
+# group 1 is the (2 or 3 letter) language code as in "[pt-BR]", "[hi]" or "[es-US]"
+ytdlp_langtag_regexp_pattern = r'\[([A-Za-z]{2,3})(?:-[A-Za-z0-9]+)*\]'
+cmpld_ytdlp_langtag_pattern = re.compile(ytdlp_langtag_regexp_pattern)
 TWOLETTER_N_LANGUAGENAME_DICTMAP = {
   'ar': 'Arabic',
   'de': 'German',
@@ -32,27 +45,34 @@ TWOLETTER_N_LANGUAGENAME_DICTMAP = {
   'id': 'Indonesian',
   'it': 'Italian',
   'ja': 'Japanese',
+  'ko': 'Korean',
   'ma': 'Mandarin Chinese',
   'ml': 'Malaysian',
+  'nl': 'Dutch',
+  'pl': 'Polish',
   'po': 'Polish',
   'pt': 'Portuguese',
   'ro': 'Romanian',
   'ru': 'Russian',
+  'tr': 'Turkish',
   'uk': 'Ukrainian',
+  'zh': 'Chinese',
 }
 
 
 def is_str_enc64(line: str | None) -> bool:
-  blist = list(map(lambda c: c in enc64_valid_chars, line))
-  if False in blist:
+  """
+  Obs: as before, the empty string is taken as ENC64 (there's no char in it that isn't)
+  """
+  if line is None:
     return False
-  return True
+  return cmpld_enc64_str_pattern.fullmatch(line) is not None
 
 
 def is_str_a_ytid(ytid: str | None) -> bool:
   if ytid is None or len(ytid) != YTID_CHARSIZE:
     return False
-  return is_str_enc64(ytid)
+  return cmpld_ytid_pattern.fullmatch(ytid) is not None
 
 
 def does_basename_end_with_dash_ytid(anystr: str | None) -> bool:
@@ -322,6 +342,12 @@ class LangAttr:
 
   @property
   def audioonlycode(self):
+    """
+    A negative (or None) nsufix means the video has no dubs, so the audiocode is not dash-sufixed
+      example: langless_audiocode=233 and nsufix=-1 => audioonlycode = "233"
+    """
+    if self.nsufix is None or self.nsufix < 0:
+      return f"{self.langless_audiocode}"
     aoc = f"{self.langless_audiocode}-{self.nsufix}"
     return aoc
 
@@ -330,7 +356,7 @@ class LangAttr:
     try:
       _langname = TWOLETTER_N_LANGUAGENAME_DICTMAP[self.twolettercode]
       return _langname
-    except IndexError:
+    except (IndexError, KeyError):
       pass
     return 'not-known'
 
@@ -400,7 +426,8 @@ class SufixLanguageMapper:
     aocs = []
     for item in self.dict_as_items_in_order:
       numbersufix = item[0]
-      audioonlycode = f"{self.audiomainnumber}-{numbersufix}"
+      # a negative sufix (the no-dubs case) means a non-dashed audioonlycode
+      audioonlycode = f"{self.audiomainnumber}" if numbersufix < 0 else f"{self.audiomainnumber}-{numbersufix}"
       aocs.append(audioonlycode)
     return aocs
 
@@ -453,7 +480,7 @@ class SufixLanguageMapper:
   def get_langname_fr_2lettercode(twolettercode):
     try:
       return TWOLETTER_N_LANGUAGENAME_DICTMAP[twolettercode]
-    except IndexError:
+    except (IndexError, KeyError):
       pass
     return 'unknown'
 
@@ -511,6 +538,8 @@ class SufixLanguageMapper:
     nsufix = self.get_audioonlycodesufix_fr_idx(idx)
     if nsufix is None:
       return None
+    if nsufix < 0:
+      return f"{self.audiomainnumber}"
     audioonlycode = f"{self.audiomainnumber}-{nsufix}"
     return audioonlycode
 
@@ -738,15 +767,91 @@ class SufixLanguageMapFinder:
     """
     return outstr
 
-def fetch_langdict_w_videoformatoutput(videoformatoutput):
+
+def parse_audioformat_rows_fr_videoformatoutput(videoformatoutput: str | None) -> list[dict]:
   """
-  vfo = videoformatoutput
-  TWOLETTER_N_LANGUAGENAME_DICTMAP.values()
-  :param videoformatoutput:
-  :return:
+  Parses the "audio only" lines of a "yt-dlp -F <url>" output into a list of dict rows
+    each row has:
+      audiomainnumber (int), nsufix (int or None if not dashed), format_id (str),
+      langtag (the full tag lowercased, str or None), twolettercode (str or None),
+      is_original (bool), is_dubbed (bool)
+    regional variants (e.g. es-US & es-ES) share a twolettercode but keep their own langtag
+
+  Example:
+    "233-9  mp4 audio only  m3u8 [en-US] American English - original (default)"
+    becomes
+    {'audiomainnumber': 233, 'nsufix': 9, 'format_id': '233-9', 'langtag': 'en-us',
+     'twolettercode': 'en', 'is_original': True, 'is_dubbed': False}
+  """
+  rows = []
+  if not videoformatoutput:
+    return rows
+  for line in videoformatoutput.splitlines():
+    line = line.strip()
+    if 'audio only' not in line:
+      continue
+    match = cmpld_ytdlp_formatline_pattern.match(line)
+    if match is None:
+      continue
+    audiomainnumber = int(match.group(1))
+    nsufix = None if match.group(2) is None else int(match.group(2))
+    rest = match.group(3)
+    langmatch = cmpld_ytdlp_langtag_pattern.search(rest)
+    langtag = None if langmatch is None else langmatch.group(0)[1:-1].lower()
+    twolettercode = None if langmatch is None else langmatch.group(1).lower()[:2]
+    row = {
+      'audiomainnumber': audiomainnumber,
+      'nsufix': nsufix,
+      'format_id': match.group(1) if nsufix is None else f"{audiomainnumber}-{nsufix}",
+      'langtag': langtag,
+      'twolettercode': twolettercode,
+      'is_original': 'original' in rest,
+      'is_dubbed': 'dubbed' in rest,
+    }
+    rows.append(row)
+  return rows
+
+
+def fetch_langdict_w_videoformatoutput(videoformatoutput, audiomainnumber=None) -> dict[int, str]:
   """
+  Returns the {nsufix: twolettercode} dict (ie the --map) for an audiomainnumber
+    read from a "yt-dlp -F <url>" output (or from its already parsed rows)
+
+  If audiomainnumber is None, the first dash-sufixed audiomainnumber found is used
+  An empty dict means the audiomainnumber has no dash-sufixed (ie language) variations
+  The twolettercode names the output file, so regional variants of one language (e.g. es-US & es-ES)
+    would collide: only one is kept (the original if it's one of them, else the first listed)
+    and each one dropped is reported
 
-  return {}
+  Example:
+    for the lines
+      233-0  mp4 audio only    m3u8 [en-US] American English - dubbed-auto
+      233-1  mp4 audio only    m3u8 [pt-BR] Português (Brasil) - original (default)
+    the result is {0: 'en', 1: 'pt'}
+  """
+  if isinstance(videoformatoutput, list):
+    rows = videoformatoutput
+  else:
+    rows = parse_audioformat_rows_fr_videoformatoutput(videoformatoutput)
+  if audiomainnumber is None:
+    dashed = [row['audiomainnumber'] for row in rows if row['nsufix'] is not None]
+    if len(dashed) == 0:
+      return {}
+    audiomainnumber = dashed[0]
+  langdict, kept_rows = {}, {}
+  variant_rows = [row for row in rows if row['audiomainnumber'] == audiomainnumber and row['nsufix'] is not None]
+  # the original track goes first, so that it's the one kept among its regional variants
+  for row in sorted(variant_rows, key=lambda r: not r['is_original']):
+    twolettercode = row['twolettercode'] or 'un'
+    kept_row = kept_rows.get(twolettercode)
+    if kept_row is not None and twolettercode != 'un':
+      wrnmsg = (f"Warning: dropping {row['format_id']} [{row.get('langtag')}]: its language code "
+                f"'{twolettercode}' is already taken by {kept_row['format_id']} [{kept_row.get('langtag')}]")
+      print(wrnmsg)
+      continue
+    kept_rows[twolettercode] = row
+    langdict[row['nsufix']] = twolettercode
+  return langdict
 
 
 def adhoctest6():
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/ytdlp_formatprobe.py
+
+  The FormatProbe class runs "yt-dlp -F <url>" once per ytid and
+    turns its "audio only" lines into a SufixLanguageMapper automatically,
+    ie, the --map (the sufix-to-language dict) no longer needs to be typed by hand.
+
+  The parsed format table is persisted in an on-disk cache (one json file per ytid)
+    with a TTL (time-to-live), so batch runs do not re-probe the same ytid.
+    The default cache directory is:
+      $XDG_CACHE_HOME/lblib/ytdlp_formats (or ~/.cache/lblib/ytdlp_formats)
+
+  This class is used by ~/bin/dlYouTubeWhenThereAreDubbed2.py (its --automap parameter).
+
+  Example of the lines this probe is interested in:
+    233-0  mp4 audio only    m3u8 [en-US] American English - dubbed-auto
+    233-1  mp4 audio only    m3u8 [pt-BR] Português (Brasil) - original (default)
+  These become (for audiomainnumber=233) the map {0: 'en', 1: 'pt'}
+
+  When the audiomainnumber has no dashed variations (the video has no dubs),
+    the mapper is made with a single non-dashed language (nsufix=-1),
+    ie, the audioonlycode is "233" from the start and the
+    failing-then-fallback path in the Downloader is not needed.
+"""
+import json
+import os
+import time
+import lblib.os.localstate as lst
+import lblib.os.subprocrunner as sprun
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+DEFAULT_CACHE_TTL_SECS = 24 * 3600  # dubs may be added to a video later on, so one day seems a fair TTL
+DEFAULT_PROBE_TIMEOUT_SECS = 120
+
+
+def get_default_cachedir_abspath() -> str:
+  return lst.get_lblib_cachedir_abspath('ytdlp_formats')
+
+
+class FormatProbe:
+
+  comm_list_base = ['yt-dlp', '-F']
+  video_baseurl = 'https://www.youtube.com/watch?v={ytid}'
+
+  def __init__(self, ytid, cachedir_abspath=None, ttl_secs=None):
+    self.ytid = ytstrfs.get_validated_ytid_or_raise(ytid)
+    self.cachedir_abspath = cachedir_abspath or get_default_cachedir_abspath()
+    self.ttl_secs = DEFAULT_CACHE_TTL_SECS if ttl_secs is None else ttl_secs
+    self._rows = None
+    self.b_came_from_cache = False
+
+  @property
+  def videourl(self):
+    return self.video_baseurl.format(ytid=self.ytid)
+
+  @property
+  def cachefilepath(self):
+    return os.path.join(self.cachedir_abspath, f"{self.ytid}.json")
+
+  def read_cache_or_none(self) -> list | None:
+    """
+    Returns the cached rows if the cachefile exists and is not older than the TTL
+    """
+    try:
+      with open(self.cachefilepath, 'r', encoding='utf-8') as f:
+        cachedict = json.load(f)
+    except (OSError, ValueError):
+      return None
+    probed_at = cachedict.get('probed_at', 0)
+    if time.time() - probed_at > self.ttl_secs:
+      return None
+    return cachedict.get('rows')
+
+  def write_cache(self, rows, videoformatoutput):
+    """
+    The cachefile is written to a tmp name and then renamed over,
+      so that concurrent downloaders never read a half-written json
+    """
+    os.makedirs(self.cachedir_abspath, exist_ok=True)
+    cachedict = {
+      'ytid': self.ytid,
+      'probed_at': time.time(),
+      'rows': rows,
+      'videoformatoutput': videoformatoutput,
+    }
+    tmpfilepath = f"{self.cachefilepath}.{os.getpid()}.tmp"
+    with open(tmpfilepath, 'w', encoding='utf-8') as f:
+      json.dump(cachedict, f, ensure_ascii=False, indent=1)
+    os.replace(tmpfilepath, self.cachefilepath)
+
+  def run_ytdlp_format_listing(self) -> str:
+    """
+    Raises OSError if yt-dlp fails (after the runner's retries for transient failures)
+    """
+    comm = self.comm_list_base + [self.videourl]
+    scrmsg = f"@FormatProbe | probing formats: {' '.join(comm)}"
+    print(scrmsg)
+    runner = sprun.SubprocRunner(timeout_secs=DEFAULT_PROBE_TIMEOUT_SECS, b_capture_stdout=True)
+    result = runner.run(comm)
+    if not result.ok:
+      errmsg = f"Error: format probe failed ({result.failure_kind}) for ytid={self.ytid} => {result.last_stderr_lines}"
+      raise OSError(errmsg)
+    return result.stdout
+
+  @property
+  def rows(self) -> list[dict]:
+    """
+    The parsed format table (only the "audio only" rows), taken from the cache if fresh
+      @see ytstrfs.parse_audioformat_rows_fr_videoformatoutput() for the row keys
+    """
+    if self._rows is not None:
+      return self._rows
+    rows = self.read_cache_or_none()
+    if rows is not None:
+      self.b_came_from_cache = True
+      self._rows = rows
+      return self._rows
+    videoformatoutput = self.run_ytdlp_format_listing()
+    self._rows = ytstrfs.parse_audioformat_rows_fr_videoformatoutput(videoformatoutput)
+    self.write_cache(self._rows, videoformatoutput)
+    return self._rows
+
+  @property
+  def audiomainnumbers(self) -> list[int]:
+    """
+    The distinct audiomainnumbers (e.g. 233, 234, 249) in the order they appear
+    """
+    amns = []
+    for row in self.rows:
+      if row['audiomainnumber'] not in amns:
+        amns.append(row['audiomainnumber'])
+    return amns
+
+  def choose_audiomainnumber(self, wished_audiomainnumber=None) -> int | None:
+    """
+    Returns the wished audiomainnumber if it's available, otherwise
+      the available one having the most language variations (or None if there's no audio at all)
+    """
+    amns = self.audiomainnumbers
+    if wished_audiomainnumber in amns:
+      return wished_audiomainnumber
+    if len(amns) == 0:
+      return None
+    return max(amns, key=lambda amn: len(ytstrfs.fetch_langdict_w_videoformatoutput(self.rows, amn)))
+
+  def get_original_twolettercode(self, audiomainnumber) -> str:
+    for row in self.rows:
+      if row['audiomainnumber'] == audiomainnumber and row['is_original'] and row['twolettercode']:
+        return row['twolettercode']
+    return 'un'
+
+  def get_langmapper(self, wished_audiomainnumber=None) -> ytstrfs.SufixLanguageMapper | None:
+    """
+    Builds the SufixLanguageMapper from the probed format table
+      None is returned if no audio-only format was found at all
+    """
+    audiomainnumber = self.choose_audiomainnumber(wished_audiomainnumber)
+    if audiomainnumber is None:
+      return None
+    langdict = ytstrfs.fetch_langdict_w_videoformatoutput(self.rows, audiomainnumber)
+    if len(langdict) > 0:
+      return ytstrfs.SufixLanguageMapper(langdict, audiomainnumber)
+    # no dashed variations: one language only whose audioonlycode is not dash-sufixed
+    twolettercode = self.get_original_twolettercode(audiomainnumber)
+    langmapper = ytstrfs.SufixLanguageMapper({-1: twolettercode}, audiomainnumber)
+    langmapper.turn_off_dubs()
+    return langmapper
+
+  def __str__(self):
+    outstr = f"""FormatProbe ytid={self.ytid} | from cache = {self.b_came_from_cache}
+    cachefile = [{self.cachefilepath}] | ttl = {self.ttl_secs}s
+    audiomainnumbers = {self.audiomainnumbers}"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  ytid = 'abcABC123-_'
+  videoformatoutput = """233-0  mp4 audio only    m3u8 [en-US] American English - dubbed-auto
+  233-1  mp4 audio only    m3u8 [pt-BR] Português (Brasil) - original (default)
+  160    mp4 256x144 video only"""
+  probe = FormatProbe(ytid, cachedir_abspath=tempfile.mkdtemp())
+  rows = ytstrfs.parse_audioformat_rows_fr_videoformatoutput(videoformatoutput)
+  probe.write_cache(rows, videoformatoutput)
+  langmapper = probe.get_langmapper(233)
+  print(probe)
+  print(langmapper, langmapper.audioonlycodes)
+
+
+def process():
+  """
+  """
+  pass
+
+
+if __name__ == '__main__':
+  """
+  process()
+  """
+  adhoctest1()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/ytid_binstore.py
+
+  A compact binary file format for (large) ytid sets, e.g. the "already downloaded" ones,
+    and the YtidBinStore class that opens it memory-mapped to test membership by binary search.
+
+  Packing:
+    an 11-char ENC64 (base64url) ytid is 11 * 6 = 66 bits, so it's packed into a 9-byte (72-bit) record:
+      the ytid gets one 'A' (the zero-valued base64 char) appended and is base64url-decoded,
+      ie the 6 padding bits are zeros and the packing/unpacking runs in C (the base64 module)
+    the records are sorted (bytewise, which is the same as the base64 alphabet order) and unique
+
+  File layout (all integers little-endian):
+    header (32 bytes):
+      magic          8 bytes  b'YTIDSET1'
+      version        uint16   1
+      recordsize     uint16   9
+      bloom_k        uint16   number of hash functions (0 if there's no bloom filter)
+      reserved       uint16   0
+      count          uint64   number of records
+      bloom_nbytes   uint64   size of the bloom filter in bytes (0 if there's none)
+    records:  count * 9 bytes
+    bloom filter (optional): bloom_nbytes bytes, bloom_k bit positions per record
+      (a multiplicative hash of the record's integer value, ytids being random-like already)
+      it's checked before the binary search, so that the (usual) "not in the set" answer
+      costs a few bit tests instead of ~log2(count) record reads
+
+  Size: a million ytids take 9 MB (+1.2 MB for the default bloom filter)
+    against ~12 MB for the youtube-ids.txt (11 chars + newline) that also has to be parsed on load
+
+  Usage:
+    write_ytidset(binfilepath, ytids)
+    with YtidBinStore(binfilepath) as store:
+      if ytid in store: ...
+    convert_txt_to_binstore(txtfilepath, binfilepath)
+    convert_binstore_to_txt(binfilepath, txtfilepath)
+
+  CLI:
+    ytid_binstore.py tobin <youtube-ids.txt> <ytids.ytidset>
+    ytid_binstore.py totxt <ytids.ytidset> <youtube-ids.txt>
+    ytid_binstore.py has <ytids.ytidset> <ytid> [<ytid> ...]
+"""
+import base64
+import binascii
+import mmap
+import os
+import struct
+import sys
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+import lblib.ytfunctions.ytid_extractor as ytext
+MAGIC = b'YTIDSET1'
+VERSION = 1
+RECORDSIZE = 9
+HEADER_STRUCT = struct.Struct('<8sHHHHQQ')
+HEADERSIZE = HEADER_STRUCT.size  # 32
+DEFAULT_BLOOM_BITS_PER_ITEM = 10
+DEFAULT_BLOOM_K = 7  # about 1% false positives with 10 bits per item
+BINSTORE_DOT_EXT = '.ytidset'
+MASK64 = (1 << 64) - 1
+BLOOM_MULTIPLIER1 = 0x9E3779B97F4A7C15  # the golden-ratio constants (as in Fibonacci hashing)
+BLOOM_MULTIPLIER2 = 0xC2B2AE3D27D4EB4F
+b64url_to_b64_table = str.maketrans('-_', '+/')
+
+
+def pack_ytid(ytid: str) -> bytes:
+  """
+  Example: 'abcABC123-_' => 9 bytes
+    Raises ValueError if ytid is not a valid ytid
+  """
+  if not ytstrfs.is_str_a_ytid(ytid):
+    errmsg = f"Error: [{ytid}] is not a valid ytid (11 ENC64 chars)"
+    raise ValueError(errmsg)
+  return base64.urlsafe_b64decode(ytid + 'A')
+
+
+def unpack_ytid(record: bytes) -> str:
+  return base64.urlsafe_b64encode(record).decode('ascii')[:-1]
+
+
+def pack_ytids_in_bulk(ytids) -> list[bytes]:
+  """
+  Packs many ytids with a single base64 decode (the per-ytid call costs more than the decoding itself)
+    invalid ytids are skipped (in that case, the ytids are packed one by one)
+  The standard base64 '+' and '/' are not ytid chars, yet they'd pass the translated decode
+    (stored as if they were '-' and '_'), so their presence also sends the ytids to the one-by-one path
+  """
+  ytids = [ytid for ytid in ytids if isinstance(ytid, str) and len(ytid) == ytstrfs.YTID_CHARSIZE]
+  joined = 'A'.join(ytids) + 'A'
+  if '+' not in joined and '/' not in joined:
+    try:
+      data = base64.b64decode(joined.translate(b64url_to_b64_table), validate=True)
+      return [data[i:i + RECORDSIZE] for i in range(0, len(data), RECORDSIZE)]
+    except (binascii.Error, ValueError):
+      pass
+  records = []
+  for ytid in ytids:
+    try:
+      records.append(pack_ytid(ytid))
+    except ValueError:
+      continue
+  return records
+
+
+def get_bloom_bitpositions(record: bytes, nbits: int, k: int) -> list[int]:
+  """
+  k bit positions via double hashing (h1 + i*h2)
+  """
+  x = int.from_bytes(record, 'big')
+  h1 = (x * BLOOM_MULTIPLIER1 >> 8) & MASK64
+  h2 = ((x * BLOOM_MULTIPLIER2 >> 16) & MASK64) | 1
+  return [(h1 + i * h2) % nbits for i in range(k)]
+
+
+def make_bloom(records, count, bits_per_item=DEFAULT_BLOOM_BITS_PER_ITEM, k=DEFAULT_BLOOM_K) -> bytearray:
+  nbytes = max(8, (count * bits_per_item + 7) // 8)
+  bloom = bytearray(nbytes)
+  nbits = nbytes * 8
+  for record in records:
+    for pos in get_bloom_bitpositions(record, nbits, k):
+      bloom[pos >> 3] |= 1 << (pos & 7)
+  return bloom
+
+
+def write_ytidset(binfilepath, ytids, b_bloom=True) -> int:
+  """
+  Writes the (deduplicated & sorted) ytids into binfilepath (via a tmp file renamed over)
+    invalid ytids are skipped
+  Returns the number of records written
+  """
+  records = sorted(set(pack_ytids_in_bulk(ytids)))
+  count = len(records)
+  bloom = make_bloom(records, count) if b_bloom and count > 0 else b''
+  bloom_k = DEFAULT_BLOOM_K if bloom else 0
+  header = HEADER_STRUCT.pack(MAGIC, VERSION, RECORDSIZE, bloom_k, 0, count, len(bloom))
+  tmpfilepath = f"{binfilepath}.{os.getpid()}.tmp"
+  with open(tmpfilepath, 'wb') as f:
+    f.write(header)
+    f.write(b''.join(records))
+    f.write(bloom)
+  os.replace(tmpfilepath, binfilepath)
+  return count
+
+
+class YtidBinStore:
+  """
+  A read-only, memory-mapped ytid set
+  """
+
+  def __init__(self, binfilepath):
+    self.binfilepath = binfilepath
+    self.f = open(binfilepath, 'rb')
+    filesize = os.fstat(self.f.fileno()).st_size
+    if filesize < HEADERSIZE:
+      self.f.close()
+      errmsg = f"Error: [{binfilepath}] is too small to be a ytidset file"
+      raise ValueError(errmsg)
+    self.mm = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, recordsize, self.bloom_k, _, self.count, self.bloom_nbytes = HEADER_STRUCT.unpack_from(self.mm, 0)
+    if magic != MAGIC or version != VERSION or recordsize != RECORDSIZE:
+      self.close()
+      errmsg = f"Error: [{binfilepath}] is not a ytidset v{VERSION} file (magic={magic} version={version})"
+      raise ValueError(errmsg)
+    self.bloom_offset = HEADERSIZE + self.count * RECORDSIZE
+    if self.bloom_offset + self.bloom_nbytes > filesize:
+      self.close()
+      errmsg = f"Error: [{binfilepath}] is truncated"
+      raise ValueError(errmsg)
+
+  def get_record(self, idx) -> bytes:
+    offset = HEADERSIZE + idx * RECORDSIZE
+    return self.mm[offset:offset + RECORDSIZE]
+
+  def is_maybe_in_bloom(self, record) -> bool:
+    if self.bloom_nbytes == 0:
+      return True
+    nbits = self.bloom_nbytes * 8
+    for pos in get_bloom_bitpositions(record, nbits, self.bloom_k):
+      if not self.mm[self.bloom_offset + (pos >> 3)] & (1 << (pos & 7)):
+        return False
+    return True
+
+  def has_record(self, record) -> bool:
+    if not self.is_maybe_in_bloom(record):
+      return False
+    lo, hi = 0, self.count
+    while lo < hi:
+      mid = (lo + hi) // 2
+      midrecord = self.get_record(mid)
+      if midrecord < record:
+        lo = mid + 1
+      elif midrecord > record:
+        hi = mid
+      else:
+        return True
+    return False
+
+  def __contains__(self, ytid) -> bool:
+    try:
+      return self.has_record(pack_ytid(ytid))
+    except ValueError:
+      return False
+
+  def __len__(self):
+    return self.count
+
+  def __iter__(self):
+    """
+    Yields the ytids in the stored (sorted) order
+    """
+    for idx in range(self.count):
+      yield unpack_ytid(self.get_record(idx))
+
+  def close(self):
+    if self.mm is not None:
+      self.mm.close()
+      self.mm = None
+    self.f.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+    return False
+
+  def __str__(self):
+    outstr = f"""YtidBinStore: [{self.binfilepath}]
+    count = {self.count} | bloom = {self.bloom_nbytes} bytes (k={self.bloom_k})"""
+    return outstr
+
+
+def convert_txt_to_binstore(txtfilepath, binfilepath, b_bloom=True) -> int:
+  """
+  The txt file may be a youtube-ids.txt (one ytid per line) or any text the ytid_extractor recognizes
+  """
+  return write_ytidset(binfilepath, ytext.extract_ytids_fr_file(txtfilepath), b_bloom)
+
+
+def convert_binstore_to_txt(binfilepath, txtfilepath) -> int:
+  with YtidBinStore(binfilepath) as store:
+    with open(txtfilepath, 'w', encoding='utf-8') as f:
+      for ytid in store:
+        f.write(ytid + '\n')
+    return store.count
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  binfilepath = os.path.join(tmpdir, 'test' + BINSTORE_DOT_EXT)
+  ytids = ['abcABC123-_', 'zyxZYX987_-', '___________', 'AAAAAAAAAAA', 'abcABC123-_', 'invalid']
+  n = write_ytidset(binfilepath, ytids)
+  with YtidBinStore(binfilepath) as store:
+    print(store, '| written', n)
+    print(list(store))
+    for ytid in ['abcABC123-_', 'zyxZYX987_-', 'notInSet123', 'invalid']:
+      print(ytid, ytid in store)
+
+
+def process():
+  """
+  """
+  if len(sys.argv) < 4 or sys.argv[1] not in ('tobin', 'totxt', 'has'):
+    print(__doc__)
+    return
+  comm, filepath = sys.argv[1], sys.argv[2]
+  if comm == 'tobin':
+    n = convert_txt_to_binstore(filepath, sys.argv[3])
+    print(f"Written {n} ytids to [{sys.argv[3]}]")
+  elif comm == 'totxt':
+    n = convert_binstore_to_txt(filepath, sys.argv[3])
+    print(f"Written {n} ytids to [{sys.argv[3]}]")
+  else:
+    with YtidBinStore(filepath) as store:
+      for ytid in sys.argv[3:]:
+        print(ytid, 'yes' if ytid in store else 'no')
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
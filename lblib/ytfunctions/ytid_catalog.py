@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/ytid_catalog.py
+
+  The YtidCatalog class keeps a local (SQLite) catalog of the ytid-named files on disk,
+    ie, ytid => (dirpath, filename, size, mtime, dot_ext),
+    so that the scripts that look up "which ytids are here" do not walk the dirtree from scratch
+    at every invocation, namely:
+      ~/bin/uTubeVideoidsFetcherFromLocalDirUpwards.py
+      ~/bin/uTubeShowYtidRepeatsInDirTree.py
+      ~/bin/uTubeListFilenameWithGivenVideoid.py
+      ~/bin/uTubeGenDifComplBetweenLocFilesAndTxtIds.py (its grab_existing_folders_ytids())
+      ~/bin/dlYouTubeMissingVideoIdsOnLocalDir.py
+
+  The incremental refresh:
+    1 - the catalog keeps, for every directory scanned, its st_mtime_ns and its parent
+    2 - a refresh goes down from the given root stat'ing directories only:
+        a directory whose mtime is the same as the one kept has had no entry added, removed or renamed,
+        so its files are not listed again and its subdirectories are taken from the catalog
+    3 - a directory whose mtime changed is listed again (os.scandir) and its rows are replaced;
+        the subdirectories that disappeared are removed from the catalog (with their subtrees)
+    Thus, on an unchanged tree, a refresh costs one stat per directory (no file listing, no file stat).
+
+  Limitation:
+    a file whose content changes in place (same name) does not change its directory's mtime,
+    so its size and mtime in the catalog are those of the last listing of its directory
+    (use refresh(..., b_force=True) to list everything again)
+
+  The ytid in a filename is taken (in this order) from:
+    a) the yt-dlp convention: "title [ytid].ext" (the last bracketed ytid)
+    b) the former youtube-dl convention: "title-ytid.ext" (at most one extension)
+    c) a filename that is only the ytid: "ytid.ext"
+    files without a ytid are not kept in the catalog
+
+  The database file (WAL mode, so a refresh does not block the readers) is, in this order:
+    a) the dbfilepath given to the constructor
+    b) the environment variable LBLIB_YTID_CATALOG
+    c) $XDG_CACHE_HOME/lblib/ytid_catalog.sqlite (XDG_CACHE_HOME defaults to ~/.cache)
+    One catalog may hold many roots (dirpaths are absolute), queries are scoped by a root dirpath.
+
+  Usage:
+    catalog = YtidCatalog()
+    catalog.refresh('/media/videos')  # seconds, if little has changed since the last one
+    for entry in catalog.get_entries_for_ytid('abcABC123-_'):
+      print(entry.filepath, entry.size)
+
+  CLI:
+    ytid_catalog.py refresh [<dirpath>] [--force]
+    ytid_catalog.py find <ytid> [<ytid> ...]
+    ytid_catalog.py repeats [<dirpath>]
+"""
+import collections
+import os
+import sqlite3
+import sys
+import time
+import lblib.os.localstate as lst
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+CATALOG_ENVVAR = 'LBLIB_YTID_CATALOG'
+DEFAULT_CATALOG_FILENAME = 'ytid_catalog.sqlite'
+COMMIT_EVERY_N_DIRS = 500
+CatalogEntry = collections.namedtuple('CatalogEntry', ['ytid', 'dirpath', 'filename', 'size', 'mtime_ns', 'dot_ext'])
+CatalogEntry.filepath = property(lambda self: os.path.join(self.dirpath, self.filename))
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS dirs (
+  dirpath TEXT PRIMARY KEY,
+  parentpath TEXT,
+  mtime_ns INTEGER NOT NULL,
+  scanned_ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parentpath_idx ON dirs (parentpath);
+CREATE TABLE IF NOT EXISTS files (
+  dirpath TEXT NOT NULL,
+  filename TEXT NOT NULL,
+  ytid TEXT NOT NULL,
+  dot_ext TEXT NOT NULL,
+  size INTEGER,
+  mtime_ns INTEGER,
+  PRIMARY KEY (dirpath, filename)
+);
+CREATE INDEX IF NOT EXISTS files_ytid_idx ON files (ytid);
+"""
+
+
+def get_default_dbfilepath() -> str:
+  dbfilepath = os.environ.get(CATALOG_ENVVAR)
+  if dbfilepath:
+    return dbfilepath
+  return lst.get_lblib_cachedir_abspath(DEFAULT_CATALOG_FILENAME)
+
+
+def extract_ytid_n_dot_ext_fr_filename(filename) -> tuple[str | None, str]:
+  """
+  Examples:
+    "title [abcABC123-_].mp4" => ('abcABC123-_', '.mp4')
+    "title-abcABC123-_.mp4" => ('abcABC123-_', '.mp4')
+    "abcABC123-_.mp4" => ('abcABC123-_', '.mp4')
+    "title.mp4" => (None, '.mp4')
+  """
+  name, dot_ext = os.path.splitext(filename)
+  matches = ytstrfs.cmpld_ytid_in_ytdlp_filename_pattern.findall(filename)
+  if matches:
+    return matches[-1], dot_ext
+  ytid = ytstrfs.extract_ytid_from_fn_w_0_or_1_ext_having_dash_ytid_sufix(filename)
+  if ytid is not None:
+    return ytid, dot_ext
+  if ytstrfs.is_str_a_ytid(name):
+    return name, dot_ext
+  return None, dot_ext
+
+
+def get_subtree_bounds(dirpath) -> tuple[str, str]:
+  """
+  The [lower, upper) string range of the dirpaths below dirpath,
+    ie "/a/b" => ("/a/b/", "/a/b0") ('0' is the char that follows '/'),
+    a LIKE would need escaping '%' and '_' that may be in dirnames
+  """
+  prefix = dirpath if dirpath.endswith(os.sep) else dirpath + os.sep
+  return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class RefreshStats:
+
+  def __init__(self):
+    self.n_dirs_statted = 0
+    self.n_dirs_listed = 0
+    self.n_dirs_removed = 0
+    self.n_ytidfiles = 0
+    self.start = time.monotonic()
+    self.elapsed = 0.0
+
+  def finish(self):
+    self.elapsed = time.monotonic() - self.start
+
+  def __str__(self):
+    outstr = f"""RefreshStats: dirs statted = {self.n_dirs_statted} | listed = {self.n_dirs_listed}"""
+    outstr += f""" | removed = {self.n_dirs_removed} | ytid files listed = {self.n_ytidfiles}"""
+    outstr += f""" | elapsed = {self.elapsed:.2f}s"""
+    return outstr
+
+
+class YtidCatalog:
+
+  def __init__(self, dbfilepath=None):
+    self.dbfilepath = dbfilepath or get_default_dbfilepath()
+    dbdir_abspath = os.path.dirname(os.path.abspath(self.dbfilepath))
+    os.makedirs(dbdir_abspath, exist_ok=True)
+    self.conn = sqlite3.connect(self.dbfilepath, timeout=60)
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute('PRAGMA synchronous=NORMAL')
+    self.conn.executescript(SCHEMA_SQL)
+    self.conn.commit()
+
+  def _get_dir_mtime_ns_or_none(self, dirpath) -> int | None:
+    row = self.conn.execute('SELECT mtime_ns FROM dirs WHERE dirpath = ?', (dirpath,)).fetchone()
+    return None if row is None else row[0]
+
+  def _get_catalogued_subdirpaths(self, dirpath) -> list[str]:
+    rows = self.conn.execute('SELECT dirpath FROM dirs WHERE parentpath = ?', (dirpath,))
+    return [row[0] for row in rows]
+
+  def _remove_subtree(self, dirpath) -> int:
+    lower, upper = get_subtree_bounds(dirpath)
+    cursor = self.conn.execute(
+      'DELETE FROM dirs WHERE dirpath = ? OR (dirpath >= ? AND dirpath < ?)', (dirpath, lower, upper)
+    )
+    self.conn.execute('DELETE FROM files WHERE dirpath = ? OR (dirpath >= ? AND dirpath < ?)', (dirpath, lower, upper))
+    return cursor.rowcount
+
+  def _list_dir_n_store(self, dirpath, parentpath, mtime_ns, stats) -> list[str]:
+    """
+    Lists dirpath, replaces its file rows and returns its subdirpaths
+    """
+    rows, subdirpaths = [], []
+    try:
+      with os.scandir(dirpath) as it:
+        for entry in it:
+          try:
+            if entry.is_dir(follow_symlinks=False):
+              subdirpaths.append(entry.path)
+              continue
+            if not entry.is_file():
+              continue
+            ytid, dot_ext = extract_ytid_n_dot_ext_fr_filename(entry.name)
+            if ytid is None:
+              continue
+            st = entry.stat()
+            rows.append((dirpath, entry.name, ytid, dot_ext, st.st_size, st.st_mtime_ns))
+          except OSError:
+            # vanished between the listing and the stat
+            continue
+    except OSError:
+      return []
+    self.conn.execute('DELETE FROM files WHERE dirpath = ?', (dirpath,))
+    self.conn.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)', rows)
+    self.conn.execute(
+      'INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?)', (dirpath, parentpath, mtime_ns, time.time())
+    )
+    # the subdirs are known from now on (mtime -1 means "not listed yet"), even if this refresh is not recursive
+    self.conn.executemany(
+      'INSERT OR IGNORE INTO dirs VALUES (?, ?, -1, 0)', [(subdirpath, dirpath) for subdirpath in subdirpaths]
+    )
+    # the subdirs that were catalogued but are not there anymore
+    for catalogued_subdirpath in set(self._get_catalogued_subdirpaths(dirpath)) - set(subdirpaths):
+      stats.n_dirs_removed += self._remove_subtree(catalogued_subdirpath)
+    stats.n_dirs_listed += 1
+    stats.n_ytidfiles += len(rows)
+    return subdirpaths
+
+  def refresh(self, root_abspath=None, b_recursive=True, b_force=False) -> RefreshStats:
+    """
+    Brings the catalog up to date for root_abspath (and its subtree, if b_recursive)
+      only directories whose mtime changed (or that are new) are listed again
+    """
+    root_abspath = os.path.abspath(root_abspath or '.')
+    stats = RefreshStats()
+    stack = [(root_abspath, os.path.dirname(root_abspath))]
+    n_since_commit = 0
+    while stack:
+      dirpath, parentpath = stack.pop()
+      try:
+        mtime_ns = os.stat(dirpath).st_mtime_ns
+      except OSError:
+        stats.n_dirs_removed += self._remove_subtree(dirpath)
+        continue
+      stats.n_dirs_statted += 1
+      if not b_force and self._get_dir_mtime_ns_or_none(dirpath) == mtime_ns:
+        subdirpaths = self._get_catalogued_subdirpaths(dirpath)
+      else:
+        subdirpaths = self._list_dir_n_store(dirpath, parentpath, mtime_ns, stats)
+        n_since_commit += 1
+        if n_since_commit >= COMMIT_EVERY_N_DIRS:
+          self.conn.commit()
+          n_since_commit = 0
+      if b_recursive:
+        stack.extend((subdirpath, dirpath) for subdirpath in subdirpaths)
+    self.conn.commit()
+    stats.finish()
+    return stats
+
+  @staticmethod
+  def _form_scope_sql(root_abspath, b_recursive) -> tuple[str, tuple]:
+    if root_abspath is None:
+      return '1', ()
+    root_abspath = os.path.abspath(root_abspath)
+    if not b_recursive:
+      return 'dirpath = ?', (root_abspath,)
+    lower, upper = get_subtree_bounds(root_abspath)
+    return '(dirpath = ? OR (dirpath >= ? AND dirpath < ?))', (root_abspath, lower, upper)
+
+  def get_entries_under(self, root_abspath=None, b_recursive=True, dot_exts=None) -> list[CatalogEntry]:
+    """
+    The entries below root_abspath (all the catalog if None) ordered by dirpath and filename
+      dot_exts (e.g. ['.mp4', '.webm']) filters by extension
+    """
+    scope_sql, params = self._form_scope_sql(root_abspath, b_recursive)
+    sql = f'SELECT ytid, dirpath, filename, size, mtime_ns, dot_ext FROM files WHERE {scope_sql}'
+    if dot_exts:
+      sql += f" AND dot_ext IN ({','.join('?' * len(dot_exts))})"
+      params = params + tuple(dot_exts)
+    sql += ' ORDER BY dirpath, filename'
+    return [CatalogEntry(*row) for row in self.conn.execute(sql, params)]
+
+  def get_ytids_under(self, root_abspath=None, b_recursive=True, dot_exts=None) -> list[str]:
+    """
+    The unique ytids below root_abspath in the order of get_entries_under()
+    """
+    ytids = [entry.ytid for entry in self.get_entries_under(root_abspath, b_recursive, dot_exts)]
+    return ytstrfs.trans_list_as_uniq_keeping_order_n_makingnewlist(ytids)
+
+  def get_entries_for_ytid(self, ytid, root_abspath=None, b_recursive=True) -> list[CatalogEntry]:
+    scope_sql, params = self._form_scope_sql(root_abspath, b_recursive)
+    sql = f'SELECT ytid, dirpath, filename, size, mtime_ns, dot_ext FROM files WHERE ytid = ? AND {scope_sql}'
+    sql += ' ORDER BY dirpath, filename'
+    return [CatalogEntry(*row) for row in self.conn.execute(sql, (ytid,) + params)]
+
+  def has_ytid(self, ytid, root_abspath=None, b_recursive=True) -> bool:
+    return len(self.get_entries_for_ytid(ytid, root_abspath, b_recursive)) > 0
+
+  def get_repeats_under(self, root_abspath=None, b_recursive=True) -> dict[str, list[CatalogEntry]]:
+    """
+    ytid => its entries, for the ytids that have more than one file below root_abspath
+    """
+    repeats = {}
+    for entry in self.get_entries_under(root_abspath, b_recursive):
+      repeats.setdefault(entry.ytid, []).append(entry)
+    return {ytid: entries for ytid, entries in repeats.items() if len(entries) > 1}
+
+  def close(self):
+    self.conn.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+    return False
+
+  def __str__(self):
+    n_dirs = self.conn.execute('SELECT count(*) FROM dirs').fetchone()[0]
+    n_files = self.conn.execute('SELECT count(*) FROM files').fetchone()[0]
+    n_ytids = self.conn.execute('SELECT count(DISTINCT ytid) FROM files').fetchone()[0]
+    outstr = f"""YtidCatalog: [{self.dbfilepath}]
+    dirs = {n_dirs} | ytid files = {n_files} | unique ytids = {n_ytids}"""
+    return outstr
+
+
+def get_refreshed_catalog(root_abspath=None, b_recursive=True, dbfilepath=None) -> YtidCatalog:
+  """
+  The usual entry point for the scripts: a catalog just brought up to date for root_abspath
+  """
+  catalog = YtidCatalog(dbfilepath)
+  catalog.refresh(root_abspath, b_recursive)
+  return catalog
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  os.makedirs(os.path.join(tmpdir, 'sub'))
+  for filename in ['a [abcABC123-_].mp4', 'b-zyxZYX987_-.webm', 'nothing.txt', 'sub/c [abcABC123-_].m4a']:
+    with open(os.path.join(tmpdir, filename), 'w') as f:
+      f.write('x')
+  with YtidCatalog(os.path.join(tmpdir, 'catalog.sqlite')) as catalog:
+    print('1st', catalog.refresh(tmpdir))
+    print('2nd', catalog.refresh(tmpdir))
+    os.remove(os.path.join(tmpdir, 'b-zyxZYX987_-.webm'))
+    print('3rd', catalog.refresh(tmpdir))
+    print(catalog)
+    print(catalog.get_ytids_under(tmpdir))
+    print(catalog.get_repeats_under(tmpdir))
+
+
+def process():
+  """
+  """
+  if len(sys.argv) < 2 or sys.argv[1] not in ('refresh', 'find', 'repeats'):
+    print(__doc__)
+    return
+  comm, params = sys.argv[1], [p for p in sys.argv[2:] if p != '--force']
+  with YtidCatalog() as catalog:
+    if comm == 'refresh':
+      stats = catalog.refresh(params[0] if params else None, b_force='--force' in sys.argv)
+      print(stats)
+      print(catalog)
+    elif comm == 'find':
+      for ytid in params:
+        for entry in catalog.get_entries_for_ytid(ytid):
+          print(ytid, entry.filepath)
+    else:
+      for ytid, entries in catalog.get_repeats_under(params[0] if params else None).items():
+        print(ytid, len(entries))
+        for entry in entries:
+          print('  ', entry.filepath)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
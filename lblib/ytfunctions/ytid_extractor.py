@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/ytid_extractor.py
+
+  A single-pass ytid extractor for bulk text (e.g. the multi-million-line z_ls-R_contents-*.txt files):
+    instead of validating each candidate char by char in Python, one precompiled (bytes) regex
+    runs over large chunks of the file (or stdin) and yields the ytids it finds.
+
+  The four forms recognized (one alternation, the first that matches at a position wins):
+    1 - URL:     https://www.youtube.com/watch?v=<ytid>&... | youtu.be/<ytid> | /shorts/<ytid> | /embed/<ytid>
+    2 - bracket: "title [<ytid>].mp4" (the yt-dlp filename convention)
+    3 - dash:    "title-<ytid>.mp4" (the former youtube-dl filename convention, with at most one extension)
+    4 - bare:    a line that is only the ytid (surrounding blanks allowed)
+
+  Usage:
+    for ytid in extract_ytids_fr_file(filepath):  # filepath '-' means stdin
+      ...
+    ytids = extract_ytids_fr_text(text)
+    ytidfilter = UniqueYtidFilter()
+    for ytids in extract_ytid_batches_fr_binstream(sys.stdin.buffer, b_streaming=True):  # pipe-friendly
+      for ytid in ytidfilter.filter(ytids):
+        ...
+
+  The chunks are cut at the last newline, so a line is never split between two chunks
+    (all four forms live within one line).
+
+  Speed notes (CPython's re):
+    a) every alternative starts with a literal char ('v', 'y', '/', '[', '-' or '\n'),
+       so the engine only tries a match at those chars; the line borders are '\n' literals
+       (a '\n' is put before each chunk) instead of the slower MULTILINE '^' and '$'
+    b) exactly one group participates in a match, so b''.join(groups) is the ytid
+       and the whole chunk's ytids are joined and decoded at once (no Python work per match)
+
+  @see benchmarkYtidExtractorOnLsRContents.py (in ~/bin) for its comparison with the former functions
+"""
+import re
+import sys
+DEFAULT_CHUNKSIZE = 4 * 1024 * 1024
+YTID_CHARCLASS = rb'[A-Za-z0-9_-]'
+_ytid = rb'(%s{11})' % YTID_CHARCLASS
+_not_followed_by_ytidchar = rb'(?!%s)' % YTID_CHARCLASS
+_end_of_line = rb'[ \t\r]*(?=\n)'
+ytids_in_bulktext_regexp_pattern = b'|'.join([
+  # 1 - URL (the ytid is the value of "v=" or the path part after youtu.be/, shorts/ or embed/)
+  rb'v=(?<=[?&]v=)' + _ytid + _not_followed_by_ytidchar,
+  rb'youtu\.be/' + _ytid + _not_followed_by_ytidchar,
+  rb'/shorts/' + _ytid + _not_followed_by_ytidchar,
+  rb'/embed/' + _ytid + _not_followed_by_ytidchar,
+  # 2 - bracket
+  rb'\[' + _ytid + rb'\]',
+  # 3 - dash sufix, followed by an optional extension and the end of line
+  rb'-' + _ytid + rb'(?=(?:\.[A-Za-z0-9]{1,5})?' + _end_of_line + rb')',
+  # 4 - bare (the whole line)
+  rb'\n[ \t]*' + _ytid + _end_of_line,
+])
+cmpld_ytids_in_bulktext_pattern = re.compile(ytids_in_bulktext_regexp_pattern)
+
+
+def extract_ytids_fr_bytes(data: bytes):
+  """
+  Yields the ytids (as str) found in data (whole lines) in their order of appearance (repeats included)
+  """
+  # the line borders are '\n' literals in the pattern, so data gets one before and (if missing) one after
+  data = b'\n' + data if data.endswith(b'\n') else b'\n' + data + b'\n'
+  groups_per_match = cmpld_ytids_in_bulktext_pattern.findall(data)
+  if len(groups_per_match) == 0:
+    return
+  # only one of the groups has participated in each match (the others are b''), so joining them gives the ytid
+  yield from b'\n'.join(map(b''.join, groups_per_match)).decode('ascii').split('\n')
+
+
+def extract_ytids_fr_text(text: str | None) -> list[str]:
+  if not text:
+    return []
+  return list(extract_ytids_fr_bytes(text.encode('utf-8', errors='replace')))
+
+
+def extract_ytid_batches_fr_binstream(binstream, chunksize=DEFAULT_CHUNKSIZE, b_streaming=False):
+  """
+  Reads binstream (a file opened 'rb' or sys.stdin.buffer) in chunks and yields, per chunk, the list of its ytids
+    b_streaming: a chunk is whatever the stream has available (read1()) instead of a full chunksize,
+      so that, in a pipe, the ytids of a line come out as soon as the line comes in
+      (a read(chunksize) on a pipe waits for chunksize bytes or the EOF)
+  """
+  read = binstream.read1 if b_streaming and hasattr(binstream, 'read1') else binstream.read
+  remainder = b''
+  while True:
+    chunk = read(chunksize)
+    if not chunk:
+      break
+    chunk = remainder + chunk
+    cut = chunk.rfind(b'\n')
+    if cut == -1:
+      # a (very long) line without a newline yet, keep accumulating
+      remainder = chunk
+      continue
+    remainder = chunk[cut + 1:]
+    yield list(extract_ytids_fr_bytes(chunk[:cut + 1]))
+  if remainder:
+    yield list(extract_ytids_fr_bytes(remainder))
+
+
+def extract_ytids_fr_binstream(binstream, chunksize=DEFAULT_CHUNKSIZE, b_streaming=False):
+  """
+  Reads binstream (a file opened 'rb' or sys.stdin.buffer) in chunks and yields its ytids
+  """
+  for ytids in extract_ytid_batches_fr_binstream(binstream, chunksize, b_streaming):
+    yield from ytids
+
+
+class UniqueYtidFilter:
+  """
+  Order-preserving dedup for a stream of ytids: keeps only a seen-set (memory grows with the unique ytids,
+    not with the input) and optionally drops the ytids in an exclude container
+    (anything with "in", eg a set or a ytid_binstore.YtidBinStore of the already downloaded ones)
+  Usage:
+    ytidfilter = UniqueYtidFilter(exclude=store)
+    for ytids in extract_ytid_batches_fr_binstream(sys.stdin.buffer, b_streaming=True):
+      for ytid in ytidfilter.filter(ytids):
+        ...
+  """
+
+  def __init__(self, exclude=None):
+    self.exclude = exclude
+    self.seen = set()
+    self.n_in = 0
+    self.n_out = 0
+    self.n_excluded = 0
+
+  def filter(self, ytids) -> list[str]:
+    """
+    The ytids not seen before (nor excluded), in their order of appearance
+    """
+    new_ytids = []
+    for ytid in ytids:
+      self.n_in += 1
+      if ytid in self.seen:
+        continue
+      self.seen.add(ytid)
+      if self.exclude is not None and ytid in self.exclude:
+        self.n_excluded += 1
+        continue
+      new_ytids.append(ytid)
+    self.n_out += len(new_ytids)
+    return new_ytids
+
+  def __str__(self):
+    outstr = f"""UniqueYtidFilter: in = {self.n_in} | unique out = {self.n_out} | excluded = {self.n_excluded}"""
+    return outstr
+
+
+def extract_ytids_fr_file(filepath, chunksize=DEFAULT_CHUNKSIZE):
+  """
+  Yields the ytids in the file at filepath ('-' or None means stdin)
+  """
+  if filepath is None or filepath == '-':
+    yield from extract_ytids_fr_binstream(sys.stdin.buffer, chunksize)
+    return
+  with open(filepath, 'rb') as f:
+    yield from extract_ytids_fr_binstream(f, chunksize)
+
+
+def adhoctest1():
+  text = """./some/folder:
+title one [abcABC123-_].mp4
+title two-zyxZYX987_-.webm
+https://www.youtube.com/watch?v=qwertyUIOP1&pp=continuation
+https://youtu.be/asdfgHJKL23
+  mnbvcXZ0987
+not a ytid line
+toolongtoolongtoolong
+"""
+  print(extract_ytids_fr_text(text))
+
+
+def process():
+  """
+  Prints the ytids found in the files given as arguments (or in stdin), one per line
+  """
+  filepaths = sys.argv[1:] or ['-']
+  for filepath in filepaths:
+    for ytid in extract_ytids_fr_file(filepath):
+      print(ytid)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
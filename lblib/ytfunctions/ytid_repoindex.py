@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+~/bin/lblib/ytfunctions/ytid_repoindex.py
+
+  The YtidRepoIndex class keeps a persisted inverted index of the "z_ls-R_contents-<drive>.txt" repository files
+    (each one an "ls -R" listing of a drive), ie, ytid => [(repofile, line number, dirpath, filename)],
+    so that "where (on which drives) is ytid X?" and "which ytids repeat?" are SQL lookups (milliseconds)
+    instead of reading all the repository files again at every run
+
+  The incremental update:
+    1 - the index keeps each repofile's size & st_mtime_ns
+    2 - refresh(repodir) re-indexes only the repofiles that are new or whose size or mtime changed,
+        and forgets the ones no longer in the folder
+    3 - the repofiles to (re-)index are parsed in parallel (a process pool, the parsing is CPU-bound),
+        each worker returning its file's postings; the merge step (in this process) replaces,
+        one transaction per repofile, that repofile's rows
+
+  A repofile line is one of:
+    "./dir/subdir:" (or ".:") => the dirpath of the lines that follow
+    "<filename>" => a posting, if the filename has a ytid (see ytid_catalog.extract_ytid_n_dot_ext_fr_filename())
+                    and one of the DEFAULT_DOT_EXTS; as in the former repofile scripts, an all-lowercase or
+                    all-uppercase "ytid" is taken as a false positive (eg a "-yyyy-mm-dd.." sufix) & skipped
+    empty lines, "total ..." and the like => skipped
+
+  The database file (WAL mode) is, in this order:
+    a) the dbfilepath given to the constructor
+    b) the environment variable LBLIB_YTID_REPOINDEX
+    c) $XDG_CACHE_HOME/lblib/ytid_repoindex.sqlite (XDG_CACHE_HOME defaults to ~/.cache)
+    One index may hold the repofiles of many folders; queries are scoped by a repodir.
+
+  Client:
+    ~/bin/uTubeFindDuplicateYtIdsInRepoFilesOnFolder.py
+
+  Usage:
+    with YtidRepoIndex() as index:
+      index.refresh('/media/friend/CompSci 2T Orig')
+      print(index.get_drives_for_ytid('abcABC123-_'))
+      for ytid, postings in index.get_duplicates().items():  # repeats within a repofile (a drive)
+        ...
+      index.get_duplicates(b_across_repofiles=True)  # also a ytid found once on each of two drives
+
+  CLI:
+    ytid_repoindex.py refresh [<repodir>]
+    ytid_repoindex.py find <ytid> [<ytid> ...]
+    ytid_repoindex.py dups [<repodir>] [--across]
+"""
+import collections
+import concurrent.futures
+import os
+import sqlite3
+import sys
+import time
+import lblib.os.localstate as lst
+import lblib.ytfunctions.ytid_catalog as ytcatalog
+REPOINDEX_ENVVAR = 'LBLIB_YTID_REPOINDEX'
+DEFAULT_DB_FILENAME = 'ytid_repoindex.sqlite'
+REPOFILE_PREFIX = 'z_ls-R_contents-'
+REPOFILE_SUFFIX = '.txt'
+DEFAULT_DOT_EXTS = ('.mp3', '.mp4', '.webm', '.m4a', '.mkv')
+SQL_IN_BATCHSIZE = 500
+Posting = collections.namedtuple('Posting', ['ytid', 'repofile', 'lineno', 'dirpath', 'filename'])
+Posting.drive = property(lambda self: get_drive_fr_repofile(self.repofile))
+Posting.filepath = property(lambda self: os.path.join(self.dirpath, self.filename))
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS repofiles (
+  repofile TEXT PRIMARY KEY,
+  repodir TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  n_lines INTEGER NOT NULL,
+  n_postings INTEGER NOT NULL,
+  indexed_ts REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS repofiles_repodir_idx ON repofiles (repodir);
+CREATE TABLE IF NOT EXISTS postings (
+  ytid TEXT NOT NULL,
+  repofile TEXT NOT NULL,
+  lineno INTEGER NOT NULL,
+  dirpath TEXT NOT NULL,
+  filename TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_ytid_idx ON postings (ytid);
+CREATE INDEX IF NOT EXISTS postings_repofile_idx ON postings (repofile);
+"""
+
+
+def get_default_dbfilepath() -> str:
+  dbfilepath = os.environ.get(REPOINDEX_ENVVAR)
+  if dbfilepath:
+    return dbfilepath
+  return lst.get_lblib_cachedir_abspath(DEFAULT_DB_FILENAME)
+
+
+def is_repofilename(filename) -> bool:
+  return filename.startswith(REPOFILE_PREFIX) and filename.endswith(REPOFILE_SUFFIX)
+
+
+def get_drive_fr_repofile(repofile) -> str:
+  """
+  "/a/z_ls-R_contents-CompSci 2T Orig.txt" => "CompSci 2T Orig"
+  """
+  filename = os.path.basename(repofile)
+  return filename[len(REPOFILE_PREFIX):len(filename) - len(REPOFILE_SUFFIX)]
+
+
+def find_repofiles_in_folder(repodir) -> list[str]:
+  with os.scandir(repodir) as it:
+    return sorted(entry.path for entry in it if is_repofilename(entry.name) and entry.is_file())
+
+
+def parse_repofile(repofile, dot_exts=DEFAULT_DOT_EXTS) -> tuple:
+  """
+  Runs in the pool's processes
+  Returns (repofile, size, mtime_ns, n_lines, postings [(ytid, lineno, dirpath, filename)])
+    (size & mtime_ns are taken before the reading, so a file changed meanwhile is re-indexed next time)
+  """
+  st = os.stat(repofile)
+  postings = []
+  dirpath = '.'
+  n_lines = 0
+  with open(repofile, 'r', encoding='utf-8', errors='replace') as f:
+    for lineno, line in enumerate(f, start=1):
+      n_lines = lineno
+      line = line.strip(' \t\r\n')
+      if line.endswith(':') and (line == '.:' or line.startswith('./')):
+        dirpath = line[:-1]
+        continue
+      if len(line) < 15:  # the shortest posting: "<ytid>.mp3"
+        continue
+      if not line.endswith(dot_exts):
+        continue
+      ytid, _ = ytcatalog.extract_ytid_n_dot_ext_fr_filename(line)
+      if ytid is not None and ytid != ytid.lower() and ytid != ytid.upper():
+        postings.append((ytid, lineno, dirpath, line))
+  return repofile, st.st_size, st.st_mtime_ns, n_lines, postings
+
+
+class RefreshStats:
+
+  def __init__(self):
+    self.n_repofiles = 0
+    self.n_reindexed = 0
+    self.n_removed = 0
+    self.n_postings = 0
+    self.start = time.monotonic()
+    self.elapsed = 0.0
+
+  def finish(self):
+    self.elapsed = time.monotonic() - self.start
+
+  def __str__(self):
+    outstr = f"""RefreshStats: repofiles = {self.n_repofiles} | re-indexed = {self.n_reindexed}"""
+    outstr += f""" | removed = {self.n_removed} | postings written = {self.n_postings}"""
+    outstr += f""" | elapsed = {self.elapsed:.2f}s"""
+    return outstr
+
+
+class YtidRepoIndex:
+
+  def __init__(self, dbfilepath=None, n_workers=None):
+    self.dbfilepath = dbfilepath or get_default_dbfilepath()
+    self.n_workers = max(1, n_workers or os.cpu_count() or 1)
+    dbdir_abspath = os.path.dirname(os.path.abspath(self.dbfilepath))
+    os.makedirs(dbdir_abspath, exist_ok=True)
+    self.conn = sqlite3.connect(self.dbfilepath, timeout=60)
+    self.conn.execute('PRAGMA journal_mode=WAL')
+    self.conn.execute('PRAGMA synchronous=NORMAL')
+    self.conn.executescript(SCHEMA_SQL)
+    self.conn.commit()
+
+  def _get_indexed_stats(self, repodir) -> dict:
+    rows = self.conn.execute('SELECT repofile, size, mtime_ns FROM repofiles WHERE repodir = ?', (repodir,))
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+  def _merge(self, repodir, parsed):
+    """
+    The merge step: the repofile's former rows are replaced by the parsed ones (one transaction)
+    """
+    repofile, size, mtime_ns, n_lines, postings = parsed
+    with self.conn:
+      self.conn.execute('DELETE FROM postings WHERE repofile = ?', (repofile,))
+      self.conn.executemany(
+        'INSERT INTO postings (ytid, repofile, lineno, dirpath, filename) VALUES (?, ?, ?, ?, ?)',
+        [(ytid, repofile, lineno, dirpath, filename) for ytid, lineno, dirpath, filename in postings],
+      )
+      self.conn.execute(
+        'INSERT OR REPLACE INTO repofiles VALUES (?, ?, ?, ?, ?, ?, ?)',
+        (repofile, repodir, size, mtime_ns, n_lines, len(postings), time.time()),
+      )
+
+  def _remove_repofile(self, repofile):
+    with self.conn:
+      self.conn.execute('DELETE FROM postings WHERE repofile = ?', (repofile,))
+      self.conn.execute('DELETE FROM repofiles WHERE repofile = ?', (repofile,))
+
+  def refresh(self, repodir=None, b_force=False) -> RefreshStats:
+    """
+    Brings the index up to date with the repofiles in repodir (re-indexing only the changed ones)
+    """
+    stats = RefreshStats()
+    repodir = os.path.abspath(repodir or '.')
+    repofiles = find_repofiles_in_folder(repodir)
+    stats.n_repofiles = len(repofiles)
+    indexed = self._get_indexed_stats(repodir)
+    for repofile in set(indexed) - set(repofiles):
+      self._remove_repofile(repofile)
+      stats.n_removed += 1
+    to_parse = []
+    for repofile in repofiles:
+      try:
+        st = os.stat(repofile)
+      except OSError:
+        continue
+      if b_force or indexed.get(repofile) != (st.st_size, st.st_mtime_ns):
+        to_parse.append(repofile)
+    n_workers = min(self.n_workers, len(to_parse))
+    if n_workers <= 1:
+      for parsed in map(parse_repofile, to_parse):
+        self._merge(repodir, parsed)
+        stats.n_postings += len(parsed[4])
+    else:
+      with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        # the merges (sqlite writes) happen here, in this process, as each parse completes
+        for parsed in executor.map(parse_repofile, to_parse):
+          self._merge(repodir, parsed)
+          stats.n_postings += len(parsed[4])
+    stats.n_reindexed = len(to_parse)
+    stats.finish()
+    return stats
+
+  @staticmethod
+  def _form_scope_sql(repodir) -> tuple[str, tuple]:
+    if repodir is None:
+      return '', ()
+    return ' AND p.repofile IN (SELECT repofile FROM repofiles WHERE repodir = ?)', (os.path.abspath(repodir),)
+
+  def get_postings_for_ytid(self, ytid, repodir=None) -> list[Posting]:
+    scope_sql, scope_params = self._form_scope_sql(repodir)
+    sql = f"""SELECT p.ytid, p.repofile, p.lineno, p.dirpath, p.filename FROM postings p
+      WHERE p.ytid = ?{scope_sql} ORDER BY p.repofile, p.lineno"""
+    return [Posting(*row) for row in self.conn.execute(sql, (ytid,) + scope_params)]
+
+  def get_postings_for_ytids(self, ytids, repodir=None) -> dict[str, list[Posting]]:
+    scope_sql, scope_params = self._form_scope_sql(repodir)
+    ytids = list(ytids)
+    postings_by_ytid = {}
+    for i in range(0, len(ytids), SQL_IN_BATCHSIZE):
+      batch = ytids[i:i + SQL_IN_BATCHSIZE]
+      placeholders = ','.join('?' * len(batch))
+      sql = f"""SELECT p.ytid, p.repofile, p.lineno, p.dirpath, p.filename FROM postings p
+        WHERE p.ytid IN ({placeholders}){scope_sql} ORDER BY p.ytid, p.repofile, p.lineno"""
+      for row in self.conn.execute(sql, tuple(batch) + scope_params):
+        postings_by_ytid.setdefault(row[0], []).append(Posting(*row))
+    return postings_by_ytid
+
+  def get_drives_for_ytid(self, ytid, repodir=None) -> list[str]:
+    """
+    "Which drives hold ytid X?"
+    """
+    return sorted({posting.drive for posting in self.get_postings_for_ytid(ytid, repodir)})
+
+  def get_duplicates(self, repodir=None, b_across_repofiles=False) -> dict[str, list[Posting]]:
+    """
+    ytid => its postings, for the ytids repeated within a repofile (ie on one drive, as the former script did),
+      only the postings of the repofiles where it repeats are given
+    If b_across_repofiles is True: the ytids with more than one posting, on one drive or across drives
+    """
+    scope_sql, scope_params = self._form_scope_sql(repodir)
+    if b_across_repofiles:
+      sql = f"""SELECT p.ytid FROM postings p WHERE 1 = 1{scope_sql}
+        GROUP BY p.ytid HAVING count(*) > 1 ORDER BY p.ytid"""
+      dup_ytids = [row[0] for row in self.conn.execute(sql, scope_params)]
+      return self.get_postings_for_ytids(dup_ytids, repodir)
+    sql = f"""SELECT p.ytid, p.repofile FROM postings p WHERE 1 = 1{scope_sql}
+      GROUP BY p.ytid, p.repofile HAVING count(*) > 1 ORDER BY p.ytid"""
+    dup_pairs = {(row[0], row[1]) for row in self.conn.execute(sql, scope_params)}
+    postings_by_ytid = self.get_postings_for_ytids(sorted({ytid for ytid, _ in dup_pairs}), repodir)
+    return {
+      ytid: [posting for posting in postings if (ytid, posting.repofile) in dup_pairs]
+      for ytid, postings in postings_by_ytid.items()
+    }
+
+  def close(self):
+    self.conn.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_val, exc_tb):
+    self.close()
+    return False
+
+  def __str__(self):
+    n_repofiles = self.conn.execute('SELECT count(*) FROM repofiles').fetchone()[0]
+    n_postings = self.conn.execute('SELECT count(*) FROM postings').fetchone()[0]
+    n_ytids = self.conn.execute('SELECT count(DISTINCT ytid) FROM postings').fetchone()[0]
+    outstr = f"""YtidRepoIndex: [{self.dbfilepath}]
+    repofiles = {n_repofiles} | postings = {n_postings} | unique ytids = {n_ytids}"""
+    return outstr
+
+
+def adhoctest1():
+  import tempfile
+  tmpdir = tempfile.mkdtemp()
+  contents = {
+    'A': '.:\nx.txt\n\n./vids:\ntitle one-abcABC123-_.mp4\ntitle two [zyxZYX987_-].webm\n./old:\ntwo-zyxZYX987_-.mp4\n',
+    'B': './bkp/vids:\ncopy of one-abcABC123-_.mp4\nnothing here.mp4\n',
+  }
+  for drive, content in contents.items():
+    with open(os.path.join(tmpdir, f"{REPOFILE_PREFIX}{drive}{REPOFILE_SUFFIX}"), 'w') as f:
+      f.write(content)
+  with YtidRepoIndex(os.path.join(tmpdir, 'index.sqlite'), n_workers=2) as index:
+    print('1st', index.refresh(tmpdir))
+    print('2nd', index.refresh(tmpdir))
+    print(index)
+    print('drives for abcABC123-_', index.get_drives_for_ytid('abcABC123-_', tmpdir))
+    for b_across_repofiles in (False, True):
+      for ytid, postings in index.get_duplicates(tmpdir, b_across_repofiles).items():
+        print('across' if b_across_repofiles else 'within', ytid, [(p.drive, p.lineno, p.filepath) for p in postings])
+
+
+def process():
+  """
+  """
+  if len(sys.argv) < 2 or sys.argv[1] not in ('refresh', 'find', 'dups'):
+    print(__doc__)
+    return
+  comm, params = sys.argv[1], [p for p in sys.argv[2:] if p not in ('--force', '--across')]
+  with YtidRepoIndex() as index:
+    if comm == 'refresh':
+      print(index.refresh(params[0] if params else None, b_force='--force' in sys.argv))
+      print(index)
+    elif comm == 'find':
+      for ytid in params:
+        for posting in index.get_postings_for_ytid(ytid):
+          print(ytid, '|', posting.drive, '|', posting.lineno, '|', posting.filepath)
+    else:
+      dups = index.get_duplicates(params[0] if params else None, b_across_repofiles='--across' in sys.argv)
+      for ytid, postings in dups.items():
+        print(ytid, len(postings))
+        for posting in postings:
+          print('  ', posting.drive, '|', posting.filepath)
+
+
+if __name__ == '__main__':
+  """
+  adhoctest1()
+  """
+  process()
@@ -13,6 +13,7 @@ import os
 import re
 import sys
 from pathlib import Path
+import lblib.os.treescanner as tscan
 yyyy = ' yyyy '
 restr = r"^.+?(\d{4}).+$"
 recmp = re.compile(restr)
@@ -68,7 +69,7 @@ class EqualNamesDirWalker:
         self.namechunks.append(namechunk)
 
   def process(self):
-    for self.curdir_abspath, foldernames, _ in os.walk(self.rootdir_abspath):
+    for self.curdir_abspath, foldernames, _ in tscan.walk(str(self.rootdir_abspath)):
       # print('In dir', self.curdir_abspath)
       self.mount_namechunks_per_dir(foldernames)
       self.find_equals()
@@ -1,7 +1,18 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 '''
+moveUnderExtensionCopyingDirStructure.py
+  Moves the files with a given extension (default mp3) from the current dirtree
+    to a target basefolder, recreating there the same relative folder structure.
+  A hidden marker file (.mp3s_generated_do_not_regenerate_them) is left in each source folder.
 
+  With -c=<source extension> (e.g. -c=mp4), instead of moving existing mp3s,
+    the source media files are converted to mp3 straight into the target structure,
+    all folders' conversions running in one parallel pool (lblib/os/ffmpeg_engine.py).
+
+  Usage:
+    moveUnderExtensionCopyingDirStructure.py -t=<target basefolder> [-e=<extension>]
+      [-c=<source extension> [-j=<workers>] [-n=<niceness>] [-b=<kbps>] [-s=<khz>]]
 
   Written on 2015-01-12 Luiz Lewis
 '''
@@ -9,6 +20,7 @@ import os
 import sys
 import shutil
 import batchFfmpegConvertDeux as batchConverter
+import lblib.os.treescanner as tscan
 
 CONVENTIONED_MP3GENERATED_MARK_HIDDENFILE_NAME = '.mp3s_generated_do_not_regenerate_them'
 # target_abs_basepath_DEFAULT = '/media/friend/SAMSUNG/TVJus mp3converted/Saber Direito mp3converted/'
@@ -17,71 +29,125 @@ extension_DEFAULT = 'mp3'
 def walk_dirtree_and_cache_moveables(file_extension):
   move_queue = []
   if file_extension == None:
-    raise ValueError, 'file_extension is missing'
+    raise ValueError('file_extension is missing')
   source_abs_basepath = os.path.abspath('.')
   walk_counter = 0
-  for dirpath, dirnames, filenames in os.walk('.'):
-    if 'mp3split' in dirpath:
+  for record in tscan.TreeScanner(source_abs_basepath).scan():
+    if 'mp3split' in record.dirpath:
       continue
     walk_counter += 1
-    print walk_counter #, 'current path:', dirpath
+    print(walk_counter)
     files_to_move = []
-    for fichier in filenames:
+    for fichier in record.filenames:
       if fichier.endswith('.'+file_extension):
         files_to_move.append(fichier)
     if len(files_to_move) > 0:
-      target_rel_path = dirpath
-      #print 'FOUND %d files to move at [%s]' %(len(files_to_move), target_rel_path)
+      target_rel_path = os.path.relpath(record.dirpath, source_abs_basepath)
       move_queue.append({'target_rel_path':target_rel_path, 'files_to_move':files_to_move})
-      #print '-'*40
   return move_queue, source_abs_basepath
 
+def write_marker_file(source_abs_dirpath):
+  marker_abs_filepath = os.path.join(source_abs_dirpath, CONVENTIONED_MP3GENERATED_MARK_HIDDENFILE_NAME)
+  marker_file = open(marker_abs_filepath, 'w')
+  marker_file.close()
+
 def move_over_to_target_abs_path(move_queue, source_abs_basepath, target_abs_basepath):
   if source_abs_basepath == None:
-    raise ValueError, 'source_abs_basepath is None'
+    raise ValueError('source_abs_basepath is None')
   if target_abs_basepath == None:
-    raise ValueError, 'target_abs_basepath is None'
+    raise ValueError('target_abs_basepath is None')
   move_counter = 0
   for move_instance in move_queue:
     target_rel_path = move_instance['target_rel_path']
-    print 'Target Rel. Path =', target_rel_path
-    if target_rel_path.startswith('./'):
-      target_rel_path = target_rel_path[2:]
-    target_abs_dirpath = os.path.join(target_abs_basepath, target_rel_path)
+    print('Target Rel. Path =', target_rel_path)
+    target_abs_dirpath = os.path.normpath(os.path.join(target_abs_basepath, target_rel_path))
     if not os.path.isdir(target_abs_dirpath):
       os.makedirs(target_abs_dirpath)
-    print '-'*10
+    print('-'*10)
     files_to_move = move_instance['files_to_move']
-    source_abs_dirpath = os.path.join(source_abs_basepath, target_rel_path)
+    source_abs_dirpath = os.path.normpath(os.path.join(source_abs_basepath, target_rel_path))
     for file_to_move in files_to_move:
       source_abs_filepath = os.path.join(source_abs_dirpath, file_to_move)
       shutil.move(source_abs_filepath, target_abs_dirpath)
       # marker file
-      marker_abs_filepath = os.path.join(source_abs_dirpath, CONVENTIONED_MP3GENERATED_MARK_HIDDENFILE_NAME)
-      marker_file = open(marker_abs_filepath, 'w')
-      marker_file.close()
+      write_marker_file(source_abs_dirpath)
       move_counter += 1
-      print move_counter, 'Moved', file_to_move
+      print(move_counter, 'Moved', file_to_move)
+
+def convert_over_to_target_abs_path(move_queue, source_abs_basepath, target_abs_basepath, convert_params):
+  '''
+  Converts (to mp3) the queued source media files into the target structure, in one engine run
+    the marker file goes into each source folder whose conversions all succeeded
+  '''
+  media_objs = []
+  for move_instance in move_queue:
+    target_rel_path = move_instance['target_rel_path']
+    target_abs_dirpath = os.path.normpath(os.path.join(target_abs_basepath, target_rel_path))
+    os.makedirs(target_abs_dirpath, exist_ok=True)
+    source_abs_dirpath = os.path.normpath(os.path.join(source_abs_basepath, target_rel_path))
+    for file_to_convert in move_instance['files_to_move']:
+      media_obj = batchConverter.Media(os.path.join(source_abs_dirpath, file_to_convert), 0, is_audio=True)
+      if convert_params['bitrate_in_kbps'] is not None:
+        media_obj.set_bitrate_in_kbps(convert_params['bitrate_in_kbps'])
+      if convert_params['resampling_freq_in_khz'] is not None:
+        media_obj.set_resampling_freq_in_khz(convert_params['resampling_freq_in_khz'])
+      # the mp3 goes to the target folder (Media.mpx would put it beside its source)
+      media_obj.target_mpx = os.path.join(target_abs_dirpath, os.path.basename(media_obj.mpx))
+      media_objs.append(media_obj)
+  jobs = []
+  for media_obj in media_objs:
+    if os.path.isfile(media_obj.target_mpx):
+      print(media_obj.target_mpx, 'exists. Jumping to next.')
+      continue
+    jobs.append(batchConverter.ffeng.ConversionJob(
+      media_obj.media_file_from, media_obj.target_mpx, media_obj.form_codec_args(),
+      b_cacheable=True
+    ))
+  engine = batchConverter.form_engine(n_workers=convert_params['n_workers'], niceness=convert_params['niceness'])
+  print(engine, '| jobs =', len(jobs))
+  results = engine.run(jobs)
+  failed_dirpaths = {os.path.dirname(r.job.src_filepath) for r in results if not r.ok}
+  for source_abs_dirpath in {os.path.dirname(media_obj.media_file_from) for media_obj in media_objs}:
+    if source_abs_dirpath not in failed_dirpaths:
+      write_marker_file(source_abs_dirpath)
 
 def get_args():
   target_abs_basepath = None
   extension           = None
+  convert_params = {
+    'source_extension': None, 'n_workers': None, 'niceness': batchConverter.ffeng.DEFAULT_NICENESS,
+    'bitrate_in_kbps': None, 'resampling_freq_in_khz': None,
+  }
   for arg in sys.argv:
     if arg.startswith('-e='):
       extension = arg[len('-e='):]
+    elif arg.startswith('-c='):
+      convert_params['source_extension'] = arg[len('-c='):]
+    elif arg.startswith('-j='):
+      convert_params['n_workers'] = int(arg[len('-j='):])
+    elif arg.startswith('-n='):
+      convert_params['niceness'] = int(arg[len('-n='):])
+    elif arg.startswith('-b='):
+      convert_params['bitrate_in_kbps'] = int(arg[len('-b='):])
+    elif arg.startswith('-s='):
+      convert_params['resampling_freq_in_khz'] = float(arg[len('-s='):])
     elif arg.startswith('-t='):
       target_abs_basepath = arg[len('-t='):]
       if not os.path.isdir(target_abs_basepath):
-        raise OSError, target_abs_basepath + ' is not a directory.'
+        raise OSError(target_abs_basepath + ' is not a directory.')
   if target_abs_basepath == None:
-    raise OSError, 'target_abs_basepath must be given as input.'
+    raise OSError('target_abs_basepath must be given as input.')
     # target_abs_basepath = target_abs_basepath_DEFAULT
   if extension == None:
     extension = extension_DEFAULT
-  return extension, target_abs_basepath
+  return extension, os.path.abspath(target_abs_basepath), convert_params
 
 def main():
-  extension, target_abs_basepath = get_args()
+  extension, target_abs_basepath, convert_params = get_args()
+  if convert_params['source_extension'] is not None:
+    move_queue, source_abs_basepath = walk_dirtree_and_cache_moveables(convert_params['source_extension'])
+    convert_over_to_target_abs_path(move_queue, source_abs_basepath, target_abs_basepath, convert_params)
+    return
   move_queue, source_abs_basepath = walk_dirtree_and_cache_moveables(extension)
   move_over_to_target_abs_path(move_queue, source_abs_basepath, target_abs_basepath)
 
@@ -7,11 +7,15 @@ Examples:
 python3 mp3_converter.py -b 64k -r 22050 -i video.mp4
 python3 mp3_converter.py -b 128k -r 44100 -i ./media_folder -o ./converted_mp3
 
+A source already converted with the same bitrate and sample rate (by content, whatever its name or folder)
+  gets a copy of the cached mp3 instead of being converted again (lblib/os/conversion_cache.py);
+  --no-cache turns this off.
 """
 import argparse
 import os
 import subprocess
 import sys
+import lblib.os.conversion_cache as convcache
 
 # Valid bitrate/sample rate combinations (basic sanity check)
 VALID_COMBINATIONS = {
@@ -29,10 +33,9 @@ def check_combination(bitrate, samplerate):
     sys.exit(f"Error: Bitrate {bitrate} and sample rate {samplerate} Hz is not a valid combination.")
 
 
-def convert_to_mp3(input_file, output_dir, bitrate, samplerate):
+def convert_to_mp3(input_file, output_dir, bitrate, samplerate, cache=None):
   filename = os.path.splitext(os.path.basename(input_file))[0] + ".mp3"
   output_file = os.path.join(output_dir, filename)
-
   cmd = [
       "ffmpeg",
       "-i", input_file,
@@ -42,9 +45,16 @@ def convert_to_mp3(input_file, output_dir, bitrate, samplerate):
       "-f", "mp3",
       output_file
   ]
+  # the cache key takes the whole command (its input & output filepaths taken out)
+  cache_params = convcache.form_params_fr_argv(cmd, input_file, output_file)
+  if cache is not None and cache.materialize(input_file, cache_params, output_file):
+    print(f"Cached {input_file} -> {output_file}")
+    return
 
   print(f"Converting {input_file} -> {output_file}")
   subprocess.run(cmd, check=True)
+  if cache is not None:
+    cache.store(input_file, cache_params, output_file)
 
 
 def main():
@@ -53,6 +63,7 @@ def main():
   parser.add_argument("-r", "--samplerate", type=int, required=True, help="MP3 sample rate (e.g., 22050, 44100)")
   parser.add_argument("-i", "--input", required=True, help="Input file or folder")
   parser.add_argument("-o", "--output", default="output_mp3", help="Output folder")
+  parser.add_argument("--no-cache", action="store_true", help="Do not use the conversion cache")
 
   args = parser.parse_args()
 
@@ -68,9 +79,10 @@ def main():
   else:
     files = [args.input]
 
+  cache = None if args.no_cache else convcache.ConversionCache()
   for f in files:
     try:
-      convert_to_mp3(f, args.output, args.bitrate, args.samplerate)
+      convert_to_mp3(f, args.output, args.bitrate, args.samplerate, cache)
     except subprocess.CalledProcessError:
       print(f"Failed to convert {f}")
 
@@ -8,12 +8,19 @@ python3 mp3_converter_pydub.py -b 64k -r 22050 -i video.mp4
 pip install pydub
 
 python3 mp3_converter.py -b 128k -r 44100 -i ./media_folder -o ./converted_mp3
+python3 mp3_converter.py -b 64k -r 22050 -i lecture.mp4 --stream
 
+--stream: instead of AudioSegment.from_file() (which decodes the whole input into memory,
+  gigabytes of PCM for a multi-hour lecture), the decoded PCM flows in bounded chunks
+  (--chunk-kib, default 1024) from an ffmpeg decoder to an ffmpeg encoder,
+  so the memory stays fixed whatever the duration (lblib/os/pcm_streamer.py);
+  pydub's configured ffmpeg (AudioSegment.converter) is used for both.
 """
 import argparse
 import os
 import sys
 from pydub import AudioSegment
+import lblib.os.pcm_streamer as pcmstr
 
 # Valid bitrate/sample rate combinations (basic sanity check)
 VALID_COMBINATIONS = {
@@ -45,12 +52,27 @@ def convert_to_mp3(input_file, output_dir, bitrate, samplerate):
   audio.export(output_file, format="mp3", bitrate=bitrate)
 
 
+def convert_to_mp3_streaming(input_file, output_dir, bitrate, samplerate, chunk_bytes=pcmstr.DEFAULT_CHUNK_BYTES):
+  filename = os.path.splitext(os.path.basename(input_file))[0] + ".mp3"
+  output_file = os.path.join(output_dir, filename)
+
+  print(f"Converting (streaming) {input_file} -> {output_file}")
+
+  stats = pcmstr.stream_convert_to_mp3(
+    input_file, output_file, bitrate, samplerate, chunk_bytes=chunk_bytes, ffmpeg_bin=AudioSegment.converter
+  )
+  print(f"  {stats}")
+
+
 def main():
   parser = argparse.ArgumentParser(description="Extract and convert audio to MP3 using pydub.")
   parser.add_argument("-b", "--bitrate", required=True, help="MP3 bitrate (e.g., 32k, 64k, 128k)")
   parser.add_argument("-r", "--samplerate", type=int, required=True, help="MP3 sample rate (e.g., 22050, 44100)")
   parser.add_argument("-i", "--input", required=True, help="Input file or folder")
   parser.add_argument("-o", "--output", default="output_mp3", help="Output folder")
+  parser.add_argument("--stream", action="store_true", help="Stream the PCM in bounded chunks (fixed memory)")
+  parser.add_argument("--chunk-kib", type=int, default=pcmstr.DEFAULT_CHUNK_BYTES // 1024,
+                      help="Chunk size of --stream in KiB")
 
   args = parser.parse_args()
 
@@ -68,7 +90,10 @@ def main():
 
   for f in files:
     try:
-      convert_to_mp3(f, args.output, args.bitrate, args.samplerate)
+      if args.stream:
+        convert_to_mp3_streaming(f, args.output, args.bitrate, args.samplerate, args.chunk_kib * 1024)
+      else:
+        convert_to_mp3(f, args.output, args.bitrate, args.samplerate)
     except Exception as e:
       print(f"Failed to convert {f}: {e}")
 
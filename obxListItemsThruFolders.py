@@ -7,6 +7,7 @@
 """
 import os
 import re
+import lblib.os.treescanner as tscan
 # import sys
 # re pattern  # (?P<name>...)
 restr = r"^(?P<sku>\d{8})\t(?P<title>.*)$"
@@ -61,7 +62,7 @@ class TextThruFoldersGrabber:
         self.files_to_read.append(filepath)
 
   def walkup_fr_basefolder(self):
-    for i, (self.curdir_abspath, _, filenames) in enumerate(os.walk(self.base_folder)):
+    for i, (self.curdir_abspath, _, filenames) in enumerate(tscan.walk(self.base_folder)):
       # seq = i + 1
       # print(seq, 'traversing:', self.curdir_abspath)
       self.process_folder(filenames)
@@ -9,6 +9,7 @@ import re
 import sys
 from pathlib import Path
 from collections import namedtuple
+import lblib.os.treescanner as tscan
 bookinfo_nt = namedtuple(
   'InfoExtractor',
   ['title', 'year', 'author', 'isbn']
@@ -109,7 +110,7 @@ class InfoExtractor:
       self.extract_info_from_filename(each_file)
 
   def walkup_dirtree(self):
-    for self.current_folder_ap, _, files in os.walk(self.basefolder_ap):
+    for self.current_folder_ap, _, files in tscan.walk(str(self.basefolder_ap)):
       self.extract_info_from_folder(files)
 
   def process(self):
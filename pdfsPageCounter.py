@@ -4,11 +4,13 @@ This script renames pdf-files inserting the total page number according to a sta
 (It uses library PyPDF2.)
 
 Usage:
-  pdfsPageCounter.py [-p="<abs_directory>"]  [-y|-Y]
+  pdfsPageCounter.py [-p="<abs_directory>"]  [-y|-Y] [-r] [-j=<workers>]
 
 Optional Parameters:
   1) abs_directory: the directory under which the renames will occur. If None, current directory will be used.
   2) -y|-Y means autorename (ie without the user's confirmation (yes/no) in CLI-prompt)
+  3) -r means recursive, ie, the pdfs in all the folders below abs_directory are renamed (one confirmation for all)
+  4) -j=<workers>: the number of processes counting pages (default: the number of cores)
 
 A simple example:
 1) Issuing command:
@@ -22,11 +24,16 @@ A simple example:
 Previously, this script ran only under the current folder. In August 2023,
   it was updated to accept any directory in the available folder-tree and then
   can also be used as an API to other calling programs.
+
+The page counting (lblib/os/pdf_pagecounter.py) reads the page tree root's /Count (from the trailer)
+  without parsing the whole pdf, falling back to PyPDF2's PdfReader only when that is not possible;
+  the pdfs are counted in a process pool and each folder keeps a hidden cache (.pdfpagecounts.json)
+  of filename => (size, mtime, page total), so an unchanged pdf is not opened again.
 """
 import os
 import sys
-from PyPDF2 import PdfReader  # got deprecated after PyPDF2 v3 use instead PdfReader
-from PyPDF2.errors import PdfReadError
+import lblib.os.pdf_pagecounter as pdfpc
+import lblib.os.treescanner as tscan
 
 
 def check_n_get_number_from_strnumber_plus_p(strnumber_plus_p):
@@ -44,7 +51,7 @@ def check_n_get_number_from_strnumber_plus_p(strnumber_plus_p):
 
 class PageTotalPdfRenamer:
 
-  def __init__(self, p_basefolder_absdir=None, p_autoren_no_cli_confirm=False):
+  def __init__(self, p_basefolder_absdir=None, p_autoren_no_cli_confirm=False, p_n_workers=None):
     self.seq = 0
     self.total_pdfs_in_folder = 0
     self.pdffilenames = []  # this attribute is to be deleted after use
@@ -52,8 +59,10 @@ class PageTotalPdfRenamer:
     self.renamepairs = []
     self.total_renames = 0
     self.autoren_no_cli_confirm = p_autoren_no_cli_confirm
+    self.n_workers = p_n_workers
     self.basefolder_absdir = p_basefolder_absdir
     self.treat_basefolder_absdir()
+    self.cache = pdfpc.FolderPageCountCache(self.basefolder_absdir)
 
   def treat_basefolder_absdir(self):
     try:
@@ -98,29 +107,46 @@ class PageTotalPdfRenamer:
     filenames = list(filter(lambda fn: fn.endswith('.pdf'), filenames))
     pdffiles = [os.path.join(self.basefolder_absdir, fn) for fn in filenames]
     pdffiles = list(filter(lambda f: os.path.isfile(f), pdffiles))
-    sorted(pdffiles)
+    pdffiles.sort()
+    self.total_pdfs_in_folder = len(pdffiles)
     # filter out those that have already a page-total sufix and then don't need it
     return self.finish_collect_pdfs_excluding_those_already_with_pagesufix(pdffiles)
 
-  def collect_totalpage_in_each_pdf_for_all_pdfs(self):
+  def get_pdffiles_to_count(self):
+    """
+    The pdfs (as full paths) whose page total is not in the folder's cache
+    """
+    return [
+      os.path.join(self.basefolder_absdir, pdffilename) for pdffilename in self.pdffilenames
+      if self.cache.get_or_none(pdffilename) is None
+    ]
+
+  def collect_totalpage_in_each_pdf_for_all_pdfs(self, counted=None):
+    """
+    :param counted: pdfpc.count_pages_in_pool()'s result if the caller has already counted them
+      (the recursive mode counts all folders' pdfs in one pool); if None, they are counted here
+    """
+    if counted is None:
+      counted = pdfpc.count_pages_in_pool(self.get_pdffiles_to_count(), self.n_workers)
     # for keeping just a record of amounts, the list itself will be deleted
     afterprocess_filenames = []
     for i, pdffilename in enumerate(self.pdffilenames):
       seq = i + 1
       pdffile = os.path.join(self.basefolder_absdir, pdffilename)
       print(seq, '=>', pdffilename)
-      with open(pdffile, 'rb') as fd:
-        try:
-          pdf_obj = PdfReader(fd)  # PdfFileReader got deprecated
-          n_of_pages = len(pdf_obj.pages)  # pdf_obj.getNumPages() got deprecated
-        except (PdfReadError, ValueError):  # PyPDF2.errors.PdfReadError
+      n_of_pages, strategy = self.cache.get_or_none(pdffilename), pdfpc.STRATEGY_CACHED
+      if n_of_pages is None:
+        n_of_pages, strategy = counted.get(pdffile, (None, None))
+        if n_of_pages is None:
           continue
-        afterprocess_filenames.append(pdffilename)
-        filename_n_pagetotal_tuple = (pdffilename, n_of_pages)
-        print(seq, '/', self.total_pdfs_in_folder, 'finding total pages as', n_of_pages, 'for', pdffilename)
-        print('-'*30)
-        self.filename_n_pagetotal_tuplelist.append(filename_n_pagetotal_tuple)
+        self.cache.put(pdffilename, n_of_pages)
+      afterprocess_filenames.append(pdffilename)
+      filename_n_pagetotal_tuple = (pdffilename, n_of_pages)
+      print(seq, '/', self.total_pdfs_in_folder, 'finding total pages as', n_of_pages, 'for', pdffilename, f'({strategy})')
+      print('-'*30)
+      self.filename_n_pagetotal_tuplelist.append(filename_n_pagetotal_tuple)
     self.pdffilenames = afterprocess_filenames
+    self.cache.save()
 
   def print_totalpage_for_pdfs(self):
     total_pdfs_for_rename = len(self.filename_n_pagetotal_tuplelist)
@@ -189,7 +215,9 @@ class PageTotalPdfRenamer:
       print(seq, oldfilename)
       print(seq, newfilename)
       os.rename(oldfile, newfile)
+      self.cache.rename(oldfilename, newfilename)
       self.total_renames += 1
+    self.cache.save()
     print('Total renamed =', self.total_renames)
 
   def process(self):
@@ -200,18 +228,84 @@ class PageTotalPdfRenamer:
       self.rename_pairs()
 
 
+class TreePageTotalPdfRenamer:
+  """
+  The recursive mode: a PageTotalPdfRenamer per folder (with pdfs) in the dirtree,
+    all folders' uncached pdfs counted in one process pool and one confirmation for all renames
+  """
+
+  def __init__(self, p_basefolder_absdir=None, p_autoren_no_cli_confirm=False, p_n_workers=None):
+    self.basefolder_absdir = p_basefolder_absdir
+    if self.basefolder_absdir is None or not os.path.isdir(self.basefolder_absdir):
+      self.basefolder_absdir = os.path.abspath('.')
+    self.autoren_no_cli_confirm = p_autoren_no_cli_confirm
+    self.n_workers = p_n_workers
+    self.renamers = []
+
+  def collect_renamers(self):
+    for record in tscan.TreeScanner(self.basefolder_absdir).scan():
+      if len(record.get_file_entries_with_exts(['.pdf'])) == 0:
+        continue
+      renamer = PageTotalPdfRenamer(record.dirpath, self.autoren_no_cli_confirm, self.n_workers)
+      renamer.select_pdffiles_in_folder()
+      self.renamers.append(renamer)
+
+  def confirm_renames(self):
+    total_renamepdfs = sum(len(renamer.renamepairs) for renamer in self.renamers)
+    if total_renamepdfs == 0:
+      print('-'*30)
+      print('There are %d pdf files in the dirtree.' % sum(r.total_pdfs_in_folder for r in self.renamers))
+      print('No pdf files to rename adding total page number.')
+      print('-'*30)
+      return False
+    for renamer in self.renamers:
+      if len(renamer.renamepairs) > 0:
+        print('='*30)
+        print('Folder:', renamer.basefolder_absdir)
+        renamer.show_pairs()
+    if self.autoren_no_cli_confirm:
+      return True
+    screen_msg = 'Confirm the %d renames above (in %d folders) ? (*Y/n) ' % (total_renamepdfs, len(self.renamers))
+    ans = input(screen_msg)
+    if ans in ['Y', 'y', '']:
+      return True
+    return False
+
+  def process(self):
+    self.collect_renamers()
+    pdffiles_to_count = []
+    for renamer in self.renamers:
+      pdffiles_to_count += renamer.get_pdffiles_to_count()
+    counted = pdfpc.count_pages_in_pool(pdffiles_to_count, self.n_workers)
+    for renamer in self.renamers:
+      renamer.collect_totalpage_in_each_pdf_for_all_pdfs(counted)
+      renamer.generate_renamepairs()
+    if self.confirm_renames():
+      for renamer in self.renamers:
+        renamer.rename_pairs()
+
+
 def get_args():
   p_autoren_no_cli_confirm = False
   p_basefolder_absdir = None
+  p_recursive = False
+  p_n_workers = None
   for arg in sys.argv:
     if arg.startswith('-p='):
       p_basefolder_absdir = arg[len('-p='):]
     elif arg in ['-y', '-Y']:
       p_autoren_no_cli_confirm = True
-  return p_basefolder_absdir, p_autoren_no_cli_confirm
+    elif arg == '-r':
+      p_recursive = True
+    elif arg.startswith('-j='):
+      p_n_workers = int(arg[len('-j='):])
+  return p_basefolder_absdir, p_autoren_no_cli_confirm, p_recursive, p_n_workers
 
 
 if __name__ == '__main__':
-  basefolder_absdir, autoren_no_cli_confirm = get_args()
-  renamer = PageTotalPdfRenamer(basefolder_absdir, autoren_no_cli_confirm)
+  basefolder_absdir, autoren_no_cli_confirm, recursive, n_workers = get_args()
+  if recursive:
+    renamer = TreePageTotalPdfRenamer(basefolder_absdir, autoren_no_cli_confirm, n_workers)
+  else:
+    renamer = PageTotalPdfRenamer(basefolder_absdir, autoren_no_cli_confirm, n_workers)
   renamer.process()
@@ -1,10 +1,20 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 #-*-coding:utf-8-*-
-import glob, os, re, sys
+'''
+pylame.py [kbps] [--no-cache]
+  Re-encodes (with lame) the mp3s in the local folder to the given kbps (24, 32 or 48),
+    each "name.mp3" giving a "name.<kbps>k.mp3"
+
+  An mp3 whose content was already re-encoded with the same kbps (whatever its name or folder)
+    gets a copy of the cached result instead of running lame again (lblib/os/conversion_cache.py);
+    --no-cache turns this off.
+'''
+import glob, os, re, subprocess, sys
+import lblib.os.conversion_cache as convcache
 
 def print_program_usage_and_exit():
-  print '''Usage:
-  <command> [file numbers]'''
+  print('''Usage:
+  <command> [kbps] [--no-cache]''')
   sys.exit(0)
 
 class DEFAULTS:
@@ -42,14 +52,14 @@ def pick_up_all_mp3s_on_localfolder():
 class Mp3LameFreqChanger(object):
 
   # think about how to solve the "--resample" issue
-  LAME_COMMAND_BASE = 'lame -b %(freq_in_kbps)d --mp3input -m s --resample 48 "%(input_mp3_filename)s" "%(output_mp3_filename)s"'
-  # LAME_COMMAND_BASE = 'lame -b %(freq_in_kbps)d --mp3input -m s "%(input_mp3_filename)s" "%(output_mp3_filename)s"'
-  kbps_re_str = '\d+k'
+  LAME_ARGV_BASE = ['lame', '-b', '%(freq_in_kbps)d', '--mp3input', '-m', 's', '--resample', '48']
+  kbps_re_str = r'\d+k'
   kbps_re = re.compile(kbps_re_str)
   
   
-  def __init__(self, freq_in_kbps):
+  def __init__(self, freq_in_kbps, b_use_cache=True):
     self.freq_in_kbps = freq_in_kbps
+    self.cache = convcache.ConversionCache() if b_use_cache else None
     self.init_mp3_tuple_list_to_convert_on_localfolder()
     self.confirm_batch_conversion()
     self.batch_convert_one_by_one()
@@ -84,28 +94,38 @@ class Mp3LameFreqChanger(object):
       self.mp3_tuple_list_to_convert.append(convert_tuple)
 
   def confirm_batch_conversion(self):
-    print 'Conversion:'
-    print '-'*30
+    print('Conversion:')
+    print('-'*30)
     for i, convert_tuple in enumerate(self.mp3_tuple_list_to_convert):
-      print i+1, 'converting:', convert_tuple
-    print 'Total:', len(self.mp3_tuple_list_to_convert)
-    ans = raw_input(' *** Please, to avoid converting them above, press n or N and [ENTER]. Any other key means [ok] to convert. ***')
+      print(i+1, 'converting:', convert_tuple)
+    print('Total:', len(self.mp3_tuple_list_to_convert))
+    ans = input(' *** Please, to avoid converting them above, press n or N and [ENTER]. Any other key means [ok] to convert. ***')
     if ans in ['n', 'N']:
       sys.exit(0)
 
   def batch_convert_one_by_one(self):
+    params = {'freq_in_kbps': self.freq_in_kbps}
     for convert_tuple in self.mp3_tuple_list_to_convert:
       input_mp3_filename, output_mp3_filename = convert_tuple
-      dict_for_lame_command_base = {'freq_in_kbps':self.freq_in_kbps, 'input_mp3_filename':input_mp3_filename, 'output_mp3_filename':output_mp3_filename} 
-      command = self.LAME_COMMAND_BASE %dict_for_lame_command_base
-      retValue = os.system(command)
-      print '-'*30
-      print 'os.system() returned %d' %retValue
-      print '-'*30
+      command = [arg % params for arg in self.LAME_ARGV_BASE] + [input_mp3_filename, output_mp3_filename]
+      # the cache key takes the whole command (its input & output filepaths taken out)
+      cache_params = convcache.form_params_fr_argv(command, input_mp3_filename, output_mp3_filename)
+      if self.cache is not None and self.cache.materialize(input_mp3_filename, cache_params, output_mp3_filename):
+        print('Cached:', output_mp3_filename)
+        continue
+      retValue = subprocess.run(command).returncode
+      print('-'*30)
+      print('lame returned %d' %retValue)
+      print('-'*30)
+      if retValue == 0 and self.cache is not None:
+        self.cache.store(input_mp3_filename, cache_params, output_mp3_filename)
 
 def process():
+  b_use_cache = '--no-cache' not in sys.argv
+  if not b_use_cache:
+    sys.argv.remove('--no-cache')
   freq_in_kbps = pick_up_freq_in_arg1_or_default_or_print_usage_and_exit()
-  Mp3LameFreqChanger(freq_in_kbps)
+  Mp3LameFreqChanger(freq_in_kbps, b_use_cache)
 
 if __name__ == '__main__':
   process()
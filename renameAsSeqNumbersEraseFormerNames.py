@@ -5,7 +5,8 @@ CAUTION:
   as the new names will be only numbers sequencially augmenting (1, 2, 3, 4...)
 
 Usage:
-$this_script.py -e=[<extension>]
+$this_script.py -e=[<extension>] [-y]
+  (-o=<extension> is also accepted; -y renames without the confirmation prompt)
 
 Example: suppose the following files are in the current directory:
   "F1 file foo bar.mp4"
@@ -14,13 +15,12 @@ Running this script and confirming the operation, the (renamed) new names will b
   "1.mp4"
   "2.mp4"
 
-CAUTION AGAIN:
-  this operation, if confirmed, can not be undone, so, if possible, make a back-up before running it.
+The run is journaled (a hidden ".renamejournal-*.jsonl" file in the folder, see lblib/os/rename_journal.py):
+  renameUndo.py brings the former names back (or completes the run, if it was interrupted: renameUndo.py --resume).
 """
-# import glob
-import math
 import os
 import sys
+import lblib.os.rename_engine as rneng
 DEFAULT_EXTENSION = '.mp4'
 
 
@@ -70,11 +70,11 @@ class Renamer:
 
   """
   
-  def __init__(self, ext_for_rename=None, dir_abspath=None):
+  def __init__(self, ext_for_rename=None, dir_abspath=None, b_autoconfirm=False):
     """
     """
-    self.is_renames_confirmed = False
-    self.rename_pairs = []
+    self.results = []
+    self.b_autoconfirm = b_autoconfirm
     if ext_for_rename is None:
       self.ext_for_rename = DEFAULT_EXTENSION
     else:
@@ -85,79 +85,24 @@ class Renamer:
     else:
       self.dir_abspath = dir_abspath
 
-  def find_files_from_current_folder(self):
-    self.rename_pairs = []
-    files = os.listdir(self.dir_abspath)
-    files = return_only_filenames_under_ext(files, self.dir_abspath, self.ext_for_rename)
-    files.sort()
-    total_files = len(files)
-    if total_files < 1:
-      print('No files to rename.')
-      return
-    zfill_size = int(math.log(total_files, 10) + 1)
-    self.rename_pairs = []
-    for i, f in enumerate(files):
-      seq = i + 1
-      outfilename = '%s' + self.ext_for_rename
-      seqstr = str(seq).zfill(zfill_size)
-      outfilename = outfilename % seqstr
-      rename_pair = f, outfilename
-      self.rename_pairs.append(rename_pair)
-
-  def confirm_renames(self):
-    self.is_renames_confirmed = False
-    if len(self.rename_pairs) == 0:
-      print('No files to rename.')
-      return
-    for i, rename_pair in enumerate(self.rename_pairs):
-      seq = i + 1
-      print(seq, 'Rename:')
-      old_name, new_name = rename_pair
-      print('FROM: >>>%s' % old_name)
-      print('TO:   >>>%s' % new_name)
-    screen_msg = 'Confirm the %d renames above ? (*Y/n) ([ENTER] means Yes) ' % len(self.rename_pairs)
-    ans = input(screen_msg)
-    if ans in ['Y', 'y', '']:
-      self.is_renames_confirmed = True
-      return
-
-  def do_renames(self):
-    if not self.is_renames_confirmed:
-      print('Renames not confirmed.')
-      return
-    print('-'*40)
-    n_renamed = 0
-    for i, rename_pair in enumerate(self.rename_pairs):
-      old_filename, new_filename = rename_pair
-      old_file_absfile = os.path.join(self.dir_abspath, old_filename)
-      new_file_absfile = os.path.join(self.dir_abspath, new_filename)
-      if not os.path.isfile(old_file_absfile):
-        continue
-      if os.path.isfile(new_file_absfile):
-        continue
-      seq = i + 1
-      print(seq, 'Rename:')
-      print('FROM: >>>%s' % old_filename)
-      print('TO:   >>>%s' % new_filename)
-      os.rename(old_file_absfile, new_file_absfile)
-      n_renamed += 1
-    print('-'*40)
-    print('Finished %d rename pairs.' % len(self.rename_pairs))
-    print('Total renamed:', n_renamed)
+  def form_new_filename(self, _filename, context):
+    seqstr = str(context.seq).zfill(context.zfill_size)
+    return seqstr + self.ext_for_rename
 
   def process_rename(self):
-    self.find_files_from_current_folder()
-    self.confirm_renames()
-    if self.is_renames_confirmed:
-      self.do_renames()
+    self.results = rneng.run_renames(
+      self.form_new_filename, self.dir_abspath, self.ext_for_rename, b_autoconfirm=self.b_autoconfirm,
+    )
 
 
 def get_argdict():
-  argdict = {'ext_for_rename': None}
+  argdict = {'ext_for_rename': None, 'b_autoconfirm': False}
   for arg in sys.argv:
-    if arg.startswith('-o='):
+    if arg.startswith('-o=') or arg.startswith('-e='):
       ext_for_rename = arg[len('-o='):]
       argdict['ext_for_rename'] = ext_for_rename
+    elif arg in ['-y', '-Y']:
+      argdict['b_autoconfirm'] = True
   return argdict
 
 
@@ -166,7 +111,7 @@ def process():
   """
   argdict = get_argdict()
   ext_for_rename = argdict['ext_for_rename']
-  renamer = Renamer(ext_for_rename)
+  renamer = Renamer(ext_for_rename, b_autoconfirm=argdict['b_autoconfirm'])
   renamer.process_rename()
 
 
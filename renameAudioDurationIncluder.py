@@ -1,10 +1,8 @@
 #!/usr/bin/env python3
 import glob
-import json
 import os
-import string
-import subprocess
 import sys
+import lblib.os.media_duration as mdur
 
 DEFAULT_EXTENSION = 'mp4'
 
@@ -37,81 +35,45 @@ def print_explanation_and_exit():
   sys.exit(0)
 
 
-def probe_n_return_json(vid_file_path):
+def probe_n_return_duration_in_sec(vid_file_path, service=None):
   """
-
-    NOT YET WORKING TO THE PROBABLY THE BYTES/STRING PROBLEM FROM THE PIPE-FFPROBE
-    Give a json from ffprobe command line
-    @vid_file_path : The absolute (full) path of the video file, string.
-
-      This function was copied from the one in StackOverflow at:
-        https://stackoverflow.com/questions/3844430/how-to-get-the-duration-of-a-video-in-python
-
+  The duration of vid_file_path read from its headers (mp4's mvhd, mp3's Xing/VBRI/ID3, lblib/os/media_duration.py)
+    or, if they could not be parsed, from lblib's metadata service (ffprobe, with its cache)
   """
   if not os.path.isfile(vid_file_path):
-    raise Exception('Give ffprobe a full file path of the video')
-
-  command = [
-    "ffprobe",
-    "-loglevel",  "quiet",
-    "-print_format", "json",
-    "-show_format",
-    "-show_streams",
-    vid_file_path
-  ]
-
-  pipe = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-  out, err = pipe.communicate()
-  # print(out, err)
-  # sys.exit(0)
-  return json.loads(out)
+    raise OSError('Give ffprobe a full file path of the video')
+  duration_in_sec = mdur.get_duration_secs_or_none(vid_file_path, service)
+  return get_duration_in_sec(vid_file_path, duration_in_sec)
 
 
 def transform_duration_from_sec_to_min(duration_in_sec):
   return int(round(float(duration_in_sec) / 60, 0))
 
 
-def get_duration_in_sec(json_as_dict):
+def get_duration_in_sec(vid_file_path, duration_in_sec):
   """
-  :param json_as_dict:
-  :return:
-
-  The approach here will be as follows:
-  1) first, try to find the duration key inside json_as_dict['streams']
-  2) if the above attempt fails, then try to find the duration key inside json_as_dict['format']
-  3) if both above fails, then exit(1) with error "duration not found"
-
-  Chances to improve this routine:
-  1) try to find a way to introspect the whole json_as_dict,
-    so that it would look up the duration key wherever it has a chance to be
-  2) if the above is implementable,
-    that would guarantee "duration not found"
-    in case duration is really missing
+  :param vid_file_path: the file (for the error message)
+  :param duration_in_sec: the duration found (by lblib/os/media_duration.py) or None
+  :return: the duration in seconds
+
+  The duration is the headers' or, if they could not be parsed, ffprobe's:
+    the container's (format) duration or, missing it, the longest stream's
+    (formerly the 2nd stream's duration was tried first, then the format's)
+  If there's none, the program exits with error "duration not found"
   """
-  try:
-    # 1st try: look up duration key from dict inside key 'streams', second element from list
-    dict_that_has_duration = json_as_dict['streams'][1]
-    duration_in_sec = dict_that_has_duration['duration']
-    # got it, so return it right away
-    # (but how will we know whether or not this exception is always thrown
-    # and code might be refactored to leave only the 2nd try below?)
-    return duration_in_sec
-  except (IndexError, KeyError) as _:
-    pass
-  try:
-    # 2nd try: look up duration key from dict inside key 'format'
-    dict_that_has_duration = json_as_dict['format']
-    duration_in_sec = dict_that_has_duration['duration']
-  except (IndexError, KeyError) as _:
-    print(json_as_dict)
+  if duration_in_sec is None:
+    print(vid_file_path)
     print("Couldn't find duration key, program cannot continue.")
     sys.exit(1)
   return duration_in_sec
 
 
-def get_duration_str(fil):
-  json_from_file = probe_n_return_json(fil)
-  duration_in_sec = get_duration_in_sec(json_from_file)
+def get_duration_str(fil, service=None):
+  duration_in_sec = probe_n_return_duration_in_sec(fil, service)
+  return form_duration_str(duration_in_sec)
+
+
+def form_duration_str(duration_in_sec):
   duration_in_min = transform_duration_from_sec_to_min(duration_in_sec)
   if duration_in_min <= 60:
     # Notice that output is dd' where dd is value in minutes (eg. 59' or 7')
@@ -208,6 +170,7 @@ https://stackoverflow.com/questions/3430372/how-to-get-full-path-of-current-file
     """
     files = glob.glob('*.' + self.extension)
     files.sort()
+    candidates = []
     for filename in files:
       name, ext = os.path.splitext(filename)
       if ext is None or ext == '':
@@ -215,8 +178,16 @@ https://stackoverflow.com/questions/3430372/how-to-get-full-path-of-current-file
       words = filename.split(' ')
       if len(words) < 2:
         continue
+      candidates.append((filename, words))
+    # the durations come from the files' headers; ffprobe runs (in one bulk call to the metadata service,
+    # with its cache) only for those whose headers could not be parsed
+    durations = mdur.get_durations_secs([os.path.join(self.abspath, filename) for filename, _ in candidates])
+    for filename, words in candidates:
       fileabspath = os.path.join(self.abspath, filename)
-      duration_str = get_duration_str(fileabspath)  # probe_n_return_json
+      if not os.path.isfile(fileabspath):
+        # the file is gone
+        continue
+      duration_str = form_duration_str(get_duration_in_sec(fileabspath, durations.get(fileabspath)))
       # if (duration_str) exists in source filename, do not buffer it to rename_pairs tuple list
       if duration_str == words[1]:
         continue
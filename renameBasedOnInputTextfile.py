@@ -7,13 +7,15 @@ renameBasedOnInputTextfile
 
 Usage:
 $renameBasedOnInputTextfile.py [-e=<ext>] [-dp=<'/home/user1/sci_videos'>]
-    [-n=<newnames_input_filename>] [-nf]
+    [-n=<newnames_input_filename>] [-nf] [-y]
 
 Arguments:
   -e=<extension> => the file extension: examples: mp4 or webm
   -dp=<dir_path> => the path to the directory where renames should occur
   -n=<newnames_input_filename> => a text file with has the new name for renaming
   -nf => if present it means a sequential numbering (1, 2, 3...) should prefix names
+  -y => renames without the confirmation prompt (the run is journaled: renameUndo.py reverses it,
+    or completes it, with --resume, if it was interrupted)
 
 Example:
   $renameConservingVideoid.py -dp='/home/user1/sci_videos'
@@ -23,7 +25,7 @@ In this example, two default values will take place:
 """
 import os
 import sys
-import math
+import lblib.os.rename_engine as rneng
 
 
 def check_n_clean_or_none_as_extension_startswithadot(dotextension):
@@ -41,23 +43,20 @@ class Renamer(object):
   DEFAULT_NAMES_FILENAME = 'z-titles.txt'
   VIDEOID_CHARSIZE = 11
   
-  def __init__(self, extension=None, names_filename=None, absdirpath=None, numberthem=True):
+  def __init__(self, extension=None, names_filename=None, absdirpath=None, numberthem=True, b_autoconfirm=False):
     self.dotextension = None
     self.names_filename = None
     self.absdirpath = None
     self.numberthem = numberthem
-    self.files = []
-    self.filenames = []
-    self.rename_pairs = []
+    self.b_autoconfirm = b_autoconfirm
+    # (line index, title) for each non-empty line of the names file
+    self.indexed_titles = []
+    self.results = []
     self.set_dotextension_or_default(extension)
     self.set_names_filename_or_default(names_filename)
     self.set_absdirpath_or_default(absdirpath)
     self.process()
 
-  @property
-  def leftzeroes_zfillsize(self):
-    return int(math.log(len(self.files), 10)) + 1
-
   def set_names_filename_or_default(self, names_filename=None):
     if names_filename is None:
       self.names_filename = self.DEFAULT_NAMES_FILENAME
@@ -92,83 +91,37 @@ class Renamer(object):
     trailing_charsize = len(self.dotextension)
     return trailing_charsize
 
-  def do_rename(self):
-    if len(self.rename_pairs) == 0:
-      return
-    for i, rename_pair in enumerate(self.rename_pairs):
-      old_file = rename_pair[0]
-      new_file = rename_pair[1]
-      old_filename = os.path.split(old_file)[1]
-      new_filename = os.path.split(old_file)[1]
-      seq = i + 1
-      print(seq, 'Rename:')
-      print('FROM: >>>', old_filename)
-      print('TO:   >>>', new_filename)
-      os.rename(old_file, new_file)
-    print('%d files were renamed.' % len(self.rename_pairs))
-    print('In directory:', self.absdirpath)
-
-  def confirm_rename_pairs(self):
-    print('='*40)
-    for i, rename_pair in enumerate(self.rename_pairs):
-      old_file = rename_pair[0]
-      new_file = rename_pair[1]
-      old_filename = os.path.split(old_file)[1]
-      new_filename = os.path.split(new_file)[1]
-      seq = i + 1
-      print(seq, 'Rename:')
-      print('FROM: >>>', old_filename)
-      print('TO:   >>>', new_filename)
-    print('=' * 40)
-    print('In directory:', self.absdirpath)
-    ans = input('Confirm the %d renames above (Y*/n)? [Y, y or empty-ENTER] means Yes : ' % len(self.rename_pairs))
-    if ans in ['Y', 'y', '']:
-      return True
-    return False
-
-  def get_names_from_input_textfile_n_generate_renamepairs(self):
-    indexseq_old_names = 0
-    lines = open(self.names_filename).readlines()
+  def read_titles_from_input_textfile(self):
+    self.indexed_titles = []
+    with open(self.names_filename) as f:
+      lines = f.readlines()
     for indexseq_new_names, new_title in enumerate(lines):
       new_title = new_title.lstrip(' \t').rstrip(' \t\r\n')
       if new_title == '':
         continue
-      new_filename = new_title + self.dotextension
-      if self.numberthem:
-        seq_str = str(indexseq_new_names+1).zfill(self.leftzeroes_zfillsize)
-        new_filename = seq_str + ' ' + new_filename
-      if indexseq_old_names > len(self.files) - 1:
-        return
-      abspathfile = self.files[indexseq_old_names]
-      old_filename = os.path.split(abspathfile)[1]
-      print('checking', old_filename, '||', new_filename, '||', old_filename==new_filename)
-      if old_filename == new_filename:
-        indexseq_old_names += 1
-        continue
-      new_abspathfile = os.path.join(self.absdirpath, new_filename)
-      rename_pair = (abspathfile, new_abspathfile)
-      self.rename_pairs.append(rename_pair)
-      indexseq_old_names += 1
+      self.indexed_titles.append((indexseq_new_names, new_title))
 
-  def enlist_files_on_current_folder(self):
+  def form_new_filename_or_none(self, _filename, context):
     """
-    Picks up the files in absdirpath that ends with the class given extension
-    The result is stored in instance variable 'files'
-    :return:
+    The n-th file (alphabetical order) gets the n-th title; files beyond the titles are not renamed
+      (the -nf number is the title's line number, zero-filled to the number of files)
     """
-    entries = os.listdir(self.absdirpath)
-    entries = filter(lambda e: e.endswith(self.dotextension), entries)
-    fullentries = filter(lambda f: os.path.join(self.absdirpath, f), entries)
-    self.files = list(filter(lambda f: os.path.isfile(f), fullentries))
-    self.files.sort()
-    self.filenames = [os.path.split(abspathfile)[1] for abspathfile in self.files]
+    if context.seq > len(self.indexed_titles):
+      return None
+    indexseq_new_names, new_title = self.indexed_titles[context.seq - 1]
+    new_filename = new_title + self.dotextension
+    if self.numberthem:
+      seq_str = str(indexseq_new_names + 1).zfill(context.zfill_size)
+      new_filename = seq_str + ' ' + new_filename
+    return new_filename
 
   def process(self):
-    self.enlist_files_on_current_folder()
-    self.get_names_from_input_textfile_n_generate_renamepairs()
-    if len(self.rename_pairs) > 0 and self.confirm_rename_pairs():
-      self.do_rename()
-    else:
+    self.read_titles_from_input_textfile()
+    print('In directory:', self.absdirpath)
+    self.results = rneng.run_renames(
+      self.form_new_filename_or_none, self.absdirpath, self.dotextension, b_autoconfirm=self.b_autoconfirm,
+    )
+    if len(self.results) == 0:
       print('No files were renamed.')
 
 
@@ -190,6 +143,7 @@ def get_args():
   names_filename = None
   dpath = None
   numberthem = False
+  b_autoconfirm = False
   for arg in sys.argv:
     if arg.startswith('-e='):
       extension = arg[len('-e='):]
@@ -202,12 +156,14 @@ def get_args():
       dpath = arg[len('-dp='):]
     elif arg.startswith('-nf'):
       numberthem = True
-  return extension, names_filename, dpath, numberthem
+    elif arg in ['-y', '-Y']:
+      b_autoconfirm = True
+  return extension, names_filename, dpath, numberthem, b_autoconfirm
 
 
 def process():
-  extension, names_filename, dpath, numberthem = get_args()
-  Renamer(extension, names_filename, dpath, numberthem)
+  extension, names_filename, dpath, numberthem, b_autoconfirm = get_args()
+  Renamer(extension, names_filename, dpath, numberthem, b_autoconfirm)
 
 
 if __name__ == '__main__':
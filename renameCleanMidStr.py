@@ -23,8 +23,7 @@ Of course, -ext should be 'mp4' (but the script is able to have None in this par
 
 import os
 import sys
-# import glob, string, shutil
-# import getopt
+import lblib.os.rename_engine as rneng
 
 
 class Args(object):
@@ -106,109 +105,55 @@ class Rename(object):
 
   def process(self):
     """
+    The current folder's renames go through the rename engine (lblib/os/rename_engine.py)
 
     :return: n_of_renames
     """
-    n_of_renames = 0
     if len(self.mock_file_list) > 0:
       return None
-    self.get_elligible_file_pairs_for_rename()
-    # if self.mockFileList is present, do_renames() will return upfront and not execute
-    bool_confirm = self.show_renames_and_ask_confirmation()
-    # if self.mockFileList is present, do_renames() will return upfront and not execute
-    if bool_confirm:
-      n_of_renames = self.do_renames()
+    dot_ext = None if self.file_ext is None else self.get_target_dot_ext()
+    # as its former "Are you sure? (y/n)" prompt, [ENTER] does not confirm
+    results = rneng.run_renames(self.form_new_filename_or_none, os.path.abspath('.'), dot_ext, default_yes=False)
+    n_of_renames = sum(len(result.done) for result in results)
     print('n_of_renames =', n_of_renames)
     return n_of_renames
 
-  def get_elligible_file_pairs_for_rename(self):
-    """
-    Both
-      + process() without "mocking mode" (the mockFileList filled-in) and
-      + run_test_str_with_mockFileList() issue this method
-
-    In mock mode, the mockFileList will be used
-    In "folder mode", ie, in true-run mode, the current folder file listing will be used
+  def get_target_dot_ext(self):
+    return '.' + self.file_ext.lstrip('.')
 
-    :return:
+  def form_new_filename_or_none(self, original_filename, _context=None):
     """
-    if not self.mock_file_list:
-      files = os.listdir('.')
-      files.sort()
-    else:
-      files = self.mock_file_list[:]  # make a copy
-    self.rename_pairs = []  # reinitialize it to empty
-    new_name = None
-    for original_filename in files:
-      name, dot_ext = os.path.splitext(original_filename)
-      target_dot_ext = '.' + self.file_ext
-      if self.file_ext is not None and target_dot_ext != dot_ext:
-        continue  # this file is not to be renamed, it has a different extension
-      if self.pos_ini > len(name) - 1:
-        continue  # cannot rename this file, for pos_ini is beyond its size
-      if self.pos_ini + self.size <= len(name):
-        pos_fim = self.pos_ini + self.size
-      else:
-        pos_fim = len(name) - self.pos_ini + 1
-      if self.pos_ini > 0:
-        new_name = name[: self.pos_ini]
-        if pos_fim < len(name):
-          new_name += name[pos_fim:]
-      else:  # ie pos_ini == 0
-        if pos_fim < len(name):
-          new_name += name[pos_fim:]
-        else:
-          continue  # ie, the file will just be the same, so no need to rename it
-      new_filename = new_name
-      if self.file_ext is not None:
-        new_filename += target_dot_ext
-
-      self.rename_pairs.append((original_filename, new_filename))
-
-  def show_renames_and_ask_confirmation(self):
+    The name transform: the [pos_ini, pos_ini + size) chunk stripped off the name (the extension is kept)
     """
+    name, dot_ext = os.path.splitext(original_filename)
+    if self.file_ext is not None and self.get_target_dot_ext() != dot_ext:
+      return None  # this file is not to be renamed, it has a different extension
+    if self.pos_ini > len(name) - 1:
+      return None  # cannot rename this file, for pos_ini is beyond its size
+    if self.pos_ini + self.size <= len(name):
+      pos_fim = self.pos_ini + self.size
+    else:
+      pos_fim = len(name) - self.pos_ini + 1
+    new_name = name[: self.pos_ini]
+    if pos_fim < len(name):
+      new_name += name[pos_fim:]
+    if len(new_name) == 0:
+      return None
+    return new_name + dot_ext
 
-    :return: a boolean confirmation whether to rename files or not
-    """
-    if len(self.rename_pairs) == 0:
-      scrmsg = ('No files in folder are under the parameters for renames (pos_ini=%d, pos_fim=%d, file_ext=%s)' % 
-                (self.pos_ini, self.size, self.file_ext))
-      print(scrmsg)
-      return False
-    for i, pair in enumerate(self.rename_pairs):
-      original_filename, new_filename = pair
-      if not os.path.isfile(original_filename):
-        continue
-      n = i+1
-      phrase = 'renaming'
-      print(n, phrase, original_filename)
-      print('> to:', new_filename)
-    ans = input('Are you sure? (y/n) ')
-    if ans in ['y', 'Y']:
-      return True
-    return False
-
-  def do_renames(self):
+  def get_elligible_file_pairs_for_rename(self):
     """
+    Used by run_test_str_with_mock_file_list() (mock mode, the mockFileList is the listing)
 
-    :return: n_of_renames
+    :return:
     """
-    n_of_renames = 0
-    if len(self.mock_file_list) > 0:
-      return n_of_renames
-    if len(self.rename_pairs) == 0:
-      return n_of_renames
-    for i, pair in enumerate(self.rename_pairs):
-      original_filename, new_filename = pair
-      if not os.path.isfile(original_filename):
+    files = self.mock_file_list[:]  # make a copy
+    self.rename_pairs = []  # reinitialize it to empty
+    for original_filename in files:
+      new_filename = self.form_new_filename_or_none(original_filename)
+      if new_filename is None or new_filename == original_filename:
         continue
-      n = i+1
-      phrase = 'renamed'
-      print(n, n_of_renames + 1, phrase, original_filename)
-      print('> to:', new_filename)
-      os.rename(original_filename, new_filename)
-      n_of_renames += 1
-    return n_of_renames
+      self.rename_pairs.append((original_filename, new_filename))
 
   def run_test_str_with_mock_file_list(self):
     """
@@ -270,7 +215,7 @@ youtube-ids.txt*
   '''
   mock_file_list = str_files.split('\n')
   rename = Rename(3, 2, 'mp4', mock_file_list)
-  result_str = rename.run_test_str_with_mockFileList()
+  result_str = rename.run_test_str_with_mock_file_list()
   print(result_str)
 
 
@@ -26,113 +26,85 @@ Notice fn3 is not renamed (it does not match regexp "\[\w+\d*\]+")
 :: meaning: letters (at least one [+]) or numbers (zero or more [*]) within square brackets
 
 Obs: the additional parameter -y will rename without confirmation (take care when using this "auto" parameter, take even more care because regexp act sometimes not what we think they should!...)
+
+Since the rename engine (lblib/os/rename_engine.py), the regexes are applied to the name without its extension
+  (every match is removed), and there may be an ordered set of them, compiled once, each applied in turn:
+
+  -r="<regex>" :: removes the regex's matches (repeatable)
+  -sub="<regex> => <replacement>" :: substitutes (repeatable; the replacement may use \\1 etc)
+  -f=<patternsfile> :: one substitution per line, "<regex> => <replacement>" or "<regex>" (a removal),
+                       '#' lines are comments
+  -e=<ext> :: the extension (default mp4), -e=all for all files
+  -dw :: tree mode: the current folder and all its subfolders, each folder an independent task in a thread pool,
+         with a per-folder throughput report at the end
+  -j=<n> :: the number of threads in tree mode (default 8)
+  -q :: does not list each rename (for very large trees)
+  -y :: no confirmation (the run is journaled: renameUndo.py reverses it)
+
+Example (tree mode, two clean-ups in one pass):
+$ renameCleanRegExp.py -e=mp4 -r="\[\w+\d*\]+" -sub="\s{2,} =>  " -dw -y -q
 """
-import glob
 import os
 import re
 import sys
+import lblib.os.rename_engine as rneng
 
 
 DEFAULT_RENAME_EXTENSION = 'mp4'
+ALL_EXTENSIONS_ARG = 'all'
+DEFAULT_TREE_N_WORKERS = 8
 
 
 class Renamer:
   """
-  class Renamer:
+  class Renamer: gives the name transform (the ordered regex substitution set)
+    to the rename engine (lblib/os/rename_engine.py)
   """
-  def __init__(self, specified_restr, extension=None, autorename_without_confirmation=False, abspath=None):
+  def __init__(
+      self, substitution_set, extension=None, autorename_without_confirmation=False, abspath=None,
+      b_dirwalk=False, n_workers=DEFAULT_TREE_N_WORKERS, b_show_pairs=True,
+    ):
     """
 
-    :param specified_str:
-    :param extension:
+    :param substitution_set: a rneng.RegexSubstitutionSet (or a regex str, to be removed)
+    :param extension: None for the default one, ALL_EXTENSIONS_ARG for all files
     :param abspath:
     """
-    self.specified_restr = specified_restr
+    if isinstance(substitution_set, str):
+      restr = substitution_set
+      substitution_set = rneng.RegexSubstitutionSet()
+      substitution_set.add(restr)
+    self.substitution_set = substitution_set
     self.extension = extension
     if self.extension is None:
       self.extension = DEFAULT_RENAME_EXTENSION
+    elif self.extension == ALL_EXTENSIONS_ARG:
+      self.extension = None
     self.abspath = abspath
     if self.abspath is None or not os.path.isdir(self.abspath):
       self.abspath = os.path.abspath('.')
-    self.target_filenames = []
-    self.n_target_filenames = 0
-    self.rename_pairs = []
-    self.n_renames = 0
+    self.b_dirwalk = b_dirwalk
+    self.n_workers = n_workers if b_dirwalk else 1
+    self.b_show_pairs = b_show_pairs
+    self.results = []
     self.autorename_without_confirmation = autorename_without_confirmation
-    self.user_has_confirmed_interactively = False
-    # self.rename_process()
-
-  def prepare_for_rename(self):
-    """
-
-    :return:
-    """
-    print("Folder (from the command line, not yet implemented as a generic API) =>")
-    print(self.abspath)
-    print("Replace Reg Exp str =>", self.specified_restr)
-    for i, target_filename in enumerate(self.target_filenames):
-      re_match_o = re.search(self.specified_restr, target_filename)
-      print('Trying to match', self.specified_restr, 'in', target_filename)
-      if re_match_o is None:
-        continue
-      remove_str = re_match_o.group(0)
-      if len(remove_str) > 0:
-        newname = target_filename.replace(remove_str, '')
-        if os.path.isfile(newname):
-          continue
-        rename_pair = (target_filename, newname)
-        self.rename_pairs.append(rename_pair)
-        seq = i + 1
-        print(seq, ' => Rename:')
-        print('FROM:', target_filename)
-        print('TO:  ', newname)
-
-  def confirm_the_renames_if_any(self):
-    self.user_has_confirmed_interactively = False
-    if len(self.rename_pairs) == 0:
-      return
-    screen_msg = 'Rename the %d files shown above (*Y/n) ? ' % len(self.rename_pairs)
-    ans = input(screen_msg)
-    if ans in ['Y', 'y', '']:
-      self.user_has_confirmed_interactively = True
-
-  def do_rename(self):
-    """
-
-    :return:
-    """
-    if len(self.rename_pairs) == 0:
-      print('No files to rename.')
-      return
-    self.n_renames = 0
-    for i, rename_pair in enumerate(self.rename_pairs):
-      target_filename = rename_pair[0]
-      new_namefile = rename_pair[1]
-      if not os.path.isfile(target_filename):
-        continue
-      if os.path.isfile(new_namefile):
-        continue
-      self.n_renames += 1
-      print('FROM =>', target_filename)
-      print('TO   =>', new_namefile)
-      os.rename(target_filename, new_namefile)
 
   def rename_process(self):
     """
 
     :return:
     """
-    os.chdir(self.abspath)
-    self.target_filenames = glob.glob('*.' + self.extension)
-    print('total files:', len(self.target_filenames))
-    self.prepare_for_rename()
+    print("Folder =>", self.abspath, '(and its subfolders)' if self.b_dirwalk else '')
+    print("Reg Exp substitutions =>", self.substitution_set)
     print('autorename_without_confirmation', self.autorename_without_confirmation)
-    if self.autorename_without_confirmation:
-      self.do_rename()
-    else:
-      self.confirm_the_renames_if_any()
-      if self.user_has_confirmed_interactively:
-        self.do_rename()
+    self.results = rneng.run_renames(
+      self.substitution_set, self.abspath, self.extension,
+      b_recursive=self.b_dirwalk,
+      b_autoconfirm=self.autorename_without_confirmation,
+      n_workers=self.n_workers,
+      b_show_pairs=self.b_show_pairs,
+      b_report_throughput=self.b_dirwalk,
+    )
     self.show_numbers()
 
   def show_numbers(self):
@@ -140,40 +112,60 @@ class Renamer:
 
     :return:
     """
-    print('Number of rename pairs:', len(self.rename_pairs))
-    print('Number of renamed:',      self.n_renames)
-
-
-def get_str_arg():
-  specified_restr = None
-  autorename_without_confirmation = False
-  ext = None
-  for arg in sys.argv:
-    if arg.startswith('--help'):
-      print(__doc__)
-      sys.exit(0)
-    elif arg.startswith('-r='):
-      specified_restr = arg[len('-r='):]
-    elif arg.startswith('-e='):
-      ext = arg[len('-e='):]
-    elif arg in ['-Y', '-y']:
-      autorename_without_confirmation = True
-  if specified_restr is None:
+    print('Number of rename pairs:', sum(len(result.plan.pairs) for result in self.results))
+    print('Number of renamed:',      sum(len(result.done) for result in self.results))
+
+
+def get_args() -> dict:
+  args = {
+    'substitution_set': rneng.RegexSubstitutionSet(), 'extension': None,
+    'autorename_without_confirmation': False, 'b_dirwalk': False,
+    'n_workers': DEFAULT_TREE_N_WORKERS, 'b_show_pairs': True,
+  }
+  subset = args['substitution_set']
+  try:
+    for arg in sys.argv[1:]:
+      if arg.startswith('--help'):
+        print(__doc__)
+        sys.exit(0)
+      elif arg.startswith('-r='):
+        subset.add(arg[len('-r='):])
+      elif arg.startswith('-sub='):
+        pattern, sep, replacement = arg[len('-sub='):].partition(' => ')
+        subset.add(pattern, replacement if sep else '')
+      elif arg.startswith('-f='):
+        with open(arg[len('-f='):], encoding='utf-8') as f:
+          subset.add_lines(f)
+      elif arg.startswith('-e='):
+        args['extension'] = arg[len('-e='):]
+      elif arg.startswith('-j='):
+        args['n_workers'] = max(1, int(arg[len('-j='):]))
+      elif arg == '-dw':
+        args['b_dirwalk'] = True
+      elif arg == '-q':
+        args['b_show_pairs'] = False
+      elif arg in ['-Y', '-y']:
+        args['autorename_without_confirmation'] = True
+  except re.error as e:
+    error_msg = f'Bad regexp: {e}. Program cannot continue.'
+    raise ValueError(error_msg)
+  if len(subset) == 0:
     print(__doc__)
-    error_msg = 'specified_str is missing. Program cannot continue.'
+    error_msg = 'No regexp given (-r=, -sub= or -f=). Program cannot continue.'
     raise ValueError(error_msg)
-  return specified_restr, ext, autorename_without_confirmation
+  return args
 
 
 def process():
-  specified_restr, extension, autorename_without_confirmation = get_str_arg()
+  args = get_args()
   print(
     'Input parameters:',
-    'specified_restr [', specified_restr, ']',
-    '| extension [', extension, ']',
-    '| autorename', autorename_without_confirmation
+    'substitutions [', args['substitution_set'], ']',
+    '| extension [', args['extension'], ']',
+    '| autorename', args['autorename_without_confirmation'],
+    '| tree mode', args['b_dirwalk'],
   )
-  renamer = Renamer(specified_restr, extension, autorename_without_confirmation)
+  renamer = Renamer(**args)
   renamer.rename_process()
 
 
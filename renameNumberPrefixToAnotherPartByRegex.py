@@ -6,12 +6,16 @@ Renames the number prefix in files in a folder
   replacing these numbers with another part in file that is captured by a certain regex
 At the time of writing, the captured regex is a number within parentheses and its last 3 digits are discarded.
   TODO improve this captured regex so that it can be input from the CLI parameters
+
+The renames go through the rename engine (lblib/os/rename_engine.py, journaled: renameUndo.py reverses a run);
+  with --tree, the whole dirtree under --rundir is processed, each folder an independent task in a thread pool
+  (--workers), with a per-folder throughput report at the end
 """
 import argparse
-import glob
 import os
 import re
 import sys
+import lblib.os.rename_engine as rneng
 # the regex contains an arbitrary first piece ".+?", then a gap "[ ]", then any numbers within parentheses "\((\d+?)\)"
 # which also makes up a group (group(1)), then a hyphen "\-", then an arbitrary last piece ".+?"
 # example: "bla foo bar (9812453452524352)- bla foo bar"
@@ -32,17 +36,24 @@ parser.add_argument("--rundir", type=str, default=".",
                     help="Directory in which this script willl execute, default to current dir.")
 parser.add_argument("--ext", type=str, default=DEFAULT_FILE_EXTENSION,
                     help="Directory in which this script willl execute, default to current dir.")
+parser.add_argument("--tree", action="store_true",
+                    help="process rundir and all its subdirectories")
+parser.add_argument("--workers", type=int, default=8,
+                    help="number of threads (folders processed at a time) in tree mode, default 8")
+parser.add_argument("-y", action="store_true",
+                    help="rename without the confirmation prompt")
 args = parser.parse_args()
 
 
 class Renamer:
 
-  def __init__(self, basedir_abspath=None, dot_ext=None):
+  def __init__(self, basedir_abspath=None, dot_ext=None, b_tree=False, n_workers=1, b_autoconfirm=False):
     self.basedir_abspath = basedir_abspath
     self.dot_ext = dot_ext or DEFAULT_FILE_EXTENSION  # it will get a prepended dot if missing
-    self.filenames = []
-    self.rename_pairs = []
-    self.renaming_confirmed = False
+    self.b_tree = b_tree
+    self.n_workers = n_workers if b_tree else 1
+    self.b_autoconfirm = b_autoconfirm
+    self.results = []
     self.n_renamed = 0
     self.treat_attrs()
 
@@ -52,78 +63,44 @@ class Renamer:
     if not self.dot_ext.startswith('.'):
       self.dot_ext = '.' + self.dot_ext
 
-  def find_dot_ext_files_in_folder(self):
-    files = glob.glob(self.basedir_abspath + '/*' + self.dot_ext)
-    self.filenames = list(map(lambda p: os.path.split(p)[1], files))
-
-  def form_rename_pairs(self):
-    self.find_dot_ext_files_in_folder()
-    total = len(self.filenames)
-    for i, filename in enumerate(self.filenames):
-      match = beginning_regex_cmp.match(filename)
-      if not match:
-        continue
-      # actually, it's not needed to form the new-name, but might be used to check filename starts with a 3-digit number
-      first_number = match.group(1)
-      match = middle_regex_cmp.match(filename)
-      if not match:
-        continue
-      middle_number = match.group(1)
-      # middle_number = middle_number.rstrip(rightstrip_from_middle_number)
-      middle_number = middle_number[: -number_of_rightsided_fixed_digits_to_stripout]
-      # check if they are equal, if so, don't go on, loop-continue
-      try:
-        first = int(first_number)
-        middle = int(middle_number)
-        if first == middle:
-          #  they are equal, nothing to do
-          continue
-        # reconstitute middle_number with zfill equals to the rightsided_fixed_digits
-        middle_number = str(middle).zfill(number_of_rightsided_fixed_digits_to_stripout)
-      except ValueError:
-        continue
-      newname = middle_number + ' ' + filename[4:]
-      if filename == newname:
-        continue
-      rename_pair = (filename, newname)
-      seq = i + 1
-      scrmsg = f"""{seq}/{total} Renames:"
-      FROM [{filename}]
-      TO   [{newname}]
-      """
-      print(scrmsg)
-      self.rename_pairs.append(rename_pair)
-
-  def confirm_renames(self):
-    self.renaming_confirmed = False
-    scrmsg = f" Confirm the {len(self.rename_pairs)} renames above ? [Y, n] [ENTER] means Yes "
-    ans = input(scrmsg)
-    if ans in ['Y', 'y', '']:
-      self.renaming_confirmed = True
-
-  def do_rename(self):
-    if not self.renaming_confirmed:
-      print('No renames. Returning.')
-      return
-    for rename_pair in self.rename_pairs:
-      filename, newname = rename_pair
-      print('rename_pair', rename_pair)
-      oldfilepath = os.path.join(self.basedir_abspath, filename)
-      newfilepath = os.path.join(self.basedir_abspath, newname)
-      if not os.path.isfile(oldfilepath):
-        continue
-      if os.path.isfile(newfilepath):
-        continue
-      os.rename(oldfilepath, newfilepath)
-      print('renamed!')
-      self.n_renamed += 1
+  @staticmethod
+  def form_new_filename_or_none(filename, _context=None):
+    match = beginning_regex_cmp.match(filename)
+    if not match:
+      return None
+    # actually, it's not needed to form the new-name, but might be used to check filename starts with a 3-digit number
+    first_number = match.group(1)
+    match = middle_regex_cmp.match(filename)
+    if not match:
+      return None
+    middle_number = match.group(1)
+    # middle_number = middle_number.rstrip(rightstrip_from_middle_number)
+    middle_number = middle_number[: -number_of_rightsided_fixed_digits_to_stripout]
+    # check if they are equal, if so, don't go on, loop-continue
+    try:
+      first = int(first_number)
+      middle = int(middle_number)
+      if first == middle:
+        #  they are equal, nothing to do
+        return None
+      # reconstitute middle_number with zfill equals to the rightsided_fixed_digits
+      middle_number = str(middle).zfill(number_of_rightsided_fixed_digits_to_stripout)
+    except ValueError:
+      return None
+    newname = middle_number + ' ' + filename[4:]
+    if filename == newname:
+      return None
+    return newname
 
   def process(self):
     print('Process Renaming')
     print('='*40)
-    self.form_rename_pairs()
-    self.confirm_renames()
-    self.do_rename()
+    self.results = rneng.run_renames(
+      self.form_new_filename_or_none, self.basedir_abspath, self.dot_ext,
+      b_recursive=self.b_tree, b_autoconfirm=self.b_autoconfirm, n_workers=self.n_workers,
+      b_report_throughput=self.b_tree,
+    )
+    self.n_renamed = sum(len(result.done) for result in self.results)
 
 
 def show_docstrhelp_n_exit():
@@ -133,13 +110,10 @@ def show_docstrhelp_n_exit():
 
 def get_cli_args():
   """
-  Required parameters:
-    src_rootdir_abspath & trg_rootdir_abspath
-
-  Optional parameter:
-    resolution_tuple
+  Optional parameters (argparse above):
+    --rundir, --ext, --tree, --workers & -y
 
-  :return: srctree_abspath, trg_rootdir_abspath, resolution_tuple
+  :return: rundir, dot_ext, b_tree, n_workers, b_autoconfirm
   """
   if args.docstr:
     show_docstrhelp_n_exit()
@@ -147,7 +121,7 @@ def get_cli_args():
   dot_ext = args.ext  # if not given, it defaults to "mp4" or DEFAULT_FILE_EXTENSION
   if not dot_ext.startswith('.'):
     dot_ext = '.' + dot_ext
-  return rundir, dot_ext
+  return rundir, dot_ext, args.tree, max(1, args.workers), args.y
 
 
 def confirm_cli_args_with_user(ytids, dirpath, videoonlycode, audioonlycodes, nvdseq):
@@ -208,10 +182,13 @@ def adhoctest1():
 
 
 def process():
-  rundir, dot_ext = get_cli_args()
+  rundir, dot_ext, b_tree, n_workers, b_autoconfirm = get_cli_args()
   renamer = Renamer(
     basedir_abspath=rundir,
-    dot_ext=dot_ext
+    dot_ext=dot_ext,
+    b_tree=b_tree,
+    n_workers=n_workers,
+    b_autoconfirm=b_autoconfirm,
   )
   renamer.process()
 
@@ -13,12 +13,12 @@ Running this script and confirming the operation, the (renamed) new names will b
   "1 F1 file foo bar.mp4"
   "2 F2 file bar foo.mp4"
 
-CAUTION AGAIN:
-  this operation, if confirmed, can not be undone, so, if possible, make a back-up before running it.
+The renames go through the rename engine (lblib/os/rename_engine.py), which writes an undo journal:
+  renameUndo.py (run in the same folder, it takes the latest journal) renames the files back.
 """
-import math
 import os
 import sys
+import lblib.os.rename_engine as rneng
 DEFAULT_DOT_EXTENSION = '.mp4'
 
 
@@ -71,8 +71,7 @@ class Renamer:
   def __init__(self, ext_for_rename=None, dir_abspath=None):
     """
     """
-    self.is_renames_confirmed = False
-    self.rename_pairs = []
+    self.results = []
     if ext_for_rename is None:
       self.extension = DEFAULT_DOT_EXTENSION
     else:
@@ -83,69 +82,13 @@ class Renamer:
     else:
       self.dir_abspath = dir_abspath
 
-  def find_files_from_current_folder(self):
-    self.rename_pairs = []
-    files = os.listdir(self.dir_abspath)
-    filenames = return_only_filenames_under_ext(files, self.dir_abspath, self.extension)
-    total_files = len(filenames)
-    if total_files < 1:
-      print('No files to rename.')
-      return
-    zfill_size = int(math.log(total_files, 10) + 1)
-    self.rename_pairs = []
-    for i, ip_filename in enumerate(filenames):
-      seq = i + 1
-      seqstr = str(seq).zfill(zfill_size)
-      op_filename = f"{seqstr} {ip_filename}"
-      rename_pair = ip_filename, op_filename
-      self.rename_pairs.append(rename_pair)
-
-  def confirm_renames(self):
-    self.is_renames_confirmed = False
-    if len(self.rename_pairs) == 0:
-      print('No files to rename.')
-      return
-    for i, rename_pair in enumerate(self.rename_pairs):
-      seq = i + 1
-      print(seq, 'Rename:')
-      old_name, new_name = rename_pair
-      print('FROM: >>>%s' % old_name)
-      print('TO:   >>>%s' % new_name)
-    screen_msg = 'Confirm the %d renames above ? (*Y/n) ([ENTER] means Yes) ' % len(self.rename_pairs)
-    ans = input(screen_msg)
-    if ans in ['Y', 'y', '']:
-      self.is_renames_confirmed = True
-      return
-
-  def do_renames(self):
-    if not self.is_renames_confirmed:
-      print('Renames not confirmed.')
-      return
-    print('-'*40)
-    n_renamed = 0
-    for i, rename_pair in enumerate(self.rename_pairs):
-      old_filename, new_filename = rename_pair
-      old_file_absfile = os.path.join(self.dir_abspath, old_filename)
-      new_file_absfile = os.path.join(self.dir_abspath, new_filename)
-      if not os.path.isfile(old_file_absfile):
-        continue
-      if os.path.isfile(new_file_absfile):
-        continue
-      seq = i + 1
-      print(seq, 'Rename:')
-      print('FROM: >>>%s' % old_filename)
-      print('TO:   >>>%s' % new_filename)
-      os.rename(old_file_absfile, new_file_absfile)
-      n_renamed += 1
-    print('-'*40)
-    print('Finished %d rename pairs.' % len(self.rename_pairs))
-    print('Total renamed:', n_renamed)
+  @staticmethod
+  def form_new_filename(filename, context):
+    seqstr = str(context.seq).zfill(context.zfill_size)
+    return f"{seqstr} {filename}"
 
   def process_rename(self):
-    self.find_files_from_current_folder()
-    self.confirm_renames()
-    if self.is_renames_confirmed:
-      self.do_renames()
+    self.results = rneng.run_renames(self.form_new_filename, self.dir_abspath, self.extension)
 
 
 def get_argdict():
@@ -9,7 +9,7 @@
 
   Its application envisages folders, not files. See other scripts here (in this folder) for file-renaming.
 
-Usage: <this_script> -s1="<string1>" -s2="<string2>" [-as_endswith] [-dirwalk] [-basedir="<workdir>"]
+Usage: <this_script> -s1="<string1>" -s2="<string2>" [-as_endswith] [-dirwalk] [-basedir="<workdir>"] [-j=<n>] [-y]
 
 Parameters:
   -s1="<string1>" | the from-string
@@ -17,6 +17,13 @@ Parameters:
   -as_endswith | if set, s1 will be searched at the end of foldername
   -dirwalk | if set, all up-directories (up meaning cd'ing inside recursely into subdirectories) will be processed
   -basedir="<target_directory>" | the working directory, if None, it defaults to the current working directory
+  -j=<n> | with -dirwalk, the number of threads (folders processed at a time), default 8
+  -y | renames without the confirmation prompt
+
+The renames go through the rename engine (lblib/os/rename_engine.py): s1 => s2 is a compiled regex substitution,
+  the tree is listed in one pass, each folder is an independent task in a thread pool,
+  the levels are renamed the deepest first (so a folder is renamed after its subfolders),
+  and the run is journaled (renameUndo.py reverses it).
 
 Examples:
 
@@ -34,151 +41,55 @@ As above but adding recursive cd'ing processing (i.e. the current directory and
 Similar to the one above, adding also parameter -basedir for the current working directory.
 """
 import os
+import re
 import sys
+import lblib.os.rename_engine as rneng
+DEFAULT_DIRWALK_N_WORKERS = 8
 
 
 class Renamer:
 
-  def __init__(self, s1, s2, as_endswith=False, dirwalk=False, base_absdir=None, autoconfirmed=False):
+  def __init__(
+      self, s1, s2, as_endswith=False, dirwalk=False, base_absdir=None, autoconfirmed=False,
+      n_workers=DEFAULT_DIRWALK_N_WORKERS,
+    ):
     self.n_renamed = 0
-    self.rename_pairs = []
-    self.curr_absdir = None
-    self.rule40 = '-' * 40
+    self.results = []
     self.s1 = s1
     self.s2 = s2
     self.as_endswith = as_endswith
     self.dirwalk = dirwalk
     self.base_absdir = base_absdir
-    self.autoconfirmed = autoconfirmed  # has not been implemented yet, it'd work as a pre-confirmed renaming
-    self.user_confirmed = False
-    self.treat_basedir()
+    self.autoconfirmed = autoconfirmed
+    self.n_workers = n_workers if dirwalk else 1
+    self.substitution_set = rneng.RegexSubstitutionSet(b_keep_ext=False)
+    self.treat_params()
 
-  def treat_basedir(self):
+  def treat_params(self):
     if self.base_absdir is None or not os.path.isdir(self.base_absdir):
       self.base_absdir = os.path.abspath('.')
-
-  def do_rename(self):
-    """
-    Renames here are approached in the tradicional way with os.rename()
-
-    Two other approaches are:
-      1 pathlib.Path.rename()
-        This one has an object-oriented approach, example:
-          oldfolder = Path(oldpath)
-          newfolder = Path(newpath)
-          oldfoder.rename(newfolder)
-      2 shutil.move()
-        It has the same procedural approach of os.rename()
-        It works across filesystems, but this script is supposed to only rename (not exactly move across filesystems)
-    """
-    if not self.user_confirmed:
-      print('No renamings or not confirmed. Returning.')
-      return False
-    self.n_renamed = 0
-    total_to_rename = len(self.rename_pairs)
-    for i, rename_pair in enumerate(self.rename_pairs):
-      seq = i + 1
-      scrmsg = f"{seq}/{total_to_rename} renaming | {self.n_renamed} renamed"
-      print(scrmsg)
-      print(self.rule40)
-      # from_abspath
-      from_abspath = rename_pair[0]
-      scrmsg = f"\tfrom: [{from_abspath}]"
-      print(scrmsg)
-      # from_abspath
-      to_abspath = rename_pair[1]
-      scrmsg = f"\tto:   [{to_abspath}]"
-      print(scrmsg)
-      print(self.rule40)
-      os.rename(from_abspath, to_abspath)
-      self.n_renamed += 1
-    print('total renames:', self.n_renamed)
-    return True
-
-  def confirm_renames(self):
+    if not self.s1:
+      error_msg = 's1 is missing, please enter it with the -s1=<string> parameter'
+      raise ValueError(error_msg)
+    pattern = re.escape(self.s1) + ('$' if self.as_endswith else '')
+    # the replacement is literal (a backslash in s2 is not a group reference)
+    self.substitution_set.add(pattern, (self.s2 or '').replace('\\', '\\\\'))
+
+  def form_new_foldername_or_none(self, name, context):
     """
-    The user, if autoconfirm is False, is asked for confirmation.
-    """
-    if self.autoconfirmed:
-      self.user_confirmed = True
-      return
-    self.user_confirmed = False
-    total_to_rename = len(self.rename_pairs)
-    for i, rename_pair in enumerate(self.rename_pairs):
-      seq = i + 1
-      from_abspath = rename_pair[0]
-      to_abspath = rename_pair[1]
-      scrmsg = f"{seq}/{total_to_rename} pair to rename"
-      print(scrmsg)
-      print(self.rule40)
-      scrmsg = f"\tfrom: [{from_abspath}]"
-      print(scrmsg)
-      scrmsg = f"\tto:   [{to_abspath}]"
-      print(scrmsg)
-      print(self.rule40)
-    scrmsg = f"Confirm the {len(self.rename_pairs)} renames above? (*Y/n) [ENTER] means Yes."
-    ans = input(scrmsg)
-    if ans in ['', 'Y', 'y']:
-      self.user_confirmed = True
-    return
-
-  def invert_rename_queue(self):
-    """
-    The rename queue must be inverted (order-reversed) because 'outter' subdirectories must be renamed first,
-      or, in other words, renaming should 'happen' downward. The following example make this clear:
-
-    Suppose the renames are:
-      ("basedir/Science au+vi", "basedir/Science au"),
-      ("basedir/Science au+vi/Physics au+vi", "basedir/Science au/Physics au"),
-      ("basedir/Science au+vi/Physics au+vi/Quantum au+vi", "basedir/Science au/Physics au/Quantum au"),
-
-    If the above list is processing from first to last,
-      the second rename will have a source-directory (rename-from) that does no longer exist, ie:
-
-        -> after 1st rename: "basedir/Science au+vi" became "basedir/Science au"
-
-      at the moment the second rename will happen, it will search for "basedir/Science au+vi/Physics au+vi",
-        but, the middle foldername no longer exists, because it was renamed to "basedir/Science au/Physics au+vi"
-
-    Then, one solution (perhaps the simplest) is to invert (order-reverse) the renaming list.
-    """
-    self.rename_pairs.reverse()
-
-  def gather_folders(self, foldernames):
-    """
-    self.as_endswith = as_endswith
-    """
-    for foldername in foldernames:
-      found = False
-      if self.as_endswith:
-        if foldername.endswith(self.s1):
-          found = True
-      else:
-        if foldername.find(self.s1) > -1:
-          found = True
-      if not found:
-        continue
-      new_foldername = foldername.replace(self.s1, self.s2)
-      from_abspath = os.path.join(self.curr_absdir, foldername)
-      to_abspath = os.path.join(self.curr_absdir, new_foldername)
-      rename_pair = (from_abspath, to_abspath)
-      self.rename_pairs.append(rename_pair)
-
-  def walkup_dirs(self):
-    """
-    self.dirwalk = dirwalk
+    Only folders are renamed (files are left as they are)
     """
-    for self.curr_absdir, foldernames, _ in os.walk(self.base_absdir):
-      self.gather_folders(foldernames)
-      if not self.dirwalk:
-        # if not dirwalk, the current directory has already been gathered, do not loop on
-        break
+    if not context.b_is_dir:
+      return None
+    return self.substitution_set(name, context)
 
   def process(self):
-    self.walkup_dirs()
-    self.invert_rename_queue()
-    self.confirm_renames()
-    self.do_rename()
+    self.results = rneng.run_renames(
+      self.form_new_foldername_or_none, self.base_absdir,
+      b_recursive=self.dirwalk, b_autoconfirm=self.autoconfirmed, n_workers=self.n_workers,
+      b_include_dirs=True, b_report_throughput=self.dirwalk,
+    )
+    self.n_renamed = sum(len(result.done) for result in self.results)
 
 
 def get_args():
@@ -187,6 +98,7 @@ def get_args():
   But, for the time being, this approach seems fine.
   """
   s1, s2, as_endswith, dirwalk, basedir = None, None, False, False, None
+  autoconfirmed, n_workers = False, DEFAULT_DIRWALK_N_WORKERS
   for arg in sys.argv:
     if arg.startswith('-h') or arg.startswith('--help'):
       print(__doc__)
@@ -201,7 +113,14 @@ def get_args():
       dirwalk = True
     elif arg.startswith('-basedir'):
       basedir = arg[len('-basedir='):]
-  args_dict = {'s1': s1, 's2': s2, 'as_endswith': as_endswith, 'dirwalk': dirwalk, 'basedir': basedir}
+    elif arg.startswith('-j='):
+      n_workers = max(1, int(arg[len('-j='):]))
+    elif arg in ['-y', '-Y']:
+      autoconfirmed = True
+  args_dict = {
+    's1': s1, 's2': s2, 'as_endswith': as_endswith, 'dirwalk': dirwalk, 'basedir': basedir,
+    'autoconfirmed': autoconfirmed, 'n_workers': n_workers,
+  }
   return args_dict
 
 
@@ -215,7 +134,7 @@ def process():
   s1, s2, as_endswith, dirwalk, basedir = ad['s1'], ad['s2'], ad['as_endswith'], ad['dirwalk'], ad['basedir']
   scrmsg = f"s1={s1} | s2={s2} | as_endswith={as_endswith} | dirwalk={dirwalk} | basedir={basedir}"
   print(scrmsg)
-  renamer = Renamer(s1, s2, as_endswith, dirwalk, basedir)
+  renamer = Renamer(s1, s2, as_endswith, dirwalk, basedir, ad['autoconfirmed'], ad['n_workers'])
   renamer.process()
 
 
@@ -19,6 +19,7 @@ Example:
 """
 import os
 import sys
+import lblib.os.rename_engine as rneng
 DEFAULT_DOTEXTENSION = '.pdf'
 
 
@@ -31,10 +32,12 @@ def include_dot_in_extension_if_needed(ext):
 
 
 class Renamer:
+	"""
+	Gives the name transform (name + includestr + extension) to the rename engine (lblib/os/rename_engine.py)
+	"""
 
 	def __init__(self, includestr=None, dotextension=None, dir_abspath=None):
-		self.rename_pairs = []
-		self.confirmed = False
+		self.results = []
 		# params
 		self.includestr = None
 		self.dotextension = None
@@ -54,61 +57,21 @@ class Renamer:
 		else:
 			self.dotextension = include_dot_in_extension_if_needed(dotextension)
 		# param dir_abspath
-		if dir_abspath is None or os.path.isdir(dir_abspath):
+		if dir_abspath is None or not os.path.isdir(dir_abspath):
 			self.dir_abspath = os.path.abspath('.')
 		else:
-			self.dir_abspath = dir_abspath
-
-	def prep_rename(self):
-		self.rename_pairs = []
-		filenames = os.listdir(self.dir_abspath)
-		filenames = list(filter(lambda f: f.endswith(self.dotextension), filenames))
-		filenames.sort()
-		for i, fn in enumerate(filenames):
-			newname, _ = os.path.splitext(fn)
-			newname += self.includestr
-			new_filename = newname + self.dotextension
-			rename_pair = (fn, new_filename)
-			seq = i + 1
-			print(seq, 'renaming')
-			print('FROM: ' + fn)
-			print('TO:   ' + new_filename)
-			self.rename_pairs.append(rename_pair)
-
-	def confirm_rename(self):
-		self.confirmed = False
-		total_torename = len(self.rename_pairs)
-		screen_msg = 'Confirm the %d renames above (Y*/n) [ENTER] means yes ' \
-			% total_torename
-		ans = input(screen_msg)
-		if ans in ['Y', 'y', '']:
-			self.confirmed = True
-
-	def do_rename(self):
-		n_renamed = 0
-		if self.confirmed:
-			for i, rename_pair in enumerate(self.rename_pairs):
-				fn, new_filename = rename_pair
-				seq = i + 1
-				print(seq, 'renaming')
-				print('FROM: ' + fn)
-				print('TO:   ' + new_filename)
-				os.rename(fn, new_filename)
-				n_renamed += 1
-		screenline = 'Total files = ' + str(len(self.rename_pairs))
-		if n_renamed == 0:
-			print(screenline + ' :: No files renamed')
-		else:
-			print(screenline + ' :: Total files renamed =', n_renamed)
+			self.dir_abspath = os.path.abspath(dir_abspath)
+
+	def form_new_filename(self, filename, _context=None):
+		newname, _ = os.path.splitext(filename)
+		return newname + self.includestr + self.dotextension
 
 	def process_rename(self):
-		self.prep_rename()
-		self.confirm_rename()
-		self.do_rename()
+		self.results = rneng.run_renames(self.form_new_filename, self.dir_abspath, self.dotextension)
 
 
 def get_args():
-	dictargs = {'dotextension': None, 'includestr': None}
+	dictargs = {'dotextension': None, 'includestr': None, 'dir_abspath': None}
 	for arg in sys.argv:
 		if arg.startswith('-e='):
 			dotextension = arg[len('-e='):]
@@ -117,6 +80,8 @@ def get_args():
 		elif arg.startswith('-i='):
 			includestr = arg[len('-i='):]
 			dictargs['includestr'] = includestr
+		elif arg.startswith('-p='):
+			dictargs['dir_abspath'] = arg[len('-p='):]
 	return dictargs
 
 
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+~/bin/renameUndo.py
+  Reverses a whole rename run, or resumes (completes) an interrupted one,
+    from the journal every rename run leaves in its folder
+    (the hidden file ".renamejournal-<runid>.jsonl", see lblib/os/rename_journal.py)
+
+  Each file is found by its inode under its old, temporary or new name, so the undo (or the resume)
+    is right however far the run had got (a crash, a kill, a power cut) and takes a single two-phase pass;
+    an undo (or a resume) is itself journaled, so it can be undone in its turn
+    (undoing an undo redoes the rename run; undoing a resume undoes the whole rename run).
+
+Usage:
+  renameUndo.py [<journalfile>] [-p=<folder>] [--resume] [--list] [-y]
+
+Where:
+  <journalfile> [optional] the journal of the run to reverse (default: the latest one in the folder)
+  -p=<folder> [optional] the folder where the journals are looked for (default: the current one)
+  --resume [optional] completes the run instead of reversing it
+  --list [optional] lists the folder's journals (with where their files are now) and exits
+  -y [optional] no confirmation prompt
+
+Examples:
+  1) $renameUndo.py
+    reverses the latest rename run in the current folder (after confirmation)
+  2) $renameUndo.py --resume -y
+    completes the latest (interrupted) rename run in the current folder without a prompt
+"""
+import os
+import sys
+import lblib.os.rename_engine as rneng
+import lblib.os.rename_journal as rnjournal
+
+
+def get_args() -> dict:
+  args = {'journalpath': None, 'dirpath': '.', 'b_resume': False, 'b_list': False, 'b_autoconfirm': False}
+  for arg in sys.argv[1:]:
+    if arg in ['-h', '--help']:
+      print(__doc__)
+      sys.exit(0)
+    elif arg.startswith('-p='):
+      args['dirpath'] = arg[len('-p='):]
+    elif arg == '--resume':
+      args['b_resume'] = True
+    elif arg == '--list':
+      args['b_list'] = True
+    elif arg in ['-y', '-Y']:
+      args['b_autoconfirm'] = True
+    elif not arg.startswith('-'):
+      args['journalpath'] = arg
+  return args
+
+
+def list_journals(dirpath):
+  journalpaths = rnjournal.list_journals(dirpath)
+  if len(journalpaths) == 0:
+    print('No rename journals in folder', os.path.abspath(dirpath))
+  for seq, journalpath in enumerate(journalpaths, start=1):
+    run = rnjournal.read_journal(journalpath)
+    counts = rnjournal.count_locations(run)
+    print(seq, run, '| files now at:', ' '.join(f"{at}={n}" for at, n in counts.items()))
+    print('   ', os.path.basename(journalpath))
+
+
+def process():
+  args = get_args()
+  if args['b_list']:
+    list_journals(args['dirpath'])
+    return
+  journalpath = args['journalpath']
+  if journalpath is None:
+    journalpaths = rnjournal.list_journals(args['dirpath'])
+    if len(journalpaths) == 0:
+      print('No rename journals in folder', os.path.abspath(args['dirpath']))
+      return
+    journalpath = journalpaths[-1]
+  print('Journal:', journalpath)
+  print(rnjournal.read_journal(journalpath))
+  run, b_resume = rneng.resolve_origin_run(journalpath, args['b_resume'])
+  if run.journalpath != journalpath:
+    print('=> acting on its rename run:', run, '| to', 'resume' if b_resume else 'undo')
+  plans, n_missing = rneng.plan_recovery(run, b_resume)
+  rneng.print_plans(plans, b_show_dirpath=True)
+  if n_missing > 0:
+    print(n_missing, 'files of the run are under none of their names (moved, deleted or renamed since)')
+  if sum(len(plan.pairs) for plan in plans) == 0:
+    print('Nothing to', 'resume.' if b_resume else 'undo.')
+    return
+  if not args['b_autoconfirm'] and not rneng.confirm_plans(plans, default_yes=False):
+    print('Not confirmed.')
+    return
+  results, _, journal = rneng.recover_run(journalpath, args['b_resume'])
+  rneng.print_results(results, journal)
+
+
+if __name__ == '__main__':
+  process()
@@ -8,12 +8,14 @@
     (whose default filename is also given below)
 
 Usage:
-  $renameWithNewNameListingFileAndExt.py [-e=<fileextension>] [-n="<textfilename>"] [-w="<workdir_abspath>"]
+  $renameWithNewNameListingFileAndExt.py [-e=<fileextension>] [-n="<textfilename>"] [-w="<workdir_abspath>"] [-y]
 
 Where:
   fileextension => the desired file extension for the files to be renamed (eg '.txt')
   textfilename => the filename that contains the new names for the files to be renamed
   workdir_abspath => the directory where the renaming is to be processed
+  -y => renames without the confirmation prompt (the run is journaled: renameUndo.py reverses it,
+    or completes it, with --resume, if it was interrupted)
 
 Example:
 
@@ -39,6 +41,7 @@ Some historical notes:
 """
 import os
 import sys
+import lblib.os.rename_engine as rneng
 DEFAULT_EXT = 'mp4'
 DEFAULT_NEW_NAME_LISTING_FILE = 'course-titles.txt'
 
@@ -55,10 +58,13 @@ class InputArguments:
   def __init__(self):
     self.should_be_ext = DEFAULT_EXT
     self.new_name_listing_file = DEFAULT_NEW_NAME_LISTING_FILE
+    self.b_autoconfirm = False
     for arg in sys.argv:
       if arg.startswith('-h') or arg.startswith('--help'):
-        print(__dict__)
+        print(__doc__)
         sys.exit(0)
+      elif arg in ['-y', '-Y']:
+        self.b_autoconfirm = True
       elif arg.startswith('-e='):
         self.should_be_ext = arg[len('-e='):]
       elif arg.startswith('-n='):
@@ -69,13 +75,11 @@ class InputArguments:
 
 class Renamer:
 
-  def __init__(self, workdir_abspath=None, new_name_listing_file=None, should_be_ext=None):
-    self.confirmed_renames = False
+  def __init__(self, workdir_abspath=None, new_name_listing_file=None, should_be_ext=None, b_autoconfirm=False):
+    self.b_autoconfirm = b_autoconfirm
     self.workdir_abspath = workdir_abspath
-    self.current_filenames = []
     self.new_filenames = []
     self.n_renames = 0
-    # self.rename_pairs is a dynamic property that zips current_files with new_names "on-the-fly"
     self.new_name_listing_file = new_name_listing_file
     self.should_be_ext = should_be_ext
     self.treat_workdir_inputfilename_n_ext()
@@ -108,113 +112,33 @@ class Renamer:
         new_name = new_name.replace('/', '_')
       self.new_filenames.append(new_name)
 
-  def pick_up_n_set_current_filenames(self):
+  def form_new_filename(self, _filename, context):
     """
-    Returns folder files with the executing extension
+    The files (in alphabetical order, as listed by the rename engine) get the new names in the text file's order
     """
-    filenames = os.listdir(self.workdir_abspath)
-    self.current_filenames = list(filter(lambda e: e.endswith(self.should_be_ext), filenames))
-    self.current_filenames.sort()
-
-  def get_srcfile_abspath(self, srcfilename):
-    return os.path.join(self.workdir_abspath, srcfilename)
-
-  def get_trgfile_abspath(self, trgfilename):
-    return os.path.join(self.workdir_abspath, trgfilename)
-
-  @property
-  def rename_pairs(self):
-    """
-    Zips current_files with new_names "on-the-fly" returns a list of tuples representing the rename pairs
-
-    Zip Explanation:
-      Zip joins each element of one list to each element of another
-    Example:
-      list1 = [1, 2, 3]
-      list2 = [11, 22, 33]
-    list(zip(list1, list2)) results in:
-      [(1, 11), (2, 22), (3, 33)]
-    without function list() zip() returns an iterator-like object
-    """
-    n_curr_files = len(self.current_filenames)
     n_new_names = len(self.new_filenames)
-    if n_curr_files != n_new_names:
+    if context.total != n_new_names:
       errmsg = (f"Error: number of files to/from should be the same, but isn't: "
-                f"len(self.current_files={n_curr_files}) != len(self.new_names={n_new_names})")
+                f"{context.total} files with extension {self.should_be_ext} != {n_new_names} new names")
       raise ValueError(errmsg)
-    return list(zip(self.current_filenames, self.new_filenames))
+    return self.new_filenames[context.seq - 1]
 
-  def pick_up_n_set_current_and_new_filenames(self):
-    """
-    Picks up (so to say) the two lists new_names and current_files
-      for, in the sequence, calling function unite_elements_one_to_one(current_files, new_names)
-    """
+  def process(self):
     self.pick_up_n_set_new_filenames()
-    self.pick_up_n_set_current_filenames()
-
-  def confirm_renames(self):
-    self.confirmed_renames = False
-    if len(self.rename_pairs) == 0:
-      print('No renames')
-      return False
-    scrmsg = f"In directory: [{self.workdir_abspath}]"
-    print(scrmsg)
-    for i, tuple_to_rename in enumerate(self.rename_pairs):
-      seq = i + 1
-      current_name, new_name = tuple_to_rename
-      scrmsg = f"""{seq} => rename pair:
-        current_name=[{current_name}]
-        new_name=[{new_name}]"""
-      print(scrmsg)
-    ans = input('Rename them above ? (y/N) [ENTER] means Yes ')
-    if ans in ['y', 'Y', '']:
-      self.confirmed_renames = True
-    return self.confirmed_renames
-
-  def rename(self):
-    """
-    Finally, it does the renaming
-    """
-    if len(self.rename_pairs) == 0 or not self.confirmed_renames:
-      print('No files to rename')
-      return False
-    scrmsg = f"In directory: [{self.workdir_abspath}]"
-    print(scrmsg)
-    for i, tuple_to_rename in enumerate(self.rename_pairs):
-      seq = i + 1
-      srcfilename, trgfilename = tuple_to_rename
-      srcfile_abspath = self.get_srcfile_abspath(srcfilename)
-      trgfile_abspath = self.get_trgfile_abspath(trgfilename)
-      if not os.path.isfile(srcfile_abspath):
-        scrmsg = f"file {srcfile_abspath} does not exist. Continuing."
-        print(scrmsg)
-        continue
-      if os.path.isfile(trgfile_abspath):
-        scrmsg = f"file {srcfile_abspath} does exist, cannot rename pair. Continuing."
-        print(scrmsg)
-        continue
-      os.rename(srcfile_abspath, trgfile_abspath)
-      scrmsg = f"""{seq} => renamed pair:
-        srcfile_abspath=[{srcfilename}]
-        trgfile_abspath=[{trgfilename}]"""
-      print(scrmsg)
-      self.n_renames += 1
+    results = rneng.run_renames(
+      self.form_new_filename, self.workdir_abspath, self.should_be_ext, b_autoconfirm=self.b_autoconfirm,
+    )
+    self.n_renames = sum(len(result.done) for result in results)
     scrmsg = f"{self.n_renames} files were renamed."
     print(scrmsg)
-    return True
-
-  def process(self):
-    self.pick_up_n_set_current_and_new_filenames()
-    self.confirm_renames()
-    self.rename()
 
 
 def process():
   """
   This is the main process() function:
-    1) it finds out the two CLI parameters
-    1) it gets the rename pairs
-    3) it calls the rename() function with the rename pairs
+    1) it finds out the CLI parameters
+    2) it reads the new names
+    3) it hands the name transform to the rename engine (which lists, confirms, renames & journals)
   """
   print()
   args_obj = InputArguments()
@@ -233,7 +157,7 @@ def process():
     should_be_ext = args_obj.should_be_ext or None
   except AttributeError:
     pass
-  renamer = Renamer(workdir_abspath, new_name_listing_file, should_be_ext)
+  renamer = Renamer(workdir_abspath, new_name_listing_file, should_be_ext, args_obj.b_autoconfirm)
   renamer.process()
 
 
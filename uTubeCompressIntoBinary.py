@@ -5,8 +5,19 @@ This script compresses the txt file that keeps ytids.
   The idea is to take the whole text, derive the ytid and
   leave only the ytid in text.
 
+  With -b, the ytids go into a real binary file instead:
+    each z_ls-R_contents-*.txt gets a sibling z_ls-R_contents-*.ytidset
+    (9 bytes per ytid, sorted, with a bloom filter; the txt file is left untouched)
+    @see lblib/ytfunctions/ytid_binstore.py for the format and the YtidBinStore membership lookup
+
+  Usage:
+    $uTubeCompressIntoBinary.py [-b] [-t]
+      -b: write the binary .ytidset files (default: minimize the txt files in place)
+      -t: run the adhoc test
 '''
 import glob, os, sys
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+import lblib.ytfunctions.ytid_binstore as ytbs
 
 YT_FILE_EXTENSION_LIST = ['mp4', 'mp3']
 
@@ -37,10 +48,8 @@ def extractYtId(line):
     return None
 
   supposed_ytid = name[-11 :  ]
-  #supposed_ytid_list = list(supposed_ytid)
-  true_false_list = list(map(forbidden_chars_lambda, supposed_ytid))
-  # print (str(filtered))
-  if True in true_false_list:
+  # the ENC64 check is a compiled regexp (formerly a char-by-char map over FORBIDDEN_CHARS_LIST)
+  if not ytstrfs.is_str_a_ytid(supposed_ytid):
     return None
 
   if supposed_ytid == supposed_ytid.upper():
@@ -100,6 +109,33 @@ class FileSizeMinimizer:
       outfile.close()
       print ('Written ' + str(nOfYtIds) + ' ytids.')
 
+class BinaryCompressor:
+  '''
+  Writes, for each input txt file, its ytids (extracted as FileSizeMinimizer does) into a .ytidset binary file
+  '''
+
+  def __init__(self, inputFiles=[]):
+    if len(inputFiles) == 0:
+      self.inputFiles = glob.glob('z_ls-R_contents-*.txt')
+    else:
+      self.inputFiles = list(inputFiles)
+    self.process()
+
+  def process(self):
+    for i, inputFile in enumerate(self.inputFiles):
+      seqInputFile = i + 1
+      print (str(seqInputFile) + ' Processing ' + inputFile)
+      with open(inputFile, encoding='utf-8', errors='replace') as f:
+        ytids = [ytid for ytid in map(extractYtId, f.read().split('\n')) if ytid is not None]
+      if len(ytids) == 0:
+        print (str(seqInputFile) + ' file:' + inputFile + ' does not have ytids.')
+        continue
+      binFile = os.path.splitext(inputFile)[0] + ytbs.BINSTORE_DOT_EXT
+      nOfYtIds = ytbs.write_ytidset(binFile, ytids)
+      txtSize, binSize = os.path.getsize(inputFile), os.path.getsize(binFile)
+      print ('Written ' + str(nOfYtIds) + ' ytids to ' + binFile + ' (' + str(binSize) + ' bytes against ' + str(txtSize) + ')')
+
+
 def adhoc_test():
   fs = []
   fn = 'blah 12345678901.mp4'
@@ -124,6 +160,9 @@ def process():
   if '-t' in sys.argv:
     adhoc_test()
     return
+  if '-b' in sys.argv:
+    BinaryCompressor()
+    return
   FileSizeMinimizer()
 
 if __name__ == '__main__':
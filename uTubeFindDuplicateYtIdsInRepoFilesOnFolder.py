@@ -3,18 +3,34 @@
 uTubeFindDuplicateIds.py
 This script reads the conventioned-named youtube-ids repository.
 Inside this textfile, this script looks for duplicate youtube-ids and, if found, prints them out.
+
+The repofiles ("z_ls-R_contents-<drive>.txt") are kept in a persisted inverted index
+  (ytid => repofile, line number & path, see lblib/ytfunctions/ytid_repoindex.py):
+  a run re-reads only the repofiles changed since the last one (in parallel) and the repeats
+  (within a repofile, ie a drive, as before; or, with --across, also across drives) are an index query
+
+Usage:
+  uTubeFindDuplicateYtIdsInRepoFilesOnFolder.py [-w=<workpath>] [-f=<ytid> ...] [-j=<n_workers>] [--force] [--across]
+
+Where:
+  -w=<workpath> [optional] the folder with the repofiles (default: AjustFolderPath.default_baseworkpath)
+  -f=<ytid> [optional, repeatable] instead of the repeats, shows which drives (and paths) hold the ytid
+  -j=<n_workers> [optional] the number of processes reading repofiles (default: the cpu count)
+  --force [optional] re-reads all repofiles even if unchanged
+  --across [optional] a ytid found in two (or more) repofiles is also a repeat (default: repeats within a repofile)
 """
 import math
 import os
 import random
 import string
 import sys
-import time
 import unittest
+import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytstrfs
+import lblib.ytfunctions.ytid_repoindex as ytrepoindex
 
 FILEPREFIX = 'z_ls-R_contents-'
 ENCODE64CHARS = string.digits + string.ascii_uppercase + string.ascii_lowercase + '_' + '-'
-ACCEPTABLE_EXTENSIONS = ['.mp3', '.mp4', 'webm']
+ACCEPTABLE_EXTENSIONS = ['.mp3', '.mp4', '.webm']
 
 
 def add_to_countingdict(pkey, pdict):
@@ -56,17 +72,13 @@ def return_encode64_or_none(supposed_ytid):
   except TypeError:
     # hypothesis 3 -> paramvalue is not a string-castable type
     return None
-  bool_list = map(lambda c: c in ENCODE64CHARS, supposed_ytid)
-  if False in bool_list:
-    # hypothesis 4 -> paramvalue has one or more non-ENCODE64 characters
+  if not ytstrfs.is_str_a_ytid(supposed_ytid):
+    # hypothesis 4 -> paramvalue has one or more non-ENCODE64 characters (checked by a compiled regexp)
     return None
   # hypothesis 5 -> there should be at least a lowercase char
-  bool_list = map(lambda c: c in string.ascii_lowercase, supposed_ytid)
-  if True not in bool_list:
-    return None
   # hypothesis 6 -> there should be at least an uppercase char
-  bool_list = map(lambda c: c in string.ascii_uppercase, supposed_ytid)
-  if True not in bool_list:
+  # (as the chars are all ENC64 at this point, comparing against lower() & upper() covers the two above)
+  if supposed_ytid == supposed_ytid.upper() or supposed_ytid == supposed_ytid.lower():
     return None
   return supposed_ytid
 
@@ -127,72 +139,48 @@ class AjustFolderPath:
       raise OSError(error_msg)
     cls.workpath = workpath
     if cls._instance is None:
-      cls._instance = cls()
-      cls._instance.workpath = cls.workpath = workpath
+      cls._instance = cls(workpath)
+    cls._instance.workpath = workpath
 
 
 class RepoFilesReader:
   """
-  Because of possible memory large use, the ytid's will be looked up throughout TWO pass, ie:
-  1) the 1st pass is just to filter out the ytid's that repeat.
-  2) the 2nd pass will tabulate them ordered by ytid's themselves (instead of order of appearance)
+  The ytid's are looked up in the ytid repo index (lblib/ytfunctions/ytid_repoindex.py), ie:
+  1) the index is refreshed: only the repofiles new or changed (size or mtime) since the last run are
+     (re-)read, in parallel (n_workers processes), each one's postings merged into the index
+  2) the repeats (ytid's found more than once in one repofile or, if b_across_repofiles, also across drives)
+     come from an index query and are written, ordered by ytid, to the results file
   """
 
   REPEATS_OUTPUT_FILENAME = 'z-results-ytid-repeats.txt'
 
-  def __init__(self):
+  def __init__(self, n_workers=None, b_force_reindex=False, b_across_repofiles=False):
     self.REPEATS_OUTPUT_FILEPATH = None
     self.set_repeats_output_filepath()
+    self.n_workers = n_workers
+    self.b_force_reindex = b_force_reindex
+    self.b_across_repofiles = b_across_repofiles
     self.ytids_repeat_dict = {}
     self.ytids_paths_dict = {}
-    self.ytids_found = []
-    self.outfile = None
+    self.ytids_postings_dict = {}
 
   def set_repeats_output_filepath(self):
     workdirpath = AjustFolderPath.get_workpath()
     self.REPEATS_OUTPUT_FILEPATH = os.path.join(workdirpath, self.REPEATS_OUTPUT_FILENAME)
 
-  @staticmethod
-  def find_repofiles_on_folder():
-    workdirpath = AjustFolderPath.get_workpath()
-    files = os.listdir(workdirpath)
-    repofilenames = filter(lambda n: n.startswith(FILEPREFIX), files)
-    repofiles = []
-    for fn in repofilenames:
-      repofiles.append(os.path.join(workdirpath, fn))
-    return repofiles
-
-  def write_to_repeat_ytid_file(self, ytid, filename, previouspath):
-    if self.outfile is None:
-      outfilename = 'z-results-ytid-repeats.txt'
-      self.outfile = open(outfilename, 'w', encoding='utf8')
-    filepath = os.path.join(previouspath, filename)
-    outline = ytid + ' | ' + filepath + '\n'
-    self.n_repeat_ytids += 1
-    self.outfile.write(outline)
-
   def save_resultsfile_with_ytids_n_paths(self):
-    filepath = os.path.join(AjustFolderPath.get_workpath(), self.REPEATS_OUTPUT_FILENAME)
-    outfile = open(filepath, 'w', encoding='utf8')
+    outfile = open(self.REPEATS_OUTPUT_FILEPATH, 'w', encoding='utf8')
     print('Writing to file', self.REPEATS_OUTPUT_FILENAME)
     n_lines = 0
-    for ytid in self.ytids_paths_dict:
-      strlist = self.ytids_paths_dict[ytid]
-      for path in strlist:
-        outline = path
+    for ytid in self.ytids_postings_dict:
+      for posting in self.ytids_postings_dict[ytid]:
+        outline = ytid + ' | ' + posting.drive + ' | ' + posting.filepath
         outline = outline.rstrip(' \t\r\n') + '\n'  # only one \n should go with line
         n_lines += 1
         outfile.write(outline)
     print('Closing file', self.REPEATS_OUTPUT_FILENAME, 'with', n_lines)
     outfile.close()
 
-  def treat_ytid_in_the_2nd_pass(self, ytid, lineasfilename, previouspath):
-    if ytid not in self.ytids_repeat_dict:
-      return
-    lineasfilename = lineasfilename.lstrip(' \t').lstrip(' \t\r\n')
-    filepath = os.path.join(previouspath, lineasfilename)
-    add_to_strlistdict(ytid, filepath, self.ytids_paths_dict)
-
   def run_3rd_pass_interactive_del(self):
     n_deleted = 0
     for ytid in self.ytids_paths_dict:
@@ -222,90 +210,41 @@ class RepoFilesReader:
           pass
       print('n_deleted', n_deleted)
 
-  def run_2nd_pass(self, repofile):
-    print('Reading 2nd pass', repofile)
-    repofd = open(repofile)
-    line = repofd.readline()
-    previouspath = None
-    while line:
-      if line.startswith('./'):
-        previouspath = line.rstrip(' \t\r\n')
-        previouspath = previouspath.rstrip(':')
-      elif len(line) < 17:  # 11 (ytid) + 1 (dash) + 5|4 (.webm | .mp4) + 2|1 (short filename) = 19|17
-        pass
-      else:
-        ytid = self.extract_ytid_from_line_as_filename(line)
-        self.treat_ytid_in_the_2nd_pass(ytid, line, previouspath)
-      # reads next line and loop
-      line = repofd.readline()
-    repofd.close()
-
-  @staticmethod
-  def extract_ytid_from_line_as_filename(line):
-    filename = line.lstrip(' \t').rstrip(' \t\r\n')
-    name, ext = os.path.splitext(filename)
-    if ext not in ACCEPTABLE_EXTENSIONS:
-      return None
-    try:
-      ytid = find_a_possible_ytid_from_name(name)
-      return ytid
-    except IndexError:
-      pass
-    return None
-
   def print_histogram_ytid_repeats(self):
     for ytid in self.ytids_repeat_dict:
       print(ytid, ' | ', self.ytids_repeat_dict[ytid])
     print('Total:', len(self.ytids_repeat_dict))
 
-  def treat_ytid_in_the_1st_pass(self, ytid):
-    if ytid is None:
-      return
-    if ytid not in self.ytids_found:
-      self.ytids_found.append(ytid)
-    else:
-      add_to_countingdict(ytid, self.ytids_repeat_dict)
-      # self.write_to_repeat_ytid_file(ytid, filename, previouspath)
+  def refresh_index(self, index):
+    stats = index.refresh(AjustFolderPath.get_workpath(), b_force=self.b_force_reindex)
+    print(stats)
 
-  def run_1st_pass(self, repofile):
+  def find_ytids(self, ytids):
     """
-    The 1st pass discovers ytid's that repeat and, later in the 2nd pass, writes them with its paths in order
-    Details for deleting a large list at the end of the 1st run:
-      1) list self.ytids_found helps organize the self.ytids_repeat_dict in the first run
-      2) at the end of the 1st run, this list may be safely deleted to save some memory
-         (the garbage collector run is not guaranteed)
-
-    :return:
+    "Which drives hold ytid X?" straight from the index (refreshed first)
     """
-    print('Reading 1st pass', repofile)
-    repofd = open(repofile)
-    line = repofd.readline()
-    while line:
-      if line.startswith('./'):
-        pass
-      elif len(line) < 17:  # 11 (ytid) + 1 (dash) + 5|4 (.webm | .mp4) + 2|1 (short filename) = 19|17
-        pass
-      else:
-        ytid = self.extract_ytid_from_line_as_filename(line)
-        self.treat_ytid_in_the_1st_pass(ytid)
-      # reads next line and loop
-      line = repofd.readline()
-    repofd.close()
-    # the ytids_found is a large list, to save some memory, reattribute [] (empty list) to it
-    self.ytids_found = []
-
-  def process_repofile(self, repofile):
-    self.run_1st_pass(repofile)
+    with ytrepoindex.YtidRepoIndex(n_workers=self.n_workers) as index:
+      self.refresh_index(index)
+      postings_by_ytid = index.get_postings_for_ytids(ytids, AjustFolderPath.get_workpath())
+    for ytid in ytids:
+      postings = postings_by_ytid.get(ytid, [])
+      drives = sorted({posting.drive for posting in postings})
+      print(ytid, '| drives:', ', '.join(drives) if drives else '(none)')
+      for posting in postings:
+        print('  ', posting.drive, '| line', posting.lineno, '|', posting.filepath)
+
+  def process(self):
+    with ytrepoindex.YtidRepoIndex(n_workers=self.n_workers) as index:
+      self.refresh_index(index)
+      self.ytids_postings_dict = index.get_duplicates(AjustFolderPath.get_workpath(), self.b_across_repofiles)
+    for ytid, postings in self.ytids_postings_dict.items():
+      self.ytids_repeat_dict[ytid] = len(postings)
+      for posting in postings:
+        add_to_strlistdict(ytid, posting.filepath, self.ytids_paths_dict)
     # self.print_histogram_ytid_repeats()
-    self.run_2nd_pass(repofile)
     self.save_resultsfile_with_ytids_n_paths()
     # self.run_3rd_pass_interactive_del()
 
-  def process(self):
-    repofiles = self.find_repofiles_on_folder()
-    for repofile in repofiles:
-      self.process_repofile(repofile)
-
 
 def adhoc_test1():
   known_ytid = 'Ço-jk4kVtE8'
@@ -316,13 +255,40 @@ def adhoc_test1():
   print(list(bool_list))
 
 
+def get_args() -> dict:
+  args = {'workpath': None, 'ytids': [], 'n_workers': None, 'b_force_reindex': False, 'b_across_repofiles': False}
+  for arg in sys.argv[1:]:
+    if arg in ['-h', '--help']:
+      print(__doc__)
+      sys.exit(0)
+    elif arg.startswith('-w='):
+      args['workpath'] = arg[len('-w='):]
+    elif arg.startswith('-f='):
+      args['ytids'].append(arg[len('-f='):])
+    elif arg.startswith('-j='):
+      args['n_workers'] = int(arg[len('-j='):])
+    elif arg == '--force':
+      args['b_force_reindex'] = True
+    elif arg == '--across':
+      args['b_across_repofiles'] = True
+  return args
+
+
 def process():
   """
   adhoctest1()
 
   :return:
   """
-  reporeader = RepoFilesReader()
+  args = get_args()
+  if args['workpath'] is not None:
+    AjustFolderPath.set_workpath(args['workpath'])
+  reporeader = RepoFilesReader(
+    n_workers=args['n_workers'], b_force_reindex=args['b_force_reindex'], b_across_repofiles=args['b_across_repofiles']
+  )
+  if args['ytids']:
+    reporeader.find_ytids(args['ytids'])
+    return
   reporeader.process()
 
 
@@ -19,6 +19,8 @@ Obs: this print-out result may be redirected (with the ">" symbol) to a shell-sc
 import os
 import string
 import sys
+import lblib.collections.setalgebra as setalg
+import lblib.ytfunctions.ytid_catalog as ytcat
 
 YOUTUBEDL_TXT_FILENAME = 'youtube-ids.txt'
 ACCEPTED_EXTENSIONS = ['.m4a', '.mp4', '.webm']
@@ -51,17 +53,13 @@ def get_ytid(filename):
 
 
 def grab_existing_folders_ytids():
-  ytids = []
-  entries = os.listdir('.')
-  # pick up filenames that have a 'accepted extension'
-  entries = filter(lambda e : os.path.splitext(e)[1] in ACCEPTED_EXTENSIONS, entries)
-  for entry in entries:
-    ytid = get_ytid(entry)
-    if ytid is None:
-      continue
-    ytids.append(ytid)
-    # print('ytid', ytid, 'entry', entry)
-  return ytids
+  """
+  The ytids of the files (with an accepted extension) in the current folder
+    taken from the ytid catalog (lblib/ytfunctions/ytid_catalog.py), refreshed first for this folder,
+    ie, the folder is only listed again if its mtime changed since the last run
+  """
+  with ytcat.get_refreshed_catalog(os.path.abspath('.'), b_recursive=False) as catalog:
+    return catalog.get_ytids_under(os.path.abspath('.'), b_recursive=False, dot_exts=ACCEPTED_EXTENSIONS)
 
 
 def grab_txt_dldble_ytids():
@@ -77,11 +75,11 @@ def grab_txt_dldble_ytids():
 
 
 def take_difcomplement(dldble_ytids, existing_ytids):
-  new_dldble_ytids = []
-  for dldble in dldble_ytids:
-    if dldble not in existing_ytids:
-      new_dldble_ytids.append(dldble)
-  return new_dldble_ytids
+  """
+  The dldble ytids not yet in folder, in their [youtube-ids.txt] order and without repeats
+    (hash sets instead of the former list lookups, @see lblib/collections/setalgebra.py)
+  """
+  return setalg.compute_on_iterables(setalg.OP_DIFFERENCE, [dldble_ytids, existing_ytids], b_keep_order=True)
 
 def printout(dldble_ytids):
   for ext in comms_dict:
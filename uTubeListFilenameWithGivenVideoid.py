@@ -1,33 +1,34 @@
-#!/usr/bin/env python
+#!/usr/bin/env python3
 #-*-coding:utf-8-*-
 '''
 
-This script picks up all YouTube video ids on the local directory and downwards from it.
-The video ids that can be found are those that end a filename before its extension.
+This script lists the filename(s) on the local directory that have the given video id (or video id prefix).
+The video ids that can be found are those that end a filename before its extension
+  (or, in the yt-dlp convention, those in brackets before it).
+
+The lookup is done in the ytid catalog (lblib/ytfunctions/ytid_catalog.py),
+  refreshed first for the local directory (it's only listed again if its mtime changed).
 
 Created on 05/jul/2013
 
 @author: friend
 '''
-import glob, os, sys
-from dlYouTubeMissingVideoIdsOnLocalDir import get_videoid_from_filename        
+import os, sys
+import lblib.ytfunctions.ytid_catalog as ytcat
 
 def verify_local_folder(p_videoid):
-  #current_folder_abspath = os.path.abspath('.')
-  folder_contents = glob.glob('*')
-  #allfiles = []
-  for content in folder_contents:
-    if not os.path.isfile(content):
-      continue
-    videoid = get_videoid_from_filename(content)
-    if videoid != None and videoid.startswith(p_videoid):
-      print 'Filename on folder:', content
+  current_folder_abspath = os.path.abspath('.')
+  with ytcat.get_refreshed_catalog(current_folder_abspath, b_recursive=False) as catalog:
+    entries = catalog.get_entries_under(current_folder_abspath, b_recursive=False)
+  for entry in entries:
+    if entry.ytid.startswith(p_videoid):
+      print('Filename on folder:', entry.filename)
       return
-  print 'Nothing found.'
+  print('Nothing found.')
 
 def process():
   p_videoid = sys.argv[1]
-  print 'Verifying videoid', p_videoid, 'existence on local folder'
+  print('Verifying videoid', p_videoid, 'existence on local folder')
   verify_local_folder(p_videoid)
           
 if __name__ == '__main__':
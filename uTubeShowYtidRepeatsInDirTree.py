@@ -3,8 +3,10 @@
 ~/bin/uTubeShowYtidRepeatsInDirTree.py
   Lists repeat ytids in a directory and also shows a ytid counting statistics.
 
-The DirTree functionality (which would show the counting for the whole directory tree)
-  has not yet been done. For the time being, it counts only the current or appointed directory.
+By default, it counts only the current or appointed directory;
+  with --dirtree, it counts the whole directory tree below it.
+  In both cases, the ytids come from the ytid catalog (lblib/ytfunctions/ytid_catalog.py),
+  which is refreshed first, ie, only the directories whose mtime changed are listed again.
 
 The first application (a kind of extended one) of this script was to help find
   the differences of mp3's derived from mp4's in two directories.
@@ -15,11 +17,14 @@ import argparse
 import os.path
 import sys
 import lblib.ytfunctions.yt_str_fs_vids_sufix_lang_map_etc as ytfs  # ytfs.is_str_a_ytid()
+import lblib.ytfunctions.ytid_catalog as ytcat
 parser = argparse.ArgumentParser(description="Show ytid stats in a folder or dirtree.")
 parser.add_argument("--docstr", action="store_true",
                     help="show docstr help and exit")
 parser.add_argument("--dirpath", type=str,
                     help="Directory from which ytid stats will be gather")
+parser.add_argument("--dirtree", action="store_true",
+                    help="count the whole directory tree (default: only the directory itself)")
 args = parser.parse_args()
 
 
@@ -79,8 +84,9 @@ def is_filename_a_ytid_conventioned_one(filename):
 
 class YtidsInDirLookerUp:
 
-  def __init__(self, dir_abspath=None):
+  def __init__(self, dir_abspath=None, b_dirtree=False):
     self.dir_abspath = dir_abspath
+    self.b_dirtree = b_dirtree
     self.filenames = []
     self.n_files = 0
     self.ytid_n_filename_dict = {}
@@ -91,6 +97,7 @@ class YtidsInDirLookerUp:
   def treat_attrs(self):
     if self.dir_abspath is None or not os.path.isdir(self.dir_abspath):
       self.dir_abspath = os.path.abspath('.')
+    self.dir_abspath = os.path.abspath(self.dir_abspath)
 
   @property
   def n_ytid_files(self):
@@ -111,17 +118,16 @@ class YtidsInDirLookerUp:
     return n1 + n2
 
   def get_n_store_ytidfilenamesdict_in_dir(self):
-    entries = os.listdir(self.dir_abspath)
+    with ytcat.get_refreshed_catalog(self.dir_abspath, b_recursive=self.b_dirtree) as catalog:
+      entries = catalog.get_entries_under(self.dir_abspath, b_recursive=self.b_dirtree)
     for entry in entries:
-      # it's assumed a ytid-conventioned dirname is not there
-      _, ytid, _ = get_the_3_ytid_filename_pieces_or_nones(entry)
-      if ytid is None:
+      # in the dirtree case, the filename is shown relative to dir_abspath
+      filename = os.path.relpath(entry.filepath, self.dir_abspath)
+      if entry.ytid in self.ytid_n_filename_dict:
+        self.ytid_repeat_set.add(entry.ytid)
+        self.ytidrepeat_filenames.append(filename)
         continue
-      if ytid in self.ytid_n_filename_dict:
-        self.ytid_repeat_set.add(ytid)
-        self.ytidrepeat_filenames.append(entry)
-        continue
-      self.ytid_n_filename_dict[ytid] = entry
+      self.ytid_n_filename_dict[entry.ytid] = filename
 
   def process(self):
     print(f'Processing dir {self.dir_abspath}')
@@ -145,7 +151,7 @@ class YtidsInDirLookerUp:
 
 def get_args():
   dirpath = args.dirpath or "."
-  return dirpath
+  return dirpath, args.dirtree
 
 
 def adhoctest2():
@@ -188,8 +194,8 @@ def process():
 
   :return:
   """
-  dirpath = get_args()
-  looker = YtidsInDirLookerUp(dir_abspath=dirpath)
+  dirpath, b_dirtree = get_args()
+  looker = YtidsInDirLookerUp(dir_abspath=dirpath, b_dirtree=b_dirtree)
   looker.process()
   # looker.list_all_ytids()
 
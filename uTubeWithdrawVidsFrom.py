@@ -1,5 +1,4 @@
-#!/usr/bin/env python
-#-*-coding:utf-8-*-
+#!/usr/bin/env python3
 '''
 This script does 2 things:
 
@@ -19,43 +18,20 @@ Usage:
 
 '''
 import sys
-#import os, sys, time
-
-# import __init__
-# import  bin_local_settings as bls
-# sys.path.insert(0, bls.UTUBEAPP_PATH)
-
-#from shellclients import extractVideoidsFromATextFileMod as extract_script
-
-def get_vids_from_file(videoids_filename):
-  videoids = []
-  lines = open(videoids_filename, 'r').readlines()
-  for line in lines:
-    line = line.lstrip(' \t').rstrip(' \t\r\n')
-    if len(line) < 11:
-      continue
-    line = line[:11]
-    if line.find(' ') > -1:
-      continue
-    # act like a "set", ie, don't append repeats
-    if line not in videoids:
-      videoids.append(line)
-  # the non-repeat feature is done above, line below is not used due to 1) need to maintain the ordering; 2) probable performance worsening, but not measured,
-  # videoids = list(set(videoids))
-  return videoids
-
-def extract_diff_videoids_between_2_lists(base_videoids, takeout_videoids):
-  '''
-  Return the diff result
+import lblib.collections.setalgebra as setalg
 
-  3) filter the basefile videoid list against the takeout videoid list
 
-  '''
-  result_videoids = []
-  for videoid in base_videoids:
-    if videoid not in takeout_videoids:
-      result_videoids.append(videoid)
-  return result_videoids
+def iter_vids_from_file(videoids_filename):
+  with open(videoids_filename, 'r', encoding='utf-8', errors='replace') as f:
+    for line in f:
+      line = line.lstrip(' \t').rstrip(' \t\r\n')
+      if len(line) < 11:
+        continue
+      line = line[:11]
+      if line.find(' ') > -1:
+        continue
+      yield line
+
 
 def get_processed_videoids(videoids_filename, withdraw_videoids_filename=None):
   '''
@@ -64,16 +40,16 @@ def get_processed_videoids(videoids_filename, withdraw_videoids_filename=None):
   2) read files and get videoid lists
   3) filter the basefile videoid list against the takeout videoid list
   (...)
+  The repeats are taken out keeping the base file's order (a set-algebra "unique" or "difference",
+    in memory or, for files larger than RAM, by external sorted-merge, @see lblib/collections/setalgebra.py)
   '''
-  base_videoids = get_vids_from_file(videoids_filename)
+  filenames = [videoids_filename]
+  op = setalg.OP_UNIQUE
+  if withdraw_videoids_filename is not None:
+    filenames.append(withdraw_videoids_filename)
+    op = setalg.OP_DIFFERENCE
+  return setalg.compute(op, filenames, itemize=iter_vids_from_file, b_keep_order=True)
 
-  if withdraw_videoids_filename == None:
-    return base_videoids
-  takeout_videoids = get_vids_from_file(withdraw_videoids_filename)
-  if len(takeout_videoids) == 0:
-    return base_videoids
-  result_videoids = extract_diff_videoids_between_2_lists(base_videoids, takeout_videoids)
-  return result_videoids
 
 def get_base_and_withdraw_filenames():
   '''
@@ -87,7 +63,8 @@ def get_base_and_withdraw_filenames():
     withdraw_videoids_filename = sys.argv[2]
   except IndexError:
     pass
-  return  videoids_filename, withdraw_videoids_filename
+  return videoids_filename, withdraw_videoids_filename
+
 
 def process():
   '''
@@ -100,7 +77,8 @@ def process():
   videoids_filename, withdraw_videoids_filename = get_base_and_withdraw_filenames()
   result_videoids = get_processed_videoids(videoids_filename, withdraw_videoids_filename)
   for videoid in result_videoids:
-    print videoid
+    print(videoid)
+
 
 if __name__ == '__main__':
   process()
@@ -0,0 +1,119 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest.mock
+# the cli params module parses the command line when imported: the test runner's args are not for it
+sys.argv = sys.argv[:1]
+import dlYouTubeWhenThereAreDubbed2 as dl2
+import lblib.os.subprocrunner as sprun
+import lblib.ytfunctions.dldjournal as djr
+import unittest
+
+
+class FakeYtdlpDownloader(dl2.Downloader):
+  """
+  yt-dlp is replaced by writing the file it would have written (the format codes in failing_fcodes fail),
+    its filepath too if asked for (--print-to-file), and the date-prefixing scripts & the move by listing the working dir
+  """
+  canonical_filename = 'Title [abcABC123-_].mp4'
+
+  def __init__(self, *args, failing_fcodes=(), **kwargs):
+    super().__init__(*args, **kwargs)
+    self.failing_fcodes = set(failing_fcodes)
+    self.ran_fcodes = []
+    self.moved_filenames = None
+
+  def run_ytdlp_governed(self, argv) -> sprun.RunResult:
+    fcode = argv[argv.index('-f') + 1]
+    self.ran_fcodes.append(fcode)
+    result = sprun.RunResult(argv)
+    if fcode in self.failing_fcodes:
+      result.returncode, result.failure_kind = 1, sprun.FAILURE_FORMAT_NOT_AVAILABLE
+      return result
+    result.returncode, result.failure_kind = 0, sprun.FAILURE_NONE
+    workdir = self.osentry.workdir_abspath
+    if '+' in fcode:
+      # the merge takes the f-sufixed video-only part
+      fsufixedfilepath = os.path.join(workdir, 'Title [abcABC123-_].f160.mp4')
+      if os.path.exists(fsufixedfilepath):
+        os.remove(fsufixedfilepath)
+      content = fcode.encode()
+    else:
+      content = b'V' * 5000
+    with open(os.path.join(workdir, self.canonical_filename), 'wb') as f:
+      f.write(content)
+    if '--print-to-file' in argv:
+      with open(argv[argv.index('--print-to-file') + 2], 'a') as f:
+        f.write(os.path.join(workdir, self.canonical_filename) + '\n')
+    return result
+
+  def prefixdate_n_move_videos_to_parent_dir(self):
+    self.moved_filenames = sorted(fn for fn in os.listdir(self.osentry.workdir_abspath) if fn.endswith('.mp4'))
+
+
+class NoDubsFallbackTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.dlddirpath = tempfile.mkdtemp(prefix='unittest_dlYouTubeWhenThereAreDubbed2-')
+
+  def tearDown(self):
+    shutil.rmtree(self.dlddirpath)
+
+  def make_downloader(self):
+    return FakeYtdlpDownloader(
+      'abcABC123-_', dlddir_abspath=self.dlddirpath, sfx_n_2letlng_dict='0:en,1:pt', audiomainnumber=233,
+      failing_fcodes=['160+233-0', '160+233-1'],
+    )
+
+  def test_1_nodubs_composite_is_merged_n_moved(self):
+    downloader = self.make_downloader()
+    self.assertTrue(downloader.process())
+    self.assertEqual(['160', '160+233-0', '160+233'], downloader.ran_fcodes)
+    self.assertEqual(['vd1-un Title [abcABC123-_].mp4'], downloader.moved_filenames)
+    self.assertTrue(downloader.journal.has_stage(
+      'abcABC123-_', djr.STAGE_LANG_MERGED, '160+233', downloader.journal_runkey
+    ))
+    self.assertTrue(downloader.journal.has_stage('abcABC123-_', djr.STAGE_MOVED, runkey=downloader.journal_runkey))
+
+  def test_2_a_rerun_does_not_redownload(self):
+    self.assertTrue(self.make_downloader().process())
+    downloader = self.make_downloader()
+    self.assertTrue(downloader.process())
+    self.assertEqual([], downloader.ran_fcodes)
+
+
+class DiscoveryTestCase(unittest.TestCase):
+
+  def setUp(self):
+    self.dlddirpath = tempfile.mkdtemp(prefix='unittest_dlYouTubeWhenThereAreDubbed2-')
+
+  def tearDown(self):
+    shutil.rmtree(self.dlddirpath)
+
+  def test_1_reported_filename_needs_no_rescan(self):
+    downloader = FakeYtdlpDownloader(
+      'abcABC123-_', dlddir_abspath=self.dlddirpath, sfx_n_2letlng_dict='0:en,1:pt', audiomainnumber=233
+    )
+    # another ytid's video already in the (shared) tmpdir is not taken
+    with open(os.path.join(downloader.osentry.workdir_abspath, 'Other [zyxZYX987_-].mp4'), 'wb') as f:
+      f.write(b'O')
+    self.assertTrue(downloader.download_video_only())
+    n_scans = downloader.osentry.snapshot.n_scans
+    downloader.discover_dldd_videofilename()
+    self.assertEqual(n_scans, downloader.osentry.snapshot.n_scans)
+    self.assertEqual(FakeYtdlpDownloader.canonical_filename, downloader.osentry.fn_as_name_ext)
+    self.assertFalse(os.path.exists(downloader.dldname_filepath))
+
+  def test_2_no_prompt_in_the_jobs_mode(self):
+    downloader = FakeYtdlpDownloader(
+      'abcABC123-_', dlddir_abspath=self.dlddirpath, sfx_n_2letlng_dict='0:en,1:pt', audiomainnumber=233,
+      b_interactive=False,
+    )
+    # nothing was downloaded: the filename cannot be discovered, and input() must not be called
+    with unittest.mock.patch('builtins.input', side_effect=AssertionError('the user was prompted')):
+      with self.assertRaises(OSError):
+        downloader.discover_dldd_videofilename()
+    record = downloader.journal.get_last_record_or_none('abcABC123-_', djr.STAGE_FAILED)
+    self.assertIsNotNone(record)
+    self.assertIn('not found', record['reason'])
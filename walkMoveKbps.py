@@ -1,14 +1,21 @@
-#!/usr/bin/env python
-import glob, os #, shutil, sys
+#!/usr/bin/env python3
+"""
+~/bin/walkMoveKbps.py
+  Walks the dirtree (from the current folder) and, in each folder, moves the files named "name.<kbps>.ext"
+    into a subfolder named "<foldername> <kbps>" (created if needed)
+  A file already in a folder whose name has its kbps is left where it is.
+
+  The walk is done by lblib/os/treescanner.py (os.scandir, no chdir into each folder).
+"""
+import os
+import lblib.os.treescanner as tscan
 
 startingDir = os.path.abspath('.')
-for entry, folders, files in os.walk(startingDir):
-    absEntry = os.path.abspath(entry)
-    folderEntered = absEntry.split('/')[-1]
-    print '>>> Entering', folderEntered
-    os.chdir(absEntry)
+for record in tscan.TreeScanner(startingDir).scan():
+    folderEntered = record.dirname
+    print('>>> Entering', folderEntered)
     kbpsList = []
-    for fil in files:
+    for fil in record.filenames:
         pp = fil.split('.')
         if len(pp) > 2:
             kbps = pp[-2]
@@ -20,10 +27,13 @@ for entry, folders, files in os.walk(startingDir):
                 kbpsList.append(kbps)
     for kbps in kbpsList:
         folderName = folderEntered + ' ' + kbps
-        if not os.path.isdir(folderName):
-            print 'making dir', folderName
-            os.mkdir(folderName)
-        globPatt = '*.' + kbps + '.*'
-        comm = 'mv ' + ' ' + globPatt + ' "./' + folderName + '"'
-        print comm
-        os.system(comm)
+        folderPath = os.path.join(record.dirpath, folderName)
+        if not os.path.isdir(folderPath):
+            print('making dir', folderName)
+            os.mkdir(folderPath)
+        # the former shell's glob "*.<kbps>.*"
+        kbpsMark = '.' + kbps + '.'
+        for fil in record.filenames:
+            if kbpsMark in fil[1:]:
+                print('mv', fil, '"./' + folderName + '"')
+                os.rename(os.path.join(record.dirpath, fil), os.path.join(folderPath, fil))
@@ -1,10 +1,18 @@
-#!/usr/bin/env python
-import glob, os, shutil, sys
+#!/usr/bin/env python3
+"""
+~/bin/walkPyLame.py <kbps>
+  Walks the dirtree (from the current folder) running "pylame.py <kbps>" in each folder
+    (pylame.py runs with the folder as its cwd; this process's cwd is never changed)
+  The walk is done by lblib/os/treescanner.py (os.scandir).
+"""
+import os
+import subprocess
+import sys
+import lblib.os.treescanner as tscan
 
 kbps = int(sys.argv[1])
 
 startingDir = os.path.abspath('.')
-for entry, folders, files in os.walk(startingDir):
-    os.chdir(entry)
-    print 'entry', entry
-    os.system('pylame.py ' + str(kbps))
+for entry, folders, files in tscan.walk(startingDir):
+    print('entry', entry)
+    subprocess.run(['pylame.py', str(kbps)], cwd=entry)